@@ -13,32 +13,65 @@ implementations:
 GYM-39 additions (Mini App dashboard):
 - get_activity     — daily set counts for a date range, sargable on idx_training_user_date
 - get_summary      — 4 headline metrics (exercises, sets, prs, current_streak)
-- get_exercise_progress — per-set weight/reps series for ECharts
+- get_exercise_progress — per-set weight/reps series for ECharts (optionally
+  bucketed by ``resolution`` and LTTB-downsampled to ``max_points``)
 
 GYM-56:
 - current_streak changed from consecutive days to consecutive Monday-start weeks (UTC).
 
+Read replica:
+- Every endpoint here is a read and takes ``get_read_db_for_principal``: with
+  ``DB_REPLICA_HOST`` set it runs on the streaming replica unless the caller
+  wrote within ``DB_REPLICA_STICKY_SECONDS`` (``app.core.read_routing``).
+
+Dashboard bootstrap:
+- get_dashboard — summary, activity, week-compare, top-muscles and
+  recent-exercises in one response: one session, one pipelined cache read.
+
 GYM-58:
 - Optional ``tz`` query param (IANA timezone name) added to get_activity, get_summary,
   get_activity.  When provided, day/week boundaries follow the user's local wall-clock
   via ``AT TIME ZONE 'UTC' AT TIME ZONE :tz`` applied only in SELECT/GROUP BY/ORDER BY
   (never in WHERE — keeps queries sargable).  Cache keys include tz to prevent collisions.
+
+Write-time local days (``app.services.local_date``):
+- activity, the streak's week list and the week-compare buckets group by the
+  trigger-maintained ``training.local_date`` instead when the requested tz is
+  the one the user's rows were backfilled for (``use_local_date``); the WHERE
+  clauses and results are unchanged.
 """
 import logging
 from collections import defaultdict
 from datetime import datetime, date, timedelta, timezone
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, Optional
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, text
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.core.cache import cache_get, cache_set, make_key
-from app.core.database import get_db_for_principal
+from app.core.cache import (
+    _CACHE_TTL,
+    cache_get_many_raw,
+    cache_get_or_compute,
+    cache_get_raw,
+    cache_set,
+    cache_set_many,
+    make_key,
+)
+from app.core.cache_codec import dumps_json
+from app.core.cache_refresh import register_refresher
+from app.core.config import get_settings
+from app.core.database import get_read_db_for_principal
+from app.core.query_registry import register_query
 from app.middleware.permissions import Principal, get_principal
 from app.models import models
 from app.schemas import schemas
+from app.services.analytics_snapshot import load_snapshot
+from app.services.downsample import lttb
+from app.services.local_date import use_local_date
 from app.services.resolve import resolve_exercise_id as _shared_resolve_exercise_id
 from app.services.resolve import resolve_muscle_id as _shared_resolve_muscle_id
 
@@ -50,6 +83,44 @@ router = APIRouter()
 _MAX_ACTIVITY_DAYS = 400
 
 
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def _response_ready(response_type: Any, value: Any) -> Any:
+    """Return ``value`` as FastAPI serializes it for ``response_model=response_type``.
+
+    Cached analytics entries are stored in this form, so a hit is sent as its
+    raw JSON bytes (``_cached_response``): the payload is validated once when
+    it is computed, never per hit.
+
+    Args:
+        response_type: The endpoint's ``response_model``.
+        value: Model instance(s) or plain dicts matching it.
+
+    Returns:
+        JSON-compatible dicts / lists (dates as ISO strings).
+    """
+    adapter = _adapter(response_type)
+    return adapter.dump_python(adapter.validate_python(value), mode="json")
+
+
+def _cached_response(body: bytes) -> Response:
+    """Send a response-ready cache entry as-is (no pydantic round trip)."""
+    return Response(content=body, media_type="application/json")
+
+
+def _snapshot_engine() -> bool:
+    """True when history-wide analytics slice the per-user snapshot.
+
+    ``ANALYTICS_ENGINE=snapshot`` (``app.services.analytics_snapshot``):
+    summary, week-compare and exercise-trend read one cached columnar load of
+    the user's history instead of running their own queries.
+    """
+    return get_settings().ANALYTICS_ENGINE == "snapshot"
+
+
 def _validate_tz(tz: Optional[str]) -> Optional[ZoneInfo]:
     """Validate and return a ZoneInfo for the given IANA timezone name.
 
@@ -84,7 +155,7 @@ def get_completed_sets(
     exercise: str,
     date: date,
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.CompletedSets:
     """Return set numbers already recorded for an exercise on a given date.
 
@@ -129,7 +200,7 @@ def get_training_history(
     muscle: str,
     exercise: str,
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> List[schemas.TrainingHistoryEntry]:
     """Return training history for an exercise, excluding today.
 
@@ -183,7 +254,7 @@ def get_personal_record(
     muscle: str,
     exercise: str,
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> Optional[schemas.PersonalRecord]:
     """Return the personal record (max weight) for an exercise.
 
@@ -237,7 +308,7 @@ def get_max_reps_for_weight(
     exercise: str,
     weight: float,
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.MaxReps:
     """Return the maximum reps ever performed at a given weight.
 
@@ -280,7 +351,7 @@ def get_top_exercises(
     muscle: str,
     limit: int = Query(default=5, ge=1, le=200),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> List[schemas.TopExercise]:
     """Return the most frequently used exercises for a muscle.
 
@@ -325,6 +396,49 @@ def get_top_exercises(
     return [schemas.TopExercise(name=r[0], frequency=r[1]) for r in rows]
 
 
+# Skip scan: the recursive CTE walks the user's distinct exercise_ids one
+# index probe at a time (``exercise_id > previous ... LIMIT 1``), the LATERAL
+# takes each one's latest row off idx_training_user_exercise_date, and only
+# those rows are joined and ordered.  Reads O(exercises) index entries
+# instead of the user's whole history (DISTINCT ON over every set).
+# Reason: max_cost — the planner prices a recursive CTE at ~10 worktable rows
+# per step whatever the data, which lands well above the default ceiling even
+# though every probe is a one-entry index read; the Seq Scan rule still holds.
+_RECENT_EXERCISES_SQL = register_query("analytics.recent_exercises", """
+    WITH RECURSIVE exercise_ids AS (
+        (SELECT exercise_id FROM training
+         WHERE user_id = :uid
+         ORDER BY exercise_id
+         LIMIT 1)
+        UNION ALL
+        SELECT (SELECT t.exercise_id FROM training t
+                WHERE t.user_id = :uid AND t.exercise_id > x.exercise_id
+                ORDER BY t.exercise_id
+                LIMIT 1)
+        FROM exercise_ids x
+        WHERE x.exercise_id IS NOT NULL
+    )
+    SELECT
+        m.name          AS muscle_name,
+        e.name          AS exercise_name,
+        last.weight_c   AS last_weight_c,
+        last.reps       AS last_reps,
+        last.date::date AS last_date
+    FROM exercise_ids x
+    CROSS JOIN LATERAL (
+        SELECT t.muscle_id, t.weight_c, t.reps, t.date
+        FROM training t
+        WHERE t.user_id = :uid AND t.exercise_id = x.exercise_id
+        ORDER BY t.date DESC
+        LIMIT 1
+    ) last
+    JOIN exercises e ON e.id = x.exercise_id
+    JOIN muscles   m ON m.id = last.muscle_id
+    ORDER BY last_date DESC
+    LIMIT :lim
+""", max_cost=50_000, prepare=True)
+
+
 @router.get(
     "/analytics/recent-exercises",
     response_model=List[schemas.RecentExercise],
@@ -333,24 +447,24 @@ def get_top_exercises(
 def get_recent_exercises(
     limit: int = Query(default=8, ge=1, le=50),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> List[schemas.RecentExercise]:
     """Return the caller's most-recently-trained distinct exercises, newest first.
 
-    Per exercise_id, picks the row with the latest ``date`` (DISTINCT ON) to
-    obtain the last set's ``weight`` and ``reps``.  Those per-exercise snapshots
-    are then ordered by ``last_date DESC LIMIT :limit`` so the result reads
+    Per exercise_id, picks the row with the latest ``date`` to obtain the last
+    set's ``weight_c`` and ``reps``.  Those per-exercise snapshots are then
+    ordered by ``last_date DESC LIMIT :limit`` so the result reads
     newest-trained first.
 
-    Query is sargable: the ``WHERE user_id = :uid`` predicate uses
-    ``idx_training_user_exercise`` or ``idx_training_user_date`` (GYM-59);
-    ``DISTINCT ON (exercise_id) … ORDER BY exercise_id, date DESC`` lets
-    Postgres satisfy the per-exercise latest-row requirement without a
-    full-scan subquery.
+    Query is sargable: the distinct exercise ids come from a recursive skip
+    scan and each one's latest row from a one-entry index-only read of
+    ``idx_training_user_exercise_date (user_id, exercise_id, date DESC)
+    INCLUDE (muscle_id, set, weight_c, reps)``, so the cost follows the
+    number of exercises, not the length of the history.
 
     Result is cached under ``analytics:{user_id}:recent-exercises:{limit}``
-    (90 s TTL).  Training-mutation invalidation clears ``analytics:{uid}:*``
-    (GYM-47), so stale entries are evicted on any write.
+    (90 s TTL).  Every training write replaces the entry through the
+    write-behind refresh (``app.core.cache_refresh``).
 
     Args:
         limit: Maximum exercises to return (1–50, default 8).
@@ -362,59 +476,58 @@ def get_recent_exercises(
     """
     uid = principal["user_id"]
     cache_key = make_key(uid, "recent-exercises", limit=limit)
-    cached = cache_get(cache_key)
+    cached = cache_get_raw(cache_key)
     if cached is not None:
-        return [schemas.RecentExercise(**item) for item in cached]
+        return _cached_response(cached)
+    result = _compute_recent_exercises(db, uid, limit)
+    cache_set(cache_key, result, refresh={"limit": limit})
+    return result
 
-    # DISTINCT ON picks the latest row per exercise_id; the outer query
-    # re-orders by date desc and limits.  Both predicates (user_id) keep
-    # Postgres using the composite index rather than a seq-scan.
+
+def _compute_recent_exercises(db: Session, uid: int, limit: int) -> List[Dict[str, object]]:
+    """Run the recent-exercises query; returns the response-ready row dicts.
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+        limit: Maximum exercises to return.
+
+    Returns:
+        One dict per exercise (``last_date`` as an ISO string), newest first.
+    """
+    # Skip scan + LATERAL latest row per exercise: see the comment above
+    # _RECENT_EXERCISES_SQL.
     rows = db.execute(
-        text("""
-            SELECT muscle_name, exercise_name, last_weight, last_reps, last_date
-            FROM (
-                SELECT DISTINCT ON (t.exercise_id)
-                    m.name  AS muscle_name,
-                    e.name  AS exercise_name,
-                    t.weight AS last_weight,
-                    t.reps   AS last_reps,
-                    t.date::date AS last_date
-                FROM training t
-                JOIN exercises e ON e.id = t.exercise_id
-                JOIN muscles   m ON m.id = t.muscle_id
-                WHERE t.user_id = :uid
-                ORDER BY t.exercise_id, t.date DESC
-            ) latest
-            ORDER BY last_date DESC
-            LIMIT :lim
-        """),
+        _RECENT_EXERCISES_SQL,
         {"uid": uid, "lim": limit},
     ).fetchall()
 
-    result = [
-        schemas.RecentExercise(
-            muscle_name=r[0],
-            exercise_name=r[1],
-            last_weight=float(r[2]),
-            last_reps=float(r[3]),
-            last_date=r[4] if isinstance(r[4], date) else date.fromisoformat(str(r[4])),
-        )
+    return _response_ready(List[schemas.RecentExercise], [
+        {
+            "muscle_name": r[0],
+            "exercise_name": r[1],
+            "last_weight": r[2] / 100,
+            "last_reps": float(r[3]),
+            "last_date": str(r[4] if isinstance(r[4], date) else date.fromisoformat(str(r[4]))),
+        }
         for r in rows
-    ]
-    cache_set(
-        cache_key,
-        [
-            {
-                "muscle_name": item.muscle_name,
-                "exercise_name": item.exercise_name,
-                "last_weight": item.last_weight,
-                "last_reps": item.last_reps,
-                "last_date": str(item.last_date),
-            }
-            for item in result
-        ],
-    )
-    return result
+    ])
+
+
+register_refresher(
+    "recent-exercises",
+    lambda db, uid, params: _compute_recent_exercises(db, uid, params["limit"]),
+)
+
+
+_TOP_MUSCLES_SQL = register_query("analytics.top_muscles", """
+    SELECT m.name, COUNT(*) AS frequency
+    FROM training t
+    JOIN muscles m ON m.id = t.muscle_id
+    WHERE t.user_id = :uid
+    GROUP BY m.name
+    ORDER BY frequency DESC, m.name ASC
+""")
 
 
 @router.get(
@@ -424,7 +537,7 @@ def get_recent_exercises(
 )
 def get_top_muscles(
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> List[schemas.TopMuscle]:
     """Return muscles the caller has trained, ranked by training frequency.
 
@@ -435,8 +548,8 @@ def get_top_muscles(
     ``idx_training_user_muscle (user_id, muscle_id)`` added in GYM-59's
     migration 0003, so Postgres performs an index scan, not a sequential scan.
 
-    Result is cached under ``analytics:{user_id}:top-muscles:`` (90 s TTL).
-    Cache invalidation on training writes is already wired (GYM-47).
+    Result is cached under ``analytics:{user_id}:top-muscles:`` (90 s TTL)
+    and recomputed by the write-behind refresh after every training write.
 
     Args:
         principal: Resolved identity from ``get_principal``.
@@ -447,25 +560,24 @@ def get_top_muscles(
     """
     uid = principal["user_id"]
     cache_key = make_key(uid, "top-muscles")
-    cached = cache_get(cache_key)
+    cached = cache_get_raw(cache_key)
     if cached is not None:
-        return [schemas.TopMuscle(**item) for item in cached]
+        return _cached_response(cached)
+    result = _compute_top_muscles(db, uid)
+    cache_set(cache_key, result, refresh={})
+    return result
+
 
+def _compute_top_muscles(db: Session, uid: int) -> List[Dict[str, object]]:
+    """Run the top-muscles query; returns the response-ready ``[{name, frequency}]``."""
     rows = db.execute(
-        text("""
-            SELECT m.name, COUNT(*) AS frequency
-            FROM training t
-            JOIN muscles m ON m.id = t.muscle_id
-            WHERE t.user_id = :uid
-            GROUP BY m.name
-            ORDER BY frequency DESC, m.name ASC
-        """),
+        _TOP_MUSCLES_SQL,
         {"uid": uid},
     ).fetchall()
+    return _response_ready(List[schemas.TopMuscle], [{"name": r[0], "frequency": r[1]} for r in rows])
 
-    result = [schemas.TopMuscle(name=r[0], frequency=r[1]) for r in rows]
-    cache_set(cache_key, [{"name": item.name, "frequency": item.frequency} for item in result])
-    return result
+
+register_refresher("top-muscles", lambda db, uid, params: _compute_top_muscles(db, uid))
 
 
 # ---------------------------------------------------------------------------
@@ -473,17 +585,104 @@ def get_top_muscles(
 # ---------------------------------------------------------------------------
 
 
+# One statement per day expression: the AT TIME ZONE transform appears only in
+# SELECT / GROUP BY / ORDER BY, never in WHERE (GYM-58).  ``.local`` groups by
+# the materialized ``local_date`` (``use_local_date``).
+_ACTIVITY_SQL_TEMPLATE = """
+    SELECT
+        {day_expr} AS day,
+        COUNT(*)    AS sets_count
+    FROM training
+    WHERE user_id = :uid
+      AND date >= :from_dt
+      AND date  < :to_exclusive
+    GROUP BY {day_expr}
+    ORDER BY {day_expr}
+"""
+_ACTIVITY_UTC_SQL = register_query(
+    "analytics.activity.utc",
+    _ACTIVITY_SQL_TEMPLATE.format(day_expr="DATE_TRUNC('day', date)"),
+)
+_ACTIVITY_TZ_SQL = register_query(
+    "analytics.activity.tz",
+    _ACTIVITY_SQL_TEMPLATE.format(
+        day_expr="DATE_TRUNC('day', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)"
+    ),
+)
+_ACTIVITY_LOCAL_SQL = register_query(
+    "analytics.activity.local",
+    _ACTIVITY_SQL_TEMPLATE.format(day_expr="local_date"),
+)
+
+
+def _compute_activity(
+    db: Session,
+    uid: int,
+    from_date: date,
+    to_date: date,
+    tz: Optional[str],
+) -> List[Dict[str, object]]:
+    """Run the activity query; returns the response-ready ``[{date, sets_count}]`` rows.
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+        from_date: Inclusive start date.
+        to_date: Inclusive end date (range already validated).
+        tz: Validated IANA timezone name, or ``None`` for UTC.
+
+    Returns:
+        One dict per active day, ordered by date ascending.
+    """
+    # Half-open range: [from_date 00:00:00, to_date+1day 00:00:00)
+    # Reason: idx_training_user_date is on (user_id, date); plain range predicates on
+    # `date` allow Postgres to use the index without a function scan.
+    # AT TIME ZONE appears only in GROUP BY / SELECT / ORDER BY, never in WHERE.
+    to_exclusive = datetime(to_date.year, to_date.month, to_date.day) + timedelta(days=1)
+    from_dt = datetime(from_date.year, from_date.month, from_date.day)
+
+    if use_local_date(db, uid, tz):
+        # Rows already carry their day in this zone: group by the plain column.
+        query_params: dict = {"uid": uid, "from_dt": from_dt, "to_exclusive": to_exclusive}
+        sql = _ACTIVITY_LOCAL_SQL
+    elif tz is None:
+        # UTC path — unchanged behaviour.
+        query_params = {"uid": uid, "from_dt": from_dt, "to_exclusive": to_exclusive}
+        sql = _ACTIVITY_UTC_SQL
+    else:
+        # Timezone-aware path: convert UTC timestamp to the user's local wall-clock
+        # before truncating.  The AT TIME ZONE transform stays out of WHERE.
+        # Reason: 'date AT TIME ZONE UTC AT TIME ZONE tz' first interprets the naive
+        # TIMESTAMP as UTC, then converts to tz, yielding the local-wall-clock value.
+        query_params = {
+            "uid": uid, "from_dt": from_dt, "to_exclusive": to_exclusive, "tz": tz
+        }
+        sql = _ACTIVITY_TZ_SQL
+
+    rows = db.execute(sql, query_params).fetchall()
+
+    # Build result — extract the calendar date from the truncated timestamp.
+    result = []
+    for r in rows:
+        day_ts = r[0]
+        day = day_ts.date() if hasattr(day_ts, "date") else day_ts
+        result.append({"date": str(day), "sets_count": r[1]})
+    return _response_ready(List[schemas.ActivityDay], result)
+
+
+
 @router.get(
     "/analytics/activity",
     response_model=List[schemas.ActivityDay],
     tags=["analytics"],
 )
 def get_activity(
+    background_tasks: BackgroundTasks,
     from_date: date = Query(..., alias="from"),
     to_date: date = Query(..., alias="to"),
     tz: Optional[str] = Query(default=None),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> List[schemas.ActivityDay]:
     """Return daily set counts for a date range (activity contribution grid).
 
@@ -516,7 +715,25 @@ def get_activity(
         HTTPException 422: If ``tz`` is not a valid IANA timezone name.
     """
     _validate_tz(tz)  # raises 422 on invalid tz
+    _validate_activity_range(from_date, to_date)
+
+    uid = principal["user_id"]
+    cache_key = _activity_key(uid, from_date, to_date, tz)
+    return _cached_response(cache_get_or_compute(
+        cache_key,
+        lambda: _compute_activity(db, uid, from_date, to_date, tz),
+        revalidate=background_tasks.add_task,
+        refresh={"frm": str(from_date), "to": str(to_date), "tz": tz},
+        raw=True,
+    ))
+
+
+def _validate_activity_range(from_date: date, to_date: date) -> None:
+    """Reject inverted or over-long activity ranges.
 
+    Raises:
+        HTTPException 400: If ``from`` > ``to`` or the range exceeds 400 days.
+    """
     if from_date > to_date:
         raise HTTPException(status_code=400, detail="'from' must be <= 'to'")
     span = (to_date - from_date).days + 1
@@ -526,66 +743,152 @@ def get_activity(
             detail=f"Date range too large ({span} days). Maximum is {_MAX_ACTIVITY_DAYS} days.",
         )
 
-    uid = principal["user_id"]
-    cache_key = make_key(uid, "activity", frm=str(from_date), to=str(to_date), tz=tz or "UTC")
-    cached = cache_get(cache_key)
-    if cached is not None:
-        return [schemas.ActivityDay(**item) for item in cached]
 
-    # Half-open range: [from_date 00:00:00, to_date+1day 00:00:00)
-    # Reason: idx_training_user_date is on (user_id, date); plain range predicates on
-    # `date` allow Postgres to use the index without a function scan.
-    # AT TIME ZONE appears only in GROUP BY / SELECT / ORDER BY, never in WHERE.
-    to_exclusive = datetime(to_date.year, to_date.month, to_date.day) + timedelta(days=1)
-    from_dt = datetime(from_date.year, from_date.month, from_date.day)
+def _activity_key(uid: int, from_date: date, to_date: date, tz: Optional[str]) -> str:
+    return make_key(uid, "activity", frm=str(from_date), to=str(to_date), tz=tz or "UTC")
 
-    if tz is None:
+
+register_refresher(
+    "activity",
+    lambda db, uid, params: _compute_activity(
+        db,
+        uid,
+        date.fromisoformat(params["frm"]),
+        date.fromisoformat(params["to"]),
+        params["tz"],
+    ),
+)
+
+
+_SUMMARY_AGG_SQL = register_query("analytics.summary.totals", """
+    SELECT
+        COUNT(DISTINCT exercise_id) AS exercises,
+        COUNT(*)                    AS sets
+    FROM training
+    WHERE user_id = :uid
+""")
+
+_SUMMARY_PRS_SQL = register_query("analytics.summary.prs", """
+    WITH windowed AS (
+        SELECT
+            weight_c,
+            max(weight_c) OVER (
+                PARTITION BY exercise_id
+                ORDER BY date, "set"
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS prev_max
+        FROM training
+        WHERE user_id = :uid
+    )
+    SELECT COUNT(*) FROM windowed
+    WHERE prev_max IS NULL OR weight_c > prev_max
+""")
+
+_SUMMARY_WEEKS_UTC_SQL = register_query("analytics.summary.weeks.utc", """
+    SELECT DATE_TRUNC('week', date)::date AS week_start
+    FROM training
+    WHERE user_id = :uid
+    GROUP BY DATE_TRUNC('week', date)
+    ORDER BY week_start DESC
+""")
+
+_SUMMARY_WEEKS_TZ_SQL = register_query("analytics.summary.weeks.tz", """
+    SELECT DATE_TRUNC('week', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date AS week_start
+    FROM training
+    WHERE user_id = :uid
+    GROUP BY DATE_TRUNC('week', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)
+    ORDER BY week_start DESC
+""")
+
+# Index-only on idx_training_user_local_date.  The explicit ::timestamp keeps
+# DATE_TRUNC off the timestamptz overload (session TimeZone independent).
+_SUMMARY_WEEKS_LOCAL_SQL = register_query("analytics.summary.weeks.local", """
+    SELECT DATE_TRUNC('week', local_date::timestamp)::date AS week_start
+    FROM training
+    WHERE user_id = :uid
+    GROUP BY DATE_TRUNC('week', local_date::timestamp)
+    ORDER BY week_start DESC
+""")
+
+
+def _compute_summary(db: Session, uid: int, tz: Optional[str]) -> schemas.AnalyticsSummary:
+    """Run the summary queries (see ``get_analytics_summary`` for the metrics).
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+        tz: Validated IANA timezone name, or ``None`` for UTC.
+
+    Returns:
+        The freshly computed ``AnalyticsSummary``.
+    """
+    if _snapshot_engine():
+        snapshot = load_snapshot(db, uid)
+        exercises, sets_total, prs = snapshot.totals()
+        today_ref = datetime.now(ZoneInfo(tz) if tz else timezone.utc).date()
+        return schemas.AnalyticsSummary(
+            exercises=exercises,
+            sets=sets_total,
+            prs=prs,
+            current_streak=_compute_streak_weeks(snapshot.active_weeks(tz), today_ref),
+        )
+
+    # Aggregate query for exercises and sets.
+    agg = db.execute(
+        _SUMMARY_AGG_SQL,
+        {"uid": uid},
+    ).fetchone()
+
+    exercises = int(agg[0]) if agg else 0
+    sets_total = int(agg[1]) if agg else 0
+
+    # PR event query: count rows where weight exceeds the running max for that
+    # (exercise_id) up to (but not including) the current row, ordered by date
+    # then set.  The first set for each exercise has prev_max IS NULL and always
+    # counts as a PR.
+    # Reason: uses a window function over the RLS-scoped training rows; no
+    # per-row subquery so it remains sargable — Postgres evaluates the window
+    # over the index-filtered partition without an additional sequential scan.
+    # The running max compares integer ``weight_c`` (0014), not numeric.
+    pr_row = db.execute(
+        _SUMMARY_PRS_SQL,
+        {"uid": uid},
+    ).fetchone()
+
+    prs = int(pr_row[0]) if pr_row else 0
+
+    # Streak (GYM-56 / GYM-58): bucket training rows into Monday-start ISO weeks
+    # and count consecutive weeks ending at the current week, each with >=1 session.
+    # When tz is provided, the AT TIME ZONE transform converts the naive UTC timestamp
+    # to the user's local wall-clock before truncating — the WHERE clause stays a plain
+    # user_id filter so Postgres uses idx_training_user_date; the transform appears only
+    # in GROUP BY / SELECT, keeping the predicate sargable.
+    if use_local_date(db, uid, tz):
+        # Materialized local days: same weeks, no per-row conversion.
+        today_ref = datetime.now(ZoneInfo(tz) if tz else timezone.utc).date()
+        week_sql = _SUMMARY_WEEKS_LOCAL_SQL
+        week_params: dict = {"uid": uid}
+    elif tz is None:
         # UTC path — unchanged behaviour.
-        query_params: dict = {"uid": uid, "from_dt": from_dt, "to_exclusive": to_exclusive}
-        day_expr = "DATE_TRUNC('day', date)"
-        sql = f"""
-            SELECT
-                {day_expr} AS day,
-                COUNT(*)    AS sets_count
-            FROM training
-            WHERE user_id = :uid
-              AND date >= :from_dt
-              AND date  < :to_exclusive
-            GROUP BY {day_expr}
-            ORDER BY {day_expr}
-        """
+        today_ref = datetime.now(timezone.utc).date()
+        week_sql = _SUMMARY_WEEKS_UTC_SQL
+        week_params = {"uid": uid}
     else:
-        # Timezone-aware path: convert UTC timestamp to the user's local wall-clock
-        # before truncating.  The AT TIME ZONE transform stays out of WHERE.
-        # Reason: 'date AT TIME ZONE UTC AT TIME ZONE tz' first interprets the naive
-        # TIMESTAMP as UTC, then converts to tz, yielding the local-wall-clock value.
-        query_params = {
-            "uid": uid, "from_dt": from_dt, "to_exclusive": to_exclusive, "tz": tz
-        }
-        day_expr = "DATE_TRUNC('day', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)"
-        sql = f"""
-            SELECT
-                {day_expr} AS day,
-                COUNT(*)    AS sets_count
-            FROM training
-            WHERE user_id = :uid
-              AND date >= :from_dt
-              AND date  < :to_exclusive
-            GROUP BY {day_expr}
-            ORDER BY {day_expr}
-        """
-
-    rows = db.execute(text(sql), query_params).fetchall()
+        # Timezone-aware path: current date in the user's timezone for the streak anchor.
+        tz_info = ZoneInfo(tz)
+        today_ref = datetime.now(tz_info).date()
+        week_sql = _SUMMARY_WEEKS_TZ_SQL
+        week_params = {"uid": uid, "tz": tz}
 
-    # Build result — extract the calendar date from the truncated timestamp.
-    result = []
-    for r in rows:
-        day_ts = r[0]
-        day = day_ts.date() if hasattr(day_ts, "date") else day_ts
-        result.append(schemas.ActivityDay(date=day, sets_count=r[1]))
+    active_weeks_rows = db.execute(week_sql, week_params).fetchall()
+    streak = _compute_streak_weeks([r[0] for r in active_weeks_rows], today_ref)
 
-    cache_set(cache_key, [{"date": str(item.date), "sets_count": item.sets_count} for item in result])
-    return result
+    return schemas.AnalyticsSummary(
+        exercises=exercises,
+        sets=sets_total,
+        prs=prs,
+        current_streak=streak,
+    )
 
 
 @router.get(
@@ -594,9 +897,10 @@ def get_activity(
     tags=["analytics"],
 )
 def get_analytics_summary(
+    background_tasks: BackgroundTasks,
     tz: Optional[str] = Query(default=None),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.AnalyticsSummary:
     """Return headline dashboard metrics for the caller.
 
@@ -640,94 +944,25 @@ def get_analytics_summary(
 
     uid = principal["user_id"]
     cache_key = make_key(uid, "summary", tz=tz or "UTC")
-    cached = cache_get(cache_key)
-    if cached is not None:
-        return schemas.AnalyticsSummary(**cached)
-
-    # Aggregate query for exercises and sets.
-    agg = db.execute(
-        text("""
-            SELECT
-                COUNT(DISTINCT exercise_id) AS exercises,
-                COUNT(*)                    AS sets
-            FROM training
-            WHERE user_id = :uid
-        """),
-        {"uid": uid},
-    ).fetchone()
-
-    exercises = int(agg[0]) if agg else 0
-    sets_total = int(agg[1]) if agg else 0
-
-    # PR event query: count rows where weight exceeds the running max for that
-    # (exercise_id) up to (but not including) the current row, ordered by date
-    # then set.  The first set for each exercise has prev_max IS NULL and always
-    # counts as a PR.
-    # Reason: uses a window function over the RLS-scoped training rows; no
-    # per-row subquery so it remains sargable — Postgres evaluates the window
-    # over the index-filtered partition without an additional sequential scan.
-    pr_row = db.execute(
-        text("""
-            WITH windowed AS (
-                SELECT
-                    weight,
-                    max(weight) OVER (
-                        PARTITION BY exercise_id
-                        ORDER BY date, "set"
-                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
-                    ) AS prev_max
-                FROM training
-                WHERE user_id = :uid
-            )
-            SELECT COUNT(*) FROM windowed
-            WHERE prev_max IS NULL OR weight > prev_max
-        """),
-        {"uid": uid},
-    ).fetchone()
-
-    prs = int(pr_row[0]) if pr_row else 0
-
-    # Streak (GYM-56 / GYM-58): bucket training rows into Monday-start ISO weeks
-    # and count consecutive weeks ending at the current week, each with >=1 session.
-    # When tz is provided, the AT TIME ZONE transform converts the naive UTC timestamp
-    # to the user's local wall-clock before truncating — the WHERE clause stays a plain
-    # user_id filter so Postgres uses idx_training_user_date; the transform appears only
-    # in GROUP BY / SELECT, keeping the predicate sargable.
-    if tz is None:
-        # UTC path — unchanged behaviour.
-        today_ref = datetime.now(timezone.utc).date()
-        week_sql = """
-            SELECT DATE_TRUNC('week', date)::date AS week_start
-            FROM training
-            WHERE user_id = :uid
-            GROUP BY DATE_TRUNC('week', date)
-            ORDER BY week_start DESC
-        """
-        week_params: dict = {"uid": uid}
-    else:
-        # Timezone-aware path: current date in the user's timezone for the streak anchor.
-        tz_info = ZoneInfo(tz)
-        today_ref = datetime.now(tz_info).date()
-        week_sql = """
-            SELECT DATE_TRUNC('week', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date AS week_start
-            FROM training
-            WHERE user_id = :uid
-            GROUP BY DATE_TRUNC('week', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)
-            ORDER BY week_start DESC
-        """
-        week_params = {"uid": uid, "tz": tz}
-
-    active_weeks_rows = db.execute(text(week_sql), week_params).fetchall()
-    streak = _compute_streak_weeks([r[0] for r in active_weeks_rows], today_ref)
-
-    result = schemas.AnalyticsSummary(
-        exercises=exercises,
-        sets=sets_total,
-        prs=prs,
-        current_streak=streak,
-    )
-    cache_set(cache_key, result.model_dump())
-    return result
+    # Single-flight on a miss: the dashboard's parallel requests share ONE
+    # recompute (app/core/cache.py).  The stale-while-revalidate refresh runs
+    # as a background task on this request's Session — FastAPI 0.104 (pinned)
+    # closes yield-dependencies only after background tasks finish.
+    return _cached_response(cache_get_or_compute(
+        cache_key,
+        lambda: _response_ready(schemas.AnalyticsSummary, _compute_summary(db, uid, tz)),
+        revalidate=background_tasks.add_task,
+        refresh={"tz": tz},
+        raw=True,
+    ))
+
+
+register_refresher(
+    "summary",
+    lambda db, uid, params: _response_ready(
+        schemas.AnalyticsSummary, _compute_summary(db, uid, params["tz"])
+    ),
+)
 
 
 def _monday_of_week(d: date) -> date:
@@ -800,6 +1035,37 @@ def _compute_streak_weeks(sorted_week_starts_desc: List[date], today: date) -> i
     return streak
 
 
+_EXERCISE_PROGRESS_SQL = register_query("analytics.exercise_progress", """
+    SELECT
+        set,
+        DATE(date)  AS day,
+        weight_c,
+        reps
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+    ORDER BY set ASC, date ASC
+""")
+
+# One point per (set, period): the period's top set — heaviest, then most
+# reps — dated at the period start (DATE_TRUNC weeks start on Monday, like
+# the GYM-56 streak weeks).  :resolution is 'day' | 'week' | 'month'.
+_EXERCISE_PROGRESS_BUCKETED_SQL = register_query("analytics.exercise_progress.bucketed", """
+    SELECT DISTINCT ON (set, day)
+        set,
+        DATE(DATE_TRUNC(:resolution, date)) AS day,
+        weight_c,
+        reps
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+    ORDER BY set ASC, day ASC, weight_c DESC, reps DESC
+""")
+
+# Upper bound for ``max_points`` — far beyond what a chart can show.
+_MAX_PROGRESS_POINTS = 5000
+
+
 @router.get(
     "/analytics/exercise-progress",
     response_model=schemas.ExerciseProgress,
@@ -808,8 +1074,10 @@ def _compute_streak_weeks(sorted_week_starts_desc: List[date], today: date) -> i
 def get_exercise_progress(
     muscle: str,
     exercise: str,
+    resolution: Optional[Literal["day", "week", "month"]] = Query(default=None),
+    max_points: Optional[int] = Query(default=None, ge=3, le=_MAX_PROGRESS_POINTS),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.ExerciseProgress:
     """Return per-set weight/reps progress series for an exercise.
 
@@ -820,9 +1088,18 @@ def get_exercise_progress(
 
     Returns ``{ series: [] }`` when the exercise has no training history.
 
+    Long histories are bounded server-side: ``resolution`` collapses each
+    series to one point per day / week / month (the period's top set, dated
+    at the period start) in SQL, and ``max_points`` then downsamples each
+    series with LTTB (``app.services.downsample``), keeping the points that
+    shape the line.  Both are part of the cache key and of the refresh params,
+    so every variant is cached and refreshed on its own.
+
     Args:
         muscle: Muscle group name (used for scoped exercise lookup).
         exercise: Exercise name.
+        resolution: ``day`` | ``week`` | ``month``; default None = every set.
+        max_points: Optional per-series point cap (3–5000); default None = no cap.
         principal: Resolved identity from ``get_principal``.
         db: SQLAlchemy session.
 
@@ -830,68 +1107,111 @@ def get_exercise_progress(
         ExerciseProgress with one ExerciseSetSeries per distinct set number.
     """
     uid = principal["user_id"]
-    cache_key = make_key(uid, "exercise_progress", muscle=muscle, exercise=exercise)
-    cached = cache_get(cache_key)
+    cache_key = make_key(
+        uid,
+        "exercise_progress",
+        muscle=muscle,
+        exercise=exercise,
+        resolution=resolution or "set",
+        max_points=max_points or 0,
+    )
+    cached = cache_get_raw(cache_key)
     if cached is not None:
-        return schemas.ExerciseProgress(**cached)
+        return _cached_response(cached)
 
     # GYM-106: resolve exercise_id via shared resolver (own-first, name_key-based).
     exercise_id = _shared_resolve_exercise_id(db, uid, muscle, exercise)
+    result = _compute_exercise_progress(db, uid, exercise_id, resolution, max_points)
+    cache_set(
+        cache_key,
+        result,
+        refresh={
+            "muscle": muscle,
+            "exercise": exercise,
+            "exercise_id": exercise_id,
+            "resolution": resolution,
+            "max_points": max_points,
+        },
+    )
+    return result
 
+
+def _compute_exercise_progress(
+    db: Session,
+    uid: int,
+    exercise_id: Optional[int],
+    resolution: Optional[str] = None,
+    max_points: Optional[int] = None,
+) -> Dict[str, object]:
+    """Build the response-ready per-set series (dates as ISO strings).
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+        exercise_id: Resolved exercise id; ``None`` yields ``{"series": []}``.
+        resolution: ``day`` | ``week`` | ``month`` bucket, or ``None`` for every set.
+        max_points: Optional LTTB cap per series (on date vs weight).
+
+    Returns:
+        ``{"series": [{"set", "points": [{"date", "weight", "reps"}]}]}``.
+    """
     if exercise_id is None:
-        empty = {"series": []}
-        cache_set(cache_key, empty)
-        return schemas.ExerciseProgress(series=[])
+        return {"series": []}
 
-    rows = db.execute(
-        text("""
-            SELECT
-                set,
-                DATE(date)  AS day,
-                weight,
-                reps
-            FROM training
-            WHERE user_id     = :uid
-              AND exercise_id = :eid
-            ORDER BY set ASC, date ASC
-        """),
-        {"uid": uid, "eid": exercise_id},
-    ).fetchall()
+    if resolution is None:
+        rows = db.execute(
+            _EXERCISE_PROGRESS_SQL,
+            {"uid": uid, "eid": exercise_id},
+        ).fetchall()
+    else:
+        rows = db.execute(
+            _EXERCISE_PROGRESS_BUCKETED_SQL,
+            {"uid": uid, "eid": exercise_id, "resolution": resolution},
+        ).fetchall()
 
     # Group by set number.
-    series_map: Dict[int, List[schemas.ExercisePoint]] = defaultdict(list)
+    series_map: Dict[int, List[tuple]] = defaultdict(list)
     for r in rows:
-        set_num = r[0]
         day_raw = r[1]
         day = day_raw if isinstance(day_raw, date) else date.fromisoformat(str(day_raw))
-        series_map[set_num].append(
-            schemas.ExercisePoint(date=day, weight=float(r[2]), reps=float(r[3]))
-        )
+        series_map[r[0]].append((day, r[2] / 100, float(r[3])))
 
-    series = [
-        schemas.ExerciseSetSeries(set=s, points=pts)
-        for s, pts in sorted(series_map.items())
-    ]
+    series = []
+    for set_num, points in sorted(series_map.items()):
+        if max_points is not None:
+            points = lttb(points, max_points, x=lambda p: p[0].toordinal(), y=lambda p: p[1])
+        series.append({
+            "set": set_num,
+            "points": [{"date": str(d), "weight": w, "reps": r} for d, w, r in points],
+        })
+    return _response_ready(schemas.ExerciseProgress, {"series": series})
 
-    result = schemas.ExerciseProgress(series=series)
 
-    # Serialize for cache — dates as ISO strings.
-    cache_set(
-        cache_key,
-        {
-            "series": [
-                {
-                    "set": s.set,
-                    "points": [
-                        {"date": str(p.date), "weight": p.weight, "reps": p.reps}
-                        for p in s.points
-                    ],
-                }
-                for s in series
-            ]
-        },
-    )
-    return result
+def _refresh_exercise_scoped(compute: Callable[..., Optional[object]]) -> Callable[..., Optional[object]]:
+    """Refresher for an exercise-scoped entry: re-resolve, then recompute.
+
+    The entry is skipped (``None``) when its names no longer resolve to the
+    exercise it was computed for — the next read resolves and caches afresh.
+    """
+
+    def refresher(db: Session, uid: int, params: Dict[str, object]):
+        exercise_id = _shared_resolve_exercise_id(db, uid, params["muscle"], params["exercise"])
+        if exercise_id != params.get("exercise_id"):
+            return None
+        return compute(db, uid, exercise_id, params)
+
+    return refresher
+
+
+register_refresher(
+    "exercise_progress",
+    # Reason: .get — entries cached before resolution/max_points carry neither.
+    _refresh_exercise_scoped(
+        lambda db, uid, eid, params: _compute_exercise_progress(
+            db, uid, eid, params.get("resolution"), params.get("max_points")
+        )
+    ),
+)
 
 
 # ---------------------------------------------------------------------------
@@ -930,6 +1250,19 @@ def _resolve_exercise_id(
     return _shared_resolve_exercise_id(db, uid or 0, muscle, exercise)
 
 
+# Prepared, but always custom-planned: a generic plan cannot see that
+# [:day_start, :day_end) is ONE day and costs ~2x the custom plan.
+_COMPLETED_SETS_SQL = register_query("analytics.log_context.completed_sets", """
+    SELECT DISTINCT "set"
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+      AND date >= :day_start
+      AND date  < :day_end
+    ORDER BY "set"
+""", prepare=True, plan_cache_mode="force_custom_plan")
+
+
 def _fetch_completed_sets(
     db: Session,
     uid: int,
@@ -951,15 +1284,7 @@ def _fetch_completed_sets(
         Sorted list of distinct set integers.
     """
     rows = db.execute(
-        text("""
-            SELECT DISTINCT "set"
-            FROM training
-            WHERE user_id     = :uid
-              AND exercise_id = :eid
-              AND date >= :day_start
-              AND date  < :day_end
-            ORDER BY "set"
-        """),
+        _COMPLETED_SETS_SQL,
         {
             "uid": uid,
             "eid": exercise_id,
@@ -970,6 +1295,27 @@ def _fetch_completed_sets(
     return [r[0] for r in rows]
 
 
+# Prepared, always custom-planned: the generic plan for the prior-day join
+# measures ~15 % slower than re-planning with the real :day_start.
+_LAST_SESSION_SETS_SQL = register_query("analytics.log_context.last_session_sets", """
+    WITH prior_day AS (
+        SELECT MAX(date::date) AS last_date
+        FROM training
+        WHERE user_id     = :uid
+          AND exercise_id = :eid
+          AND date < :day_start
+    )
+    SELECT t."set", t.weight_c, t.reps
+    FROM training t
+    JOIN prior_day pd
+      ON t.date >= pd.last_date
+     AND t.date  < pd.last_date + 1
+    WHERE t.user_id     = :uid
+      AND t.exercise_id = :eid
+    ORDER BY t."set"
+""", prepare=True, plan_cache_mode="force_custom_plan")
+
+
 def _fetch_last_session_sets(
     db: Session,
     uid: int,
@@ -979,12 +1325,12 @@ def _fetch_last_session_sets(
     """Return sets from the most recent session strictly before ``target_date``.
 
     Uses a CTE to find ``max(date::date)`` < target_date for (user, exercise),
-    then selects all rows on that day ordered by set.  Sargable: the WHERE
-    predicates on ``user_id`` and ``exercise_id`` use
-    ``idx_training_user_exercise (user_id, exercise_id)``; the date upper-bound
-    keeps an index-range scan.  ``date::date`` appears only in the subquery
-    GROUP BY, never in a top-level WHERE, so the outer filter stays a plain
-    range on the timestamp column.
+    then selects all rows on that day ordered by set.  Both steps are ranges
+    on ``idx_training_user_exercise_date (user_id, exercise_id, date DESC)
+    INCLUDE (set, weight_c, reps)``: the CTE reads the first entry below
+    ``day_start`` and the day's sets are joined as a half-open timestamp
+    range (``[last_date, last_date + 1)``), never ``date::date =``, so both
+    are index-only scans.
 
     Args:
         db: SQLAlchemy session.
@@ -998,28 +1344,24 @@ def _fetch_last_session_sets(
         prior session exists.
     """
     rows = db.execute(
-        text("""
-            WITH prior_day AS (
-                SELECT MAX(date::date) AS last_date
-                FROM training
-                WHERE user_id     = :uid
-                  AND exercise_id = :eid
-                  AND date < :day_start
-            )
-            SELECT t."set", t.weight, t.reps
-            FROM training t
-            JOIN prior_day pd ON t.date::date = pd.last_date
-            WHERE t.user_id     = :uid
-              AND t.exercise_id = :eid
-            ORDER BY t."set"
-        """),
+        _LAST_SESSION_SETS_SQL,
         {
             "uid": uid,
             "eid": exercise_id,
             "day_start": datetime.combine(target_date, datetime.min.time()),
         },
     ).fetchall()
-    return [schemas.LogSet(set=r[0], weight=float(r[1]), reps=float(r[2])) for r in rows]
+    return [schemas.LogSet(set=r[0], weight=r[1] / 100, reps=float(r[2])) for r in rows]
+
+
+_PERSONAL_RECORD_SQL = register_query("analytics.log_context.personal_record", """
+    SELECT weight, reps, date
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+    ORDER BY weight DESC, reps DESC, date DESC
+    LIMIT 1
+""", prepare=True)
 
 
 def _fetch_personal_record(
@@ -1041,14 +1383,7 @@ def _fetch_personal_record(
         PersonalRecord or None when no training rows exist.
     """
     row = db.execute(
-        text("""
-            SELECT weight, reps, date
-            FROM training
-            WHERE user_id     = :uid
-              AND exercise_id = :eid
-            ORDER BY weight DESC, reps DESC, date DESC
-            LIMIT 1
-        """),
+        _PERSONAL_RECORD_SQL,
         {"uid": uid, "eid": exercise_id},
     ).fetchone()
     if row is None:
@@ -1066,7 +1401,7 @@ def get_log_context(
     exercise: str,
     date: date,
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.LogContext:
     """Return the combined set-logger context for a user/exercise/date.
 
@@ -1088,14 +1423,9 @@ def get_log_context(
     """
     uid = principal["user_id"]
     cache_key = make_key(uid, "log-context", muscle=muscle, exercise=exercise, date=str(date))
-    cached = cache_get(cache_key)
+    cached = cache_get_raw(cache_key)
     if cached is not None:
-        pr_raw = cached.get("pr")
-        return schemas.LogContext(
-            completed_sets=cached["completed_sets"],
-            last_session_sets=[schemas.LogSet(**s) for s in cached["last_session_sets"]],
-            pr=schemas.PersonalRecord(**pr_raw) if pr_raw else None,
-        )
+        return _cached_response(cached)
 
     exercise_id = _resolve_exercise_id(db, muscle, exercise, uid)
     if exercise_id is None:
@@ -1111,25 +1441,51 @@ def get_log_context(
     pr = _fetch_personal_record(db, uid, exercise_id)
 
     result = schemas.LogContext(completed_sets=completed, last_session_sets=last_sets, pr=pr)
-
-    pr_dict = {"weight": pr.weight, "reps": pr.reps, "date": str(pr.date)} if pr else None
     cache_set(
         cache_key,
-        {
-            "completed_sets": completed,
-            "last_session_sets": [{"set": s.set, "weight": s.weight, "reps": s.reps}
-                                  for s in last_sets],
-            "pr": pr_dict,
+        _response_ready(schemas.LogContext, result),
+        refresh={
+            "muscle": muscle,
+            "exercise": exercise,
+            "date": str(date),
+            "exercise_id": exercise_id,
         },
     )
     return result
 
 
+def _refresh_log_context(db: Session, uid: int, exercise_id: int, params: dict) -> dict:
+    """Recompute a cached log-context entry for its stored ``date``."""
+    day = date.fromisoformat(params["date"])
+    return _response_ready(
+        schemas.LogContext,
+        schemas.LogContext(
+            completed_sets=_fetch_completed_sets(db, uid, exercise_id, day),
+            last_session_sets=_fetch_last_session_sets(db, uid, exercise_id, day),
+            pr=_fetch_personal_record(db, uid, exercise_id),
+        )
+    )
+
+
+register_refresher("log-context", _refresh_exercise_scoped(_refresh_log_context))
+
+
 # ---------------------------------------------------------------------------
 # GYM-134: /analytics/exercise-trend — session volume delta + e1RM trend
 # ---------------------------------------------------------------------------
 
 
+_SESSION_VOLUMES_SQL = register_query("analytics.exercise_trend.session_volumes", """
+    SELECT date::date AS day, SUM(weight_c * reps) AS volume_c
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+    GROUP BY date::date
+    ORDER BY day DESC
+    LIMIT 2
+""")
+
+
 def _fetch_last_two_session_volumes(
     db: Session,
     uid: int,
@@ -1137,7 +1493,8 @@ def _fetch_last_two_session_volumes(
 ) -> List[schemas.SessionVolume]:
     """Return the two most recent sessions (calendar days) with total volume.
 
-    Volume = SUM(weight * reps) over all sets logged on the day.  Sargable:
+    Volume = SUM(weight * reps) over all sets logged on the day, summed as
+    integer ``weight_c * reps`` (hundredths of a kg) and scaled here.  Sargable:
     the WHERE predicates on ``user_id``/``exercise_id`` use
     ``idx_training_user_exercise (user_id, exercise_id)``; ``date::date``
     appears only in GROUP BY / SELECT / ORDER BY, never in WHERE.
@@ -1152,26 +1509,32 @@ def _fetch_last_two_session_volumes(
         the exercise has no training history.
     """
     rows = db.execute(
-        text("""
-            SELECT date::date AS day, SUM(weight * reps) AS volume
-            FROM training
-            WHERE user_id     = :uid
-              AND exercise_id = :eid
-            GROUP BY date::date
-            ORDER BY day DESC
-            LIMIT 2
-        """),
+        _SESSION_VOLUMES_SQL,
         {"uid": uid, "eid": exercise_id},
     ).fetchall()
     return [
         schemas.SessionVolume(
             date=r[0] if isinstance(r[0], date) else date.fromisoformat(str(r[0])),
-            volume=float(r[1]),
+            volume=r[1] / 100,
         )
         for r in rows
     ]
 
 
+# Generic plan forced: the (user_id, exercise_id) index drives the plan for
+# any window, but ``auto`` over-estimates the generic plan's ``date >=``
+# selectivity and keeps re-planning (~20 % slower per call).
+_E1RM_TREND_SQL = register_query("analytics.exercise_trend.e1rm", """
+    SELECT date::date AS day, MAX(weight_c * (30 + reps)) AS e1rm_x3000
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+      AND date >= :window_start
+    GROUP BY date::date
+    ORDER BY day ASC
+""", prepare=True, plan_cache_mode="force_generic_plan")
+
+
 def _fetch_e1rm_trend(
     db: Session,
     uid: int,
@@ -1181,8 +1544,9 @@ def _fetch_e1rm_trend(
     """Return per-session max Epley e1RM points within the trailing window.
 
     e1RM (Epley) = weight * (1 + reps/30); per session (calendar day) the
-    maximum across the day's sets is taken — done directly in SQL via
-    ``MAX(weight * (1 + reps / 30.0))``.  Sargable: WHERE uses plain
+    maximum across the day's sets is taken — done directly in SQL in integer
+    arithmetic as ``MAX(weight_c * (30 + reps))`` (3000 x the e1RM, same
+    order) and scaled here.  Sargable: WHERE uses plain
     predicates on ``user_id``/``exercise_id`` plus a raw timestamp range
     (``date >= :window_start``) so ``idx_training_user_exercise`` applies;
     ``date::date`` appears only in GROUP BY / SELECT / ORDER BY.
@@ -1198,63 +1562,18 @@ def _fetch_e1rm_trend(
         fall within the window.
     """
     rows = db.execute(
-        text("""
-            SELECT date::date AS day, MAX(weight * (1 + reps / 30.0)) AS e1rm
-            FROM training
-            WHERE user_id     = :uid
-              AND exercise_id = :eid
-              AND date >= :window_start
-            GROUP BY date::date
-            ORDER BY day ASC
-        """),
+        _E1RM_TREND_SQL,
         {"uid": uid, "eid": exercise_id, "window_start": window_start},
     ).fetchall()
     return [
         schemas.E1rmPoint(
             date=r[0] if isinstance(r[0], date) else date.fromisoformat(str(r[0])),
-            e1rm=float(r[1]),
+            e1rm=r[1] / 3000,
         )
         for r in rows
     ]
 
 
-def _trend_to_cache(trend: schemas.ExerciseTrend) -> dict:
-    """Serialize an ExerciseTrend for the JSON cache (dates as ISO strings).
-
-    Args:
-        trend: Computed trend payload.
-
-    Returns:
-        JSON-serialisable dict mirroring the contract shape.
-    """
-    def _session(s: Optional[schemas.SessionVolume]) -> Optional[dict]:
-        return {"date": str(s.date), "volume": s.volume} if s else None
-
-    return {
-        "last_session": _session(trend.last_session),
-        "prev_session": _session(trend.prev_session),
-        "e1rm_trend": [{"date": str(p.date), "e1rm": p.e1rm} for p in trend.e1rm_trend],
-    }
-
-
-def _trend_from_cache(cached: dict) -> schemas.ExerciseTrend:
-    """Rebuild an ExerciseTrend from its cached JSON dict.
-
-    Args:
-        cached: Dict previously produced by ``_trend_to_cache``.
-
-    Returns:
-        ExerciseTrend instance.
-    """
-    last_raw = cached.get("last_session")
-    prev_raw = cached.get("prev_session")
-    return schemas.ExerciseTrend(
-        last_session=schemas.SessionVolume(**last_raw) if last_raw else None,
-        prev_session=schemas.SessionVolume(**prev_raw) if prev_raw else None,
-        e1rm_trend=[schemas.E1rmPoint(**p) for p in cached.get("e1rm_trend", [])],
-    )
-
-
 @router.get(
     "/analytics/exercise-trend",
     response_model=schemas.ExerciseTrend,
@@ -1265,7 +1584,7 @@ def get_exercise_trend(
     exercise: str,
     weeks: int = Query(default=8, ge=1, le=52),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.ExerciseTrend:
     """Return session volume delta inputs + e1RM trend for an exercise (GYM-134).
 
@@ -1275,9 +1594,8 @@ def get_exercise_trend(
     ``weeks`` window.  Resolves muscle/exercise by name through the RLS-scoped
     session (GYM-71 pattern) so a user cannot probe invisible exercises.
 
-    Cached under ``analytics:{uid}:exercise-trend:...`` (90 s TTL); training
-    mutations purge ``analytics:{uid}:*`` (GYM-47), which covers this key
-    family automatically.
+    Cached under ``analytics:{uid}:exercise-trend:...`` (90 s TTL); a training
+    write to this exercise refreshes it (``app.core.cache_refresh``).
 
     Args:
         muscle: Muscle group name.
@@ -1291,9 +1609,9 @@ def get_exercise_trend(
     """
     uid = principal["user_id"]
     cache_key = make_key(uid, "exercise-trend", muscle=muscle, exercise=exercise, weeks=weeks)
-    cached = cache_get(cache_key)
+    cached = cache_get_raw(cache_key)
     if cached is not None:
-        return _trend_from_cache(cached)
+        return _cached_response(cached)
 
     exercise_id = _resolve_exercise_id(db, muscle, exercise, uid)
     if exercise_id is None:
@@ -1302,17 +1620,52 @@ def get_exercise_trend(
         # (GYM-99 discipline, mirrors log-context).
         return schemas.ExerciseTrend(last_session=None, prev_session=None, e1rm_trend=[])
 
-    sessions = _fetch_last_two_session_volumes(db, uid, exercise_id)
+    result = _compute_exercise_trend(db, uid, exercise_id, weeks)
+    cache_set(
+        cache_key,
+        _response_ready(schemas.ExerciseTrend, result),
+        refresh={"muscle": muscle, "exercise": exercise, "weeks": weeks, "exercise_id": exercise_id},
+    )
+    return result
+
+
+def _compute_exercise_trend(
+    db: Session,
+    uid: int,
+    exercise_id: int,
+    weeks: int,
+) -> schemas.ExerciseTrend:
+    """Run the two trend queries for a resolved exercise (see ``get_exercise_trend``)."""
     window_start = datetime.utcnow() - timedelta(weeks=weeks)
-    trend = _fetch_e1rm_trend(db, uid, exercise_id, window_start)
+    if _snapshot_engine():
+        snapshot = load_snapshot(db, uid)
+        sessions = [
+            schemas.SessionVolume(date=day, volume=volume)
+            for day, volume in snapshot.session_volumes(exercise_id, limit=2)
+        ]
+        trend = [
+            schemas.E1rmPoint(date=day, e1rm=e1rm)
+            for day, e1rm in snapshot.e1rm_trend(exercise_id, window_start)
+        ]
+    else:
+        sessions = _fetch_last_two_session_volumes(db, uid, exercise_id)
+        trend = _fetch_e1rm_trend(db, uid, exercise_id, window_start)
 
-    result = schemas.ExerciseTrend(
+    return schemas.ExerciseTrend(
         last_session=sessions[0] if sessions else None,
         prev_session=sessions[1] if len(sessions) > 1 else None,
         e1rm_trend=trend,
     )
-    cache_set(cache_key, _trend_to_cache(result))
-    return result
+
+
+register_refresher(
+    "exercise-trend",
+    _refresh_exercise_scoped(
+        lambda db, uid, eid, params: _response_ready(
+            schemas.ExerciseTrend, _compute_exercise_trend(db, uid, eid, params["weeks"])
+        )
+    ),
+)
 
 
 # ---------------------------------------------------------------------------
@@ -1364,6 +1717,33 @@ def _week_compare_bounds(tz: Optional[str]) -> tuple[date, date, datetime, datet
     )
 
 
+_WEEK_BUCKETS_SQL_TEMPLATE = """
+    SELECT
+        {week_expr}::date    AS week_start,
+        COUNT(*)             AS sets,
+        SUM(weight_c * reps) AS volume_c
+    FROM training
+    WHERE user_id = :uid
+      AND date >= :range_start
+      AND date  < :range_end
+    GROUP BY {week_expr}
+"""
+_WEEK_BUCKETS_UTC_SQL = register_query(
+    "analytics.week_compare.buckets.utc",
+    _WEEK_BUCKETS_SQL_TEMPLATE.format(week_expr="DATE_TRUNC('week', date)"),
+)
+_WEEK_BUCKETS_TZ_SQL = register_query(
+    "analytics.week_compare.buckets.tz",
+    _WEEK_BUCKETS_SQL_TEMPLATE.format(
+        week_expr="DATE_TRUNC('week', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)"
+    ),
+)
+_WEEK_BUCKETS_LOCAL_SQL = register_query(
+    "analytics.week_compare.buckets.local",
+    _WEEK_BUCKETS_SQL_TEMPLATE.format(week_expr="DATE_TRUNC('week', local_date::timestamp)"),
+)
+
+
 def _fetch_week_buckets(
     db: Session,
     uid: int,
@@ -1376,7 +1756,8 @@ def _fetch_week_buckets(
     One grouped query over the 2-week range.  Sargable: the WHERE clause is a
     plain ``user_id`` filter plus a raw timestamp range, so Postgres uses
     ``idx_training_user_date``; the AT TIME ZONE transform appears only in
-    SELECT / GROUP BY (GYM-58 discipline, mirrors summary/streak).
+    SELECT / GROUP BY (GYM-58 discipline, mirrors summary/streak).  Volume
+    is summed as integer ``weight_c * reps`` (hundredths of a kg, 0014).
 
     Args:
         db: SQLAlchemy session.
@@ -1388,27 +1769,28 @@ def _fetch_week_buckets(
     Returns:
         Mapping of week-start Monday date to WeekStats.
     """
-    if tz is None:
-        week_expr = "DATE_TRUNC('week', date)"
+    if _snapshot_engine():
+        return {
+            week_start: schemas.WeekStats(sets=sets, volume=volume)
+            for week_start, (sets, volume) in load_snapshot(db, uid)
+            .week_totals(range_start, range_end, tz)
+            .items()
+        }
+
+    if use_local_date(db, uid, tz):
+        sql = _WEEK_BUCKETS_LOCAL_SQL
         params: dict = {"uid": uid, "range_start": range_start, "range_end": range_end}
+    elif tz is None:
+        sql = _WEEK_BUCKETS_UTC_SQL
+        params = {"uid": uid, "range_start": range_start, "range_end": range_end}
     else:
-        week_expr = "DATE_TRUNC('week', date AT TIME ZONE 'UTC' AT TIME ZONE :tz)"
+        sql = _WEEK_BUCKETS_TZ_SQL
         params = {
             "uid": uid, "range_start": range_start, "range_end": range_end, "tz": tz
         }
 
     rows = db.execute(
-        text(f"""
-            SELECT
-                {week_expr}::date    AS week_start,
-                COUNT(*)             AS sets,
-                SUM(weight * reps)   AS volume
-            FROM training
-            WHERE user_id = :uid
-              AND date >= :range_start
-              AND date  < :range_end
-            GROUP BY {week_expr}
-        """),
+        sql,
         params,
     ).fetchall()
 
@@ -1416,20 +1798,42 @@ def _fetch_week_buckets(
     for r in rows:
         week_start = r[0] if isinstance(r[0], date) else date.fromisoformat(str(r[0]))
         buckets[week_start] = schemas.WeekStats(
-            sets=int(r[1]), volume=float(r[2] or 0.0)
+            sets=int(r[1]), volume=(r[2] or 0) / 100
         )
     return buckets
 
 
+def _compute_week_compare(db: Session, uid: int, tz: Optional[str]) -> schemas.WeekCompare:
+    """Bucket the last two weeks' sets/volume (see ``get_week_compare``).
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+        tz: Validated IANA timezone name, or ``None`` for UTC.
+
+    Returns:
+        The freshly computed ``WeekCompare``.
+    """
+    last_monday, this_monday, range_start, range_end = _week_compare_bounds(tz)
+    buckets = _fetch_week_buckets(db, uid, range_start, range_end, tz)
+
+    empty = schemas.WeekStats(sets=0, volume=0.0)
+    return schemas.WeekCompare(
+        this_week=buckets.get(this_monday, empty),
+        last_week=buckets.get(last_monday, empty),
+    )
+
+
 @router.get(
     "/analytics/week-compare",
     response_model=schemas.WeekCompare,
     tags=["analytics"],
 )
 def get_week_compare(
+    background_tasks: BackgroundTasks,
     tz: Optional[str] = Query(default=None),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.WeekCompare:
     """Return this-week vs last-week sets/volume totals (GYM-136).
 
@@ -1438,8 +1842,9 @@ def get_week_compare(
     is the week containing today, ``last_week`` the week immediately before.
     A week with no training carries zeros.
 
-    Cached under ``analytics:{uid}:week-compare:{tz}`` (90 s TTL); training
-    mutations purge ``analytics:{uid}:*`` (GYM-47), which covers this key.
+    Cached under ``analytics:{uid}:week-compare:{tz}`` (90 s TTL); a training
+    write dated within the two weeks refreshes it (``app.core.cache_refresh``).
+    Misses are single-flight per key (``cache_get_or_compute``).
 
     Args:
         tz: Optional IANA timezone name (e.g. "Asia/Tbilisi"). Default None = UTC.
@@ -1456,17 +1861,129 @@ def get_week_compare(
 
     uid = principal["user_id"]
     cache_key = make_key(uid, "week-compare", tz=tz or "UTC")
-    cached = cache_get(cache_key)
-    if cached is not None:
-        return schemas.WeekCompare(**cached)
+    return _cached_response(cache_get_or_compute(
+        cache_key,
+        lambda: _response_ready(schemas.WeekCompare, _compute_week_compare(db, uid, tz)),
+        revalidate=background_tasks.add_task,
+        refresh={"tz": tz},
+        raw=True,
+    ))
+
+
+register_refresher(
+    "week-compare",
+    lambda db, uid, params: _response_ready(
+        schemas.WeekCompare, _compute_week_compare(db, uid, params["tz"])
+    ),
+)
 
-    last_monday, this_monday, range_start, range_end = _week_compare_bounds(tz)
-    buckets = _fetch_week_buckets(db, uid, range_start, range_end, tz)
 
-    empty = schemas.WeekStats(sets=0, volume=0.0)
-    result = schemas.WeekCompare(
-        this_week=buckets.get(this_monday, empty),
-        last_week=buckets.get(last_monday, empty),
-    )
-    cache_set(cache_key, result.model_dump())
-    return result
+# ---------------------------------------------------------------------------
+# Dashboard bootstrap: every Dashboard analytics read in one request
+# ---------------------------------------------------------------------------
+
+
+@router.get(
+    "/analytics/dashboard",
+    response_model=schemas.AnalyticsDashboard,
+    tags=["analytics"],
+)
+def get_dashboard(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    tz: Optional[str] = Query(default=None),
+    recent_limit: int = Query(default=8, ge=1, le=50),
+    principal: Principal = Depends(get_principal),
+    db: Session = Depends(get_read_db_for_principal),
+) -> schemas.AnalyticsDashboard:
+    """Return summary, activity, week-compare, top-muscles and recent-exercises.
+
+    The Mini App Dashboard otherwise issues five requests, each
+    authenticating, opening a session, setting the RLS GUCs and reading Redis
+    on its own.  Here the five entries are read in ONE pipelined round trip
+    (``cache_get_many_raw``); only the missing sections are computed, all on
+    this request's single session (which opens no connection at all when
+    every section hits), and stored back in one more round trip
+    (``cache_set_many``).
+
+    Sections use the single endpoints' cache keys and refresh params, so the
+    two paths share entries and the write-behind refresh keeps both warm.
+    Hits are spliced into the body as the stored JSON bytes.  No single-flight
+    lease or stale serving: one dashboard request replaces the parallel
+    fan-out those protect.
+
+    Args:
+        from_date: Inclusive activity range start (``from`` query parameter).
+        to_date: Inclusive activity range end (``to`` query parameter).
+        tz: Optional IANA timezone name (e.g. "Asia/Tbilisi"). Default None = UTC.
+        recent_limit: ``limit`` of the recent-exercises section (1–50, default 8).
+        principal: Resolved identity from ``get_principal``.
+        db: SQLAlchemy session.
+
+    Returns:
+        AnalyticsDashboard: one key per section (each exactly the single
+        endpoint's body) plus ``cache`` — per section, whether it was a hit
+        and the seconds its entry has left.
+
+    Raises:
+        HTTPException 400: If ``from`` > ``to`` or the range exceeds 400 days.
+        HTTPException 422: If ``tz`` is not a valid IANA timezone name.
+    """
+    _validate_tz(tz)  # raises 422 on invalid tz
+    _validate_activity_range(from_date, to_date)
+
+    uid = principal["user_id"]
+    # section -> (cache key, compute, refresh params), in body order.
+    sections: Dict[str, tuple] = {
+        "summary": (
+            make_key(uid, "summary", tz=tz or "UTC"),
+            lambda: _response_ready(schemas.AnalyticsSummary, _compute_summary(db, uid, tz)),
+            {"tz": tz},
+        ),
+        "activity": (
+            _activity_key(uid, from_date, to_date, tz),
+            lambda: _compute_activity(db, uid, from_date, to_date, tz),
+            {"frm": str(from_date), "to": str(to_date), "tz": tz},
+        ),
+        "week_compare": (
+            make_key(uid, "week-compare", tz=tz or "UTC"),
+            lambda: _response_ready(schemas.WeekCompare, _compute_week_compare(db, uid, tz)),
+            {"tz": tz},
+        ),
+        "top_muscles": (
+            make_key(uid, "top-muscles"),
+            lambda: _compute_top_muscles(db, uid),
+            {},
+        ),
+        "recent_exercises": (
+            make_key(uid, "recent-exercises", limit=recent_limit),
+            lambda: _compute_recent_exercises(db, uid, recent_limit),
+            {"limit": recent_limit},
+        ),
+    }
+
+    entries = cache_get_many_raw([key for key, _, _ in sections.values()])
+    bodies: Dict[str, bytes] = {}
+    meta: Dict[str, Dict[str, object]] = {}
+    writes = []
+    for name, (key, compute, refresh) in sections.items():
+        entry = entries[key]
+        if entry.body is not None:
+            bodies[name] = entry.body
+            meta[name] = {"hit": True, "ttl": entry.ttl}
+            continue
+        value = compute()
+        bodies[name] = dumps_json(value)
+        meta[name] = {"hit": False, "ttl": None}
+        writes.append((key, value, refresh))
+
+    if writes and cache_set_many(
+        writes, keep_stale=get_settings().CACHE_STALE_WHILE_REVALIDATE
+    ):
+        for name in sections:
+            if not meta[name]["hit"]:
+                meta[name]["ttl"] = _CACHE_TTL
+
+    parts = [b'"%s":%s' % (name.encode("ascii"), body) for name, body in bodies.items()]
+    parts.append(b'"cache":' + dumps_json(meta))
+    return _cached_response(b"{" + b",".join(parts) + b"}")
@@ -9,16 +9,19 @@ EITHER a user JWT (Mini App) OR a service token + X-Act-As-User impersonation
 
 Isolation logic is centralised in ``app.services.visibility``.
 
-Training id generation: uuid4().hex (32 lower-case hex chars).  This is the
-only scheme used across the API (GYM-22 unification decision).  The bot's
-legacy md5-based ids in existing rows are left untouched in the DB.
+Training id generation: ``new_training_id()`` — a UUIDv7 in its 32 lower-case
+hex char form.  This is the only scheme used across the API (GYM-22
+unification decision); the column is ``uuid`` since 0013, and ``training_id``
+path parameters also accept the canonical uuid text and the bot's legacy ids
+(see ``app.core.training_ids``).
 
 Cache invalidation (GYM-47): every training mutation calls
-``cache.invalidate_user(uid)`` to purge stale analytics cache entries for
-that user.  The call is graceful — Redis errors never fail the HTTP request.
+``cache_refresh.refresh_after_write(uid, writes)`` after the commit, which
+drops the analytics cache entries the write affects and queues their
+recompute (write-behind).  The call is graceful — Redis errors never fail
+the HTTP request.
 """
 import logging
-import uuid
 from datetime import datetime, time
 from typing import List
 
@@ -27,11 +30,15 @@ from sqlalchemy import exists, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.core.cache import invalidate_user
+from app.core.cache_refresh import refresh_after_write, training_write
 from app.core.database import get_db_for_principal
+from app.core.metrics import USER_UPSERTS
+from app.core.training_ids import new_training_id
 from app.middleware.permissions import Principal, get_principal
 from app.models import models
 from app.schemas import schemas
+from app.services import user_profile
+from app.services.local_date import enqueue_backfill
 from app.services.resolve import resolve_muscle_id, resolve_exercise_id
 from app.services.visibility import visible_muscles
 
@@ -79,6 +86,17 @@ def upsert_me(
 
     Maps to the bot's ``save_any_data("users", {...})``.  Idempotent.
 
+    Conditional (``app.services.user_profile``): a body whose fingerprint
+    matches the last upsert's is answered from the cached profile without
+    touching the database, and a body that changes nothing writes nothing.
+    ``last_interaction`` is recorded in Redis and written in batches; only
+    a create or a real change (or Redis being down) writes it with the row.
+
+    A changed ``timezone`` clears ``local_date_tz`` in the same commit (local-day
+    reads fall back to AT TIME ZONE) and enqueues the ``training.local_date``
+    backfill, which switches them back once every row is rewritten.  A new
+    user has no rows yet, so their zone is consistent from the start.
+
     Args:
         body: Profile fields supplied by the caller.
         principal: Resolved identity from ``get_principal``.
@@ -88,26 +106,50 @@ def upsert_me(
         The created or updated user profile.
     """
     uid = principal["user_id"]
-    user = db.query(models.User).filter(models.User.id == uid).first()
-
-    if user is None:
-        user = models.User(id=uid, registration_date=datetime.utcnow())
-        db.add(user)
+    now = datetime.utcnow()
+    fingerprint = user_profile.profile_fingerprint(body.model_dump())
 
-    if body.first_name is not None:
-        user.first_name = body.first_name
-    if body.lastname is not None:
-        user.lastname = body.lastname
-    if body.username is not None:
-        user.username = body.username
-    if body.bio is not None:
-        user.bio = body.bio
+    cached = user_profile.cached_profile(uid, fingerprint)
+    if cached is not None and user_profile.touch(uid, now):
+        USER_UPSERTS.labels(outcome="cached").inc()
+        return schemas.User(**dict(cached, last_interaction=now))
 
-    user.last_interaction = datetime.utcnow()
+    user = db.query(models.User).filter(models.User.id == uid).first()
+    tz_changed = False
+    created = user is None
+
+    if created:
+        user = models.User(
+            id=uid,
+            registration_date=now,
+            timezone=body.timezone,
+            local_date_tz=body.timezone or "UTC",
+        )
+        db.add(user)
+    elif body.timezone is not None and body.timezone != user.timezone:
+        user.timezone = body.timezone
+        user.local_date_tz = None
+        tz_changed = True
+
+    # Reason: assign only real changes — an unchanged attribute leaves the
+    # session clean, so the no-op upsert below issues no UPDATE.
+    for name in ("first_name", "lastname", "username", "bio"):
+        value = getattr(body, name)
+        if value is not None and value != getattr(user, name):
+            setattr(user, name, value)
+
+    changed = created or db.is_modified(user)
+    if changed or not user_profile.touch(uid, now):
+        user.last_interaction = now
+        db.commit()
+        db.refresh(user)
+    USER_UPSERTS.labels(outcome="created" if created else "updated" if changed else "unchanged").inc()
+    if tz_changed:
+        enqueue_backfill(uid)
 
-    db.commit()
-    db.refresh(user)
-    return user
+    profile = schemas.User.model_validate(user)
+    user_profile.remember_profile(uid, fingerprint, profile.model_dump(mode="json"))
+    return profile.model_copy(update={"last_interaction": now})
 
 
 # ---------------------------------------------------------------------------
@@ -500,7 +542,7 @@ def create_training(
     """Record a training set for the authenticated user.
 
     Maps to ``save_training_data(...)``.  Resolves muscle and exercise by name.
-    Assigns a uuid4 hex id — the unified scheme for the whole API.
+    Assigns a UUIDv7 hex id — the unified scheme for the whole API.
 
     Args:
         body: Set details (muscle_name, exercise_name, set, weight, reps).
@@ -530,7 +572,7 @@ def create_training(
         training_date = datetime.utcnow()
 
     training = models.Training(
-        id=uuid.uuid4().hex,
+        id=new_training_id(),
         date=training_date,
         user_id=uid,
         muscle_id=muscle_id,
@@ -548,7 +590,7 @@ def create_training(
         logger.error("Error creating training record: %s", exc, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to save training record")
 
-    invalidate_user(uid)
+    refresh_after_write(uid, [training_write(exercise_id, training_date)])
     return training
 
 
@@ -602,5 +644,5 @@ def update_training(
         logger.error("Error updating training record: %s", exc, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to update training record")
 
-    invalidate_user(uid)
+    refresh_after_write(uid, [training_write(training.exercise_id, training.date)])
     return training
@@ -0,0 +1,51 @@
+"""Live change events for the Mini App.
+
+Implements:
+  GET  /events   — server-sent events of the caller's training changes
+
+The caller is resolved by ``get_principal`` (user JWT or service-token
+impersonation) and only ever receives its own channel.  The stream holds no
+database session: ``app.core.events`` relays the caller's Redis pub/sub
+channel until the client disconnects or ``EVENTS_STREAM_SECONDS`` pass.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.core import events
+from app.middleware.permissions import Principal, get_principal
+
+router = APIRouter()
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    tags=["events"],
+)
+async def stream_events(
+    principal: Principal = Depends(get_principal),
+) -> StreamingResponse:
+    """Stream the caller's change events as ``text/event-stream``.
+
+    Each committed training mutation arrives as an ``event: training`` frame
+    whose data lists the (exercise, day) pairs it touched; ``: ping``
+    comments keep the connection alive in between.
+
+    Args:
+        principal: Resolved identity from ``get_principal``.
+
+    Returns:
+        The event stream; ``X-Accel-Buffering: no`` keeps nginx from holding
+        frames back.
+
+    Raises:
+        HTTPException 503: Redis is unavailable.
+    """
+    stream = await events.open_stream(principal["user_id"])
+    if stream is None:
+        raise HTTPException(status_code=503, detail="Live updates are unavailable")
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
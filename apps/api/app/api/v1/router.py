@@ -17,11 +17,13 @@ Two routers are exported:
     POST /admin/exercises
     PUT  /admin/exercises/{exercise_id}
     GET  /admin/training
+    GET  /admin/training/export
 """
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal
 from pydantic import BaseModel
 from app.core.database import get_db_for_admin, get_db_for_user
 from app.models import models
@@ -34,6 +36,7 @@ from app.core.auth import (
     create_session_token,
     verify_telegram_webapp_auth,
 )
+from app.services import training_export
 from app.services.resolve import resolve_muscle_id, resolve_exercise_id
 
 # ---------------------------------------------------------------------------
@@ -176,9 +179,10 @@ def get_current_user_endpoint(current_user: dict = Depends(get_current_user)):
 # Legacy user training endpoints — kept on /user/* prefix in main.py mount
 # ---------------------------------------------------------------------------
 
-import uuid
 from datetime import datetime
 
+from app.core.training_ids import new_training_id
+
 
 class TrainingCreate(BaseModel):
     muscle_name: str
@@ -262,7 +266,7 @@ def create_user_training(
     if not exercise_id:
         raise HTTPException(status_code=404, detail="Exercise not found")
 
-    new_id = uuid.uuid4().hex
+    new_id = new_training_id()
 
     new_training = models.Training(
         id=new_id,
@@ -527,3 +531,35 @@ def admin_read_training(
         .limit(limit)
         .all()
     )
+
+
+@admin_router.get("/training/export", response_class=StreamingResponse)
+def admin_export_training(
+    fmt: Literal["csv", "ndjson", "parquet"] = Query("csv", alias="format"),
+    current_user: dict = Depends(require_admin),
+) -> StreamingResponse:
+    """Stream every user's training history for the analytics warehouse (admin only).
+
+    Same encoders and server-side cursor as ``GET /training/export``, with a
+    leading ``user_id`` column; rows are not ordered.  Runs under the admin
+    RLS branch, on the read replica when one is configured.
+
+    Args:
+        fmt: ``format`` query param — ``csv`` (default), ``ndjson`` or
+            ``parquet``.
+        current_user: Admin user from require_admin dependency.
+
+    Returns:
+        A streamed attachment ``training-all.<ext>``.
+
+    Raises:
+        HTTPException 501: ``parquet`` requested but pyarrow is not installed.
+    """
+    if fmt == "parquet" and not training_export.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export is not available on this server")
+    spec = training_export.FORMATS[fmt]
+    return StreamingResponse(
+        training_export.open_export({"user_id": None, "role": "admin"}, fmt, user_id=None),
+        media_type=spec.media_type,
+        headers={"Content-Disposition": f'attachment; filename="training-all.{spec.extension}"'},
+    )
@@ -5,13 +5,23 @@ Implements:
   GET  /training/day/{date}        — full exercise/set detail for one day
   DELETE /training/{id}            — delete caller's own set
   PATCH /training/{id}/move        — move set to another date and/or exercise (GYM-51)
+  GET  /training/export            — streamed full history (CSV / NDJSON / Parquet)
+  POST /training/import            — bulk import of a Strong / Hevy / gym-bot file
 
 All routes use ``get_principal`` + ``get_db_for_principal`` (RLS-scoped to
-the authenticated caller, fail-closed).
-
-Cache invalidation: every mutation calls ``cache.invalidate_user(uid)`` to
-purge stale analytics:{user_id}:* keys so Dashboard/Progress numbers stay
-current after edits.  Graceful if Redis is down.
+the authenticated caller, fail-closed); the two day GETs use
+``get_read_db_for_principal`` instead, which serves them from the read
+replica when one is configured (``app.core.read_routing``).
+``/training/export`` opens its own read session, held for the length of the
+stream (``app.services.training_export``); ``/training/import`` hands the
+uploaded file to ``app.services.training_import``, which loads it in one
+transaction on its own session.
+
+Cache invalidation: every mutation calls ``cache_refresh.refresh_after_write``
+with the touched (exercise, day) pairs — both sides of a move — so the
+analytics:{user_id}:* entries they affect are dropped and recomputed in the
+background, keeping Dashboard/Progress numbers current after edits.
+Graceful if Redis is down.
 
 GYM-58: Optional ``tz`` query param added to ``list_training_days``.  When
 provided, the ``t.date::date`` grouping is replaced by
@@ -45,24 +55,41 @@ is computed from the LOCAL midnight boundaries of ``day_date`` in ``tz`` using
 ``zoneinfo.ZoneInfo``.  Without ``tz`` the existing UTC behaviour is preserved
 (back-compat).  Same ``_validate_tz`` helper and same Query metadata as
 ``list_training_days``.
+
+Write-time local days: ``list_training_days`` groups by the trigger-maintained
+``training.local_date`` (``.local`` statements) when the requested tz is the
+one the user's rows were backfilled for (``app.services.local_date``).
+
+Partitioning (0012): ``training`` is RANGE-partitioned by year on ``date``.
+Every read here bounds ``date`` — the PR-window history by ``< :dt_to`` too,
+since only earlier sets can be "prior" — so partitions after the requested
+window are pruned.
 """
 import logging
 from collections import defaultdict
 from datetime import date, datetime, time, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.services.resolve import resolve_exercise_id
 
-from app.core.cache import invalidate_user
-from app.core.database import get_db_for_principal
+from app.core.cache_refresh import refresh_after_write, training_write
+from app.core.config import get_settings
+from app.core.database import get_db_for_principal, get_read_db_for_principal
+from app.core.query_registry import register_query
+from app.core.training_ids import training_id_hex
 from app.middleware.permissions import Principal, get_principal
 from app.models import models
 from app.schemas import schemas
+from app.services.analytics_snapshot import load_snapshot
+from app.services import training_export, training_import
+from app.services.local_date import use_local_date
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +118,114 @@ def _validate_tz(tz: Optional[str]) -> None:
         )
 
 
+# GYM-155: one statement per day expression (UTC vs the caller's timezone);
+# see list_training_days for the derivation of the temporal PR window logic.
+_TRAINING_DAYS_SQL_TEMPLATE = """
+    WITH window_exercises AS (
+        -- Distinct exercises the user trained in the requested window.
+        -- Used to scope the full-history scan to only relevant exercises.
+        SELECT DISTINCT exercise_id
+        FROM training
+        WHERE user_id = :uid
+          AND date >= :dt_from
+          AND date  < :dt_to
+    ),
+    all_sets AS (
+        -- Full history for those exercises (needed for correct "prior" context)
+        -- up to the window's end: later sets are never "prior" to a window set,
+        -- and the bound prunes the partitions after the window.
+        SELECT t.id, t.date, t.local_date, t.set, t.exercise_id, t.muscle_id,
+               t.weight_c, t.reps
+        FROM training t
+        JOIN window_exercises we ON we.exercise_id = t.exercise_id
+        WHERE t.user_id = :uid
+          AND t.date < :dt_to
+    ),
+    pr_flags AS (
+        SELECT
+            id, date, local_date, exercise_id, muscle_id, weight_c, reps,
+            -- Running max weight of all EARLIER sets for this exercise.
+            MAX(weight_c) OVER (
+                PARTITION BY exercise_id
+                ORDER BY date, set
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS prior_max_w,
+            -- Running max reps of all EARLIER sets at the same weight.
+            MAX(reps) OVER (
+                PARTITION BY exercise_id, weight_c
+                ORDER BY date, set
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS prior_max_reps_at_w
+        FROM all_sets
+    )
+    SELECT
+        {day_expr}                AS day,
+        ARRAY_AGG(DISTINCT m.name) AS muscles,
+        COUNT(DISTINCT pf.exercise_id) AS exercises_count,
+        COUNT(*)                   AS sets_count,
+        BOOL_OR(
+            pf.prior_max_w IS NULL
+            OR pf.weight_c > pf.prior_max_w
+            OR (
+                pf.prior_max_reps_at_w IS NOT NULL
+                AND pf.reps > pf.prior_max_reps_at_w
+            )
+        )                          AS has_pr
+    FROM pr_flags pf
+    JOIN muscles m ON m.id = pf.muscle_id
+    WHERE pf.date >= :dt_from
+      AND pf.date  < :dt_to
+    GROUP BY {day_expr}
+    ORDER BY {day_expr} DESC
+"""
+_TRAINING_DAYS_UTC_SQL = register_query(
+    "training_history.days.utc",
+    _TRAINING_DAYS_SQL_TEMPLATE.format(day_expr="pf.date::date"),
+)
+_TRAINING_DAYS_TZ_SQL = register_query(
+    "training_history.days.tz",
+    _TRAINING_DAYS_SQL_TEMPLATE.format(
+        day_expr="(pf.date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date"
+    ),
+)
+_TRAINING_DAYS_LOCAL_SQL = register_query(
+    "training_history.days.local",
+    _TRAINING_DAYS_SQL_TEMPLATE.format(day_expr="pf.local_date"),
+)
+
+# ANALYTICS_ENGINE=snapshot: the window's rows only — has_pr comes from the
+# per-user snapshot (app/services/analytics_snapshot.py), so the full-history
+# PR window above is not needed.
+_TRAINING_DAYS_PLAIN_SQL_TEMPLATE = """
+    SELECT
+        {day_expr}                    AS day,
+        ARRAY_AGG(DISTINCT m.name)    AS muscles,
+        COUNT(DISTINCT t.exercise_id) AS exercises_count,
+        COUNT(*)                      AS sets_count
+    FROM training t
+    JOIN muscles m ON m.id = t.muscle_id
+    WHERE t.user_id = :uid
+      AND t.date >= :dt_from
+      AND t.date  < :dt_to
+    GROUP BY {day_expr}
+    ORDER BY {day_expr} DESC
+"""
+_TRAINING_DAYS_PLAIN_UTC_SQL = register_query(
+    "training_history.days.plain.utc",
+    _TRAINING_DAYS_PLAIN_SQL_TEMPLATE.format(day_expr="t.date::date"),
+)
+_TRAINING_DAYS_PLAIN_TZ_SQL = register_query(
+    "training_history.days.plain.tz",
+    _TRAINING_DAYS_PLAIN_SQL_TEMPLATE.format(
+        day_expr="(t.date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date"
+    ),
+)
+_TRAINING_DAYS_PLAIN_LOCAL_SQL = register_query(
+    "training_history.days.plain.local",
+    _TRAINING_DAYS_PLAIN_SQL_TEMPLATE.format(day_expr="t.local_date"),
+)
+
+
 @router.get(
     "/training/days",
     response_model=List[schemas.TrainingDay],
@@ -101,7 +236,7 @@ def list_training_days(
     to_date: Optional[date] = Query(None, alias="to"),
     tz: Optional[str] = Query(default=None),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> List[schemas.TrainingDay]:
     """List the caller's training days, grouped and reverse-chronological.
 
@@ -148,17 +283,22 @@ def list_training_days(
     dt_from = datetime(date_from.year, date_from.month, date_from.day)
     dt_to = datetime(date_to.year, date_to.month, date_to.day) + timedelta(days=1)
 
-    if tz is None:
+    local = use_local_date(db, uid, tz)
+    if local:
+        # Rows already carry their day in this zone: group by the plain column.
+        sql = _TRAINING_DAYS_LOCAL_SQL
+        query_params: dict = {"uid": uid, "dt_from": dt_from, "dt_to": dt_to}
+    elif tz is None:
         # UTC path — unchanged behaviour.
         # Reason: the outer query references pr_flags pf, so the column
         # alias is pf.date (not t.date which was used in the old single-table query).
-        day_expr = "pf.date::date"
-        query_params: dict = {"uid": uid, "dt_from": dt_from, "dt_to": dt_to}
+        sql = _TRAINING_DAYS_UTC_SQL
+        query_params = {"uid": uid, "dt_from": dt_from, "dt_to": dt_to}
     else:
         # Timezone-aware path: convert the naive UTC timestamp to the user's local
         # wall-clock before casting to date.  The AT TIME ZONE transform stays out
         # of the WHERE clause so the index on (user_id, date) is still used.
-        day_expr = "(pf.date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date"
+        sql = _TRAINING_DAYS_TZ_SQL
         query_params = {"uid": uid, "dt_from": dt_from, "dt_to": dt_to, "tz": tz}
 
     # GYM-155: Temporal PR detection via window functions.
@@ -174,6 +314,7 @@ def list_training_days(
     #   prior_max_reps_at_w — max reps seen BEFORE this set at this exact weight.
     # The ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING frame excludes the
     # current row so "prior" is strictly earlier.
+    # Weights are compared as the integer ``weight_c`` (0014), not numeric.
     #
     # Step 3: is_pr logic (Option A, no e1RM):
     #   - prior_max_w IS NULL              → first ever set of this exercise = PR
@@ -183,63 +324,30 @@ def list_training_days(
     #
     # Step 4: filter pr_flags to the requested window, then GROUP BY day and OR
     # the is_pr flags for has_pr.
-    sql = f"""
-        WITH window_exercises AS (
-            -- Distinct exercises the user trained in the requested window.
-            -- Used to scope the full-history scan to only relevant exercises.
-            SELECT DISTINCT exercise_id
-            FROM training
-            WHERE user_id = :uid
-              AND date >= :dt_from
-              AND date  < :dt_to
-        ),
-        all_sets AS (
-            -- Full history for those exercises (needed for correct "prior" context).
-            SELECT t.id, t.date, t.set, t.exercise_id, t.muscle_id,
-                   t.weight, t.reps
-            FROM training t
-            JOIN window_exercises we ON we.exercise_id = t.exercise_id
-            WHERE t.user_id = :uid
-        ),
-        pr_flags AS (
-            SELECT
-                id, date, exercise_id, muscle_id, weight, reps,
-                -- Running max weight of all EARLIER sets for this exercise.
-                MAX(weight) OVER (
-                    PARTITION BY exercise_id
-                    ORDER BY date, set
-                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
-                ) AS prior_max_w,
-                -- Running max reps of all EARLIER sets at the same weight.
-                MAX(reps) OVER (
-                    PARTITION BY exercise_id, weight
-                    ORDER BY date, set
-                    ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
-                ) AS prior_max_reps_at_w
-            FROM all_sets
-        )
-        SELECT
-            {day_expr}                AS day,
-            ARRAY_AGG(DISTINCT m.name) AS muscles,
-            COUNT(DISTINCT pf.exercise_id) AS exercises_count,
-            COUNT(*)                   AS sets_count,
-            BOOL_OR(
-                pf.prior_max_w IS NULL
-                OR pf.weight > pf.prior_max_w
-                OR (
-                    pf.prior_max_reps_at_w IS NOT NULL
-                    AND pf.reps > pf.prior_max_reps_at_w
-                )
-            )                          AS has_pr
-        FROM pr_flags pf
-        JOIN muscles m ON m.id = pf.muscle_id
-        WHERE pf.date >= :dt_from
-          AND pf.date  < :dt_to
-        GROUP BY {day_expr}
-        ORDER BY {day_expr} DESC
-    """
+    #
+    # ANALYTICS_ENGINE=snapshot: the same flags come vectorized from the cached
+    # per-user snapshot; SQL only aggregates the window's rows.
+    if get_settings().ANALYTICS_ENGINE == "snapshot":
+        if local:
+            plain_sql = _TRAINING_DAYS_PLAIN_LOCAL_SQL
+        elif tz is None:
+            plain_sql = _TRAINING_DAYS_PLAIN_UTC_SQL
+        else:
+            plain_sql = _TRAINING_DAYS_PLAIN_TZ_SQL
+        rows = db.execute(plain_sql, query_params).fetchall()
+        pr_days = load_snapshot(db, uid).pr_days(dt_from, dt_to, tz) if rows else {}
+        return [
+            schemas.TrainingDay(
+                date=row.day,
+                muscles=sorted(row.muscles),
+                exercises_count=row.exercises_count,
+                sets_count=row.sets_count,
+                has_pr=pr_days.get(row.day, False),
+            )
+            for row in rows
+        ]
 
-    rows = db.execute(text(sql), query_params).fetchall()
+    rows = db.execute(sql, query_params).fetchall()
 
     return [
         schemas.TrainingDay(
@@ -253,6 +361,85 @@ def list_training_days(
     ]
 
 
+_TRAINING_DAY_SQL = register_query("training_history.day", """
+    WITH day_exercises AS (
+        SELECT DISTINCT exercise_id
+        FROM training
+        WHERE user_id = :uid
+          AND date >= :dt_from
+          AND date  < :dt_to
+    ),
+    all_sets AS (
+        SELECT t.id, t.date, t.set, t.exercise_id, t.muscle_id,
+               t.weight_c, t.reps
+        FROM training t
+        JOIN day_exercises de ON de.exercise_id = t.exercise_id
+        WHERE t.user_id = :uid
+          AND t.date < :dt_to
+    ),
+    pr_flags AS (
+        SELECT
+            id, date, set, exercise_id, muscle_id, weight_c, reps,
+            MAX(weight_c) OVER (
+                PARTITION BY exercise_id
+                ORDER BY date, set
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS prior_max_w,
+            MAX(reps) OVER (
+                PARTITION BY exercise_id, weight_c
+                ORDER BY date, set
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS prior_max_reps_at_w
+        FROM all_sets
+    ),
+    ex_recency AS (
+        SELECT exercise_id, MAX(date) AS last_logged
+        FROM training
+        WHERE user_id = :uid
+          AND date >= :dt_from
+          AND date  < :dt_to
+        GROUP BY exercise_id
+    )
+    SELECT
+        pf.id                   AS training_id,
+        pf.set,
+        pf.weight_c,
+        pf.reps,
+        pf.exercise_id,
+        e.name                  AS exercise_name,
+        m.name                  AS muscle_name,
+        (
+            pf.prior_max_w IS NULL
+            OR pf.weight_c > pf.prior_max_w
+            OR (
+                pf.prior_max_reps_at_w IS NOT NULL
+                AND pf.reps > pf.prior_max_reps_at_w
+            )
+        )                       AS is_pr,
+        -- GYM-153: weight branch is checked first so the first-ever
+        -- set (prior_max_w IS NULL) always yields 'weight', guaranteeing
+        -- mutual exclusivity with the 'reps' branch.
+        -- Invariant: pr_kind IS NOT NULL exactly when is_pr is true.
+        CASE
+            WHEN (pf.prior_max_w IS NULL OR pf.weight_c > pf.prior_max_w)
+                THEN 'weight'
+            WHEN (
+                pf.prior_max_reps_at_w IS NOT NULL
+                AND pf.reps > pf.prior_max_reps_at_w
+            )
+                THEN 'reps'
+            ELSE NULL
+        END                     AS pr_kind
+    FROM pr_flags pf
+    JOIN exercises  e  ON e.id  = pf.exercise_id
+    JOIN muscles    m  ON m.id  = pf.muscle_id
+    JOIN ex_recency er ON er.exercise_id = pf.exercise_id
+    WHERE pf.date >= :dt_from
+      AND pf.date  < :dt_to
+    ORDER BY er.last_logged DESC, pf.set ASC
+""")
+
+
 @router.get(
     "/training/day/{day_date}",
     response_model=schemas.TrainingDayDetail,
@@ -262,7 +449,7 @@ def get_training_day(
     day_date: date,
     tz: Optional[str] = Query(default=None),
     principal: Principal = Depends(get_principal),
-    db: Session = Depends(get_db_for_principal),
+    db: Session = Depends(get_read_db_for_principal),
 ) -> schemas.TrainingDayDetail:
     """Return the caller's full training detail for a single calendar day.
 
@@ -340,82 +527,7 @@ def get_training_day(
     # the day so the outer ORDER BY places the most-recently-logged exercise
     # first while sets within each exercise remain ascending by set number.
     rows = db.execute(
-        text("""
-            WITH day_exercises AS (
-                SELECT DISTINCT exercise_id
-                FROM training
-                WHERE user_id = :uid
-                  AND date >= :dt_from
-                  AND date  < :dt_to
-            ),
-            all_sets AS (
-                SELECT t.id, t.date, t.set, t.exercise_id, t.muscle_id,
-                       t.weight, t.reps
-                FROM training t
-                JOIN day_exercises de ON de.exercise_id = t.exercise_id
-                WHERE t.user_id = :uid
-            ),
-            pr_flags AS (
-                SELECT
-                    id, date, set, exercise_id, muscle_id, weight, reps,
-                    MAX(weight) OVER (
-                        PARTITION BY exercise_id
-                        ORDER BY date, set
-                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
-                    ) AS prior_max_w,
-                    MAX(reps) OVER (
-                        PARTITION BY exercise_id, weight
-                        ORDER BY date, set
-                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
-                    ) AS prior_max_reps_at_w
-                FROM all_sets
-            ),
-            ex_recency AS (
-                SELECT exercise_id, MAX(date) AS last_logged
-                FROM training
-                WHERE user_id = :uid
-                  AND date >= :dt_from
-                  AND date  < :dt_to
-                GROUP BY exercise_id
-            )
-            SELECT
-                pf.id                   AS training_id,
-                pf.set,
-                pf.weight,
-                pf.reps,
-                pf.exercise_id,
-                e.name                  AS exercise_name,
-                m.name                  AS muscle_name,
-                (
-                    pf.prior_max_w IS NULL
-                    OR pf.weight > pf.prior_max_w
-                    OR (
-                        pf.prior_max_reps_at_w IS NOT NULL
-                        AND pf.reps > pf.prior_max_reps_at_w
-                    )
-                )                       AS is_pr,
-                -- GYM-153: weight branch is checked first so the first-ever
-                -- set (prior_max_w IS NULL) always yields 'weight', guaranteeing
-                -- mutual exclusivity with the 'reps' branch.
-                -- Invariant: pr_kind IS NOT NULL exactly when is_pr is true.
-                CASE
-                    WHEN (pf.prior_max_w IS NULL OR pf.weight > pf.prior_max_w)
-                        THEN 'weight'
-                    WHEN (
-                        pf.prior_max_reps_at_w IS NOT NULL
-                        AND pf.reps > pf.prior_max_reps_at_w
-                    )
-                        THEN 'reps'
-                    ELSE NULL
-                END                     AS pr_kind
-            FROM pr_flags pf
-            JOIN exercises  e  ON e.id  = pf.exercise_id
-            JOIN muscles    m  ON m.id  = pf.muscle_id
-            JOIN ex_recency er ON er.exercise_id = pf.exercise_id
-            WHERE pf.date >= :dt_from
-              AND pf.date  < :dt_to
-            ORDER BY er.last_logged DESC, pf.set ASC
-        """),
+        _TRAINING_DAY_SQL,
         {"uid": uid, "dt_from": dt_from, "dt_to": dt_to},
     ).fetchall()
 
@@ -433,9 +545,9 @@ def get_training_day(
             )
         exercise_map[eid].sets.append(
             schemas.TrainingSet(
-                training_id=row.training_id,
+                training_id=training_id_hex(row.training_id),
                 set=row.set,
-                weight=float(row.weight),
+                weight=row.weight_c / 100,
                 reps=float(row.reps),
                 is_pr=bool(row.is_pr),
                 pr_kind=row.pr_kind,
@@ -486,6 +598,7 @@ def delete_training(
             status_code=404, detail="Training record not found or access denied"
         )
 
+    write = training_write(training.exercise_id, training.date)
     db.delete(training)
     try:
         db.commit()
@@ -494,7 +607,7 @@ def delete_training(
         logger.error("Error deleting training record: %s", exc, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete training record")
 
-    invalidate_user(uid)
+    refresh_after_write(uid, [write])
 
 
 # ---------------------------------------------------------------------------
@@ -631,6 +744,7 @@ def move_training(
         )
 
     # --- apply changes ---
+    source = training_write(training.exercise_id, training.date)
     training.date = target_date
     training.exercise_id = target_exercise_id
     training.muscle_id = target_muscle_id
@@ -643,6 +757,121 @@ def move_training(
         logger.error("Error moving training record: %s", exc, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to move training record")
 
-    # Purge analytics cache for both the source and target day.
-    invalidate_user(uid)
+    # Refresh analytics cache for both the source and target exercise/day.
+    refresh_after_write(uid, [source, training_write(target_exercise_id, target_date)])
     return training
+
+
+# ---------------------------------------------------------------------------
+# GET /training/export  — streamed full history
+# ---------------------------------------------------------------------------
+
+@router.get(
+    "/training/export",
+    response_class=StreamingResponse,
+    tags=["training"],
+)
+def export_training(
+    fmt: Literal["csv", "ndjson", "parquet"] = Query("csv", alias="format"),
+    principal: Principal = Depends(get_principal),
+) -> StreamingResponse:
+    """Stream the caller's full training history as CSV, NDJSON or Parquet.
+
+    One statement over a server-side cursor, encoded batch by batch
+    (``app.services.training_export``): memory stays flat whatever the
+    history size.  Oldest set first.  The session is opened here and closed
+    by the stream, so it takes no ``db`` dependency.
+
+    Args:
+        fmt: ``format`` query param — ``csv`` (default), ``ndjson`` or
+            ``parquet``.
+        principal: Resolved identity from ``get_principal``.
+
+    Returns:
+        A streamed attachment ``training-<user_id>.<ext>``.
+
+    Raises:
+        HTTPException 501: ``parquet`` requested but pyarrow is not installed.
+    """
+    if fmt == "parquet" and not training_export.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export is not available on this server")
+    uid = principal["user_id"]
+    spec = training_export.FORMATS[fmt]
+    return StreamingResponse(
+        training_export.open_export(principal, fmt, user_id=uid),
+        media_type=spec.media_type,
+        headers={"Content-Disposition": f'attachment; filename="training-{uid}.{spec.extension}"'},
+    )
+
+
+# ---------------------------------------------------------------------------
+# POST /training/import  — bulk history import
+# ---------------------------------------------------------------------------
+
+async def _read_import_body(request: Request, limit: int) -> bytes:
+    """Read the request body, refusing it once it passes ``limit`` bytes.
+
+    A declared ``Content-Length`` over the limit is refused before reading;
+    a chunked (or understated) body is counted while streamed, so memory
+    never holds more than ``limit`` bytes of it.
+
+    Raises:
+        HTTPException 413: The body exceeds ``limit``.
+    """
+    too_large = HTTPException(status_code=413, detail="Import file is too large")
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise too_large
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post(
+    "/training/import",
+    response_model=schemas.TrainingImportResult,
+    tags=["training"],
+)
+async def import_training(
+    request: Request,
+    source: Literal["auto", "strong", "hevy", "gymbot", "json"] = Query("auto"),
+    unit: Literal["kg", "lb"] = Query("kg"),
+    principal: Principal = Depends(get_principal),
+) -> schemas.TrainingImportResult:
+    """Import a training history file into the caller's history.
+
+    The raw request body is the file (Strong or Hevy CSV, our own export
+    CSV, JSON or NDJSON).  Names are resolved in one query, the rows are
+    COPYed into a staging table and merged in one statement, skipping sets
+    the caller already has (``app.services.training_import``).  Async only
+    to read the raw body; the import itself runs in the threadpool.
+
+    Args:
+        request: The request whose body is the file.
+        source: ``auto`` (detect from the content), ``strong``, ``hevy``,
+            ``gymbot`` or ``json``.
+        unit: Unit of Strong weights without a ``Weight Unit`` column.
+        principal: Resolved identity from ``get_principal``.
+
+    Returns:
+        Row counts of the import and the exercise names that matched nothing.
+
+    Raises:
+        HTTPException 413: The body exceeds ``MAX_IMPORT_BYTES``.
+        HTTPException 422: The file is empty or cannot be read as ``source``.
+    """
+    data = await _read_import_body(request, training_import.MAX_IMPORT_BYTES)
+    if not data.strip():
+        raise HTTPException(status_code=422, detail="Import file is empty")
+    try:
+        report = await run_in_threadpool(
+            training_import.import_history, principal, data, source=source, unit=unit,
+        )
+    except training_import.ImportFormatError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return schemas.TrainingImportResult(**report.__dict__)
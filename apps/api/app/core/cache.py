@@ -11,30 +11,110 @@ Design choices:
   through to the DB query.  A cache failure NEVER fails the HTTP request.
 - The ``user_id`` is always the effective principal id (derived from get_principal)
   so users never share a cache entry — even if they request the same params.
+- Every lookup is counted in ``gym_api_cache_requests_total{endpoint,result}``
+  and every ``invalidate_user`` is timed (app/core/metrics.py).
+
+Single-flight and stale-while-revalidate (``cache_get_or_compute``):
+    After ``invalidate_user`` wipes a user's keys, the Mini App dashboard fires
+    summary / activity / week-compare in parallel and every request misses at
+    once — a per-user thundering herd on the heaviest queries.  On a miss,
+    ``cache_get_or_compute`` takes a per-key lease
+    (``SET lease:{key} <token> NX PX``):
+
+    - the lease holder computes, stores the value and releases the lease
+      (compare-and-delete, so an expired lease re-taken by another worker is
+      never released by the slow one);
+    - everyone else polls the key for up to ``_LEASE_WAIT_S``, then falls back
+      to the stale copy (if any), then to computing on its own — a request is
+      never failed, and never waits longer than the budget, because of a lost
+      lease holder.
+
+    With ``CACHE_STALE_WHILE_REVALIDATE`` on, every stored value also gets a
+    long-lived copy under ``stale:{key}`` that ``invalidate_user`` does NOT
+    delete.  A miss with a stale copy returns it immediately and schedules the
+    recompute as a background task (the caller's ``revalidate``, normally
+    ``BackgroundTasks.add_task``).  Trade-off: right after a mutation the
+    first read shows the pre-write numbers; off by default.
+
+Refresh index (write-behind refresh, ``app.core.cache_refresh``):
+    ``cache_set`` / ``cache_get_or_compute`` called with ``refresh={...}``
+    also record the entry in the per-user hash ``refresh-index:{user_id}``
+    (field = cache key, value = the JSON params needed to recompute it).
+    After a training write, ``refresh_after_write`` reads that hash to decide
+    which entries the write affects and queues exactly those for recompute.
+
+Batched reads / writes (``cache_get_many_raw`` / ``cache_set_many``):
+    Aggregate endpoints (``/analytics/dashboard``) read several entries in ONE
+    pipelined round trip — ``GET`` + ``TTL`` per key — and store every
+    recomputed entry (plus stale copies / refresh index) in one more.  The
+    keys are the single endpoints' own, so both paths share entries.
+
+Entry encoding (``app.core.cache_codec``):
+    Values are stored as compact binary entries (orjson / msgpack, zlib above
+    a size threshold).  Endpoints cache their response-ready body, and
+    ``cache_get_raw`` / ``cache_get_or_compute(raw=True)`` hand a hit back as
+    JSON bytes the endpoint returns unchanged.  Value reads use a client with
+    ``decode_responses=False``.
 """
 import json
 import logging
-from typing import Any, Optional
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
 
 import redis as redis_lib
 
+from app.core import cache_codec
 from app.core.config import get_settings
+from app.core.metrics import (
+    CACHE_INVALIDATE_DURATION,
+    CACHE_REQUESTS,
+    CACHE_SINGLE_FLIGHT,
+    cache_endpoint_of,
+)
 
 logger = logging.getLogger(__name__)
 
 _CACHE_TTL = 90  # seconds
 
+# Single-flight lease.  The TTL bounds how long a crashed lease holder can
+# stall a key; the heaviest guarded compute (summary on a multi-year history)
+# runs well under a second.  Followers poll every _LEASE_POLL_S for at most
+# _LEASE_WAIT_S — sync endpoints hold a threadpool thread while they wait.
+_LEASE_TTL_MS = 10_000
+_LEASE_WAIT_S = 1.5
+_LEASE_POLL_S = 0.05
+
+# How long the stale copy outlives the fresh value (stale-while-revalidate).
+_STALE_TTL = 24 * 3600  # seconds
+
+# The refresh index outlives the entries it describes by one TTL so an entry
+# stored just before the index expires is still refreshable.
+_REFRESH_INDEX_TTL = 2 * _CACHE_TTL  # seconds
 
-def _get_client() -> Optional[redis_lib.Redis]:
+# Deletes the lease only when it still holds OUR token.
+_RELEASE_LEASE_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+def _get_client(decode_responses: bool = True) -> Optional[redis_lib.Redis]:
     """Return a Redis client connected to REDIS_URL, or None on failure.
 
+    Args:
+        decode_responses: ``False`` for clients that read cache entries
+            (binary); key / index / queue work uses the default ``str``
+            responses.
+
     Returns:
         A ``redis.Redis`` instance, or ``None`` if the connection cannot be
         established.  The caller treats ``None`` as a cache miss.
     """
     try:
         settings = get_settings()
-        return redis_lib.from_url(settings.REDIS_URL, decode_responses=True)
+        return redis_lib.from_url(settings.REDIS_URL, decode_responses=decode_responses)
     except Exception as exc:
         logger.warning("cache: failed to create Redis client: %s", exc)
         return None
@@ -58,7 +138,7 @@ def make_key(user_id: int, endpoint: str, **params: Any) -> str:
 
 
 def cache_get(key: str) -> Optional[Any]:
-    """Fetch a JSON value from the cache.
+    """Fetch a value from the cache.
 
     Args:
         key: Cache key produced by ``make_key``.
@@ -66,16 +146,39 @@ def cache_get(key: str) -> Optional[Any]:
     Returns:
         Deserialized Python value, or ``None`` on miss or Redis error.
     """
-    client = _get_client()
+    return _lookup(key, cache_codec.decode)
+
+
+def cache_get_raw(key: str) -> Optional[bytes]:
+    """Fetch a cached response body as JSON bytes, ready to send as-is.
+
+    Args:
+        key: Cache key produced by ``make_key``.
+
+    Returns:
+        The JSON body, or ``None`` on miss or Redis error.
+    """
+    return _lookup(key, cache_codec.to_json)
+
+
+def _lookup(key: str, convert: Callable[[bytes], Any]) -> Optional[Any]:
+    """GET ``key`` and ``convert`` the entry; counts hit / miss / error."""
+    endpoint = cache_endpoint_of(key)
+    client = _get_client(decode_responses=False)
     if client is None:
+        CACHE_REQUESTS.labels(endpoint=endpoint, result="error").inc()
         return None
     try:
         raw = client.get(key)
         if raw is None:
+            CACHE_REQUESTS.labels(endpoint=endpoint, result="miss").inc()
             return None
-        return json.loads(raw)
+        value = convert(raw)
+        CACHE_REQUESTS.labels(endpoint=endpoint, result="hit").inc()
+        return value
     except Exception as exc:
         logger.warning("cache_get(%r) failed: %s", key, exc)
+        CACHE_REQUESTS.labels(endpoint=endpoint, result="error").inc()
         return None
     finally:
         try:
@@ -84,22 +187,133 @@ def cache_get(key: str) -> Optional[Any]:
             pass
 
 
-def cache_set(key: str, value: Any, ttl: int = _CACHE_TTL) -> None:
-    """Store a JSON-serialisable value in the cache with a TTL.
+@dataclass(frozen=True)
+class RawEntry:
+    """One key of a ``cache_get_many_raw`` read.
+
+    Attributes:
+        body: The JSON body on a hit, ``None`` on a miss or Redis error.
+        ttl: Seconds the entry has left on a hit, else ``None``.
+    """
+
+    body: Optional[bytes]
+    ttl: Optional[int]
+
+
+def cache_get_many_raw(keys: Sequence[str]) -> Dict[str, RawEntry]:
+    """Fetch several cached response bodies in one pipelined round trip.
+
+    Every key is counted under its own endpoint label, exactly as a
+    ``cache_get_raw`` of it would be.
+
+    Args:
+        keys: Cache keys produced by ``make_key``.
+
+    Returns:
+        ``{key: RawEntry}`` for every key; all misses on a Redis error.
+    """
+    missing = {key: RawEntry(None, None) for key in keys}
+    client = _get_client(decode_responses=False)
+    if client is None:
+        for key in keys:
+            CACHE_REQUESTS.labels(endpoint=cache_endpoint_of(key), result="error").inc()
+        return missing
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+        replies = pipe.execute()
+        entries: Dict[str, RawEntry] = {}
+        for i, key in enumerate(keys):
+            raw, ttl = replies[2 * i], replies[2 * i + 1]
+            hit = raw is not None
+            CACHE_REQUESTS.labels(
+                endpoint=cache_endpoint_of(key), result="hit" if hit else "miss"
+            ).inc()
+            entries[key] = RawEntry(
+                cache_codec.to_json(raw) if hit else None,
+                # Reason: TTL is -1 / -2 when the key has no expiry / just expired.
+                int(ttl) if hit and ttl is not None and ttl >= 0 else None,
+            )
+        return entries
+    except Exception as exc:
+        logger.warning("cache_get_many(%d keys) failed: %s", len(keys), exc)
+        for key in keys:
+            CACHE_REQUESTS.labels(endpoint=cache_endpoint_of(key), result="error").inc()
+        return missing
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def cache_set_many(
+    entries: Sequence[Tuple[str, Any, Optional[Dict[str, Any]]]],
+    ttl: int = _CACHE_TTL,
+    *,
+    keep_stale: bool = False,
+) -> bool:
+    """Store several values (and their refresh-index params) in one round trip.
+
+    Args:
+        entries: ``(key, value, refresh)`` per entry — as ``cache_set``'s
+            ``key`` / ``value`` / ``refresh``.
+        ttl: Time-to-live in seconds (default 90).
+        keep_stale: Also write the ``stale:`` copies, as
+            ``cache_get_or_compute`` does in stale-while-revalidate mode.
+
+    Returns:
+        True when the entries were stored; errors are logged and swallowed.
+    """
+    if not entries:
+        return True
+    client = _get_client()
+    if client is None:
+        return False
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, value, refresh in entries:
+            _queue_store(pipe, key, cache_codec.encode(value), ttl, keep_stale, refresh)
+        pipe.execute()
+        return True
+    except Exception as exc:
+        logger.warning("cache_set_many(%d keys) failed: %s", len(entries), exc)
+        return False
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def cache_set(
+    key: str,
+    value: Any,
+    ttl: int = _CACHE_TTL,
+    *,
+    refresh: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Store a JSON-compatible value in the cache with a TTL.
 
     Any error is swallowed — the caller's DB result has already been computed
     and must be returned regardless.
 
     Args:
         key: Cache key produced by ``make_key``.
-        value: JSON-serialisable value to store.
+        value: JSON-compatible value to store — for endpoint entries, the
+            response-ready body.
         ttl: Time-to-live in seconds (default 90).
+        refresh: Params the write-behind worker needs to recompute the entry
+            (see "Refresh index" above); ``None`` leaves it unindexed, so a
+            training write simply deletes it.
     """
     client = _get_client()
     if client is None:
         return
     try:
-        client.set(key, json.dumps(value), ex=ttl)
+        _store(client, key, cache_codec.encode(value), ttl, keep_stale=False, refresh=refresh)
     except Exception as exc:
         logger.warning("cache_set(%r) failed: %s", key, exc)
     finally:
@@ -109,6 +323,217 @@ def cache_set(key: str, value: Any, ttl: int = _CACHE_TTL) -> None:
             pass
 
 
+def _lease_key(key: str) -> str:
+    """Single-flight lease key; outside ``analytics:*`` so SCANs skip it."""
+    return f"lease:{key}"
+
+
+def _stale_key(key: str) -> str:
+    """Stale-copy key; outside ``analytics:{uid}:*`` so invalidation keeps it."""
+    return f"stale:{key}"
+
+
+def refresh_index_key(user_id: int) -> str:
+    """Per-user hash of refreshable entries (``cache key -> JSON params``)."""
+    return f"refresh-index:{user_id}"
+
+
+def user_id_of(key: str) -> Optional[int]:
+    """Extract the user id from a ``make_key`` key, or ``None`` if malformed."""
+    parts = key.split(":", 2)
+    if len(parts) < 3 or parts[0] != "analytics" or not parts[1].isdigit():
+        return None
+    return int(parts[1])
+
+
+def _store(
+    client: redis_lib.Redis,
+    key: str,
+    payload: bytes,
+    ttl: int,
+    keep_stale: bool,
+    refresh: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Write the encoded entry (stale copy, refresh index) in one round trip."""
+    if not keep_stale and refresh is None:
+        client.set(key, payload, ex=ttl)
+        return
+    pipe = client.pipeline(transaction=False)
+    _queue_store(pipe, key, payload, ttl, keep_stale, refresh)
+    pipe.execute()
+
+
+def _queue_store(
+    pipe: Any,
+    key: str,
+    payload: bytes,
+    ttl: int,
+    keep_stale: bool,
+    refresh: Optional[Dict[str, Any]],
+) -> None:
+    """Queue ``_store``'s commands for one entry on a (non-transactional) pipeline."""
+    pipe.set(key, payload, ex=ttl)
+    if keep_stale:
+        pipe.set(_stale_key(key), payload, ex=_STALE_TTL)
+    user_id = user_id_of(key) if refresh is not None else None
+    if user_id is not None:
+        index = refresh_index_key(user_id)
+        pipe.hset(index, key, json.dumps(refresh, sort_keys=True))
+        pipe.expire(index, _REFRESH_INDEX_TTL)
+
+
+def _compute_under_lease(
+    client: redis_lib.Redis,
+    key: str,
+    compute: Callable[[], Any],
+    ttl: int,
+    keep_stale: bool,
+    refresh: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """Take the lease, compute and store; otherwise wait for the holder.
+
+    Redis errors after the lease is taken are logged and swallowed — the
+    computed value is returned regardless.  Exceptions raised by ``compute``
+    release the lease and propagate to the caller unchanged.
+
+    Returns:
+        The encoded entry of the computed (or concurrently cached / stale)
+        value.
+    """
+    endpoint = cache_endpoint_of(key)
+    token = uuid.uuid4().hex
+    lease = _lease_key(key)
+    if client.set(lease, token, nx=True, px=_LEASE_TTL_MS):
+        CACHE_SINGLE_FLIGHT.labels(endpoint=endpoint, outcome="leader").inc()
+        try:
+            payload = cache_codec.encode(compute())
+            try:
+                _store(client, key, payload, ttl, keep_stale, refresh)
+            except Exception as exc:
+                logger.warning("cache store(%r) failed: %s", key, exc)
+            return payload
+        finally:
+            try:
+                client.eval(_RELEASE_LEASE_LUA, 1, lease, token)
+            except Exception as exc:
+                logger.warning("cache lease release(%r) failed: %s", key, exc)
+
+    deadline = time.monotonic() + _LEASE_WAIT_S
+    while time.monotonic() < deadline:
+        time.sleep(_LEASE_POLL_S)
+        raw = client.get(key)
+        if raw is not None:
+            CACHE_SINGLE_FLIGHT.labels(endpoint=endpoint, outcome="waited").inc()
+            return raw
+    stale = client.get(_stale_key(key)) if keep_stale else None
+    if stale is not None:
+        CACHE_SINGLE_FLIGHT.labels(endpoint=endpoint, outcome="stale").inc()
+        return stale
+    CACHE_SINGLE_FLIGHT.labels(endpoint=endpoint, outcome="timeout").inc()
+    return cache_codec.encode(compute())
+
+
+def _revalidate(
+    key: str,
+    compute: Callable[[], Any],
+    ttl: int,
+    refresh: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Background refresh for stale-while-revalidate (single-flight as well)."""
+    client = _get_client()
+    if client is None:
+        return
+    token = uuid.uuid4().hex
+    lease = _lease_key(key)
+    try:
+        if client.set(lease, token, nx=True, px=_LEASE_TTL_MS):
+            try:
+                payload = cache_codec.encode(compute())
+                _store(client, key, payload, ttl, keep_stale=True, refresh=refresh)
+            finally:
+                client.eval(_RELEASE_LEASE_LUA, 1, lease, token)
+    except Exception as exc:
+        logger.warning("cache revalidate(%r) failed: %s", key, exc)
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def cache_get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    *,
+    ttl: int = _CACHE_TTL,
+    revalidate: Optional[Callable[..., Any]] = None,
+    refresh: Optional[Dict[str, Any]] = None,
+    raw: bool = False,
+) -> Any:
+    """Return the cached value for ``key``, computing it at most once per miss.
+
+    See the module docstring for the single-flight / stale-while-revalidate
+    protocol.  Any Redis error degrades to a plain ``compute()`` — a cache
+    failure never fails the request.
+
+    Args:
+        key: Cache key produced by ``make_key``.
+        compute: Zero-arg callable returning the JSON-serialisable value.
+        ttl: Time-to-live of the fresh value in seconds (default 90).
+        revalidate: Task scheduler used for the background refresh in
+            stale-while-revalidate mode, called as
+            ``revalidate(fn, *args)`` — pass ``BackgroundTasks.add_task``.
+            ``None`` disables serving stale on this call.
+        refresh: Params for the refresh index (see ``cache_set``).
+        raw: Return the JSON response body (``bytes``) instead of the
+            decoded value — on a hit the stored bytes as-is.
+
+    Returns:
+        The cached or freshly computed value (JSON bytes with ``raw``).
+    """
+    endpoint = cache_endpoint_of(key)
+    keep_stale = get_settings().CACHE_STALE_WHILE_REVALIDATE
+    convert = cache_codec.to_json if raw else cache_codec.decode
+
+    def _uncached() -> Any:
+        value = compute()
+        return cache_codec.dumps_json(value) if raw else value
+
+    client = _get_client(decode_responses=False)
+    if client is None:
+        CACHE_REQUESTS.labels(endpoint=endpoint, result="error").inc()
+        return _uncached()
+    try:
+        try:
+            if keep_stale and revalidate is not None:
+                entry, stale = client.mget(key, _stale_key(key))
+            else:
+                entry, stale = client.get(key), None
+        except Exception as exc:
+            logger.warning("cache_get(%r) failed: %s", key, exc)
+            CACHE_REQUESTS.labels(endpoint=endpoint, result="error").inc()
+            return _uncached()
+        if entry is not None:
+            CACHE_REQUESTS.labels(endpoint=endpoint, result="hit").inc()
+            return convert(entry)
+        CACHE_REQUESTS.labels(endpoint=endpoint, result="miss").inc()
+        if stale is not None:
+            CACHE_SINGLE_FLIGHT.labels(endpoint=endpoint, outcome="revalidate").inc()
+            revalidate(_revalidate, key, compute, ttl, refresh)
+            return convert(stale)
+        try:
+            entry = _compute_under_lease(client, key, compute, ttl, keep_stale, refresh)
+        except redis_lib.RedisError as exc:
+            logger.warning("cache single-flight(%r) failed: %s", key, exc)
+            return _uncached()
+        return convert(entry)
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
 def invalidate_user(user_id: int) -> None:
     """Delete all analytics cache keys for a user.
 
@@ -122,6 +547,7 @@ def invalidate_user(user_id: int) -> None:
     Args:
         user_id: The effective principal id whose cache entries to purge.
     """
+    start = time.perf_counter()
     client = _get_client()
     if client is None:
         return
@@ -142,3 +568,4 @@ def invalidate_user(user_id: int) -> None:
             client.close()
         except Exception:
             pass
+        CACHE_INVALIDATE_DURATION.observe(time.perf_counter() - start)
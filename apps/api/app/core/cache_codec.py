@@ -0,0 +1,135 @@
+"""Encoding of analytics cache entries (``app.core.cache``).
+
+Entries are stored in RESPONSE-READY form: the value an endpoint caches is
+already its response body as FastAPI would serialize it (see
+``_response_ready`` in ``analytics_router``), so a hit is served as raw JSON
+bytes — no ``json.loads``, no pydantic model rebuilt item by item.
+
+Entry layout (bytes under ``analytics:*`` / ``stale:*``):
+
+    <header byte><body>
+    header & 0x7F   body format: 0x01 JSON (UTF-8), 0x02 MessagePack
+    header & 0x80   body is zlib-compressed
+
+Design choices:
+- JSON is encoded with ``orjson`` when it is installed (several times faster
+  than the stdlib and already UTF-8 bytes), else ``json`` — the bytes are
+  interchangeable, so mixed deployments read each other's entries.
+- ``CACHE_SERIALIZER=msgpack`` stores MessagePack instead (smaller for
+  number-heavy series).  A hit then costs a decode + JSON re-encode, so JSON
+  stays the default; an unavailable format falls back to JSON with a warning.
+- Bodies of ``CACHE_COMPRESS_MIN_BYTES`` or more are zlib-compressed at level
+  1 (long ``exercise-progress`` series shrink 5-10x); 0 disables compression.
+- Entries written before this layout (plain ``json.dumps`` text) start with a
+  printable JSON character, never a header byte, and still decode.
+"""
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from app.core.config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover — orjson is in requirements.txt
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+_COMPRESSED = 0x80
+_ZLIB_LEVEL = 1
+
+
+def dumps_json(value: Any) -> bytes:
+    """Compact UTF-8 JSON, the body FastAPI's ``JSONResponse`` would send."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads_json(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+@dataclass(frozen=True)
+class _Format:
+    code: int
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+_FORMATS: Dict[str, _Format] = {"json": _Format(0x01, dumps_json, _loads_json)}
+if msgpack is not None:
+    _FORMATS["msgpack"] = _Format(
+        0x02,
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda body: msgpack.unpackb(body, raw=False, strict_map_key=False),
+    )
+_BY_CODE = {fmt.code: fmt for fmt in _FORMATS.values()}
+
+
+@lru_cache(maxsize=None)
+def _format_named(name: str) -> _Format:
+    fmt = _FORMATS.get(name)
+    if fmt is None:
+        logger.warning("cache: serializer %r unavailable, using json", name)
+        return _FORMATS["json"]
+    return fmt
+
+
+def encode(value: Any) -> bytes:
+    """Encode a JSON-compatible value as a cache entry.
+
+    Args:
+        value: Response-ready value (dicts / lists / str / numbers / None).
+
+    Returns:
+        Header byte + (possibly compressed) body.
+    """
+    settings = get_settings()
+    fmt = _format_named(settings.CACHE_SERIALIZER)
+    body = fmt.dumps(value)
+    threshold = settings.CACHE_COMPRESS_MIN_BYTES
+    if threshold and len(body) >= threshold:
+        return bytes((fmt.code | _COMPRESSED,)) + zlib.compress(body, _ZLIB_LEVEL)
+    return bytes((fmt.code,)) + body
+
+
+def _split(entry: Union[bytes, str]) -> Tuple[Optional[_Format], bytes]:
+    """Return ``(format, plain body)``; format ``None`` = legacy JSON text."""
+    if isinstance(entry, str):
+        return None, entry.encode("utf-8")
+    header = entry[0] if entry else 0
+    fmt = _BY_CODE.get(header & ~_COMPRESSED)
+    if fmt is None:
+        return None, entry
+    body = entry[1:]
+    if header & _COMPRESSED:
+        body = zlib.decompress(body)
+    return fmt, body
+
+
+def decode(entry: Union[bytes, str]) -> Any:
+    """Decode a cache entry back to its Python value."""
+    fmt, body = _split(entry)
+    return (fmt or _FORMATS["json"]).loads(body)
+
+
+def to_json(entry: Union[bytes, str]) -> bytes:
+    """Return a cache entry as a JSON response body.
+
+    JSON entries are returned as stored (decompressed if needed); only other
+    formats are decoded and re-encoded.
+    """
+    fmt, body = _split(entry)
+    if fmt is None or fmt.code == _FORMATS["json"].code:
+        return body
+    return dumps_json(fmt.loads(body))
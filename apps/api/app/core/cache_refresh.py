@@ -0,0 +1,343 @@
+"""Write-behind refresh of the analytics cache after training mutations.
+
+Before this module every training write called ``invalidate_user(uid)``,
+which deleted ALL of the user's ``analytics:{uid}:*`` entries.  The bot's
+very next call after logging a set (``/analytics/log-context`` for the next
+set) and the Mini App's dashboard refetch then always missed and paid the
+full recompute on the request path.
+
+``refresh_after_write(uid, writes)`` replaces that purge at the mutation
+sites (post-commit, like the call it replaces):
+
+    1. SCAN the user's keys and read the refresh index
+       (``refresh-index:{uid}``, written by ``cache_set`` /
+       ``cache_get_or_compute`` with ``refresh=...``).
+    2. Classify every key against the written ``(exercise_id, day)`` pairs
+       (``is_affected``): the summary, recent-exercises and top-muscles
+       always change; an activity range only when it contains a written day;
+       week-compare only for writes in the last two weeks; the exercise-scoped
+       entries (log-context, exercise-trend, exercise_progress) only for the
+       written exercise(s).  Unaffected entries stay cached.
+    3. In ONE pipeline: bump the user's refresh generation, delete the
+       affected (and any unindexed) keys, and add the refreshable ones to
+       ``refresh-pending:{uid}``.  The delete keeps reads correct whether or
+       not the worker is running — the refresh is purely a warm-up.
+    4. Enqueue the ``cache.refresh`` background job (``app.core.jobs``) for
+       the user, deduplicated on ``cache-refresh:{uid}`` — a burst of five
+       logged sets produces one job.
+
+The job (run by ``python -m app.core.jobs worker``) drains the user's pending
+keys and recomputes each through the refresher registered for its endpoint
+(``register_refresher``, done next to the endpoint code in
+``analytics_router``) on an RLS-scoped session for that user.
+
+Design choices:
+- The worker stores a value only if the user's generation is unchanged since
+  it started (Lua compare-and-set).  A write that commits while a refresh is
+  computing bumps the generation AND deletes the key, so a pre-write value is
+  never written back over it; that write's own job refreshes the key again.
+- Refreshing is best-effort: a missing worker, a Redis error or a failed
+  recompute only costs the next read a miss — exactly the old behaviour.
+- ``CACHE_WRITE_BEHIND=false`` restores the plain ``invalidate_user`` purge.
+- Either way the write ends with ``events.publish_training_change``, which
+  tells an open Mini App which (exercise, day) pairs to refetch.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import redis as redis_lib
+from sqlalchemy.orm import Session
+
+from app.core import cache_codec
+from app.core.cache import (
+    _CACHE_TTL,
+    _REFRESH_INDEX_TTL,
+    _get_client,
+    invalidate_user,
+    refresh_index_key,
+)
+from app.core.config import get_settings
+from app.core.events import publish_training_change
+from app.core.jobs import enqueue, job
+from app.core.metrics import CACHE_INVALIDATE_DURATION, CACHE_WRITE_BEHIND, cache_endpoint_of
+
+logger = logging.getLogger(__name__)
+
+REFRESH_JOB = "cache.refresh"
+
+# How long a queued job's dedup key / the pending set may outlive a dead worker.
+_DEDUP_TTL = 60  # seconds
+_PENDING_TTL = _REFRESH_INDEX_TTL
+
+# Entries whose value depends on the exercise they were computed for; their
+# refresh params carry the resolved ``exercise_id``.
+EXERCISE_SCOPED = ("log-context", "exercise-trend", "exercise_progress")
+
+# Stores the recomputed value only if no write happened since the worker read
+# the generation.  KEYS: entry, generation, index.  ARGV: generation seen,
+# payload, ttl, index field value, index ttl.
+_STORE_IF_CURRENT_LUA = (
+    "if (redis.call('get', KEYS[2]) or '') ~= ARGV[1] then return 0 end "
+    "redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3]) "
+    "redis.call('hset', KEYS[3], KEYS[1], ARGV[4]) "
+    "redis.call('expire', KEYS[3], ARGV[5]) "
+    "return 1"
+)
+
+
+def _pending_key(user_id: int) -> str:
+    return f"refresh-pending:{user_id}"
+
+
+def _dedup_key(user_id: int) -> str:
+    return f"cache-refresh:{user_id}"
+
+
+def _generation_key(user_id: int) -> str:
+    return f"refresh-gen:{user_id}"
+
+
+@dataclass(frozen=True)
+class TrainingWrite:
+    """One training row touched by a mutation, as the cache sees it.
+
+    Attributes:
+        exercise_id: Exercise the row belongs (or belonged) to.
+        day: UTC calendar day of the row's ``date``.
+    """
+
+    exercise_id: int
+    day: date
+
+
+def training_write(exercise_id: int, when: datetime) -> TrainingWrite:
+    """Build a ``TrainingWrite`` from a training row's columns."""
+    return TrainingWrite(exercise_id=int(exercise_id), day=when.date())
+
+
+# ``refresher(db, uid, params) -> value`` recomputes one entry from the params
+# its endpoint stored in the refresh index; ``None`` means "do not cache".
+Refresher = Callable[[Session, int, Dict[str, Any]], Optional[Any]]
+
+_REFRESHERS: Dict[str, Refresher] = {}
+
+
+def register_refresher(endpoint: str, refresher: Refresher) -> None:
+    """Register the recompute function for a ``make_key`` endpoint name.
+
+    Args:
+        endpoint: Endpoint segment of the cache key, e.g. ``"summary"``.
+        refresher: ``(db, uid, params) -> JSON value or None``.
+
+    Raises:
+        ValueError: When ``endpoint`` already has a refresher.
+    """
+    if endpoint in _REFRESHERS:
+        raise ValueError(f"refresher for {endpoint!r} is already registered")
+    _REFRESHERS[endpoint] = refresher
+
+
+def is_affected(
+    endpoint: str,
+    params: Dict[str, Any],
+    writes: Sequence[TrainingWrite],
+    today: date,
+) -> bool:
+    """Decide whether a cached entry can change because of ``writes``.
+
+    Day comparisons allow one day of slack either side: ``TrainingWrite.day``
+    is a UTC day while tz-aware entries bucket by the user's local day.
+
+    Args:
+        endpoint: ``make_key`` endpoint name of the entry.
+        params: The entry's refresh-index params.
+        writes: Rows touched by the mutation.
+        today: Current UTC date (week-compare window anchor).
+
+    Returns:
+        ``False`` only when the entry provably does not depend on any write.
+    """
+    slack = timedelta(days=1)
+    if endpoint in EXERCISE_SCOPED:
+        exercise_id = params.get("exercise_id")
+        return exercise_id is None or any(w.exercise_id == exercise_id for w in writes)
+    if endpoint == "activity":
+        try:
+            frm = date.fromisoformat(params["frm"]) - slack
+            to = date.fromisoformat(params["to"]) + slack
+        except (KeyError, TypeError, ValueError):
+            return True
+        return any(frm <= w.day <= to for w in writes)
+    if endpoint == "week-compare":
+        # [last Monday, next Monday) never starts more than 13 days back.
+        return any(w.day >= today - timedelta(days=14) - slack for w in writes)
+    return True
+
+
+def refresh_after_write(user_id: int, writes: Iterable[TrainingWrite]) -> None:
+    """Drop the entries a training write affects and queue their recompute.
+
+    Call AFTER the mutation commits.  Never raises: a Redis error is logged
+    and the request proceeds (the affected keys then expire on their TTL,
+    as with ``invalidate_user``).  Ends by publishing the change event for
+    ``GET /events`` (``app.core.events``).
+
+    Args:
+        user_id: The effective principal id that wrote.
+        writes: The touched rows — both sides of a move.
+    """
+    writes = list(writes)
+    if get_settings().CACHE_WRITE_BEHIND:
+        _purge_affected(user_id, writes)
+    else:
+        invalidate_user(user_id)
+    # After the purge: a client refetching on the event misses the dropped keys.
+    publish_training_change(user_id, writes)
+
+
+def _purge_affected(user_id: int, writes: List[TrainingWrite]) -> None:
+    """Write-behind half of ``refresh_after_write``: drop / queue the affected keys."""
+    start = time.perf_counter()
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        keys: List[str] = []
+        cursor = 0
+        while True:
+            cursor, batch = client.scan(cursor, match=f"analytics:{user_id}:*", count=100)
+            keys.extend(batch)
+            if cursor == 0:
+                break
+        index = client.hgetall(refresh_index_key(user_id)) if keys else {}
+
+        today = datetime.utcnow().date()
+        drop: List[str] = []
+        refresh: List[str] = []
+        for key in keys:
+            endpoint = cache_endpoint_of(key)
+            raw = index.get(key)
+            if raw is None or endpoint not in _REFRESHERS:
+                drop.append(key)
+                CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome="dropped").inc()
+            elif is_affected(endpoint, json.loads(raw), writes, today):
+                refresh.append(key)
+                CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome="queued").inc()
+            else:
+                CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome="kept").inc()
+
+        pipe = client.pipeline(transaction=True)
+        pipe.incr(_generation_key(user_id))
+        pipe.expire(_generation_key(user_id), _PENDING_TTL)
+        if drop or refresh:
+            pipe.delete(*(drop + refresh))
+        if refresh:
+            pipe.sadd(_pending_key(user_id), *refresh)
+            pipe.expire(_pending_key(user_id), _PENDING_TTL)
+        pipe.execute()
+
+        if refresh:
+            enqueue(REFRESH_JOB, dedup_key=_dedup_key(user_id), user_id=user_id)
+    except Exception as exc:
+        logger.warning("refresh_after_write(user_id=%s) failed: %s", user_id, exc)
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+        CACHE_INVALIDATE_DURATION.observe(time.perf_counter() - start)
+
+
+@contextmanager
+def _user_session(user_id: int):
+    """RLS-scoped session acting as ``user_id`` (same wiring as ``get_db``)."""
+    from app.core.database import get_db
+
+    gen = get_db({"user_id": user_id, "role": "user"})
+    db = next(gen)
+    try:
+        yield db
+    finally:
+        gen.close()
+
+
+def refresh_user(client: redis_lib.Redis, user_id: int) -> int:
+    """Recompute every pending entry of one user.
+
+    Args:
+        client: Redis client (``decode_responses=True``).
+        user_id: User whose ``refresh-pending`` set to drain.
+
+    Returns:
+        Number of entries stored.
+    """
+    generation = client.get(_generation_key(user_id)) or ""
+    pipe = client.pipeline(transaction=True)
+    pipe.smembers(_pending_key(user_id))
+    pipe.delete(_pending_key(user_id))
+    keys = sorted(pipe.execute()[0])
+    if not keys:
+        return 0
+    index_key = refresh_index_key(user_id)
+    specs = client.hmget(index_key, keys)
+
+    stored = 0
+    with _user_session(user_id) as db:
+        for key, raw in zip(keys, specs):
+            endpoint = cache_endpoint_of(key)
+            refresher = _REFRESHERS.get(endpoint)
+            if raw is None or refresher is None:
+                CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome="skipped").inc()
+                continue
+            try:
+                value = refresher(db, user_id, json.loads(raw))
+            except Exception as exc:  # noqa: BLE001 — next read recomputes
+                logger.warning("cache refresh(%r) failed: %s", key, exc)
+                CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome="error").inc()
+                continue
+            finally:
+                db.rollback()  # read-only; ends the transaction per entry
+            if value is None:
+                CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome="skipped").inc()
+                continue
+            ok = client.eval(
+                _STORE_IF_CURRENT_LUA,
+                3,
+                key,
+                _generation_key(user_id),
+                index_key,
+                generation,
+                cache_codec.encode(value),
+                _CACHE_TTL,
+                raw,
+                _REFRESH_INDEX_TTL,
+            )
+            outcome = "stored" if ok else "superseded"
+            CACHE_WRITE_BEHIND.labels(endpoint=endpoint, outcome=outcome).inc()
+            stored += 1 if ok else 0
+    return stored
+
+
+@job(REFRESH_JOB, max_retries=0, dedup_ttl=_DEDUP_TTL)
+def refresh_user_job(user_id: int) -> None:
+    """Background job: refresh one user's pending entries.
+
+    Not retried — the pending set is drained up front, so a rerun would find
+    nothing; a failed entry just costs the next read a miss.
+    """
+    # Importing the router registers its refreshers.
+    from app.api.v1 import analytics_router  # noqa: F401
+
+    client = _get_client()
+    if client is None:
+        raise RuntimeError("cache refresh: cannot create a Redis client")
+    try:
+        stored = refresh_user(client, user_id)
+        logger.debug("cache refresh: user_id=%s stored=%d", user_id, stored)
+    finally:
+        client.close()
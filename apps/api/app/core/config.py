@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -38,6 +38,60 @@ class Settings(BaseSettings):
     # Override via REDIS_URL env var; not a secret (no credentials in the default).
     REDIS_URL: str = "redis://gymbot_redis:6379/1"
 
+    # Serve the previous analytics value on a miss and recompute it in the
+    # background (app/core/cache.py).  Off: a miss waits for the single-flight
+    # recompute, so reads right after a write are always fresh.
+    CACHE_STALE_WHILE_REVALIDATE: bool = False
+
+    # After a training write, delete only the analytics entries it affects and
+    # queue them for recompute by the cache-refresh worker
+    # (app/core/cache_refresh.py).  Off: purge every analytics:{uid}:* key.
+    CACHE_WRITE_BEHIND: bool = True
+
+    # PUT /users/me records last_interaction in Redis and a background job
+    # writes all recorded users in one UPDATE at most this often
+    # (app/services/user_profile.py).  0: write it with every upsert.
+    USER_TOUCH_FLUSH_SECONDS: float = 60.0
+
+    # GET /events (app/core/events.py): a ": ping" comment after this many
+    # quiet seconds, and streams end after EVENTS_STREAM_SECONDS (the client
+    # reconnects, re-checking its JWT).
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_STREAM_SECONDS: float = 600.0
+
+    # Analytics cache entry format (app/core/cache_codec.py): "json" entries
+    # are served to clients as stored; "msgpack" is smaller but re-encoded on
+    # every hit.  Bodies of CACHE_COMPRESS_MIN_BYTES or more are zlib-compressed
+    # (0 = never).
+    CACHE_SERIALIZER: str = "json"
+    CACHE_COMPRESS_MIN_BYTES: int = 4096
+
+    # gzip / brotli response compression (app/middleware/compression.py) for
+    # bodies of at least this many bytes; 0 disables the middleware.
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+
+    # Server-side PREPARE of the hot registered queries on every pooled
+    # connection (app/core/prepared.py).  Set to false when the API talks to
+    # Postgres through a transaction-pooling PgBouncer.
+    DB_PREPARED_STATEMENTS: bool = True
+
+    # Optional hot-standby streaming replica for the read-only analytics and
+    # history GETs (app/core/read_routing.py), reached with the APP_DB_*
+    # credentials.  Empty host: every read uses the primary.  The port
+    # defaults to DB_PORT.
+    DB_REPLICA_HOST: str = ""
+    DB_REPLICA_PORT: str = ""
+    # After a user's write commits, that user's reads stay on the primary for
+    # this many seconds (read-your-writes); keep it above the replica's usual
+    # replay lag.
+    DB_REPLICA_STICKY_SECONDS: float = 5.0
+
+    # Engine behind the history-wide analytics (summary, week-compare,
+    # exercise-trend, /training/days PR flags): "sql" runs each endpoint's own
+    # queries; "snapshot" slices one cached columnar load of the user's history
+    # (app/services/analytics_snapshot.py).
+    ANALYTICS_ENGINE: str = "sql"
+
     # CORS — comma-separated list of allowed origins.
     # Override via CORS_ALLOW_ORIGINS env var in production.
     CORS_ALLOW_ORIGINS: str = "https://gymbot.olykov.com"
@@ -94,6 +148,21 @@ class Settings(BaseSettings):
         )
 
 
+    @property
+    def APP_REPLICA_DATABASE_URL(self) -> Optional[str]:
+        """Runtime URL of the read replica as app_rw, or None when unset.
+
+        Same role and database as ``APP_DATABASE_URL``: a physical replica
+        carries the roles and the RLS policies of the primary.
+        """
+        if not self.DB_REPLICA_HOST:
+            return None
+        return (
+            f"postgresql://{self.APP_DB_USER}:{self.APP_DB_PASSWORD}"
+            f"@{self.DB_REPLICA_HOST}:{self.DB_REPLICA_PORT or self.DB_PORT}/{self.DB_NAME}"
+        )
+
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
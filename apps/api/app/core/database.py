@@ -11,14 +11,29 @@ RLS GUC injection — session.info approach (GYM-37):
         session.info['app_role']    = principal['role'] or ''
 
     A ``Session after_begin`` event listener runs at the start of every
-    transaction and reads from ``session.info`` (NOT from contextvars) to emit:
+    transaction and reads from ``session.info`` (NOT from contextvars) to arm:
 
-        SELECT set_config('app.user_id', :uid, true),
-               set_config('app.role',    :role, true)
+        SELECT set_config('app.user_id', '<uid>', true),
+               set_config('app.role',    '<role>', true);
 
     with ``is_local=true`` so the values reset automatically at transaction end,
     preventing any leakage across pooled connections.
 
+    Zero extra round trips: the armed statement is not executed on its own;
+    an ``Engine.before_cursor_execute`` hook prepends it to the transaction's
+    first statement (one simple-query message, psycopg2 returns the LAST
+    result).  Values are inlined only after a strict shape check (digits /
+    lowercase role); anything else falls back to a separate bound-parameter
+    ``set_config``.  ``python -m bench.roundtrips`` measures statements per
+    request with and without the fold.
+
+Prepared hot queries (``app.core.prepared``):
+    With ``DB_PREPARED_STATEMENTS`` on (the default) every pooled connection
+    PREPAREs the ``prepare=True`` registered queries when it is opened, and
+    the same ``before_cursor_execute`` hook swaps those statements for
+    ``EXECUTE`` BEFORE prepending the RLS prefix, so a prepared hot query
+    still carries the transaction's ``set_config``.
+
     Why session.info, not contextvars (GYM-37):
         FastAPI runs each sync dependency and the sync endpoint body in SEPARATE
         ``anyio.to_thread.run_sync`` calls, each receiving its own
@@ -40,9 +55,20 @@ RLS GUC injection — session.info approach (GYM-37):
     Pre-wired FastAPI dependency helpers exported from this module:
         ``get_db_for_principal`` — depends on ``get_principal``; use on all
             bot/user-facing routes.
+        ``get_read_db_for_principal`` — same, for the read-only analytics
+            and history GETs: a read-replica session when one is configured.
         ``get_db_for_admin`` — depends on ``require_admin``; use on admin
             catalog routes.
 
+Read replica (``app.core.read_routing``):
+    With ``DB_REPLICA_HOST`` set, ``replica_engine`` / ``ReadSessionLocal``
+    connect as the same ``app_rw`` role to a hot-standby streaming replica,
+    with the same ``after_begin`` GUC wiring and prepared hot queries.
+    ``get_read_db_for_principal`` picks the replica unless the user committed
+    a write within ``DB_REPLICA_STICKY_SECONDS`` (the ``after_commit``
+    listener below marks them) or the replica is failing.  Unset: both names
+    are ``None`` and every session is a primary one.
+
 Event choice — ``Session.after_begin``:
     ``after_begin`` fires after SQLAlchemy begins a new DBAPI transaction.  It
     receives the live DBAPI connection so we can execute raw SQL without going
@@ -51,13 +77,19 @@ Event choice — ``Session.after_begin``:
     are always fresh for the current transaction.
 """
 import logging
+import re
 from typing import Generator, Optional
 
 from fastapi import Depends
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
+from app.core import read_routing
 from app.core.config import get_settings
+from app.core.metrics import InstrumentedQueuePool, track_pool_checked_out
+from app.core.prepared import enable_prepared_statements, execute_prepared
 from app.middleware.permissions import (
     Principal,
     get_current_user,
@@ -70,24 +102,67 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Runtime engine — connects as app_rw; RLS policies apply.
-engine = create_engine(settings.APP_DATABASE_URL)
+# InstrumentedQueuePool is a plain QueuePool that also exports checkout count
+# and wait time to /metrics (app/core/metrics.py).
+engine = create_engine(settings.APP_DATABASE_URL, poolclass=InstrumentedQueuePool)
+track_pool_checked_out(engine.pool.checkedout)
+if settings.DB_PREPARED_STATEMENTS:
+    enable_prepared_statements(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+# connection.info key holding the set_config prefix for the NEXT statement of
+# the current transaction (see _set_rls_gucs / _fold_rls_gucs).
+_PENDING_GUCS_KEY = "app_rls_pending_gucs"
+
+# Only these shapes are ever inlined as SQL literals; anything else takes the
+# bound-parameter fallback.  user_id is a Telegram id (digits), role is one of
+# the fixed principal roles ('user', 'admin', ...).
+_INLINE_UID_RE = re.compile(r"^-?[0-9]*$")
+_INLINE_ROLE_RE = re.compile(r"^[a-z_]*$")
+
+
+def _rls_guc_prefix(uid: str, role: str) -> Optional[str]:
+    """Build the ``set_config`` statement prepended to a transaction's first query.
+
+    Args:
+        uid: ``session.info['app_user_id']`` (digits or ``''``).
+        role: ``session.info['app_role']`` (lowercase role name or ``''``).
+
+    Returns:
+        ``"SELECT set_config(...), set_config(...); "`` with both values
+        inlined, or ``None`` when either value does not match the strict
+        literal-safe shape.
+    """
+    if not (_INLINE_UID_RE.match(uid) and _INLINE_ROLE_RE.match(role)):
+        return None
+    return (
+        f"SELECT set_config('app.user_id', '{uid}', true),"
+        f" set_config('app.role', '{role}', true); "
+    )
+
+
 @event.listens_for(SessionLocal, "after_begin")
 def _set_rls_gucs(session: Session, transaction: object, connection: object) -> None:
-    """Inject per-request RLS GUCs at the start of every transaction.
+    """Arm the per-request RLS GUCs for the transaction that just began.
 
     Reads ``session.info['app_user_id']`` and ``session.info['app_role']``
-    (populated by ``get_db`` from the resolved principal) and emits a
-    ``set_config`` call with ``is_local=true`` so the GUC resets automatically
-    at transaction end.
+    (populated by ``get_db`` from the resolved principal).  Instead of
+    executing ``set_config`` here — a full extra round trip per transaction,
+    paid again after every mid-request commit (``create_exercise``,
+    ``move_training``) — the statement is stashed on ``connection.info`` and
+    ``_fold_rls_gucs`` prepends it to the transaction's FIRST statement, so
+    Postgres receives ``SELECT set_config(...), set_config(...); <query>`` in
+    one simple-query message.  ``is_local=true`` still resets the GUCs at
+    transaction end.
 
     Falls back to ``''`` for any missing key — fail-closed: the RLS policy's
-    ``nullif(..., '')::bigint`` evaluates to NULL, matching no row.
+    ``nullif(..., '')::bigint`` evaluates to NULL, matching no row.  Values
+    that are not literal-safe (see ``_rls_guc_prefix``) take the old path: a
+    separate ``set_config`` with bound parameters.
 
     Uses ``session.info`` (not contextvars) so the GUC is always visible to
     the endpoint-body threadpool call regardless of contextvar propagation
@@ -101,13 +176,96 @@ def _set_rls_gucs(session: Session, transaction: object, connection: object) ->
     uid = session.info.get("app_user_id", "")
     role = session.info.get("app_role", "")
     logger.debug("after_begin: set_config user_id=%r role=%r", uid, role)
-    connection.execute(
-        text(
-            "SELECT set_config('app.user_id', :uid, true),"
-            " set_config('app.role', :role, true)"
-        ),
-        {"uid": uid, "role": role},
-    )
+    prefix = _rls_guc_prefix(uid, role)
+    if prefix is None:
+        connection.execute(
+            text(
+                "SELECT set_config('app.user_id', :uid, true),"
+                " set_config('app.role', :role, true)"
+            ),
+            {"uid": uid, "role": role},
+        )
+        return
+    connection.info[_PENDING_GUCS_KEY] = prefix
+
+
+# Read replica — optional; same role, RLS wiring and prepared statements.
+replica_engine: Optional[Engine] = None
+ReadSessionLocal: Optional[sessionmaker] = None
+if settings.APP_REPLICA_DATABASE_URL:
+    replica_engine = create_engine(settings.APP_REPLICA_DATABASE_URL)
+    if settings.DB_PREPARED_STATEMENTS:
+        enable_prepared_statements(replica_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    event.listen(ReadSessionLocal, "after_begin", _set_rls_gucs)
+
+    @event.listens_for(replica_engine, "handle_error")
+    def _replica_failed(context) -> None:
+        """Skip a replica that dropped a connection for a while."""
+        if context.is_disconnect:
+            read_routing.mark_replica_down(context.original_exception)
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_to_primary(session: Session) -> None:
+    """Keep the committing user's reads on the primary (read-your-writes).
+
+    Registered on the ``Session`` class so the sessionmakers the tests build
+    are covered too.  A no-op without a replica.
+
+    Args:
+        session: The session whose transaction just committed.
+    """
+    if ReadSessionLocal is None:
+        return
+    read_routing.mark_written(session.info.get("app_user_id", ""))
+
+
+@event.listens_for(Engine, "before_cursor_execute", retval=True)
+def _fold_rls_gucs(conn, cursor, statement, parameters, context, executemany):
+    """Prepend the armed ``set_config`` prefix to the transaction's first statement.
+
+    Registered on the ``Engine`` CLASS so every engine — the runtime pool and
+    the NullPool engines the tests build around ``_set_rls_gucs`` — honours
+    the armed prefix.  A no-op (one dict lookup) when nothing is armed.
+
+    A prepared hot query is first rewritten to its ``EXECUTE`` form
+    (``execute_prepared``; a no-op on engines without prepared statements).
+    Both steps live in this one listener because class-level listeners run
+    before per-engine ones, and the prefix must wrap the FINAL statement.
+
+    psycopg2 server-side (named) cursors wrap the statement in ``DECLARE``,
+    which accepts a single statement; those run the prefix on a plain cursor
+    first (one extra round trip, streaming reads only).
+
+    Returns:
+        ``(statement, parameters)`` for the DBAPI ``execute`` call.
+    """
+    statement, parameters = execute_prepared(conn, cursor, statement, parameters, executemany)
+    prefix = conn.info.pop(_PENDING_GUCS_KEY, None)
+    if prefix is None:
+        return statement, parameters
+    if getattr(cursor, "name", None):
+        with cursor.connection.cursor() as plain:
+            plain.execute(prefix)
+        return statement, parameters
+    return prefix + statement, parameters
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _disarm_rls_gucs(conn) -> None:
+    """Drop an armed prefix that no statement consumed before the transaction ended.
+
+    ``connection.info`` lives as long as the POOLED connection, so a prefix
+    left behind (a transaction that began and ended without a query) must not
+    be applied to whichever transaction checks the connection out next.
+    An invalidated connection (disconnect, stale prepared statements) has
+    no DBAPI connection left to disarm — its ``info`` went with it.
+    """
+    if conn.invalidated:
+        return
+    conn.info.pop(_PENDING_GUCS_KEY, None)
 
 
 def get_db(principal: Optional[dict] = None) -> Generator[Session, None, None]:
@@ -127,13 +285,58 @@ def get_db(principal: Optional[dict] = None) -> Generator[Session, None, None]:
     Yields:
         An active ``Session`` instance with RLS context populated.
     """
-    db = SessionLocal()
+    db = _open_session(SessionLocal, principal)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _open_session(factory: sessionmaker, principal: Optional[dict]) -> Session:
+    """A new ``factory`` session carrying the principal's RLS context."""
+    db = factory()
     db.info["app_user_id"] = (
         str(principal["user_id"])
         if principal and principal.get("user_id") is not None
         else ""
     )
     db.info["app_role"] = (principal or {}).get("role") or ""
+    return db
+
+
+def get_read_db(principal: Optional[dict] = None) -> Generator[Session, None, None]:
+    """Yield a session for a read-only request: replica or primary.
+
+    Without a replica this is ``get_db``.  Otherwise
+    ``read_routing.read_target`` decides; a replica session checks out its
+    connection up front, so a replica that refuses connections costs this
+    request nothing but the fallback to the primary.
+
+    The session must not write: a hot standby rejects it, and a write there
+    would not mark the user sticky anyway.
+
+    Args:
+        principal: Resolved identity dict (see ``get_db``).
+
+    Yields:
+        An active ``Session`` with RLS context populated.
+    """
+    factory = ReadSessionLocal
+    db: Optional[Session] = None
+    if factory is not None:
+        db = _open_session(factory, principal)
+        if read_routing.read_target(db.info["app_user_id"]) != "replica":
+            db.close()
+            db = None
+        else:
+            try:
+                db.connection()
+            except OperationalError as exc:
+                db.close()
+                db = None
+                read_routing.mark_replica_down(exc)
+    if db is None:
+        db = _open_session(SessionLocal, principal)
     try:
         yield db
     finally:
@@ -168,6 +371,24 @@ def get_db_for_principal(
     yield from get_db(principal)
 
 
+def get_read_db_for_principal(
+    principal: Principal = Depends(get_principal),
+) -> Generator[Session, None, None]:
+    """Yield a read-only session for the analytics and history GETs.
+
+    ``get_db_for_principal`` routed through ``get_read_db``: a replica
+    session unless the caller wrote within the sticky window.  Use only on
+    endpoints that never write.
+
+    Args:
+        principal: Resolved by ``get_principal`` via FastAPI DI.
+
+    Yields:
+        A session with ``session.info`` pre-populated from the principal.
+    """
+    yield from get_read_db(principal)
+
+
 def get_db_for_admin(
     current_user: dict = Depends(require_admin),
 ) -> Generator[Session, None, None]:
@@ -0,0 +1,147 @@
+"""Per-user change events for the Mini App: Redis pub/sub behind ``GET /events``.
+
+A set logged in the bot used to reach an open Mini App only when TanStack
+Query refetched on its own, so the dashboard showed stale numbers until a
+remount.  Now every training mutation — bot, Mini App or import — publishes
+a compact "what changed" event after it commits (``refresh_after_write``
+calls ``publish_training_change``):
+
+    PUBLISH events:{user_id}
+        {"type":"training","changes":[{"exercise_id":12,"day":"2026-10-19"}]}
+
+``GET /events`` subscribes to the caller's channel and relays each message as
+a server-sent event (``event: training``); the Mini App invalidates only the
+queries those (exercise, day) pairs can affect.
+
+Design choices:
+- Pub/sub, not a stream: an event is a hint to refetch, not data.  A client
+  that was not connected misses nothing — it reads fresh data on its next
+  fetch, and the Mini App refetches its active queries after a reconnect.
+- The stream holds no database session: one async Redis connection per open
+  stream, closed when the client goes away or after
+  ``EVENTS_STREAM_SECONDS`` (the client reconnects, which also re-checks its
+  JWT).  A comment heartbeat every ``EVENTS_HEARTBEAT_SECONDS`` keeps
+  proxies from timing the connection out.
+- Redis down: publishing logs and returns (the write is never failed), and
+  ``GET /events`` answers 503 — the Mini App keeps its staleTime refetches.
+"""
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Optional
+
+import anyio
+import redis as redis_lib
+import redis.asyncio as aioredis
+
+from app.core.cache import _get_client
+from app.core.config import get_settings
+from app.core.metrics import EVENT_STREAMS, EVENTS_PUBLISHED
+
+if TYPE_CHECKING:
+    from app.core.cache_refresh import TrainingWrite
+
+logger = logging.getLogger(__name__)
+
+# EventSource reconnect delay sent to the client (ms).
+_RETRY_MS = 3000
+
+
+def channel(user_id: int) -> str:
+    """Pub/sub channel of one user's change events."""
+    return f"events:{user_id}"
+
+
+def training_event(writes: Iterable["TrainingWrite"]) -> str:
+    """JSON payload for a training mutation: its distinct (exercise, day) pairs."""
+    changes = sorted({(w.exercise_id, w.day.isoformat()) for w in writes})
+    return json.dumps(
+        {"type": "training", "changes": [{"exercise_id": e, "day": d} for e, d in changes]},
+        separators=(",", ":"),
+    )
+
+
+def publish_training_change(user_id: int, writes: Iterable["TrainingWrite"]) -> None:
+    """Publish a training change event for ``user_id``.  Never raises.
+
+    Call AFTER the mutation commits, so a client refetching on the event
+    reads the new rows.
+
+    Args:
+        user_id: The effective principal id that wrote.
+        writes: The touched rows — both sides of a move.
+    """
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.publish(channel(user_id), training_event(writes))
+        EVENTS_PUBLISHED.labels(type="training", outcome="published").inc()
+    except Exception as exc:
+        EVENTS_PUBLISHED.labels(type="training", outcome="error").inc()
+        logger.warning("publish_training_change(user_id=%s) failed: %s", user_id, exc)
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+async def open_stream(user_id: int) -> Optional[AsyncIterator[str]]:
+    """Subscribe to ``user_id``'s channel; returns the SSE body iterator.
+
+    Subscribing happens here, before the response starts, so an unreachable
+    Redis is reported to the caller instead of as an empty stream.
+
+    Returns:
+        ``None`` when Redis is unavailable.
+    """
+    client = aioredis.from_url(get_settings().REDIS_URL, decode_responses=True)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(channel(user_id))
+    except (redis_lib.RedisError, OSError) as exc:
+        logger.warning("open_stream(user_id=%s) failed: %s", user_id, exc)
+        await _close(pubsub, client)
+        return None
+    return relay(pubsub, client)
+
+
+async def relay(pubsub, client) -> AsyncIterator[str]:
+    """SSE frames for the subscribed ``pubsub``; closes it and ``client`` at the end.
+
+    Yields a ``retry:`` hint first (it also sends the response headers), then
+    one ``event:`` frame per message and a ``: ping`` comment after every
+    quiet ``EVENTS_HEARTBEAT_SECONDS``, until ``EVENTS_STREAM_SECONDS`` have
+    passed, Redis fails, or the client disconnects (Starlette cancels the
+    body iterator).
+    """
+    settings = get_settings()
+    deadline = time.monotonic() + settings.EVENTS_STREAM_SECONDS
+    EVENT_STREAMS.inc()
+    try:
+        yield f"retry: {_RETRY_MS}\n\n"
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": ping\n\n"
+                continue
+            data = message["data"]
+            event = json.loads(data).get("type", "message")
+            yield f"event: {event}\ndata: {data}\n\n"
+    except (redis_lib.RedisError, OSError) as exc:
+        logger.warning("events relay failed: %s", exc)
+    finally:
+        EVENT_STREAMS.dec()
+        # Reason: on a client disconnect this runs inside a cancelled scope;
+        # unshielded, the first await would raise again and leak the connection.
+        with anyio.CancelScope(shield=True):
+            await _close(pubsub, client)
+
+
+async def _close(pubsub, client) -> None:
+    try:
+        await pubsub.aclose()
+        await client.aclose()
+    except Exception as exc:
+        logger.debug("events: closing the subscription failed: %s", exc)
@@ -0,0 +1,373 @@
+"""Redis-backed background jobs for work that must not run on the request path.
+
+Recomputes, backfills, cache warming and exports register a job here and are
+enqueued from the API (or the CLI); a separate worker process runs them.  The
+only dependency is the Redis the analytics cache already uses (``REDIS_URL``).
+
+Usage:
+
+    @job("cache.refresh", max_retries=0, dedup_ttl=60)
+    def refresh_user_job(user_id: int) -> None:
+        ...
+
+    enqueue("cache.refresh", dedup_key=f"cache-refresh:{uid}", user_id=uid)
+
+Worker / CLI (``admin_backend`` image, or locally next to a bare Redis):
+
+    python -m app.core.jobs worker                 # serve until stopped
+    python -m app.core.jobs worker --burst         # drain the queues, then exit
+    python -m app.core.jobs enqueue cache.refresh user_id=123
+
+Keys (Redis db of ``REDIS_URL``):
+    jobs:queue:{queue}     LIST    ready payloads (LPUSH by enqueue, BRPOP by
+                                   the worker — FIFO)
+    jobs:delayed:{queue}   ZSET    payloads waiting for a delay / retry;
+                                   score = due time (epoch seconds)
+    jobs:dead:{queue}      LIST    payloads that exhausted their retries
+                                   (newest ``_DEAD_MAX_LEN`` kept)
+    jobs:dedup:{key}       STRING  held from enqueue until the job STARTS
+
+Design choices:
+- Jobs are plain functions taking JSON-serialisable keyword arguments, looked
+  up by name in a module-level registry (``job`` / ``register_job``, the same
+  shape as ``register_query``) — a payload never carries code.
+- Dedup: ``enqueue(..., dedup_key=...)`` is a no-op while a job with that key
+  is queued.  The key is released when the job starts, so a write landing
+  during a run still schedules one more run.
+- Retries: a job that raises is re-scheduled on the delayed set with
+  exponential backoff (``backoff * 2**attempt``) up to ``max_retries``
+  times, then dead-lettered.  Delivery is at-most-once per attempt: a worker
+  killed mid-job loses that attempt — jobs must be idempotent and safe to
+  re-enqueue.
+- ``enqueue`` never fails a request: a Redis error is logged and ``None``
+  returned, like every other cache/Redis call in the API.
+- Every enqueue / run outcome is counted in ``gym_api_jobs_total{job,outcome}``
+  and run time observed in ``gym_api_job_duration_seconds{job}``.
+"""
+import argparse
+import importlib
+import json
+import logging
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import redis as redis_lib
+
+from app.core.cache import _get_client
+from app.core.metrics import JOB_DURATION, JOBS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "default"
+
+# Modules whose import registers jobs; the worker imports them on start.
+JOB_MODULES = (
+    "app.core.cache_refresh",
+    "app.services.local_date",
+    "app.services.training_partitions",
+    "app.services.user_profile",
+)
+
+_DEAD_MAX_LEN = 1000
+
+# Moves due delayed payloads to the ready list.  KEYS: delayed, queue.
+# ARGV: now, batch size.
+_PROMOTE_DUE_LUA = (
+    "local due = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2]) "
+    "for _, p in ipairs(due) do "
+    "redis.call('zrem', KEYS[1], p) redis.call('lpush', KEYS[2], p) end "
+    "return #due"
+)
+
+
+def _queue_key(queue: str) -> str:
+    return f"jobs:queue:{queue}"
+
+
+def _delayed_key(queue: str) -> str:
+    return f"jobs:delayed:{queue}"
+
+
+def _dead_key(queue: str) -> str:
+    return f"jobs:dead:{queue}"
+
+
+def _dedup_key(key: str) -> str:
+    return f"jobs:dedup:{key}"
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """A registered job type.
+
+    Attributes:
+        name: Unique dotted name, e.g. ``"cache.refresh"``.
+        fn: The function run with the payload's keyword arguments.
+        queue: Queue the job is enqueued on.
+        max_retries: Re-runs after a failure before dead-lettering.
+        backoff: Seconds before the first retry (doubles per attempt).
+        dedup_ttl: Upper bound on how long a dedup key blocks re-enqueueing
+            when no worker ever picks the job up.
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    queue: str = DEFAULT_QUEUE
+    max_retries: int = 3
+    backoff: float = 5.0
+    dedup_ttl: int = 3600
+
+
+_JOBS: Dict[str, JobSpec] = {}
+
+
+def register_job(spec: JobSpec) -> None:
+    """Register a job type.
+
+    Raises:
+        ValueError: When ``spec.name`` is already registered.
+    """
+    if spec.name in _JOBS:
+        raise ValueError(f"job {spec.name!r} is already registered")
+    _JOBS[spec.name] = spec
+
+
+def job(
+    name: str,
+    *,
+    queue: str = DEFAULT_QUEUE,
+    max_retries: int = 3,
+    backoff: float = 5.0,
+    dedup_ttl: int = 3600,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of ``register_job``; returns the function unchanged."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        register_job(JobSpec(name, fn, queue, max_retries, backoff, dedup_ttl))
+        return fn
+
+    return decorator
+
+
+def registered_jobs() -> List[JobSpec]:
+    """Return every registered job, ordered by name."""
+    return [_JOBS[name] for name in sorted(_JOBS)]
+
+
+def enqueue(
+    name: str,
+    *,
+    dedup_key: Optional[str] = None,
+    delay: float = 0.0,
+    **kwargs: Any,
+) -> Optional[str]:
+    """Queue a run of job ``name`` with ``kwargs``.
+
+    Args:
+        name: A registered job name.
+        dedup_key: Skip the enqueue while a job with this key is queued.
+        delay: Seconds before the job becomes runnable.
+        **kwargs: JSON-serialisable keyword arguments for the job function.
+
+    Returns:
+        The job id, or ``None`` when deduplicated or Redis is unavailable.
+
+    Raises:
+        ValueError: When ``name`` is not a registered job (a programming
+            error, so it is NOT swallowed).
+    """
+    spec = _JOBS.get(name)
+    if spec is None:
+        raise ValueError(f"unknown job {name!r}")
+    job_id = uuid.uuid4().hex
+    payload = json.dumps({
+        "id": job_id,
+        "name": name,
+        "kwargs": kwargs,
+        "attempt": 0,
+        "dedup_key": dedup_key,
+        "enqueued_at": time.time(),
+    })
+    client = _get_client()
+    if client is None:
+        JOBS.labels(job=name, outcome="error").inc()
+        return None
+    try:
+        if dedup_key is not None and not client.set(
+            _dedup_key(dedup_key), job_id, nx=True, ex=spec.dedup_ttl
+        ):
+            JOBS.labels(job=name, outcome="deduplicated").inc()
+            return None
+        if delay > 0:
+            client.zadd(_delayed_key(spec.queue), {payload: time.time() + delay})
+        else:
+            client.lpush(_queue_key(spec.queue), payload)
+        JOBS.labels(job=name, outcome="enqueued").inc()
+        return job_id
+    except Exception as exc:
+        logger.warning("enqueue(%r) failed: %s", name, exc)
+        JOBS.labels(job=name, outcome="error").inc()
+        return None
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def run_job(client: redis_lib.Redis, payload: str) -> str:
+    """Run one dequeued payload; retry or dead-letter it on failure.
+
+    Args:
+        client: Redis client (``decode_responses=True``).
+        payload: The JSON payload popped from a queue.
+
+    Returns:
+        The outcome: ``succeeded``, ``retried``, ``failed`` or ``unknown``.
+    """
+    data = json.loads(payload)
+    name = data.get("name", "?")
+    spec = _JOBS.get(name)
+    if spec is None:
+        logger.error("jobs: no job registered as %r; dead-lettering", name)
+        client.lpush(_dead_key(DEFAULT_QUEUE), payload)
+        JOBS.labels(job="unknown", outcome="failed").inc()
+        return "unknown"
+    if data.get("dedup_key"):
+        client.delete(_dedup_key(data["dedup_key"]))
+
+    start = time.perf_counter()
+    try:
+        spec.fn(**data.get("kwargs", {}))
+        outcome = "succeeded"
+    except Exception:
+        attempt = int(data.get("attempt", 0))
+        if attempt < spec.max_retries:
+            logger.warning("jobs: %s (id=%s) failed, retry %d", name, data.get("id"),
+                           attempt + 1, exc_info=True)
+            data["attempt"] = attempt + 1
+            due = time.time() + spec.backoff * (2 ** attempt)
+            client.zadd(_delayed_key(spec.queue), {json.dumps(data): due})
+            outcome = "retried"
+        else:
+            logger.exception("jobs: %s (id=%s) failed permanently", name, data.get("id"))
+            pipe = client.pipeline(transaction=False)
+            pipe.lpush(_dead_key(spec.queue), payload)
+            pipe.ltrim(_dead_key(spec.queue), 0, _DEAD_MAX_LEN - 1)
+            pipe.execute()
+            outcome = "failed"
+    finally:
+        JOB_DURATION.labels(job=name).observe(time.perf_counter() - start)
+    JOBS.labels(job=name, outcome=outcome).inc()
+    return outcome
+
+
+def _import_job_modules() -> None:
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+
+
+def run_worker(
+    queues: Sequence[str] = (DEFAULT_QUEUE,),
+    *,
+    block_timeout: int = 5,
+    max_jobs: Optional[int] = None,
+    burst: bool = False,
+) -> int:
+    """Serve ``queues`` until interrupted.
+
+    Args:
+        queues: Queue names, in priority order.
+        block_timeout: BRPOP timeout in seconds; also bounds how late a due
+            retry is promoted.
+        max_jobs: Stop after this many jobs; ``None`` runs forever.
+        burst: Stop once the queues AND the delayed sets are empty.
+
+    Returns:
+        Number of jobs processed.
+    """
+    _import_job_modules()
+    client = _get_client()
+    if client is None:
+        raise RuntimeError("jobs worker: cannot create a Redis client")
+    queue_keys = [_queue_key(q) for q in queues]
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        try:
+            for queue in queues:
+                client.eval(_PROMOTE_DUE_LUA, 2, _delayed_key(queue), _queue_key(queue),
+                            time.time(), 100)
+            item = client.brpop(queue_keys, timeout=block_timeout)
+            if item is None:
+                if burst and not any(client.zcard(_delayed_key(q)) for q in queues):
+                    break
+                continue
+            run_job(client, item[1])
+        except redis_lib.RedisError as exc:
+            logger.warning("jobs worker: Redis error: %s", exc)
+            time.sleep(1.0)
+            continue
+        done += 1
+    return done
+
+
+def _parse_kwargs(pairs: Sequence[str]) -> Dict[str, Any]:
+    """``key=value`` CLI pairs → kwargs; values parse as JSON when they can."""
+    kwargs: Dict[str, Any] = {}
+    for pair in pairs:
+        key, sep, raw = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"expected key=value, got {pair!r}")
+        try:
+            kwargs[key] = json.loads(raw)
+        except ValueError:
+            kwargs[key] = raw
+    return kwargs
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m app.core.jobs``)."""
+    parser = argparse.ArgumentParser(description="Background job worker and enqueue CLI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="run jobs")
+    worker.add_argument("--queue", action="append", dest="queues",
+                        help=f"queue to serve, repeatable (default {DEFAULT_QUEUE!r})")
+    worker.add_argument("--burst", action="store_true", help="exit once the queues are empty")
+    worker.add_argument("--metrics-port", type=int, default=0,
+                        help="serve Prometheus metrics on this port (0 = off)")
+    put = sub.add_parser("enqueue", help="enqueue one job")
+    put.add_argument("name")
+    put.add_argument("kwargs", nargs="*", metavar="key=value")
+    put.add_argument("--dedup-key", default=None)
+    put.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.command == "enqueue":
+        _import_job_modules()
+        job_id = enqueue(args.name, dedup_key=args.dedup_key, delay=args.delay,
+                         **_parse_kwargs(args.kwargs))
+        print(job_id or "not enqueued (deduplicated or Redis unavailable)")
+        return 0 if job_id else 1
+
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+
+        start_http_server(args.metrics_port)
+    try:
+        done = run_worker(args.queues or (DEFAULT_QUEUE,), burst=args.burst)
+        logger.info("jobs worker: processed %d job(s)", done)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    # Run through the imported module, not ``__main__``: job modules register
+    # on ``app.core.jobs``.
+    from app.core.jobs import main as _main
+
+    sys.exit(_main())
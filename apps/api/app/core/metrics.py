@@ -0,0 +1,238 @@
+"""Prometheus metrics for the Core API.
+
+All collectors live in the default ``prometheus_client`` registry and are
+rendered by ``GET /metrics`` (mounted in ``main.py``).  The endpoint is not
+routed through the public nginx vhost — it is scraped from inside the Docker
+network by the local Prometheus container (see
+``infra/prometheus/prometheus.yml``).
+
+Exported series:
+    gym_api_http_request_duration_seconds{method,route,status}
+        Request latency per route TEMPLATE (``/api/v1/training/day/{day_date}``),
+        never the concrete path, so cardinality stays bounded.
+    gym_api_db_pool_checkouts_total
+        Connections handed out by the runtime (app_rw) pool.
+    gym_api_db_pool_wait_seconds
+        Time spent waiting for a pooled connection (includes connect time
+        when the pool has to open a new one).
+    gym_api_db_pool_checked_out
+        Connections currently checked out of the pool.
+    gym_api_db_read_routes_total{target,reason}
+        Sessions of the read-only GETs (``app.core.read_routing``):
+        ``target`` is ``replica`` or ``primary``; ``reason`` is ``routed``,
+        ``sticky`` (the user wrote within the sticky window), ``sticky_unknown``
+        (Redis unavailable) or ``replica_down``.  Not counted without a
+        replica (``DB_REPLICA_HOST`` unset).
+    gym_api_cache_requests_total{endpoint,result}
+        Analytics cache lookups by ``make_key`` endpoint name;
+        ``result`` is ``hit`` / ``miss`` / ``error``.  Hit ratio per endpoint:
+        ``sum by (endpoint) (rate(...{result="hit"}[5m]))
+        / sum by (endpoint) (rate(...[5m]))``.
+    gym_api_cache_invalidate_duration_seconds
+        Wall time of ``invalidate_user`` / ``refresh_after_write`` (SCAN +
+        DEL round trips) on the write path.
+    gym_api_cache_single_flight_total{endpoint,outcome}
+        ``cache_get_or_compute`` misses by outcome: ``leader`` (took the
+        lease and computed), ``waited`` (got the leader's value), ``stale``
+        (served the stale copy after the wait budget), ``timeout`` (computed
+        without the lease), ``revalidate`` (stale served, background refresh
+        scheduled).
+    gym_api_cache_write_behind_total{endpoint,outcome}
+        Write-behind refresh (``app.core.cache_refresh``).  On a training
+        write each cached entry is ``kept`` (unaffected), ``queued`` (deleted,
+        recompute queued) or ``dropped`` (deleted, not refreshable); the
+        worker then reports ``stored``, ``superseded`` (a newer write landed
+        meanwhile), ``skipped`` or ``error`` per queued entry.
+    gym_api_user_upserts_total{outcome}
+        ``PUT /users/me`` (``app.services.user_profile``): ``cached`` (the
+        profile fingerprint matched, no database access), ``unchanged`` (row
+        read, nothing written), ``updated`` or ``created``.
+    gym_api_events_published_total{type,outcome}
+        Change events published for the Mini App (``app.core.events``):
+        ``published`` or ``error`` (Redis unavailable).
+    gym_api_event_streams
+        ``GET /events`` server-sent-event streams currently open.
+    gym_api_jobs_total{job,outcome}
+        Background jobs (``app.core.jobs``).  Enqueue side: ``enqueued``,
+        ``deduplicated``, ``error`` (Redis unavailable); worker side:
+        ``succeeded``, ``retried``, ``failed`` (retries exhausted →
+        dead-lettered).
+    gym_api_job_duration_seconds{job}
+        Run time of each job attempt, successful or not.
+    gym_api_db_prepared_executions_total{query,mode}
+        Executions of ``prepare=True`` registered queries (``app.core.prepared``);
+        ``mode`` is ``prepared`` (sent as EXECUTE) or ``unprepared`` (the
+        plain-SQL fallback: PREPARE failed on that connection, named cursor,
+        executemany).
+
+Design choices:
+- Metrics NEVER fail a request: every hook is a plain counter/histogram call
+  with no I/O.
+- Route labels come from ``scope["route"]`` which FastAPI sets on the ASGI
+  scope after routing; unmatched requests are labelled ``<unmatched>``.
+"""
+import time
+from typing import Callable, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy.pool import QueuePool
+
+# Sub-5ms queries dominate the analytics paths; the default buckets start at
+# 5ms and would fold most requests into the first bucket.
+_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "gym_api_http_request_duration_seconds",
+    "HTTP request latency per route template.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+DB_POOL_CHECKOUTS = Counter(
+    "gym_api_db_pool_checkouts_total",
+    "Connections checked out of the runtime DB pool.",
+)
+
+DB_POOL_WAIT = Histogram(
+    "gym_api_db_pool_wait_seconds",
+    "Time spent acquiring a connection from the runtime DB pool.",
+    buckets=_LATENCY_BUCKETS,
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "gym_api_db_pool_checked_out",
+    "Connections currently checked out of the runtime DB pool.",
+)
+
+DB_READ_ROUTES = Counter(
+    "gym_api_db_read_routes_total",
+    "Read-only request sessions by database and routing reason.",
+    ["target", "reason"],
+)
+
+CACHE_REQUESTS = Counter(
+    "gym_api_cache_requests_total",
+    "Analytics cache lookups by make_key endpoint name and result.",
+    ["endpoint", "result"],
+)
+
+CACHE_INVALIDATE_DURATION = Histogram(
+    "gym_api_cache_invalidate_duration_seconds",
+    "Wall time of invalidate_user / refresh_after_write (SCAN + DEL).",
+    buckets=_LATENCY_BUCKETS,
+)
+
+CACHE_SINGLE_FLIGHT = Counter(
+    "gym_api_cache_single_flight_total",
+    "Analytics cache misses handled by cache_get_or_compute, by outcome.",
+    ["endpoint", "outcome"],
+)
+
+CACHE_WRITE_BEHIND = Counter(
+    "gym_api_cache_write_behind_total",
+    "Analytics cache entries handled by the write-behind refresh, by outcome.",
+    ["endpoint", "outcome"],
+)
+
+USER_UPSERTS = Counter(
+    "gym_api_user_upserts_total",
+    "PUT /users/me calls by outcome (cached, unchanged, updated, created).",
+    ["outcome"],
+)
+
+EVENTS_PUBLISHED = Counter(
+    "gym_api_events_published_total",
+    "Change events published for GET /events by type and outcome.",
+    ["type", "outcome"],
+)
+
+EVENT_STREAMS = Gauge(
+    "gym_api_event_streams",
+    "Open GET /events streams.",
+)
+
+JOBS = Counter(
+    "gym_api_jobs_total",
+    "Background jobs by job name and enqueue/run outcome.",
+    ["job", "outcome"],
+)
+
+# Jobs range from a sub-second cache refresh to multi-minute backfills.
+JOB_DURATION = Histogram(
+    "gym_api_job_duration_seconds",
+    "Run time of background job attempts.",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0, 600.0, 1800.0),
+)
+
+PREPARED_EXECUTIONS = Counter(
+    "gym_api_db_prepared_executions_total",
+    "Executions of prepare=True registered queries, by query and mode.",
+    ["query", "mode"],
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` that records checkout count and wait time.
+
+    SQLAlchemy's pool events (``checkout``) fire only AFTER a connection has
+    been obtained, so they cannot measure how long a request waited for one.
+    Overriding ``_do_get`` brackets the actual acquisition, including the
+    blocking wait when ``pool_size + max_overflow`` connections are in use.
+
+    Passed to ``create_engine(poolclass=...)`` in ``app.core.database``.
+    """
+
+    def _do_get(self):  # type: ignore[override]
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+            DB_POOL_CHECKOUTS.inc()
+
+
+def track_pool_checked_out(checkedout: Callable[[], int]) -> None:
+    """Bind the checked-out gauge to a pool's live ``checkedout()`` count.
+
+    The value is read lazily at scrape time, so no event hook is needed.
+
+    Args:
+        checkedout: Zero-arg callable returning the number of connections
+            currently checked out (``engine.pool.checkedout``).
+    """
+    DB_POOL_CHECKED_OUT.set_function(checkedout)
+
+
+def cache_endpoint_of(key: str) -> str:
+    """Extract the ``make_key`` endpoint name from a cache key.
+
+    Key shape: ``analytics:{user_id}:{endpoint}:{sorted_params}``.  Only the
+    endpoint segment is used as a label — never the user id or params, which
+    would make the series unbounded.
+
+    Args:
+        key: Cache key produced by ``app.core.cache.make_key``.
+
+    Returns:
+        The endpoint name, or ``"unknown"`` for a malformed key.
+    """
+    parts = key.split(":", 3)
+    return parts[2] if len(parts) >= 3 and parts[2] else "unknown"
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Render the default registry in the Prometheus text format.
+
+    Returns:
+        ``(body, content_type)`` ready to wrap in a ``Response``.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,298 @@
+"""Server-side prepared statements for the hot registered router SQL.
+
+The per-request analytics reads (``analytics.recent_exercises``, the
+``log_context`` trio, ``exercise_trend.e1rm``) and ``exercises.search`` run in
+well under 5 ms, so Postgres' parse/analyze/rewrite/plan work is a measurable
+share of each call.  Queries registered with ``register_query(...,
+prepare=True)`` are therefore PREPAREd once on every pooled runtime
+connection and executed through ``EXECUTE``.
+
+How it works:
+    1. ``enable_prepared_statements(engine)`` adds a pool ``connect`` listener.
+       Each NEW DBAPI connection runs ``PREPARE hot_<name> AS <sql>`` for
+       every ``prepare=True`` query (once per connection lifetime, not per
+       request) and records the names that succeeded on
+       ``connection_record.info``.
+    2. ``execute_prepared`` — called from the ``before_cursor_execute`` hook
+       in ``app.core.database`` BEFORE the RLS ``set_config`` fold — swaps a
+       registered statement's compiled text for
+
+           SET LOCAL plan_cache_mode = <mode>; EXECUTE hot_<name>(%(uid)s, ...)
+
+       keeping the caller's parameter dict untouched, so psycopg2 still
+       quotes every value client-side exactly as before.  The call site keeps
+       executing the registered ``TextClause``; nothing changes in the
+       routers.
+    3. Anything that is not a prepared hot query on THIS connection executes
+       unchanged: unregistered SQL, a query whose PREPARE failed, executemany,
+       server-side (named) cursors (``DECLARE`` cannot wrap ``EXECUTE``).
+
+Plan cache and parameter skew:
+    ``plan_cache_mode = auto`` (the default) lets Postgres switch a prepared
+    statement to a cached GENERIC plan after five custom plans when the
+    generic plan is not estimated costlier — the plan-time win; for
+    ``exercises.search`` planning is most of the call.  A query whose best
+    plan depends on the parameter VALUES registers
+    ``plan_cache_mode="force_custom_plan"``: it is still parsed once, but
+    re-planned per execution with the real values
+    (``log_context.completed_sets``, whose one-day ``date`` window a generic
+    plan cannot see, and ``log_context.last_session_sets``).  ``force_generic_plan`` is for the opposite mistake —
+    ``auto`` rejecting a generic plan that measures faster.  Every EXECUTE
+    sets its own mode with ``SET LOCAL`` (reset at transaction end), so one
+    query's mode never carries over to the next prepared query.
+
+    ``plan_cache_stats`` reads ``pg_prepared_statements`` (generic vs custom
+    plan counts per statement, PG 14+) for the connection it is given.
+
+Operational notes:
+    - ``DB_PREPARED_STATEMENTS=false`` disables the whole mechanism — required
+      behind a transaction-pooling PgBouncer, where consecutive transactions
+      may land on different server connections.
+    - A connection that loses its statements (``DEALLOCATE ALL`` /
+      ``DISCARD ALL``; SQLSTATE 26000), or whose cached plan no longer matches
+      the schema (``cached plan must not change result type``, 0A000 — the
+      on-deploy ``alembic upgrade`` runs while the old API still serves),
+      fails that one query.  The ``handle_error`` listener then invalidates
+      ONLY that pooled connection; its replacement re-PREPAREs on connect.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.metrics import PREPARED_EXECUTIONS
+from app.core.query_registry import RegisteredQuery, registered_queries, registry_size
+
+logger = logging.getLogger(__name__)
+
+# connection.info key holding the frozenset of statement names PREPAREd on
+# that pooled DBAPI connection.  Absent → prepared statements are not enabled
+# for the connection's engine.
+_PREPARED_KEY = "app_prepared_statements"
+
+# Prepared statement names share this prefix so ``plan_cache_stats`` can tell
+# them apart from anything else on the connection.
+STATEMENT_PREFIX = "hot_"
+
+# pyformat bind (``%(name)s``) or an escaped literal percent (``%%``).
+_PYFORMAT_RE = re.compile(r"%%|%\((\w+)\)s")
+
+# SQLSTATEs after which a connection's prepared statements are unusable:
+# invalid_sql_statement_name ("prepared statement ... does not exist") and
+# feature_not_supported ("cached plan must not change result type").
+_STALE_STATEMENT_SQLSTATES = ("26000", "0A000")
+
+
+@dataclass(frozen=True)
+class PreparedQuery:
+    """A registered query in its PREPARE / EXECUTE form.
+
+    Attributes:
+        name: Registry name, e.g. ``"analytics.recent_exercises"``.
+        statement_name: Server-side name, ``hot_analytics_recent_exercises``.
+        prepare_sql: ``PREPARE`` body with positional ``$n`` parameters.
+        param_order: Bind names in ``$1..$n`` order.
+        execute_sql: pyformat ``SET LOCAL ...; EXECUTE ...`` sent per call.
+    """
+
+    name: str
+    statement_name: str
+    prepare_sql: str
+    param_order: Tuple[str, ...]
+    execute_sql: str
+
+
+def to_positional(compiled: str) -> Tuple[str, Tuple[str, ...]]:
+    """Convert psycopg2 pyformat SQL to PREPARE's positional form.
+
+    Each distinct ``%(name)s`` becomes ``$n`` (numbered by first appearance,
+    so a repeated bind reuses its number) and ``%%`` is unescaped to ``%``.
+
+    Args:
+        compiled: ``str(clause.compile(dialect=...))`` for the psycopg2
+            dialect — byte-for-byte what ``before_cursor_execute`` receives.
+
+    Returns:
+        ``(sql_with_dollar_params, param_names_in_order)``.
+    """
+    order: List[str] = []
+
+    def _replace(match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name is None:
+            return "%"
+        if name not in order:
+            order.append(name)
+        return f"${order.index(name) + 1}"
+
+    return _PYFORMAT_RE.sub(_replace, compiled), tuple(order)
+
+
+def build_prepared_query(query: RegisteredQuery, compiled: str) -> PreparedQuery:
+    """Build the PREPARE / EXECUTE pair for one registered query.
+
+    Args:
+        query: A ``prepare=True`` registry entry.
+        compiled: Its statement compiled for the runtime dialect.
+
+    Returns:
+        The ``PreparedQuery``.
+    """
+    statement_name = STATEMENT_PREFIX + query.name.replace(".", "_")
+    prepare_sql, order = to_positional(compiled)
+    args = ", ".join(f"%({name})s" for name in order)
+    execute = f"EXECUTE {statement_name}({args})" if order else f"EXECUTE {statement_name}"
+    return PreparedQuery(
+        name=query.name,
+        statement_name=statement_name,
+        prepare_sql=prepare_sql,
+        param_order=order,
+        execute_sql=f"SET LOCAL plan_cache_mode = {query.plan_cache_mode}; {execute}",
+    )
+
+
+# compiled statement text → PreparedQuery, per dialect name.  Rebuilt when the
+# registry grows (routers register at import time).
+_HOT_CACHE: Dict[str, Tuple[int, Dict[str, PreparedQuery]]] = {}
+
+
+def hot_queries(dialect: Any) -> Dict[str, PreparedQuery]:
+    """Return ``{compiled_text: PreparedQuery}`` for every ``prepare=True`` query.
+
+    Args:
+        dialect: The engine dialect the statements are compiled for.
+
+    Returns:
+        Mapping keyed by the exact statement text the DBAPI cursor receives.
+    """
+    size = registry_size()
+    cached = _HOT_CACHE.get(dialect.name)
+    if cached is not None and cached[0] == size:
+        return cached[1]
+    mapping: Dict[str, PreparedQuery] = {}
+    for query in registered_queries():
+        if query.prepare:
+            compiled = str(query.clause.compile(dialect=dialect))
+            mapping[compiled] = build_prepared_query(query, compiled)
+    _HOT_CACHE[dialect.name] = (size, mapping)
+    return mapping
+
+
+def _prepare_all(dbapi_connection: Any, dialect: Any) -> FrozenSet[str]:
+    """PREPARE every hot query on a fresh DBAPI connection.
+
+    One statement at a time so a single failure (e.g. a table missing on a
+    half-migrated database) only drops that query back to plain execution.
+    PREPARE is not transactional: statements prepared before a failure survive
+    the rollback that clears it.
+
+    Returns:
+        Names of the statements that were prepared.
+    """
+    prepared = set()
+    cursor = dbapi_connection.cursor()
+    try:
+        for query in hot_queries(dialect).values():
+            try:
+                cursor.execute(f"PREPARE {query.statement_name} AS {query.prepare_sql}")
+            except Exception as exc:  # noqa: BLE001 — any failure → plain execution
+                dbapi_connection.rollback()
+                logger.warning("PREPARE %s failed; executing unprepared: %s", query.name, exc)
+                continue
+            prepared.add(query.statement_name)
+        dbapi_connection.commit()
+    finally:
+        cursor.close()
+    return frozenset(prepared)
+
+
+def enable_prepared_statements(engine: Engine) -> None:
+    """PREPARE the hot registered queries on every connection ``engine`` opens.
+
+    Args:
+        engine: The runtime engine (``app.core.database.engine``).
+    """
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        connection_record.info[_PREPARED_KEY] = _prepare_all(dbapi_connection, engine.dialect)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context) -> None:
+        # Reported as a disconnect so the pool discards this one connection
+        # (not the whole pool); the next checkout opens and re-PREPAREs a
+        # fresh one.
+        pgcode = getattr(context.original_exception, "pgcode", None)
+        if pgcode in _STALE_STATEMENT_SQLSTATES and (
+            f"EXECUTE {STATEMENT_PREFIX}" in (context.statement or "")
+        ):
+            context.is_disconnect = True
+            context.invalidate_pool_on_disconnect = False
+
+
+def execute_prepared(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    executemany: bool,
+) -> Tuple[str, Any]:
+    """Swap a prepared hot query for its ``EXECUTE`` form.
+
+    Called first thing in the ``before_cursor_execute`` hook.  A no-op (one
+    dict lookup) on engines without prepared statements.
+
+    Args:
+        conn: The SQLAlchemy connection (``conn.info`` is per pooled
+            DBAPI connection).
+        cursor: The DBAPI cursor about to execute.
+        statement: Compiled statement text.
+        parameters: The bind parameter dict.
+        executemany: Whether this is an ``executemany`` call.
+
+    Returns:
+        ``(statement, parameters)`` for the DBAPI ``execute`` call.
+    """
+    prepared = conn.info.get(_PREPARED_KEY)
+    if prepared is None:
+        return statement, parameters
+    query = hot_queries(conn.dialect).get(statement)
+    if query is None:
+        return statement, parameters
+    if (
+        query.statement_name not in prepared
+        or executemany
+        or not isinstance(parameters, dict)
+        or getattr(cursor, "name", None)
+    ):
+        PREPARED_EXECUTIONS.labels(query=query.name, mode="unprepared").inc()
+        return statement, parameters
+    PREPARED_EXECUTIONS.labels(query=query.name, mode="prepared").inc()
+    return query.execute_sql, parameters
+
+
+def plan_cache_stats(connection: Connection) -> List[Dict[str, Any]]:
+    """Per-statement plan-cache counters for the connection's session.
+
+    Args:
+        connection: A connection (or ``Session``) on the runtime engine.
+
+    Returns:
+        ``[{"name", "generic_plans", "custom_plans"}]`` for every prepared
+        hot statement, ordered by name.  A statement whose ``generic_plans``
+        stays 0 under ``auto`` is one Postgres judged skew-sensitive.
+    """
+    rows = connection.execute(
+        text(
+            "SELECT name, generic_plans, custom_plans FROM pg_prepared_statements"
+            " WHERE starts_with(name, :prefix) ORDER BY name"
+        ),
+        {"prefix": STATEMENT_PREFIX},
+    ).fetchall()
+    return [
+        {"name": r[0], "generic_plans": int(r[1]), "custom_plans": int(r[2])}
+        for r in rows
+    ]
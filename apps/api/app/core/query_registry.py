@@ -0,0 +1,225 @@
+"""Registry of hand-written router SQL for the query-plan regression guard.
+
+The routers embed large raw SQL statements (``_SEARCH_SQL``, the ``pr_flags``
+CTEs, the week/day bucket aggregates) whose docstrings promise they are
+"sargable".  Every such statement is declared once at module level through
+``register_query`` so ``tests/test_query_plans.py`` can run
+``EXPLAIN (FORMAT JSON)`` for ALL of them against a large seeded dataset and
+fail the suite when a change introduces a Seq Scan on ``training`` or blows
+through the statement's cost ceiling.
+
+Usage (module level, next to the endpoint that runs it):
+
+    _TOP_MUSCLES_SQL = register_query("analytics.top_muscles", '''
+        SELECT ... FROM training t WHERE t.user_id = :uid ...
+    ''')
+
+    rows = db.execute(_TOP_MUSCLES_SQL, {"uid": uid}).fetchall()
+
+Statements whose SQL differs per request (e.g. the UTC vs ``AT TIME ZONE :tz``
+day expression) register ONE entry per variant so each concrete text is
+planned by the guard.
+
+Design choices:
+- ``register_query`` returns the ``TextClause`` the call site executes, so the
+  guarded text and the executed text can never drift apart.
+- Names are unique; registering the same name twice raises ``ValueError``
+  (catches copy/paste mistakes at import time).
+- ``plan_problems`` is a pure function over the EXPLAIN JSON so the plan rules
+  are unit-testable without a database.
+- ``prepare=True`` marks a hot per-request query for server-side PREPARE on
+  every pooled runtime connection (``app.core.prepared``);
+  ``plan_cache_mode`` picks how Postgres plans it once prepared.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+# Relations that must never be read with a sequential scan by a registered
+# query.  ``training`` is the only table that grows without bound (one row per
+# logged set); the catalog tables are small and legitimately seq-scanned by
+# the fuzzy search tiers.
+GUARDED_RELATIONS = ("training",)
+
+# Partitions of a guarded relation (0012_training_partitioning): EXPLAIN
+# names the partition scanned, e.g. ``training_p2026`` or ``training_history``.
+_PARTITION_SUFFIX = re.compile(r"_(?:history|default|p\d{4})$")
+
+# A Seq Scan costing less than one page read is over a partition the planner
+# knows to be empty (an unused future year, the default partition) — reading
+# it is free, so it is not a violation.
+_EMPTY_SCAN_COST = 1.0
+
+# Planner cost ceiling applied when a query does not declare its own.  Tuned
+# against the guard's seeded dataset (200k sets, 500 per user): the heaviest
+# index-driven per-user read plans at ~900 units, while a full scan of
+# ``training`` alone costs ~4,000.
+DEFAULT_MAX_COST = 2500.0
+
+# Accepted values of Postgres' ``plan_cache_mode`` GUC.  ``auto`` lets the
+# server switch to a cached generic plan after five executions when it is not
+# costlier than the average custom plan; ``force_custom_plan`` re-plans with
+# the actual parameters every time (parse/rewrite are still skipped) — the
+# fallback for queries whose best plan depends on parameter values.
+PLAN_CACHE_MODES = ("auto", "force_custom_plan", "force_generic_plan")
+
+
+@dataclass(frozen=True)
+class RegisteredQuery:
+    """One guarded SQL statement.
+
+    Attributes:
+        name: Unique dotted name, ``<router>.<query>[.<variant>]``.
+        clause: The ``TextClause`` executed by the router.
+        max_cost: Upper bound for the plan's root ``Total Cost``.
+        prepare: Server-side PREPARE on every runtime connection.
+        plan_cache_mode: ``plan_cache_mode`` applied to the prepared EXECUTE.
+    """
+
+    name: str
+    clause: TextClause
+    max_cost: float
+    prepare: bool = False
+    plan_cache_mode: str = "auto"
+
+    @property
+    def param_names(self) -> List[str]:
+        """Bind parameter names referenced by the statement, sorted."""
+        return sorted(self.clause.compile().params)
+
+
+_REGISTRY: Dict[str, RegisteredQuery] = {}
+
+
+def register_query(
+    name: str,
+    sql: str,
+    *,
+    max_cost: float = DEFAULT_MAX_COST,
+    prepare: bool = False,
+    plan_cache_mode: str = "auto",
+) -> TextClause:
+    """Register a raw SQL statement and return its executable ``TextClause``.
+
+    Args:
+        name: Unique dotted name, e.g. ``"analytics.activity.tz"``.
+        sql: The SQL text with ``:name`` bind parameters.
+        max_cost: Plan cost ceiling enforced by the query-plan guard.
+        prepare: PREPARE the statement on every runtime connection and
+            route executions through ``EXECUTE`` (``app.core.prepared``).
+        plan_cache_mode: One of ``PLAN_CACHE_MODES``; only meaningful with
+            ``prepare=True``.
+
+    Returns:
+        ``text(sql)`` — pass it straight to ``Session.execute``.
+
+    Raises:
+        ValueError: When ``name`` is already registered or
+            ``plan_cache_mode`` is not a known mode.
+    """
+    if name in _REGISTRY:
+        raise ValueError(f"query {name!r} is already registered")
+    if plan_cache_mode not in PLAN_CACHE_MODES:
+        raise ValueError(f"unknown plan_cache_mode {plan_cache_mode!r}")
+    clause = text(sql)
+    _REGISTRY[name] = RegisteredQuery(
+        name=name,
+        clause=clause,
+        max_cost=max_cost,
+        prepare=prepare,
+        plan_cache_mode=plan_cache_mode,
+    )
+    return clause
+
+
+def registered_queries() -> List[RegisteredQuery]:
+    """Return every registered query, ordered by name."""
+    return [_REGISTRY[name] for name in sorted(_REGISTRY)]
+
+
+def registry_size() -> int:
+    """Number of registered queries (grows as router modules are imported)."""
+    return len(_REGISTRY)
+
+
+def iter_plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield ``plan`` and every nested node (depth-first).
+
+    Args:
+        plan: A node of ``EXPLAIN (FORMAT JSON)`` output — the ``"Plan"``
+            object of the top-level result.
+
+    Yields:
+        Each plan node dict, including CTE and sub-plan children.
+    """
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from iter_plan_nodes(child)
+
+
+def guarded_relation(relation: Optional[str]) -> Optional[str]:
+    """Map a scanned relation to the guarded table it belongs to.
+
+    Args:
+        relation: A plan node's ``Relation Name`` (may be ``None``).
+
+    Returns:
+        The ``GUARDED_RELATIONS`` entry for the table itself or one of its
+        partitions, else ``None``.
+    """
+    if relation is None:
+        return None
+    parent = _PARTITION_SUFFIX.sub("", relation)
+    return parent if parent in GUARDED_RELATIONS else None
+
+
+def plan_problems(query: RegisteredQuery, plan: Dict[str, Any]) -> List[str]:
+    """List the guard violations found in one query plan.
+
+    Rules:
+        1. No ``Seq Scan`` node on a relation in ``GUARDED_RELATIONS`` (or
+           on one of its non-empty partitions).
+        2. Every query that reads a guarded relation reads it through an
+           index (Index Scan / Index Only Scan / Bitmap Heap Scan).
+        3. The root ``Total Cost`` does not exceed ``query.max_cost``.
+
+    Args:
+        query: The registered query the plan belongs to.
+        plan: The ``"Plan"`` object from ``EXPLAIN (FORMAT JSON)``.
+
+    Returns:
+        Human-readable problems; empty when the plan passes.
+    """
+    problems: List[str] = []
+    guarded_reads = set()
+    indexed_reads = set()
+    for node in iter_plan_nodes(plan):
+        relation = node.get("Relation Name")
+        guarded = guarded_relation(relation)
+        if guarded is None:
+            continue
+        node_type = node.get("Node Type")
+        if (
+            node_type == "Seq Scan"
+            and relation != guarded
+            and float(node.get("Total Cost", 0.0)) < _EMPTY_SCAN_COST
+        ):
+            continue
+        guarded_reads.add(guarded)
+        if node_type == "Seq Scan":
+            problem = f"{query.name}: Seq Scan on {guarded}"
+            if problem not in problems:
+                problems.append(problem)
+        elif node_type in ("Index Scan", "Index Only Scan", "Bitmap Heap Scan"):
+            indexed_reads.add(guarded)
+    for relation in sorted(guarded_reads - indexed_reads):
+        problems.append(f"{query.name}: {relation} is never read through an index")
+    total_cost = float(plan.get("Total Cost", 0.0))
+    if total_cost > query.max_cost:
+        problems.append(
+            f"{query.name}: plan cost {total_cost:.0f} exceeds ceiling {query.max_cost:.0f}"
+        )
+    return problems
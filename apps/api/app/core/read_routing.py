@@ -0,0 +1,157 @@
+"""Read-replica routing for the read-only analytics and history GETs.
+
+Every request used to run on the one ``app_rw`` primary engine, so a
+dashboard burst (summary, week-compare, activity, exercise-trend, the
+training-day views) competed with the bot's set logging for the same
+connections and buffers.  With ``DB_REPLICA_HOST`` set, ``app.core.database``
+builds a second engine on a hot-standby streaming replica and
+``get_read_db_for_principal`` hands the read-only GETs a session on it.
+
+Read-your-writes — sticky to the primary:
+    A streaming replica replays the primary's WAL a few milliseconds (under
+    load, seconds) behind.  The bot logs a set and immediately asks for the
+    next set's log-context; the Mini App saves and refetches the dashboard.
+    Either read served by a replica that has not replayed the write yet
+    would show the old state.  So every commit on a primary session marks
+    its user sticky for ``DB_REPLICA_STICKY_SECONDS`` (``mark_written``):
+
+        SET db-sticky:{uid} 1 PX <window>      (shared by every API worker)
+        + an in-process deadline                (this worker, no round trip)
+
+    and ``read_target`` keeps that user's reads on the primary until the
+    window passes.  Other users keep reading the replica.
+
+Design choices:
+- Fail towards the primary: when Redis cannot answer whether a user is
+  sticky, the read goes to the primary (``sticky_unknown``) — a lost
+  offload, never a stale read.
+- A replica that refuses connections is skipped for
+  ``REPLICA_RETRY_SECONDS`` (``mark_replica_down``, fed by the replica
+  engine's ``handle_error`` and by the eager connect in the dependency);
+  reads fall back to the primary meanwhile.
+- Any commit counts as a write: the primary sessions of the GET endpoints
+  never commit, and one extra sticky window costs only offload.
+- Admin catalog edits do not mark anyone sticky; a renamed exercise may
+  show its old name on a replica read for the replay lag.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.core.cache import _get_client
+from app.core.config import get_settings
+from app.core.metrics import DB_READ_ROUTES
+
+logger = logging.getLogger(__name__)
+
+# How long a replica that failed to connect is skipped before retrying it.
+REPLICA_RETRY_SECONDS = 30.0
+
+# Bound on the in-process sticky map; expired entries are pruned first.
+_LOCAL_STICKY_MAX = 10_000
+
+_lock = threading.Lock()
+_local_sticky: Dict[str, float] = {}
+_replica_down_until = 0.0
+
+
+def sticky_key(user_id: str) -> str:
+    return f"db-sticky:{user_id}"
+
+
+def _remember_locally(user_id: str, until: float) -> None:
+    with _lock:
+        if len(_local_sticky) >= _LOCAL_STICKY_MAX:
+            now = time.monotonic()
+            for uid in [u for u, t in _local_sticky.items() if t <= now]:
+                del _local_sticky[uid]
+            if len(_local_sticky) >= _LOCAL_STICKY_MAX:
+                _local_sticky.clear()
+        _local_sticky[user_id] = until
+
+
+def _locally_sticky(user_id: str) -> bool:
+    until = _local_sticky.get(user_id)
+    return until is not None and until > time.monotonic()
+
+
+def mark_written(user_id: str) -> None:
+    """Keep ``user_id``'s reads on the primary for the sticky window.
+
+    Call after a commit on the primary.  Never raises: without Redis only
+    this worker knows, and the other workers' ``read_target`` falls back to
+    the primary anyway (``sticky_unknown``).
+
+    Args:
+        user_id: ``session.info['app_user_id']`` of the committing session.
+    """
+    seconds = get_settings().DB_REPLICA_STICKY_SECONDS
+    if not user_id or seconds <= 0:
+        return
+    _remember_locally(user_id, time.monotonic() + seconds)
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.set(sticky_key(user_id), "1", px=max(1, int(seconds * 1000)))
+    except Exception as exc:
+        logger.warning("read_routing: mark_written(user_id=%s) failed: %s", user_id, exc)
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _sticky(user_id: str) -> Tuple[bool, str]:
+    """``(stay on primary, reason)`` from the local map, then Redis."""
+    if _locally_sticky(user_id):
+        return True, "sticky"
+    client = _get_client()
+    if client is None:
+        return True, "sticky_unknown"
+    try:
+        return (client.get(sticky_key(user_id)) is not None), "sticky"
+    except Exception as exc:
+        logger.warning("read_routing: sticky lookup for user_id=%s failed: %s", user_id, exc)
+        return True, "sticky_unknown"
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def mark_replica_down(exc: BaseException) -> None:
+    """Route every read to the primary for ``REPLICA_RETRY_SECONDS``."""
+    global _replica_down_until
+    logger.warning("read_routing: replica unavailable, using the primary for %.0fs: %s",
+                   REPLICA_RETRY_SECONDS, exc)
+    _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+
+
+def replica_available() -> bool:
+    return time.monotonic() >= _replica_down_until
+
+
+def read_target(user_id: str) -> str:
+    """``"replica"`` or ``"primary"`` for a read-only request of ``user_id``.
+
+    Only called when a replica is configured; counts the decision in
+    ``gym_api_db_read_routes_total``.
+
+    Args:
+        user_id: ``session.info['app_user_id']`` of the request (``''`` for
+            a principal without one — RLS then matches no row anywhere).
+    """
+    if not replica_available():
+        target, reason = "primary", "replica_down"
+    else:
+        stay, reason = _sticky(user_id) if user_id else (False, "routed")
+        target = "primary" if stay else "replica"
+        if not stay:
+            reason = "routed"
+    DB_READ_ROUTES.labels(target=target, reason=reason).inc()
+    return target
+
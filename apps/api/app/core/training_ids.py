@@ -0,0 +1,124 @@
+"""Training row ids: native ``uuid`` in the database, 32-char hex on the wire.
+
+``training.id`` was ``VARCHAR(32)`` holding ``uuid4().hex`` (and, for rows the
+bot wrote before GYM-22, md5 hex digests).  Migration ``0013_training_uuid_id``
+converted the column to ``uuid``: 16 bytes in the heap and in every index
+entry instead of a 33-byte varlena, and new ids are UUIDv7 — time-ordered, so
+inserts append to the right edge of the primary-key btree instead of landing
+on a random leaf page.
+
+The API keeps the 32-char lower-case hex form (``uuid.hex``) as the id's
+public alias: responses look exactly as before, so the bot and the Mini App
+need no change.
+
+Dual-read period — every endpoint taking a ``training_id`` accepts:
+    32 hex chars      the alias (any case); every pre-migration hex id
+    8-4-4-4-12 form   the canonical uuid text, for clients moving to it
+    anything else     a legacy non-hex id: mapped the way the migration
+                      mapped it (``md5(id)::uuid``), so it still resolves
+
+Design choices:
+- Ids are generated here, not by a column default: Postgres 16 has no
+  ``uuidv7()``, and the server already assigns every id (GYM-22).
+- ``TrainingIdType`` does both conversions on the ORM path, so ``models.
+  Training.id`` stays a ``str`` for callers; raw-SQL reads go through
+  ``training_id_hex``.
+- Ids from one process are strictly increasing: within a millisecond the
+  12 ``rand_a`` bits are a counter (RFC 9562 method 1) seeded at random, so a
+  burst of inserts still appends instead of splitting the last leaf 50/50.
+  Across workers ids interleave only within the same millisecond.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Optional, Tuple, Union
+
+from sqlalchemy.types import TypeDecorator, Uuid
+
+_HEX_ID = re.compile(r"[0-9a-fA-F]{32}")
+_CANONICAL_ID = re.compile(r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+
+_UNIX_MS_MASK = (1 << 48) - 1
+_VERSION_7 = 0x7 << 76
+_VARIANT_RFC = 0x2 << 62
+_RAND_B_MASK = (1 << 62) - 1
+_COUNTER_MAX = 0xFFF
+# A fresh millisecond seeds the counter below this, leaving room for a burst.
+_COUNTER_SEED_MAX = 0x7FF
+
+_lock = threading.Lock()
+_last_ms = -1
+_counter = 0
+
+
+def _next_ms_and_counter() -> Tuple[int, int]:
+    """Current millisecond and ``rand_a`` counter, strictly increasing."""
+    global _last_ms, _counter
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            _last_ms, _counter = now_ms, int.from_bytes(os.urandom(2), "big") & _COUNTER_SEED_MAX
+        elif _counter < _COUNTER_MAX:
+            _counter += 1
+        else:  # counter exhausted (or the clock went back): borrow the next ms
+            _last_ms, _counter = _last_ms + 1, 0
+        return _last_ms, _counter
+
+
+def uuid7(unix_ms: Optional[int] = None) -> uuid.UUID:
+    """A UUIDv7 (RFC 9562): 48-bit Unix milliseconds, counter, random bits.
+
+    Args:
+        unix_ms: Timestamp to embed (random ``rand_a``, no ordering
+            guarantee); defaults to now, monotonic within the process.
+    """
+    if unix_ms is None:
+        unix_ms, rand_a = _next_ms_and_counter()
+    else:
+        rand_a = int.from_bytes(os.urandom(2), "big") & _COUNTER_MAX
+    rand_b = int.from_bytes(os.urandom(8), "big") & _RAND_B_MASK
+    value = (unix_ms & _UNIX_MS_MASK) << 80 | _VERSION_7 | rand_a << 64 | _VARIANT_RFC | rand_b
+    return uuid.UUID(int=value)
+
+
+def new_training_id() -> str:
+    """A new training id in its public (32-char hex) form."""
+    return uuid7().hex
+
+
+def parse_training_id(value: Union[str, uuid.UUID]) -> uuid.UUID:
+    """The stored ``uuid`` for a client-supplied training id.
+
+    Mirrors the 0013 conversion: 32 hex chars and the canonical uuid text
+    parse directly; any other string is a legacy id, stored as
+    ``md5(id)::uuid``.
+
+    Args:
+        value: An id from a path parameter, a request body or a response.
+    """
+    if isinstance(value, uuid.UUID):
+        return value
+    if _HEX_ID.fullmatch(value) or _CANONICAL_ID.fullmatch(value):
+        return uuid.UUID(value)
+    return uuid.UUID(hashlib.md5(value.encode("utf-8")).hexdigest())
+
+
+def training_id_hex(value: Union[str, uuid.UUID]) -> str:
+    """The public form of a stored id (a driver ``UUID`` or uuid text)."""
+    return value.hex if isinstance(value, uuid.UUID) else uuid.UUID(value).hex
+
+
+class TrainingIdType(TypeDecorator):
+    """``uuid`` column read and written as the 32-char hex alias."""
+
+    impl = Uuid
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else parse_training_id(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else training_id_hex(value)
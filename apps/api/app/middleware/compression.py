@@ -0,0 +1,199 @@
+"""ASGI middleware compressing responses with brotli or gzip.
+
+The encoding is negotiated from ``Accept-Encoding`` (q-values honoured;
+brotli preferred on a tie) and applied only when it pays off: the body is at
+least ``minimum_size`` bytes, the media type is textual (JSON, NDJSON, CSV,
+``text/*``) and the response is not already encoded.  Long analytics series
+(``/analytics/exercise-progress``, a 400-day ``/analytics/activity``) and
+``/training/days`` shrink 5-10x, which is what matters on a mobile link.
+
+Design choices:
+- Pure ASGI, like ``PrometheusMiddleware`` — ``BaseHTTPMiddleware`` would
+  add a task + memory stream per response.
+- Brotli needs the optional ``brotli`` package; without it (or when the
+  client does not accept ``br``) gzip is used.  Quality 4 / level 6 are the
+  usual on-the-fly settings: most of the ratio for a fraction of the CPU.
+- A single-message body is compressed in one shot with an exact
+  ``Content-Length``.  A streamed body (``more_body``) is compressed chunk by
+  chunk and flushed after each one, so streaming endpoints keep streaming;
+  ``Content-Length`` is dropped.
+- ``text/event-stream`` (``GET /events``) is never compressed: its frames are
+  a few bytes each, and a compressed event stream is one buffering proxy
+  away from arriving late.
+"""
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 4
+
+_COMPRESSIBLE_PREFIXES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "text/",
+)
+
+
+class _GzipEncoder:
+    def __init__(self) -> None:
+        self._z = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip framing
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self) -> None:
+        self._c = brotli.Compressor(quality=_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+_ENCODERS = {"gzip": _GzipEncoder}
+if brotli is not None:
+    _ENCODERS["br"] = _BrotliEncoder
+
+# Server preference on equal q-values.
+_PREFERENCE = ("br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the content coding for an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Raw header value, e.g. ``"gzip, deflate, br;q=0.9"``.
+
+    Returns:
+        ``"br"``, ``"gzip"``, or ``None`` for identity.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+
+    best: Optional[Tuple[float, str]] = None
+    for coding in _PREFERENCE:
+        if coding not in _ENCODERS:
+            continue
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > best[0]):
+            best = (weight, coding)
+    return best[1] if best else None
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").lower()
+    if media_type.startswith("text/event-stream"):
+        return False
+    return media_type.startswith(_COMPRESSIBLE_PREFIXES)
+
+
+class CompressionMiddleware:
+    """Compress eligible HTTP responses with the negotiated encoding.
+
+    Args:
+        app: The wrapped ASGI application.
+        minimum_size: Bodies smaller than this many bytes are sent as-is.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, coding, self.minimum_size))
+
+
+class _CompressingSend:
+    """``send`` wrapper holding back the start message until the first body."""
+
+    def __init__(self, send: Send, coding: str, minimum_size: int) -> None:
+        self._send = send
+        self._coding = coding
+        self._minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._encoder = None
+        self._passthrough = False
+
+    def _encoded_start(self, content_length: Optional[int]) -> Message:
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        headers["Content-Encoding"] = self._coding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        return {**self._start, "headers": headers.raw}
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._encoder is None:
+            if not _compressible(Headers(raw=self._start["headers"])) or (
+                not more_body and len(body) < self._minimum_size
+            ):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._encoder = _ENCODERS[self._coding]()
+            if not more_body:
+                compressed = self._encoder.compress(body) + self._encoder.finish()
+                await self._send(self._encoded_start(len(compressed)))
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send(self._encoded_start(None))
+
+        chunks: List[bytes] = [self._encoder.compress(body)]
+        chunks.append(self._encoder.flush() if more_body else self._encoder.finish())
+        await self._send({"type": "http.response.body", "body": b"".join(chunks),
+                          "more_body": more_body})
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Numeric, BigInteger, Computed
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, ForeignKey, DateTime, Date, Text, Numeric, BigInteger, Computed, FetchedValue
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.training_ids import TrainingIdType
 from datetime import datetime
 
 class User(Base):
@@ -15,6 +16,11 @@ class User(Base):
     country = Column(String(255))
     username = Column(String(255))
     bio = Column(Text)
+    # IANA zone for local calendar days (NULL = UTC).  ``local_date_tz`` is
+    # the zone the user's training.local_date values reflect — written by the
+    # backfill job (app/services/local_date.py), cleared on a timezone change.
+    timezone = Column(Text)
+    local_date_tz = Column(Text)
 
     training_records = relationship("Training", back_populates="user")
 
@@ -49,14 +55,26 @@ class Exercise(Base):
 class Training(Base):
     __tablename__ = "training"
 
-    id = Column(String(32), primary_key=True)
+    # RANGE-partitioned on ``date`` (0012); the database primary key is
+    # (id, date).  ``id`` alone stays the mapper identity: uuid ids are
+    # unique, and every lookup by id keeps working.  Stored as ``uuid``
+    # (0013), read and written as the 32-char hex alias — see
+    # app/core/training_ids.py.
+    id = Column(TrainingIdType, primary_key=True)
     date = Column(DateTime, nullable=False)
     user_id = Column(BigInteger, ForeignKey("users.id"))
     muscle_id = Column(Integer, ForeignKey("muscles.id"))
     exercise_id = Column(Integer, ForeignKey("exercises.id"))
     set = Column(Integer)
     weight = Column(Numeric(5, 2))
-    reps = Column(Numeric(5, 2))
+    # Whole reps (0014); CHECK training_reps_range keeps them within ±999.
+    reps = Column(SmallInteger)
+    # ``date`` as a calendar day in the owner's timezone.  Maintained by the
+    # training_local_date trigger on insert and on date/user_id updates;
+    # never set by the app.
+    local_date = Column(Date, server_default=FetchedValue(), server_onupdate=FetchedValue())
+    # ``weight`` in hundredths of a kg for integer aggregates (0014).
+    weight_c = Column(Integer, Computed("(weight * 100)::integer", persisted=True))
 
     user = relationship("User", back_populates="training_records")
     muscle_group = relationship("Muscle", back_populates="training_records")
@@ -5,8 +5,10 @@ packages/api-contract/openapi.yaml.  Admin shapes are preserved unchanged so
 that existing endpoints keep working.
 """
 import datetime as _dt
+import math
 from datetime import datetime, date
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 # Alias: prevents Pydantic from confusing the field name ``date`` with the
 # ``datetime.date`` type when both appear in the same class namespace.
@@ -179,6 +181,7 @@ class User(_ORM):
     lastname: Optional[str] = None
     username: Optional[str] = None
     bio: Optional[str] = None
+    timezone: Optional[str] = None
     registration_date: Optional[datetime] = None
     last_interaction: Optional[datetime] = None
 
@@ -190,12 +193,45 @@ class UserRegistration(BaseModel):
     lastname: Optional[str] = None
     username: Optional[str] = None
     bio: Optional[str] = None
+    timezone: Optional[str] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def _validate_timezone(cls, v: Optional[str]) -> Optional[str]:
+        """Reject names that are not IANA zones (e.g. "Asia/Tbilisi")."""
+        if v is None:
+            return v
+        try:
+            ZoneInfo(v)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Invalid or unknown timezone: {v!r}")
+        return v
 
 
 # ---------------------------------------------------------------------------
 # Training
 # ---------------------------------------------------------------------------
 
+# training.reps is a SMALLINT within CHECK training_reps_range (0014).
+REPS_MAX = 999
+
+
+def _whole_reps(v: float) -> float:
+    """Reject non-finite, fractional and out-of-range reps (422).
+
+    The column would round ``7.5`` to ``8`` on the cast and a value past the
+    CHECK would surface as a 500, so both are refused here instead.
+    ``int()`` raises on ``inf`` (JSON ``1e400``) and ``nan``, hence the
+    ``isfinite`` check first.
+    """
+    if not math.isfinite(v):
+        raise ValueError("reps must be a finite number")
+    if v != int(v):
+        raise ValueError("reps must be a whole number")
+    if abs(v) > REPS_MAX:
+        raise ValueError(f"reps must be between -{REPS_MAX} and {REPS_MAX}")
+    return v
+
 class TrainingBase(BaseModel):
     date: datetime
     user_id: int
@@ -209,9 +245,9 @@ class TrainingBase(BaseModel):
 class Training(_ORM):
     """Full training record.
 
-    ``id`` is a uuid4 hex string (32 hex chars) assigned by the server.
+    ``id`` is a UUIDv7 as a 32-char hex string, assigned by the server.
     This is the unified scheme used by the whole API — see GYM-22 ID
-    unification note.
+    unification note and ``app.core.training_ids``.
     """
 
     id: str
@@ -244,6 +280,10 @@ class TrainingCreate(BaseModel):
     would reject lookups for names that predate the current validation rules.
     See ``apps/api/app/schemas/validators.validate_lookup_name`` for the full
     create-vs-lookup rationale.
+
+    ``reps`` stays a number in the contract but is stored as a SMALLINT
+    (0014_training_fixed_point): it must be a whole number within ±999
+    (``_whole_reps``), otherwise 422.
     """
 
     muscle_name: str
@@ -263,13 +303,26 @@ class TrainingCreate(BaseModel):
         """
         return validate_lookup_name(str(v))
 
+    @field_validator("reps")
+    @classmethod
+    def _validate_reps(cls, v: float) -> float:
+        return _whole_reps(v)
+
 
 class TrainingUpdate(BaseModel):
-    """Mutable fields on a training record (weight + reps only)."""
+    """Mutable fields on a training record (weight + reps only).
+
+    ``reps`` must be a whole number within ±999, as in ``TrainingCreate``.
+    """
 
     weight: float
     reps: float
 
+    @field_validator("reps")
+    @classmethod
+    def _validate_reps(cls, v: float) -> float:
+        return _whole_reps(v)
+
 
 class TrainingMove(BaseModel):
     """Request body for PATCH /training/{training_id}/move (GYM-51).
@@ -295,6 +348,22 @@ class TrainingMove(BaseModel):
         return validate_lookup_name(str(v))
 
 
+class TrainingImportResult(BaseModel):
+    """Outcome of POST /training/import (``training_import.ImportReport``).
+
+    ``unresolved`` maps each exercise name that matched nothing to its row
+    count; those rows were not imported.
+    """
+
+    source: str
+    rows: int
+    imported: int
+    duplicates: int
+    skipped: int
+    unresolved: Dict[str, int]
+    seconds: float
+
+
 # ---------------------------------------------------------------------------
 # Training history — GYM-47
 # ---------------------------------------------------------------------------
@@ -593,3 +662,37 @@ class WeekCompare(BaseModel):
 
     this_week: WeekStats
     last_week: WeekStats
+
+
+# ---------------------------------------------------------------------------
+# Dashboard bootstrap — the Dashboard's analytics reads in one response
+# ---------------------------------------------------------------------------
+
+class DashboardSectionCache(BaseModel):
+    """Cache outcome of one ``AnalyticsDashboard`` section.
+
+    Matches ``DashboardSectionCache`` in packages/api-contract/openapi.yaml.
+
+    Attributes:
+        hit: True when the section was served from the cache.
+        ttl: Seconds the section's cache entry has left (a freshly stored
+            entry: the full TTL), or null when it is not cached.
+    """
+
+    hit: bool
+    ttl: Optional[int] = None
+
+
+class AnalyticsDashboard(BaseModel):
+    """Every Dashboard analytics read in one payload.
+
+    Matches ``AnalyticsDashboard`` in the OpenAPI contract.  Each section is
+    exactly the body of the corresponding single endpoint.
+    """
+
+    summary: AnalyticsSummary
+    activity: List[ActivityDay]
+    week_compare: WeekCompare
+    top_muscles: List[TopMuscle]
+    recent_exercises: List[RecentExercise]
+    cache: Dict[str, DashboardSectionCache]
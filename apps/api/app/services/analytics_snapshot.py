@@ -0,0 +1,431 @@
+"""Per-user analytic snapshot: one history load, vectorized derived series.
+
+The analytics endpoints each scan the same user's ``training`` rows again —
+the summary totals / PR count / active weeks, the week-compare buckets, the
+exercise-trend volumes and e1RM series, the per-day PR flags of
+``/training/days``.  For a long-time user (tens of thousands of sets) every
+one of them re-reads the whole history, and the write-behind refresh job
+(``app.core.cache_refresh``) recomputes several of them back to back.
+
+``AnalyticsSnapshot`` loads the user's history ONCE as columnar NumPy arrays
+(``analytics.snapshot.history``) and derives everything in vectorized passes:
+
+    weight PRs      segmented running max of weight per exercise, by (date, set)
+    reps PRs        segmented running max of reps per (exercise, weight)
+    e1RM            weight * (1 + reps / 30)  (Epley, as the SQL)
+    volume          weight * reps
+    day / week      UTC or the caller's local day; Monday-start weeks
+
+The slices (``totals``, ``active_weeks``, ``week_totals``,
+``session_volumes``, ``e1rm_trend``, ``pr_days``) return exactly what the
+corresponding SQL returns, so an endpoint can switch per call site
+(``ANALYTICS_ENGINE=snapshot``).  ``load_snapshot`` caches the encoded
+snapshot in Redis so every endpoint (and every refresher of one refresh job)
+slices the same load.
+
+Design choices:
+- Weight is read from the generated ``weight_c`` (hundredths of a kg) and
+  the SMALLINT reps are scaled to hundredths, so PR comparisons and volume
+  sums are exact integer arithmetic — identical to the SQL, no float ties.
+- Segmented running maxima use the offset trick on dense ranks: adding
+  ``group_index * n_ranks`` to each row's rank makes every group's values
+  exceed all previous groups', so one ``np.maximum.accumulate`` over the
+  whole array is a per-group running max.  Ranks keep it exact in int64.
+- Local days for a timezone need the zone's UTC offset only at the edges
+  of the (epoch-aligned) weeks holding sets; the few weeks with a
+  transition in between are resolved per distinct 15-minute slot (every
+  IANA transition falls on one).  The local timestamps are kept per zone on
+  the instance.
+- The cache entry lives under ``analytics:{uid}:snapshot:`` so training
+  writes drop it with the user's other entries (``refresh_after_write`` /
+  ``invalidate_user``).  It is tagged with the write-behind generation read
+  BEFORE the history load; a write that commits meanwhile bumps the
+  generation, so a pre-write snapshot stored afterwards is never served.
+  The entry TTL stays below the generation key's TTL (no ABA on expiry).
+"""
+import logging
+import struct
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.cache import _CACHE_TTL, _get_client, make_key
+from app.core.cache_refresh import _generation_key
+from app.core.query_registry import register_query
+
+logger = logging.getLogger(__name__)
+
+# Integer columns only, so the rows become arrays in one conversion
+# (``weight_c`` is stored since 0014_training_fixed_point).
+# EXTRACT(EPOCH ...) of a naive timestamp counts from 1970-01-01 00:00 as-is.
+_HISTORY_SQL = register_query("analytics.snapshot.history", """
+    SELECT
+        exercise_id,
+        (EXTRACT(EPOCH FROM date) * 1000000)::bigint AS ts_us,
+        COALESCE(set, 0)                            AS set_no,
+        COALESCE(weight_c, 0)                       AS weight_c,
+        COALESCE(reps, 0) * 100                     AS reps_c
+    FROM training
+    WHERE user_id = :uid
+    ORDER BY exercise_id, date, set
+""")
+
+# Entry: magic, generation (length-prefixed ASCII), row count, then the
+# columns back to back in _COLUMNS order; zlib level 1 over the whole.
+_MAGIC = b"GSN1"
+_COLUMNS = (
+    ("exercise_id", np.int32),
+    ("ts", np.int64),        # microseconds since the epoch, naive UTC
+    ("set_no", np.int32),
+    ("weight_c", np.int32),  # hundredths of a kg
+    ("reps_c", np.int32),    # hundredths of a rep
+)
+_ZLIB_LEVEL = 1
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_US_PER_DAY = 86_400_000_000
+_SLOT_US = 15 * 60 * 1_000_000
+_WEEK_US = 7 * _US_PER_DAY
+
+
+def _hundredths(value) -> int:
+    return int(round(float(value) * 100))
+
+
+def _segment_starts(*keys: np.ndarray) -> np.ndarray:
+    """Boolean mask of rows where any of ``keys`` differs from the previous row."""
+    n = len(keys[0])
+    starts = np.zeros(n, dtype=bool)
+    if n:
+        starts[0] = True
+        for key in keys:
+            starts[1:] |= key[1:] != key[:-1]
+    return starts
+
+
+def _beats_prior_max(starts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Per row: ``values`` strictly above every EARLIER value of its segment.
+
+    Rows are grouped into consecutive segments by ``starts``; the first row of
+    a segment has no prior and yields ``False``.
+    """
+    if not len(values):
+        return np.zeros(0, dtype=bool)
+    ranks = np.unique(values, return_inverse=True)[1].astype(np.int64)
+    shifted = ranks + (np.cumsum(starts) - 1) * (int(ranks.max()) + 1)
+    running = np.maximum.accumulate(shifted)
+    beats = np.zeros(len(values), dtype=bool)
+    beats[1:] = shifted[1:] > running[:-1]
+    return beats & ~starts
+
+
+def _to_date(days: int) -> date:
+    return date.fromordinal(_EPOCH.toordinal() + int(days))
+
+
+def _to_us(when: datetime) -> int:
+    """Naive-UTC (or aware) datetime -> microseconds since the epoch."""
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return (when - _EPOCH) // _MICROSECOND
+
+
+def _utc_offsets(instants_us: np.ndarray, zone: ZoneInfo) -> np.ndarray:
+    """UTC offset of ``zone`` (microseconds) at each epoch-microsecond instant."""
+    return np.fromiter(
+        (
+            datetime.fromtimestamp(int(us) / 1e6, tz=zone).utcoffset() // _MICROSECOND
+            for us in instants_us
+        ),
+        dtype=np.int64,
+        count=len(instants_us),
+    )
+
+
+class AnalyticsSnapshot:
+    """One user's training history as columnar arrays plus derived series.
+
+    Rows are kept sorted by ``(exercise_id, date, set)`` — the order every
+    PR window in the SQL uses.
+
+    Args:
+        exercise_id: Exercise id per set.
+        ts: Naive-UTC timestamps as int64 microseconds since the epoch.
+        set_no: Set number per set.
+        weight_c: Weight in hundredths of a kg.
+        reps_c: Reps in hundredths.
+        generation: Write-behind generation the history was read under.
+    """
+
+    def __init__(
+        self,
+        exercise_id: np.ndarray,
+        ts: np.ndarray,
+        set_no: np.ndarray,
+        weight_c: np.ndarray,
+        reps_c: np.ndarray,
+        generation: str = "",
+    ) -> None:
+        order = np.lexsort((set_no, ts, exercise_id))
+        self._assign(
+            *(np.asarray(column, dtype=dtype)[order] for column, (_, dtype) in
+              zip((exercise_id, ts, set_no, weight_c, reps_c), _COLUMNS)),
+            generation=generation,
+        )
+
+    def _assign(self, exercise_id, ts, set_no, weight_c, reps_c, generation: str) -> None:
+        self.exercise_id = exercise_id
+        self.ts = ts
+        self.set_no = set_no
+        self.weight_c = weight_c
+        self.reps_c = reps_c
+        self.generation = generation
+        self._local_cache: Dict[str, np.ndarray] = {}
+
+    # -- construction / encoding -------------------------------------------
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple], generation: str = "") -> "AnalyticsSnapshot":
+        """Build from ORM-shaped ``(exercise_id, date, set, weight, reps)`` rows."""
+        rows = list(rows)
+        return cls(
+            np.fromiter((r[0] for r in rows), dtype=np.int32, count=len(rows)),
+            np.fromiter((_to_us(r[1]) for r in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((r[2] for r in rows), dtype=np.int32, count=len(rows)),
+            np.fromiter((_hundredths(r[3]) for r in rows), dtype=np.int32, count=len(rows)),
+            np.fromiter((_hundredths(r[4]) for r in rows), dtype=np.int32, count=len(rows)),
+            generation=generation,
+        )
+
+    @classmethod
+    def load(cls, db: Session, uid: int, generation: str = "") -> "AnalyticsSnapshot":
+        """Read the user's whole history in one query (RLS-scoped ``db``)."""
+        rows = db.execute(_HISTORY_SQL, {"uid": uid}).fetchall()
+        # Reason: plain tuples — NumPy probing ``Row`` objects for the array
+        # protocol goes through SQLAlchemy's key-fallback path per cell.
+        table = np.array([tuple(r) for r in rows], dtype=np.int64)
+        return cls(*table.reshape(len(rows), len(_COLUMNS)).T, generation=generation)
+
+    def to_bytes(self) -> bytes:
+        """Encode for the cache (see the module docstring for the layout)."""
+        generation = self.generation.encode("ascii")
+        head = _MAGIC + struct.pack("<H", len(generation)) + generation
+        head += struct.pack("<I", len(self))
+        body = b"".join(getattr(self, name).astype(dtype, copy=False).tobytes()
+                        for name, dtype in _COLUMNS)
+        return zlib.compress(head + body, _ZLIB_LEVEL)
+
+    @classmethod
+    def from_bytes(cls, entry: bytes) -> "AnalyticsSnapshot":
+        """Decode a ``to_bytes`` entry.
+
+        Raises:
+            ValueError: When ``entry`` is not a snapshot entry.
+        """
+        raw = zlib.decompress(entry)
+        if raw[:4] != _MAGIC:
+            raise ValueError("not an analytics snapshot entry")
+        (gen_len,) = struct.unpack_from("<H", raw, 4)
+        offset = 6 + gen_len
+        generation = raw[6:offset].decode("ascii")
+        (n,) = struct.unpack_from("<I", raw, offset)
+        offset += 4
+        columns = []
+        for _, dtype in _COLUMNS:
+            columns.append(np.frombuffer(raw, dtype=dtype, count=n, offset=offset))
+            offset += n * np.dtype(dtype).itemsize
+        # Reason: entries are written in snapshot order — skip the re-sort.
+        snapshot = cls.__new__(cls)
+        snapshot._assign(*columns, generation=generation)
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    # -- derived series ------------------------------------------------------
+
+    @cached_property
+    def weight_pr(self) -> np.ndarray:
+        """First set of the exercise, or heavier than every earlier set of it."""
+        starts = _segment_starts(self.exercise_id)
+        return starts | _beats_prior_max(starts, self.weight_c)
+
+    @cached_property
+    def reps_pr(self) -> np.ndarray:
+        """Not a weight PR; the weight was lifted before with fewer reps at most."""
+        order = np.lexsort((self.weight_c, self.exercise_id))  # stable: keeps (date, set)
+        starts = _segment_starts(self.exercise_id[order], self.weight_c[order])
+        beats = np.zeros(len(self), dtype=bool)
+        beats[order] = _beats_prior_max(starts, self.reps_c[order])
+        return beats & ~self.weight_pr
+
+    @cached_property
+    def is_pr(self) -> np.ndarray:
+        """GYM-155 temporal PR flag: weight PR or reps-at-weight PR."""
+        return self.weight_pr | self.reps_pr
+
+    @cached_property
+    def e1rm(self) -> np.ndarray:
+        """Epley estimated 1RM per set."""
+        return (self.weight_c / 100.0) * (1.0 + (self.reps_c / 100.0) / 30.0)
+
+    @cached_property
+    def volume_c(self) -> np.ndarray:
+        """weight x reps per set in ten-thousandths (exact)."""
+        return self.weight_c.astype(np.int64) * self.reps_c.astype(np.int64)
+
+    def days(self, tz: Optional[str] = None) -> np.ndarray:
+        """Calendar day per set (days since the epoch), UTC or local to ``tz``."""
+        return self._local_us(tz) // _US_PER_DAY
+
+    def _local_us(self, tz: Optional[str]) -> np.ndarray:
+        if tz is None or not len(self):
+            return self.ts
+        if tz not in self._local_cache:
+            zone = ZoneInfo(tz)
+            # Offset at the edges of each UTC week with a set; only the rare
+            # weeks whose offset changes in between are resolved per slot.
+            weeks, inverse = np.unique(self.ts // _WEEK_US, return_inverse=True)
+            edges = np.union1d(weeks, weeks + 1)
+            at_edge = _utc_offsets(edges * _WEEK_US, zone)
+            start = at_edge[np.searchsorted(edges, weeks)]
+            end = at_edge[np.searchsorted(edges, weeks + 1)]
+            offsets = start[inverse]
+            moving = (start != end)[inverse]
+            if moving.any():
+                slots, slot_inverse = np.unique(self.ts[moving] // _SLOT_US, return_inverse=True)
+                offsets[moving] = _utc_offsets(slots * _SLOT_US, zone)[slot_inverse]
+            self._local_cache[tz] = self.ts + offsets
+        return self._local_cache[tz]
+
+    @staticmethod
+    def _monday(days: np.ndarray) -> np.ndarray:
+        # 1970-01-01 was a Thursday: (days + 3) % 7 is the Monday-based weekday.
+        return days - (days + 3) % 7
+
+    # -- slices (each mirrors one SQL statement) -----------------------------
+
+    def totals(self) -> Tuple[int, int, int]:
+        """``(exercises, sets, prs)`` of ``/analytics/summary``."""
+        return (
+            int(len(np.unique(self.exercise_id))),
+            len(self),
+            int(self.weight_pr.sum()),
+        )
+
+    def active_weeks(self, tz: Optional[str] = None) -> List[date]:
+        """Monday-start weeks with >=1 set, newest first (streak input)."""
+        weeks = np.unique(self._monday(self.days(tz)))
+        return [_to_date(w) for w in weeks[::-1]]
+
+    def week_totals(
+        self,
+        range_start: datetime,
+        range_end: datetime,
+        tz: Optional[str] = None,
+    ) -> Dict[date, Tuple[int, float]]:
+        """``{week_start: (sets, volume)}`` for sets in ``[range_start, range_end)``."""
+        mask = (self.ts >= _to_us(range_start)) & (self.ts < _to_us(range_end))
+        if not mask.any():
+            return {}
+        weeks, inverse = np.unique(self._monday(self.days(tz)[mask]), return_inverse=True)
+        sets = np.bincount(inverse)
+        volume = np.bincount(inverse, weights=self.volume_c[mask])
+        return {
+            _to_date(w): (int(s), float(v) / 10_000.0)
+            for w, s, v in zip(weeks, sets, volume)
+        }
+
+    def _exercise_days(self, exercise_id: int, since_us: Optional[int] = None):
+        lo, hi = np.searchsorted(self.exercise_id, [exercise_id, exercise_id + 1])
+        rows = np.arange(lo, hi)
+        if since_us is not None:
+            rows = rows[self.ts[rows] >= since_us]
+        days = self.ts[rows] // _US_PER_DAY
+        # Rows of one exercise are date-ordered, so equal days are adjacent.
+        firsts = np.flatnonzero(_segment_starts(days)) if len(rows) else rows
+        return rows, days, firsts
+
+    def session_volumes(self, exercise_id: int, limit: int = 2) -> List[Tuple[date, float]]:
+        """Most recent UTC days of an exercise with Σ weight x reps, newest first."""
+        rows, days, firsts = self._exercise_days(exercise_id)
+        if not len(rows):
+            return []
+        sums = np.add.reduceat(self.volume_c[rows], firsts)
+        pairs = list(zip(days[firsts], sums))[::-1][:limit]
+        return [(_to_date(d), float(v) / 10_000.0) for d, v in pairs]
+
+    def e1rm_trend(self, exercise_id: int, window_start: datetime) -> List[Tuple[date, float]]:
+        """Per UTC day max e1RM of an exercise since ``window_start``, ascending."""
+        rows, days, firsts = self._exercise_days(exercise_id, _to_us(window_start))
+        if not len(rows):
+            return []
+        best = np.maximum.reduceat(self.e1rm[rows], firsts)
+        return [(_to_date(d), float(v)) for d, v in zip(days[firsts], best)]
+
+    def pr_days(
+        self,
+        dt_from: datetime,
+        dt_to: datetime,
+        tz: Optional[str] = None,
+    ) -> Dict[date, bool]:
+        """``{day: has_pr}`` for the days with sets in ``[dt_from, dt_to)``."""
+        mask = (self.ts >= _to_us(dt_from)) & (self.ts < _to_us(dt_to))
+        if not mask.any():
+            return {}
+        days, inverse = np.unique(self.days(tz)[mask], return_inverse=True)
+        flagged = np.bincount(inverse, weights=self.is_pr[mask]) > 0
+        return {_to_date(d): bool(f) for d, f in zip(days, flagged)}
+
+
+def _snapshot_key(uid: int) -> str:
+    return make_key(uid, "snapshot")
+
+
+def load_snapshot(db: Session, uid: int) -> AnalyticsSnapshot:
+    """Return the user's snapshot from the cache, or load and cache it.
+
+    Never raises on Redis errors: without Redis every call loads from the
+    database (one query, still cheaper than the per-endpoint SQL it replaces
+    for a long history).
+
+    Args:
+        db: SQLAlchemy session RLS-scoped to ``uid``.
+        uid: Effective principal id.
+
+    Returns:
+        The user's ``AnalyticsSnapshot``.
+    """
+    client = _get_client(decode_responses=False)
+    if client is None:
+        return AnalyticsSnapshot.load(db, uid)
+    key = _snapshot_key(uid)
+    try:
+        generation = ""
+        try:
+            entry, current = client.mget(key, _generation_key(uid))
+            generation = (current or b"").decode("ascii")
+            if entry is not None:
+                snapshot = AnalyticsSnapshot.from_bytes(entry)
+                if snapshot.generation == generation:
+                    return snapshot
+        except Exception as exc:
+            logger.warning("snapshot cache read(%r) failed: %s", key, exc)
+
+        snapshot = AnalyticsSnapshot.load(db, uid, generation=generation)
+        try:
+            client.set(key, snapshot.to_bytes(), ex=_CACHE_TTL)
+        except Exception as exc:
+            logger.warning("snapshot cache write(%r) failed: %s", key, exc)
+        return snapshot
+    finally:
+        try:
+            client.close()
+        except Exception:
+            pass
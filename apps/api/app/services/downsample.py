@@ -0,0 +1,82 @@
+"""Largest-Triangle-Three-Buckets (LTTB) downsampling for chart series.
+
+Used by ``/analytics/exercise-progress`` to bound the number of points a
+series sends to the client (``max_points``).  A multi-year history easily has
+thousands of points per set number; a phone-sized ECharts line cannot show
+more than a few hundred, so the rest is payload, serialization and render
+time for nothing.
+
+Design choices:
+- LTTB (Steinarsson, 2013) keeps the points that carry the visual shape —
+  peaks, drops, plateaus' edges — where uniform striding or bucket averaging
+  would flatten a PR spike.
+- The output is a SUBSET of the input (no synthesized points): every point
+  returned is a real set the user logged, so its date / weight / reps stay
+  consistent with each other and with the other analytics endpoints.
+- First and last points are always kept, so the series spans the same dates.
+- Pure function over any point type via ``x`` / ``y`` accessors — no
+  dependency on the response schema, trivially unit-testable.
+"""
+from typing import Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def lttb(
+    points: Sequence[T],
+    threshold: int,
+    x: Callable[[T], float],
+    y: Callable[[T], float],
+) -> List[T]:
+    """Downsample ``points`` to at most ``threshold`` points with LTTB.
+
+    Args:
+        points: Points ordered by ``x`` ascending.
+        threshold: Maximum number of points to return (at least 3: both
+            endpoints plus one bucket).  Shorter series are returned
+            unchanged.
+        x: Numeric x accessor (e.g. the date's ordinal).
+        y: Numeric y accessor (e.g. the weight).
+
+    Returns:
+        A new list with the selected points, in input order.
+
+    Raises:
+        ValueError: If ``threshold`` is below 3.
+    """
+    if threshold < 3:
+        raise ValueError(f"LTTB threshold must be at least 3, got {threshold}")
+    n = len(points)
+    if n <= threshold:
+        return list(points)
+
+    xs = [float(x(p)) for p in points]
+    ys = [float(y(p)) for p in points]
+
+    # The first and last points are fixed; the n - 2 middle points are split
+    # into ``buckets`` ranges.  Integer bounds: no float drift at the edges.
+    buckets = threshold - 2
+    middle = n - 2
+
+    def bounds(i: int) -> range:
+        return range(i * middle // buckets + 1, (i + 1) * middle // buckets + 1)
+
+    selected = [0]
+    a = 0
+    for i in range(buckets):
+        # Third triangle vertex: the average of the NEXT bucket (the fixed
+        # last point after the final bucket).
+        following = bounds(i + 1) if i + 1 < buckets else range(n - 1, n)
+        avg_x = sum(xs[j] for j in following) / len(following)
+        avg_y = sum(ys[j] for j in following) / len(following)
+
+        # Keep the point of THIS bucket forming the largest triangle with the
+        # previously kept point and that average.
+        ax, ay = xs[a], ys[a]
+        a = max(
+            bounds(i),
+            key=lambda j: abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay)),
+        )
+        selected.append(a)
+    selected.append(n - 1)
+    return [points[j] for j in selected]
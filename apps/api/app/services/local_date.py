@@ -0,0 +1,202 @@
+"""Write-time local calendar days: ``training.local_date``.
+
+Every tz-aware read used to evaluate ``date AT TIME ZONE 'UTC' AT TIME ZONE
+:tz`` per row.  Migration ``0010_training_local_date`` adds ``users.timezone``
+and a ``training.local_date`` column that a BEFORE INSERT / UPDATE OF date
+trigger fills from the owner's zone, so local-day grouping becomes a plain
+indexed column.  This module decides when a read may use it and runs the
+backfill that makes it consistent.
+
+    users.timezone       the user's IANA zone (NULL = UTC), set via
+                         ``PUT /users/me``
+    users.local_date_tz  the zone ALL of the user's ``local_date`` values
+                         reflect; NULL until the backfill has run
+
+Usage (routers):
+
+    if use_local_date(db, uid, tz):
+        rows = db.execute(_ACTIVITY_LOCAL_SQL, params)   # GROUP BY local_date
+    else:
+        rows = db.execute(_ACTIVITY_TZ_SQL, params)      # AT TIME ZONE path
+
+Jobs (``python -m app.core.jobs enqueue <name> ...``):
+    training.local_date.backfill      user_id=<id> — recompute one user
+    training.local_date.backfill_all  enqueue the above for every user whose
+                                      rows are not yet consistent
+
+Design choices:
+- ``local_date_tz`` is the switch, not ``timezone``: it only becomes equal to
+  the zone once the backfill has rewritten every row, and ``upsert_me``
+  clears it in the same transaction that changes ``timezone``.  Reads in
+  between keep the AT TIME ZONE path, so no answer is ever half-migrated.
+- The backfill rewrites rows in ``_BACKFILL_BATCH`` chunks, one commit each,
+  so a decade of history never holds its row locks at once.  The final pass
+  and the ``local_date_tz`` write run under ``SELECT ... FOR UPDATE`` on the
+  users row: that lock conflicts with the FK lock every concurrent training
+  insert takes, so no row can land between the last check and the switch.
+- The stored zone is read once per session (``db.info``): the dashboard asks
+  for three sections on one session.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.jobs import enqueue, job
+from app.core.query_registry import register_query
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_JOB = "training.local_date.backfill"
+BACKFILL_ALL_JOB = "training.local_date.backfill_all"
+
+# Rows rewritten per committed batch.
+_BACKFILL_BATCH = 5000
+
+_INFO_KEY = "local_date_tz"
+
+_STORED_TZ_SQL = register_query("local_date.stored_tz", """
+    SELECT local_date_tz FROM users WHERE id = :uid
+""")
+
+_TIMEZONE_SQL = register_query("local_date.timezone", """
+    SELECT COALESCE(timezone, 'UTC') FROM users WHERE id = :uid
+""")
+
+_LOCK_USER_SQL = register_query("local_date.lock_user", """
+    SELECT COALESCE(timezone, 'UTC') FROM users WHERE id = :uid FOR UPDATE
+""")
+
+_BACKFILL_BATCH_SQL = register_query("local_date.backfill_batch", """
+    UPDATE training
+    SET local_date = (date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date
+    WHERE user_id = :uid
+      AND id IN (
+        SELECT id FROM training
+        WHERE user_id = :uid
+          AND local_date IS DISTINCT FROM (date AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date
+        LIMIT :batch
+      )
+""")
+
+_MARK_CONSISTENT_SQL = register_query("local_date.mark_consistent", """
+    UPDATE users SET local_date_tz = :tz WHERE id = :uid
+""")
+
+_PENDING_USERS_SQL = register_query("local_date.pending_users", """
+    SELECT id FROM users
+    WHERE local_date_tz IS DISTINCT FROM COALESCE(timezone, 'UTC')
+    ORDER BY id
+""")
+
+
+def stored_local_tz(db: Session, uid: int) -> Optional[str]:
+    """Return ``users.local_date_tz`` for ``uid`` (memoized on the session).
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+
+    Returns:
+        The zone the user's ``local_date`` values reflect, or ``None`` while
+        a backfill is outstanding (or the user row does not exist).
+    """
+    memo = db.info.setdefault(_INFO_KEY, {})
+    if uid not in memo:
+        memo[uid] = db.execute(_STORED_TZ_SQL, {"uid": uid}).scalar()
+    return memo[uid]
+
+
+def use_local_date(db: Session, uid: int, tz: Optional[str]) -> bool:
+    """True when a read for ``tz`` may group by ``training.local_date``.
+
+    Args:
+        db: SQLAlchemy session (RLS-scoped to ``uid``).
+        uid: Effective principal id.
+        tz: Validated IANA timezone name, or ``None`` for UTC.
+    """
+    return stored_local_tz(db, uid) == (tz or "UTC")
+
+
+def enqueue_backfill(uid: int) -> Optional[str]:
+    """Queue the per-user backfill (deduplicated); never raises on Redis errors."""
+    return enqueue(BACKFILL_JOB, dedup_key=f"local-date:{uid}", user_id=uid)
+
+
+def backfill_local_dates(db: Session, uid: int, batch: int = _BACKFILL_BATCH) -> int:
+    """Make every ``local_date`` of ``uid`` match their zone, then flip the switch.
+
+    Idempotent: rows already consistent are skipped, and a user whose zone
+    changed mid-run is left for the job that change enqueued.
+
+    Args:
+        db: Session scoped to ``uid`` (or an admin session).
+        uid: User whose rows to rewrite.
+        batch: Rows per committed batch.
+
+    Returns:
+        Number of rows rewritten.
+    """
+    tz = db.execute(_TIMEZONE_SQL, {"uid": uid}).scalar()
+    db.commit()
+    if tz is None:
+        return 0
+
+    params = {"uid": uid, "tz": tz, "batch": batch}
+    updated = 0
+    while True:
+        count = db.execute(_BACKFILL_BATCH_SQL, params).rowcount
+        db.commit()
+        updated += count
+        if count < batch:
+            break
+
+    # Final pass + switch under the users row lock (see module docstring).
+    if db.execute(_LOCK_USER_SQL, {"uid": uid}).scalar() != tz:
+        db.rollback()
+        return updated
+    while True:
+        count = db.execute(_BACKFILL_BATCH_SQL, params).rowcount
+        updated += count
+        if count < batch:
+            break
+    db.execute(_MARK_CONSISTENT_SQL, {"uid": uid, "tz": tz})
+    db.commit()
+    db.info.pop(_INFO_KEY, None)
+    return updated
+
+
+@contextmanager
+def _session(principal: dict):
+    """RLS-scoped session for ``principal`` (same wiring as ``get_db``)."""
+    from app.core.database import get_db
+
+    gen = get_db(principal)
+    db = next(gen)
+    try:
+        yield db
+    finally:
+        gen.close()
+
+
+@job(BACKFILL_JOB, dedup_ttl=3600)
+def backfill_local_dates_job(user_id: int) -> None:
+    """Background job: backfill one user's ``training.local_date``."""
+    with _session({"user_id": user_id, "role": "user"}) as db:
+        updated = backfill_local_dates(db, user_id)
+    logger.info("local_date backfill: user_id=%s rows=%d", user_id, updated)
+
+
+@job(BACKFILL_ALL_JOB, max_retries=0)
+def backfill_all_job() -> None:
+    """Background job: enqueue the backfill for every pending user.
+
+    Run once after deploying migration 0010; afterwards only timezone
+    changes create pending users, and ``upsert_me`` enqueues those itself.
+    """
+    with _session({"user_id": None, "role": "admin"}) as db:
+        user_ids = [row[0] for row in db.execute(_PENDING_USERS_SQL)]
+    for uid in user_ids:
+        enqueue_backfill(uid)
+    logger.info("local_date backfill_all: %d user(s) enqueued", len(user_ids))
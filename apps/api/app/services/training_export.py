@@ -0,0 +1,245 @@
+"""Streaming training-history export — CSV, NDJSON and Parquet.
+
+``GET /training/export`` (the caller's history) and ``GET /admin/training/export``
+(every user, for the analytics warehouse) used to be ``GET /training`` paged
+100 rows at a time with an offset — one round trip and one ever deeper
+OFFSET scan per page.  Both now run ONE statement over a server-side cursor
+and stream the encoded rows as they are fetched:
+
+    db.execute(stmt, execution_options={"yield_per": EXPORT_BATCH_ROWS})
+        -> psycopg2 named cursor (DECLARE ... / FETCH FORWARD 2000)
+        -> one encoded chunk per fetched batch
+
+so the API holds one batch and one chunk at a time, whatever the history
+size.
+
+Columns, in order (the admin export prepends ``user_id``):
+
+    id        32-char hex training id (the API's id form)
+    date      UTC timestamp of the set, ISO 8601
+    muscle    muscle name
+    exercise  exercise name
+    set       set number
+    weight    kg, two decimals (exact in CSV and Parquet)
+    reps      whole reps
+
+Design choices:
+- RLS applies as everywhere else: the session carries the principal
+  (``get_read_db`` — the read replica when one is configured), so the user
+  export sees only the caller's rows even without the ``user_id`` filter;
+  the admin export runs with ``app.role = 'admin'``.
+- The session belongs to the stream, not to a yield dependency: it is opened
+  and the statement executed before the response starts (so a failing query
+  still answers 500), and closed when the last chunk is sent or the client
+  goes away.  FastAPI 0.106+ tears yield dependencies down before a streamed
+  body is sent.
+- The user export is ordered by date (``idx_training_user_date``, registered
+  as ``training_export.user``); the admin export is not ordered — sorting
+  all of ``training`` would hold back the first byte until the sort is done.
+- Parquet writes one row group per batch through ``pyarrow``, an optional
+  dependency (requirements-parquet.txt); without it ``parquet_available()``
+  is False and the routers answer 501 before anything is streamed.
+"""
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Result, Row
+
+from app.core.cache_codec import dumps_json
+from app.core.database import get_read_db
+from app.core.query_registry import register_query
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: requirements-parquet.txt
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Rows per server-side FETCH, per encoded chunk and per Parquet row group.
+EXPORT_BATCH_ROWS = 2000
+
+COLUMNS = ("id", "date", "muscle", "exercise", "set", "weight", "reps")
+ADMIN_COLUMNS = ("user_id",) + COLUMNS
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """Response metadata of one export format."""
+
+    media_type: str
+    extension: str
+
+
+FORMATS = {
+    "csv": ExportFormat("text/csv; charset=utf-8", "csv"),
+    "ndjson": ExportFormat("application/x-ndjson", "ndjson"),
+    "parquet": ExportFormat("application/vnd.apache.parquet", "parquet"),
+}
+
+_SELECT = """
+    SELECT {user_col}replace(t.id::text, '-', '') AS id, t.date,
+           m.name AS muscle, e.name AS exercise, t."set", t.weight, t.reps
+    FROM training t
+    JOIN muscles   m ON m.id = t.muscle_id
+    JOIN exercises e ON e.id = t.exercise_id
+"""
+
+_USER_EXPORT_SQL = register_query("training_export.user", _SELECT.format(user_col="") + """
+    WHERE t.user_id = :uid
+    ORDER BY t.date, t."set"
+""")
+
+# Not registered: a full read of ``training`` is the point.
+_ADMIN_EXPORT_SQL = text(_SELECT.format(user_col="t.user_id, "))
+
+
+def parquet_available() -> bool:
+    """True when the optional ``pyarrow`` is installed."""
+    return pa is not None
+
+
+def open_export(principal: dict, fmt: str, user_id: Optional[int]) -> Iterator[bytes]:
+    """Run the export statement and return the stream of encoded chunks.
+
+    Args:
+        principal: Identity the session's RLS context is armed with.
+        fmt: A ``FORMATS`` key; ``"parquet"`` requires ``parquet_available()``.
+        user_id: The user whose history is exported, or ``None`` for every
+            user (admin export, adds the ``user_id`` column).
+
+    Returns:
+        An iterator of ``bytes`` chunks that closes the session when it is
+        exhausted or closed.
+
+    Raises:
+        sqlalchemy.exc.SQLAlchemyError: The statement failed; the session is
+            already closed.
+    """
+    sessions = get_read_db(principal)
+    db = next(sessions)
+    try:
+        if user_id is None:
+            stmt, params, columns = _ADMIN_EXPORT_SQL, {}, ADMIN_COLUMNS
+        else:
+            stmt, params, columns = _USER_EXPORT_SQL, {"uid": user_id}, COLUMNS
+        result = db.execute(stmt, params, execution_options={"yield_per": EXPORT_BATCH_ROWS})
+    except Exception:
+        sessions.close()
+        raise
+    return _stream(sessions, _ENCODERS[fmt](result, columns))
+
+
+def _stream(sessions: Iterator, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    try:
+        yield from chunks
+    finally:
+        sessions.close()
+
+
+def _csv_chunks(result: Result, columns: Sequence[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    date_at = columns.index("date")
+    for batch in result.partitions(EXPORT_BATCH_ROWS):
+        for row in batch:
+            values = list(row)
+            values[date_at] = values[date_at].isoformat()
+            writer.writerow(values)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(result: Result, columns: Sequence[str]) -> Iterator[bytes]:
+    date_at, weight_at = columns.index("date"), columns.index("weight")
+    for batch in result.partitions(EXPORT_BATCH_ROWS):
+        lines: List[bytes] = []
+        for row in batch:
+            values = list(row)
+            values[date_at] = values[date_at].isoformat()
+            if values[weight_at] is not None:
+                values[weight_at] = float(values[weight_at])
+            lines.append(dumps_json(dict(zip(columns, values))))
+        lines.append(b"")
+        yield b"\n".join(lines)
+
+
+class _ChunkSink:
+    """Write-only file that hands out what the Parquet writer wrote so far."""
+
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        chunk, self._parts = b"".join(self._parts), []
+        return chunk
+
+
+def _parquet_schema(columns: Sequence[str]):
+    types = {
+        "user_id": pa.int64(),
+        "id": pa.string(),
+        "date": pa.timestamp("us", tz="UTC"),
+        "muscle": pa.string(),
+        "exercise": pa.string(),
+        "set": pa.int32(),
+        "weight": pa.decimal128(5, 2),
+        "reps": pa.int16(),
+    }
+    return pa.schema([(name, types[name]) for name in columns])
+
+
+def _parquet_chunks(result: Result, columns: Sequence[str]) -> Iterator[bytes]:
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in result.partitions(EXPORT_BATCH_ROWS):
+            writer.write_table(_parquet_table(schema, batch))
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def _parquet_table(schema, batch: Sequence[Row]):
+    values = list(zip(*batch))
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(values, schema)],
+        schema=schema,
+    )
+
+
+_ENCODERS = {
+    "csv": _csv_chunks,
+    "ndjson": _ndjson_chunks,
+    "parquet": _parquet_chunks,
+}
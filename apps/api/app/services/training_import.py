@@ -0,0 +1,676 @@
+"""Bulk training-history import — Strong / Hevy CSV, our own export, JSON.
+
+New users arrive with years of history from other trackers.  Replaying it as
+one ``POST /training`` per set costs two name resolutions and one commit per
+set; a 10k-set history took minutes.  ``import_history`` loads a whole file
+in one transaction:
+
+    parse            file -> ParsedSet list (format detected from the header)
+    resolve          every distinct exercise name in ONE catalog query
+    COPY             resolved rows -> TEMP ``training_import_staging``
+    merge            ONE ``INSERT INTO training ... SELECT`` that skips the
+                     sets the user already has
+
+Sources (``source=auto`` picks one from the content):
+
+    strong   Strong CSV: Date, Exercise Name, Set Order, Weight, Reps
+             (+ Weight Unit in older exports)
+    hevy     Hevy CSV: start_time, exercise_title, set_index,
+             weight_kg | weight_lbs, reps
+    gymbot   our own ``GET /training/export`` CSV (the admin export's
+             ``user_id`` column is ignored)
+    json     a JSON array of objects, or NDJSON (our NDJSON export):
+             date, exercise, reps, and optionally muscle, set, weight
+
+Name resolution, best first per distinct name:
+  1. the exercise name (``name_key``), then an alias (``exercise_alias``),
+     then a free-exercise-db name (``_FXDB_NAMES``);
+  2. for "Bench Press (Barbell)"-style names (Strong, Hevy) the name as
+     written, then "Barbell Bench Press", then "Bench Press";
+  3. an exercise under the row's muscle (when the file names one), then the
+     caller's own exercise over a global one.
+Rows whose name resolves to nothing are not imported; the report lists those
+names so the user can create them and import the same file again.
+
+Design choices:
+- Strong and Hevy write local wall-clock times without a zone: their sets
+  are stored at noon UTC of the workout day, like a retroactive
+  ``POST /training`` (GYM-51).  ``gymbot`` and ``json`` dates are UTC and
+  kept as they are (a date-only value also becomes noon).
+- A set is identified by (exercise, UTC day, set number).  Strong and Hevy
+  sets are numbered in file order per exercise and day, so re-importing the
+  same file — or an overlapping later export — adds only the new sets.
+- The staging table holds resolved ids only (no names), so the COPY text
+  needs no escaping; it is ``ON COMMIT DROP`` and the import is one
+  transaction: a failure leaves nothing behind.
+- RLS applies as everywhere else: the session carries the caller, so the
+  resolution sees only their own and global catalog rows and the merge can
+  only write their rows.
+- Progress is reported per stage through the ``progress`` callback (the CLI
+  prints it); the endpoint answers with the final ``ImportReport``.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, time as dtime, timezone
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache_refresh import refresh_after_write, training_write
+from app.core.training_ids import new_training_id
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("strong", "hevy", "gymbot", "json")
+
+# Upper bound of an uploaded file: ~200k sets of Strong CSV.
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+
+_LB_TO_KG = Decimal("0.45359237")
+_CENT = Decimal("0.01")
+# NUMERIC(5,2) and the training_reps_range CHECK.
+_MAX_WEIGHT = Decimal("999.99")
+_MAX_REPS = 999
+
+# Reviewed subset of packages/db/seeds/fxdb_crossmap.tsv (GYM-111), embedded
+# like the 0009 aliases (the TSV is not shipped with the API): high-confidence
+# rows whose free-exercise-db name is the same movement as our canonical
+# exercise and maps to no other one.  Tuples are (exercise id, fxdb name); the
+# trailing comment is our name.
+_FXDB_NAMES: Tuple[Tuple[int, str], ...] = (
+    (3, "Close-Grip Front Lat Pulldown"),  # Close-Grip Lat Pulldown
+    (8, "Incline Dumbbell Press"),  # Incline Dumbbell Bench Press
+    (31, "Smith Machine Incline Bench Press"),  # Incline Smith Machine Press
+    (54, "Cable Chest Press"),  # Cable Chest Press (Machine)
+    (44, "Leverage Decline Chest Press"),  # Decline Chest Press (Machine)
+    (21, "Incline Cable Chest Press"),  # Incline Chest Press (Machine)
+    (36, "Cable Crossover"),  # High Cable Crossover
+    (29, "Seated Calf Raise"),  # Calf Raise (Machine)
+    (28, "Lying Leg Curls"),  # Lying Leg Curl
+    (70, "Cable Seated Lateral Raise"),  # Cable Lateral Raise
+    (12, "Smith Machine Overhead Shoulder Press"),  # Smith Machine Shoulder Press
+    (15, "Upright Cable Row"),  # Upright Row
+    (74, "Close-Grip Barbell Bench Press"),  # Close-Grip Bench Press
+    (359, "JM Press"),  # Smith Machine JM Press
+    (19, "Cable Rope Overhead Triceps Extension"),  # Overhead Cable Triceps Extension
+    (1, "Triceps Pushdown"),  # Rope Triceps Pushdown
+    (39, "Triceps Pushdown - V-Bar Attachment"),  # V-Bar Triceps Pushdown
+)
+
+# Header columns that identify a CSV source (all must be present).
+_CSV_SIGNATURES = (
+    ("strong", {"Date", "Exercise Name", "Reps"}),
+    ("hevy", {"start_time", "exercise_title", "reps"}),
+    ("gymbot", {"date", "exercise", "reps"}),
+)
+
+# Hevy's start_time, e.g. "15 Mar 2021, 18:22".
+_HEVY_DATE_FORMATS = ("%d %b %Y, %H:%M", "%d %b %Y %H:%M")
+
+# "Bench Press (Barbell)" -> ("Bench Press", "Barbell").
+_QUALIFIED_NAME = re.compile(r"(.+?)\s*\(([^()]+)\)")
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be read as the requested (or any known) source."""
+
+
+@dataclass(frozen=True)
+class ParsedSet:
+    """One set read from the file, before name resolution.
+
+    Attributes:
+        date: Naive UTC timestamp to store.
+        exercise: Exercise name as written (whitespace-collapsed).
+        muscle: Muscle name when the source has one.
+        set: Set number; ``None`` until numbered in file order.
+        weight: kg, two decimals.
+        reps: Whole reps.
+    """
+
+    date: datetime
+    exercise: str
+    muscle: Optional[str]
+    set: Optional[int]
+    weight: Decimal
+    reps: int
+
+
+@dataclass
+class ImportReport:
+    """Outcome of one import.
+
+    Attributes:
+        source: The source the file was read as.
+        rows: Data rows in the file.
+        imported: Sets inserted.
+        duplicates: Sets the user already had (or repeated in the file).
+        skipped: Rows without reps or outside the stored ranges (cardio,
+            timed sets).
+        unresolved: Exercise name -> rows, for names no exercise matched.
+        seconds: Wall time of the import.
+    """
+
+    source: str
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    unresolved: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+# ``progress(stage, done, total)``: stage is parse|resolve|stage|merge.
+Progress = Callable[[str, int, int], None]
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def detect_source(data: bytes) -> str:
+    """Name the source a file was exported from.
+
+    Raises:
+        ImportFormatError: Not JSON and no known CSV header.
+    """
+    head = data.lstrip()[:1]
+    if head in (b"[", b"{"):
+        return "json"
+    columns = set(_csv_header(_decode(data)))
+    for source, required in _CSV_SIGNATURES:
+        if required <= columns:
+            return source
+    raise ImportFormatError("Unrecognised file: expected a Strong, Hevy or gym-bot CSV, or JSON")
+
+
+def parse_sets(data: bytes, source: str, unit: str = "kg") -> Tuple[List[ParsedSet], int, int]:
+    """Read every set of a file.
+
+    Args:
+        data: The file's bytes (UTF-8, a BOM is allowed).
+        source: One of ``SOURCES``.
+        unit: ``kg`` or ``lb`` — the unit of a Strong ``Weight`` column
+            without ``Weight Unit``; the other sources name their unit.
+
+    Returns:
+        ``(sets, rows, skipped)``: the importable sets in file order, the
+        number of data rows and how many of them were skipped.
+
+    Raises:
+        ImportFormatError: A required column is missing or a value cannot be
+            read; the message names the row.
+    """
+    if source == "json":
+        records = _json_records(data)
+    else:
+        content = _decode(data)
+        records = list(csv.DictReader(io.StringIO(content), dialect=_dialect(content)))
+    reader = _ROW_READERS[source]
+    sets: List[ParsedSet] = []
+    skipped = 0
+    for number, record in enumerate(records, start=1):
+        try:
+            parsed = reader(record, unit)
+        except (KeyError, ValueError, TypeError, InvalidOperation, AttributeError) as exc:
+            raise ImportFormatError(f"Row {number}: {_describe(exc)}") from exc
+        if parsed is None:
+            skipped += 1
+        else:
+            sets.append(parsed)
+    return _number_sets(sets), len(records), skipped
+
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError("File is not UTF-8 text") from exc
+
+
+class _SemicolonCsv(csv.excel):
+    delimiter = ";"
+
+
+def _dialect(content: str):
+    """Strong writes ``;``-separated CSV in comma-decimal locales."""
+    first_line = content.splitlines()[0] if content.strip() else ""
+    return _SemicolonCsv if first_line.count(";") > first_line.count(",") else csv.excel
+
+
+def _csv_header(content: str) -> List[str]:
+    first_line = content.splitlines()[0] if content.strip() else ""
+    return [column.strip() for column in next(csv.reader([first_line], dialect=_dialect(content)), [])]
+
+
+def _json_records(data: bytes) -> List[dict]:
+    content = _decode(data).strip()
+    try:
+        if content.startswith("["):
+            records = json.loads(content)
+        else:
+            records = [json.loads(line) for line in content.splitlines() if line.strip()]
+    except ValueError as exc:
+        raise ImportFormatError(f"Invalid JSON: {exc}") from exc
+    if not all(isinstance(record, dict) for record in records):
+        raise ImportFormatError("JSON must be an array of objects or one object per line")
+    return records
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, KeyError):
+        return f"missing column {exc.args[0]!r}"
+    return str(exc) or type(exc).__name__
+
+
+def _name(value: Optional[str]) -> str:
+    name = " ".join(str(value or "").split())
+    if not name:
+        raise ValueError("empty exercise name")
+    return name
+
+
+def _number(value) -> Optional[Decimal]:
+    """A decimal from a cell; ``None`` for an empty one.  Accepts ``12,5``."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    raw = str(value).strip()
+    if not raw:
+        return None
+    if "," in raw and "." not in raw:
+        raw = raw.replace(",", ".")
+    return Decimal(raw)
+
+
+def _noon(day: datetime) -> datetime:
+    return datetime.combine(day.date(), dtime(12, 0))
+
+
+def _iso_datetime(value: str) -> datetime:
+    """Naive UTC from an ISO 8601 timestamp; a bare date becomes noon."""
+    raw = str(value).strip()
+    parsed = datetime.fromisoformat(raw)
+    if len(raw) == 10:
+        return _noon(parsed)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _wall_clock_day(value: str) -> datetime:
+    """Noon UTC of the day a local wall-clock timestamp falls on."""
+    raw = str(value).strip()
+    for fmt in _HEVY_DATE_FORMATS:
+        try:
+            return _noon(datetime.strptime(raw, fmt))
+        except ValueError:
+            pass
+    return _noon(datetime.fromisoformat(raw[:10]))
+
+
+def _make_set(day: datetime, exercise: str, muscle: Optional[str], set_no: Optional[int],
+              weight: Optional[Decimal], reps: Optional[Decimal]) -> Optional[ParsedSet]:
+    """A ``ParsedSet``, or ``None`` when the row cannot be stored as a set."""
+    if reps is None:
+        return None
+    weight = (weight or Decimal(0)).quantize(_CENT, rounding=ROUND_HALF_UP)
+    whole_reps = int(reps.to_integral_value(rounding=ROUND_HALF_UP))
+    if abs(weight) > _MAX_WEIGHT or abs(whole_reps) > _MAX_REPS:
+        return None
+    return ParsedSet(day, exercise, muscle, set_no, weight, whole_reps)
+
+
+def _in_kg(weight: Optional[Decimal], unit: str) -> Optional[Decimal]:
+    if weight is None or unit.lower() not in ("lb", "lbs"):
+        return weight
+    return weight * _LB_TO_KG
+
+
+def _strong_row(record: dict, unit: str) -> Optional[ParsedSet]:
+    row_unit = (record.get("Weight Unit") or unit).strip()
+    return _make_set(
+        _wall_clock_day(record["Date"]), _name(record["Exercise Name"]), None, None,
+        _in_kg(_number(record.get("Weight")), row_unit), _number(record["Reps"]),
+    )
+
+
+def _hevy_row(record: dict, unit: str) -> Optional[ParsedSet]:
+    if "weight_kg" in record:
+        weight = _number(record["weight_kg"])
+    else:
+        weight = _in_kg(_number(record.get("weight_lbs")), "lb")
+    return _make_set(
+        _wall_clock_day(record["start_time"]), _name(record["exercise_title"]), None, None,
+        weight, _number(record["reps"]),
+    )
+
+
+def _gymbot_row(record: dict, unit: str) -> Optional[ParsedSet]:
+    set_no = _number(record.get("set"))
+    return _make_set(
+        _iso_datetime(record["date"]), _name(record["exercise"]),
+        " ".join(str(record.get("muscle") or "").split()) or None,
+        int(set_no) if set_no is not None else None,
+        _number(record.get("weight")), _number(record["reps"]),
+    )
+
+
+_ROW_READERS = {
+    "strong": _strong_row,
+    "hevy": _hevy_row,
+    "gymbot": _gymbot_row,
+    "json": _gymbot_row,
+}
+
+
+def _number_sets(sets: List[ParsedSet]) -> List[ParsedSet]:
+    """Give sets without a number the next one for their exercise and day."""
+    counters: Dict[Tuple, int] = defaultdict(int)
+    numbered = []
+    for s in sets:
+        key = (s.date.date(), s.exercise.lower(), s.muscle)
+        counters[key] += 1
+        if s.set is None:
+            s = ParsedSet(s.date, s.exercise, s.muscle, counters[key], s.weight, s.reps)
+        numbered.append(s)
+    return numbered
+
+
+# ---------------------------------------------------------------------------
+# Resolution
+# ---------------------------------------------------------------------------
+
+# Catalog-only (no ``training``), so not registered with the plan guard.
+# ``rank`` orders a name's candidate spellings; ``tier`` the match kind.
+_RESOLVE_SQL = text("""
+    WITH cand AS (
+        SELECT c.name, c.muscle, c.rank, public.app_name_key(c.candidate) AS k
+        FROM unnest(CAST(:names AS text[]), CAST(:muscles AS text[]),
+                    CAST(:ranks AS int[]), CAST(:candidates AS text[]))
+             AS c(name, muscle, rank, candidate)
+    ),
+    fxdb AS (
+        SELECT f.id, public.app_name_key(f.name) AS k
+        FROM unnest(CAST(:fxdb_ids AS int[]), CAST(:fxdb_names AS text[])) AS f(id, name)
+    ),
+    hits AS (
+        SELECT cand.name, cand.muscle, cand.rank, 1 AS tier, e.id, e.muscle AS muscle_id, e.created_by
+        FROM cand JOIN exercises e ON e.name_key = cand.k
+        UNION ALL
+        SELECT cand.name, cand.muscle, cand.rank, 2, e.id, e.muscle, e.created_by
+        FROM cand
+        JOIN exercise_alias a ON a.name_key = cand.k
+        JOIN exercises e ON e.id = a.canonical_id
+        UNION ALL
+        SELECT cand.name, cand.muscle, cand.rank, 3, e.id, e.muscle, e.created_by
+        FROM cand
+        JOIN fxdb ON fxdb.k = cand.k
+        JOIN exercises e ON e.id = fxdb.id
+    )
+    SELECT DISTINCT ON (h.name, h.muscle) h.name, h.muscle, h.id, h.muscle_id
+    FROM hits h
+    JOIN muscles m ON m.id = h.muscle_id
+    ORDER BY h.name, h.muscle,
+             (m.name_key IS NOT DISTINCT FROM public.app_name_key(h.muscle)) DESC,
+             h.rank, h.tier, (h.created_by IS NULL), h.id
+""")
+
+
+def name_candidates(name: str) -> List[str]:
+    """Spellings to try for a name, best first.
+
+    "Bench Press (Barbell)" -> ["Bench Press (Barbell)", "Barbell Bench Press",
+    "Bench Press"]; any other name is tried as written only.
+    """
+    match = _QUALIFIED_NAME.fullmatch(name)
+    if match is None:
+        return [name]
+    base, qualifier = match.group(1), match.group(2).strip()
+    return [name, f"{qualifier} {base}", base]
+
+
+def resolve_names(
+    db: Session, keys: Iterable[Tuple[str, Optional[str]]]
+) -> Dict[Tuple[str, Optional[str]], Tuple[int, int]]:
+    """Resolve (exercise, muscle) names to (exercise_id, muscle_id) in one query.
+
+    Args:
+        db: Session already GUC-wired for the importing user.
+        keys: Distinct (exercise name, muscle name or ``None``) pairs.
+
+    Returns:
+        The pairs that matched a visible exercise; missing pairs did not.
+    """
+    names, muscles, ranks, candidates = [], [], [], []
+    for name, muscle in keys:
+        for rank, candidate in enumerate(name_candidates(name)):
+            names.append(name)
+            muscles.append(muscle)
+            ranks.append(rank)
+            candidates.append(candidate)
+    if not names:
+        return {}
+    rows = db.execute(_RESOLVE_SQL, {
+        "names": names,
+        "muscles": muscles,
+        "ranks": ranks,
+        "candidates": candidates,
+        "fxdb_ids": [eid for eid, _ in _FXDB_NAMES],
+        "fxdb_names": [fx_name for _, fx_name in _FXDB_NAMES],
+    })
+    return {(row.name, row.muscle): (row.id, row.muscle_id) for row in rows}
+
+
+# ---------------------------------------------------------------------------
+# Staging and merge
+# ---------------------------------------------------------------------------
+
+_STAGING_COLUMNS = 'id, date, muscle_id, exercise_id, "set", weight, reps'
+
+_CREATE_STAGING_SQL = text("""
+    CREATE TEMP TABLE training_import_staging (
+        id          uuid          NOT NULL,
+        date        timestamp     NOT NULL,
+        muscle_id   int           NOT NULL,
+        exercise_id int           NOT NULL,
+        "set"       int           NOT NULL,
+        weight      numeric(5, 2) NOT NULL,
+        reps        smallint      NOT NULL
+    ) ON COMMIT DROP
+""")
+
+_COPY_STAGING_SQL = f"COPY training_import_staging ({_STAGING_COLUMNS}) FROM STDIN"
+
+# Not registered: it reads the per-transaction staging table.  The NOT EXISTS
+# probe is an index range scan of idx_training_user_exercise_date per staged
+# row (partitions pruned at run time by the day bounds).
+_MERGE_SQL = text("""
+    WITH inserted AS (
+        INSERT INTO training (id, date, user_id, muscle_id, exercise_id, "set", weight, reps)
+        SELECT s.id, s.date, :uid, s.muscle_id, s.exercise_id, s."set", s.weight, s.reps
+        FROM training_import_staging s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM training t
+            WHERE t.user_id = :uid
+              AND t.exercise_id = s.exercise_id
+              AND t.date >= date_trunc('day', s.date)
+              AND t.date < date_trunc('day', s.date) + interval '1 day'
+              AND t."set" = s."set"
+        )
+        RETURNING exercise_id, date
+    )
+    SELECT exercise_id, date_trunc('day', date) AS day, COUNT(*) AS n
+    FROM inserted
+    GROUP BY exercise_id, date_trunc('day', date)
+""")
+
+
+def _copy_rows(db: Session, rows: Sequence[Tuple]) -> None:
+    """COPY resolved rows into the staging table over the session's connection."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(str(value) for value in row))
+        buf.write("\n")
+    buf.seek(0)
+    # The session's own DBAPI connection: same transaction, same RLS GUCs.
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(_COPY_STAGING_SQL, buf)
+    finally:
+        cursor.close()
+
+
+def import_sets(
+    db: Session,
+    uid: int,
+    sets: Sequence[ParsedSet],
+    report: ImportReport,
+    progress: Optional[Progress] = None,
+) -> ImportReport:
+    """Resolve, stage and merge parsed sets for one user, then commit.
+
+    Args:
+        db: Session already GUC-wired for ``uid``.
+        uid: The importing user.
+        sets: Parsed sets, numbered.
+        report: Filled in place (``imported``, ``duplicates``, ``unresolved``).
+        progress: Optional per-stage callback.
+
+    Returns:
+        ``report``.
+    """
+    notify = progress or (lambda stage, done, total: None)
+    keys = {(s.exercise, s.muscle) for s in sets}
+    resolved = resolve_names(db, keys)
+    notify("resolve", len(resolved), len(keys))
+
+    unresolved: Counter = Counter()
+    staged: List[Tuple] = []
+    seen = set()
+    for s in sets:
+        ids = resolved.get((s.exercise, s.muscle))
+        if ids is None:
+            unresolved[s.exercise] += 1
+            continue
+        exercise_id, muscle_id = ids
+        identity = (exercise_id, s.date.date(), s.set)
+        if identity in seen:
+            report.duplicates += 1
+            continue
+        seen.add(identity)
+        staged.append((new_training_id(), s.date.isoformat(sep=" "), muscle_id,
+                       exercise_id, s.set, s.weight, s.reps))
+    report.unresolved = dict(unresolved.most_common())
+
+    if staged:
+        db.execute(_CREATE_STAGING_SQL)
+        _copy_rows(db, staged)
+        db.execute(text("ANALYZE training_import_staging"))
+        notify("stage", len(staged), len(staged))
+        groups = db.execute(_MERGE_SQL, {"uid": uid}).fetchall()
+        db.commit()
+        report.imported = sum(group.n for group in groups)
+        report.duplicates += len(staged) - report.imported
+        notify("merge", report.imported, len(staged))
+        if groups:
+            refresh_after_write(uid, [training_write(group.exercise_id, group.day) for group in groups])
+    return report
+
+
+@contextmanager
+def _session(principal: dict):
+    """RLS-scoped session for ``principal`` (same wiring as ``get_db``)."""
+    from app.core.database import get_db
+
+    gen = get_db(principal)
+    db = next(gen)
+    try:
+        yield db
+    finally:
+        gen.close()
+
+
+def import_history(
+    principal: dict,
+    data: bytes,
+    source: str = "auto",
+    unit: str = "kg",
+    progress: Optional[Progress] = None,
+) -> ImportReport:
+    """Import a file of sets into the principal's history.
+
+    Args:
+        principal: The importing user (``user_id``, ``role``).
+        data: The file's bytes.
+        source: One of ``SOURCES``, or ``auto`` to detect it.
+        unit: ``kg`` or ``lb`` for Strong weights without a unit column.
+        progress: Optional ``(stage, done, total)`` callback.
+
+    Returns:
+        The ``ImportReport``.
+
+    Raises:
+        ImportFormatError: The file cannot be read; nothing was written.
+    """
+    start = time.perf_counter()
+    if source == "auto":
+        source = detect_source(data)
+    sets, rows, skipped = parse_sets(data, source, unit)
+    report = ImportReport(source=source, rows=rows, skipped=skipped)
+    if progress:
+        progress("parse", len(sets), rows)
+    if sets:
+        with _session(principal) as db:
+            import_sets(db, principal["user_id"], sets, report, progress)
+    report.seconds = round(time.perf_counter() - start, 3)
+    logger.info(
+        "training import: user_id=%s source=%s rows=%d imported=%d duplicates=%d "
+        "skipped=%d unresolved=%d in %.2fs",
+        principal["user_id"], source, rows, report.imported, report.duplicates,
+        report.skipped, sum(report.unresolved.values()), report.seconds,
+    )
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m app.services.training_import``)."""
+    parser = argparse.ArgumentParser(description="Import a training history file for one user.")
+    parser.add_argument("path", help="Strong / Hevy / gym-bot CSV, JSON or NDJSON file")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--source", choices=("auto",) + SOURCES, default="auto")
+    parser.add_argument("--unit", choices=("kg", "lb"), default="kg",
+                        help="unit of Strong weights without a Weight Unit column")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    with open(args.path, "rb") as fh:
+        data = fh.read()
+
+    def progress(stage: str, done: int, total: int) -> None:
+        print(f"{stage}: {done}/{total}", file=sys.stderr)
+
+    try:
+        report = import_history({"user_id": args.user_id, "role": "user"}, data,
+                                source=args.source, unit=args.unit, progress=progress)
+    except ImportFormatError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    print(json.dumps(report.__dict__, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
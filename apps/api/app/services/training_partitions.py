@@ -0,0 +1,146 @@
+"""Yearly partitions of ``training`` (RANGE on ``date``).
+
+Migration ``0012_training_partitioning`` turned ``training`` into a
+partitioned table: ``training_history`` (everything before the first yearly
+partition), ``training_p<YYYY>`` and ``training_default``.  Partitions for the
+coming years are created by the SQL function
+``public.training_ensure_partitions(years_ahead)``; this module runs it, and
+the functions of ``0015_training_history_split`` that move the pre-partitioning
+rows out of ``training_history`` into their years.
+
+Jobs (``python -m app.core.jobs enqueue <name> ...``):
+    training.partitions.ensure          create missing partitions up to
+                                        ``_YEARS_AHEAD`` years past the current
+                                        one, then re-enqueue itself
+                                        ``_INTERVAL`` later
+    training.partitions.split_history   move the rows of ``training_history``
+                                        into one partition per year (once,
+                                        after migration 0015)
+
+Design choices:
+- The SQL function does the work (SECURITY DEFINER: ``app_rw`` cannot create
+  tables) so the migration, ``init.sql`` and this job share one code path.
+- A write never depends on this job: a row past the created years lands in
+  ``training_default`` and is moved into its own partition when the year is
+  created.  A missed run only delays that move.
+- The job reschedules itself (the queue has no cron); enqueue it once after
+  deploying with ``--dedup-key training.partitions.ensure`` — the key the
+  chain holds, so a manual enqueue never starts a second chain.
+- The split copies ``_SPLIT_BATCH`` rows per commit into a shadow table that
+  triggers keep in step with concurrent writes; only the final swap takes a
+  lock (catalog changes, ``lock_timeout`` 5 s).  Every step resumes where the
+  last run stopped, so a lock timeout is simply retried by the worker.
+"""
+import logging
+from contextlib import contextmanager
+
+from sqlalchemy.orm import Session
+
+from app.core.jobs import enqueue, job
+from app.core.query_registry import register_query
+
+logger = logging.getLogger(__name__)
+
+ENSURE_JOB = "training.partitions.ensure"
+SPLIT_JOB = "training.partitions.split_history"
+
+# Years past the current one that always have a partition.
+_YEARS_AHEAD = 1
+
+# Seconds between runs of the self-rescheduling job.
+_INTERVAL = 24 * 3600
+
+_ENSURE_SQL = register_query("training_partitions.ensure", """
+    SELECT public.training_ensure_partitions(:years_ahead)
+""")
+
+# Source rows copied per committed batch of the split.
+_SPLIT_BATCH = 5000
+
+_SPLIT_PREPARE_SQL = register_query("training_partitions.split_prepare", """
+    SELECT public.training_split_history_prepare()
+""")
+
+_SPLIT_COPY_SQL = register_query("training_partitions.split_copy", """
+    SELECT public.training_split_history_copy(:batch)
+""")
+
+_SPLIT_SWAP_SQL = register_query("training_partitions.split_swap", """
+    SELECT public.training_split_history_swap()
+""")
+
+
+def ensure_partitions(db: Session, years_ahead: int = _YEARS_AHEAD) -> int:
+    """Create the missing yearly partitions of ``training`` and commit.
+
+    Args:
+        db: Any session (the SQL function runs as its owner).
+        years_ahead: Years past the current one to cover.
+
+    Returns:
+        Number of partitions created.
+    """
+    created = db.execute(_ENSURE_SQL, {"years_ahead": years_ahead}).scalar()
+    db.commit()
+    return created
+
+
+def split_history(db: Session, batch: int = _SPLIT_BATCH) -> int:
+    """Move ``training_history`` into yearly partitions, one commit per step.
+
+    Args:
+        db: Any session (the SQL functions run as their owner).
+        batch: Source rows copied per committed batch.
+
+    Returns:
+        Number of partitions attached by the swap; 0 when the history holds
+        no rows (nothing to split, or already split).
+    """
+    prepared = db.execute(_SPLIT_PREPARE_SQL).scalar()
+    db.commit()
+    if not prepared:
+        return 0
+    copied = 0
+    while True:
+        rows = db.execute(_SPLIT_COPY_SQL, {"batch": batch}).scalar()
+        db.commit()
+        if not rows:
+            break
+        copied += rows
+    attached = db.execute(_SPLIT_SWAP_SQL).scalar()
+    db.commit()
+    logger.info("training history split: %d rows copied, %d partitions attached", copied, attached)
+    return attached
+
+
+@contextmanager
+def _admin_session():
+    """Admin session (same wiring as ``get_db``)."""
+    from app.core.database import get_db
+
+    gen = get_db({"user_id": None, "role": "admin"})
+    db = next(gen)
+    try:
+        yield db
+    finally:
+        gen.close()
+
+
+# Reason: max_retries=0 — the ``finally`` re-enqueue IS the retry; a failed
+# run retried by the worker as well would start a second chain.
+@job(ENSURE_JOB, max_retries=0, dedup_ttl=_INTERVAL * 2)
+def ensure_partitions_job() -> None:
+    """Background job: ensure the partitions, then schedule the next run."""
+    try:
+        with _admin_session() as db:
+            created = ensure_partitions(db)
+        logger.info("training partitions: %d created", created)
+    finally:
+        enqueue(ENSURE_JOB, dedup_key=ENSURE_JOB, delay=_INTERVAL)
+
+
+@job(SPLIT_JOB, dedup_ttl=24 * 3600)
+def split_history_job() -> None:
+    """Background job: split ``training_history`` into yearly partitions."""
+    with _admin_session() as db:
+        split_history(db)
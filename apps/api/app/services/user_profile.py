@@ -0,0 +1,191 @@
+"""Conditional ``PUT /users/me``: profile fingerprints and batched last_interaction.
+
+The bot calls ``PUT /users/me`` (``ensure_user``) on every ``/start`` and
+``/gym``, almost always with the same Telegram names.  Each call used to
+SELECT the user, rewrite the row and commit — a new row version (and WAL) per
+menu open, only to move ``last_interaction``.  Now:
+
+    fingerprint hit     the body matches the profile stored by the last
+                        upsert: answer from the cached ``schemas.User``, no
+                        database round trip at all
+    unchanged           (cache miss) SELECT, nothing differs: no UPDATE, no
+                        commit
+    created / updated   the row is written (with ``last_interaction``), as
+                        before
+
+and in every case but the write ``last_interaction`` is only recorded in
+Redis; ``flush_last_interactions`` writes all recorded users in ONE batched
+UPDATE at most every ``USER_TOUCH_FLUSH_SECONDS``.
+
+Keys (Redis db of ``REDIS_URL``):
+    users:profile:{user_id}            STRING  JSON {"fp": ..., "user": {...}}
+                                               (``_PROFILE_TTL``)
+    users:last_interaction             HASH    user_id -> epoch seconds
+    users:last_interaction:flushing    HASH    the batch the flush job is
+                                               writing (kept until it commits)
+
+Jobs (``python -m app.core.jobs enqueue <name> ...``):
+    users.last_interaction.flush   write the recorded last_interaction values
+
+Design choices:
+- The fingerprint covers only the fields the body sets (``None`` means "leave
+  as is"), and the cached entry is replaced on every upsert that reads the
+  row — the Mini App's timezone-only body and the bot's names-only body take
+  turns in the one slot instead of serving each other's stale snapshot.
+  ``upsert_me`` is the only writer of these columns.
+- The flush job is enqueued by the touch that adds a user to the hash,
+  delayed by the interval and deduplicated, so an idle API schedules nothing
+  and a busy one writes once per interval.  RENAME hands the batch to the
+  job atomically; a run that fails leaves it under ``:flushing`` for the
+  retry, and the UPDATE only ever moves ``last_interaction`` forward.
+- Redis down: ``touch`` reports it, and ``upsert_me`` writes
+  ``last_interaction`` with the row as before.  ``last_interaction`` in a
+  response is the time of this request even when the column is not written
+  yet.
+"""
+import hashlib
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import redis as redis_lib
+from sqlalchemy import text
+
+from app.core.cache import _get_client
+from app.core.config import get_settings
+from app.core.jobs import enqueue, job
+
+logger = logging.getLogger(__name__)
+
+FLUSH_JOB = "users.last_interaction.flush"
+
+# Cached profiles expire on their own; a snapshot is only ever as stale as a
+# lost race between two concurrent upserts.
+_PROFILE_TTL = 3600  # seconds
+
+_PENDING_KEY = "users:last_interaction"
+_FLUSHING_KEY = "users:last_interaction:flushing"
+
+# Not registered: the plan guard covers reads of ``training``; this is a
+# primary-key update of ``users``.
+_FLUSH_SQL = text("""
+    UPDATE users u
+    SET last_interaction = v.ts
+    FROM unnest(CAST(:ids AS bigint[]), CAST(:ts AS timestamp[])) AS v(id, ts)
+    WHERE u.id = v.id
+      AND (u.last_interaction IS NULL OR u.last_interaction < v.ts)
+""")
+
+
+def _profile_key(user_id: int) -> str:
+    return f"users:profile:{user_id}"
+
+
+def profile_fingerprint(fields: Dict[str, Any]) -> str:
+    """Stable hash of the profile fields a request sets (``None`` values dropped)."""
+    given = {name: value for name, value in fields.items() if value is not None}
+    return hashlib.sha1(json.dumps(given, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cached_profile(user_id: int, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """The stored ``schemas.User`` dump when the last upsert had this fingerprint."""
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(_profile_key(user_id))
+    except redis_lib.RedisError as exc:
+        logger.warning("cached_profile(user_id=%s) failed: %s", user_id, exc)
+        return None
+    if raw is None:
+        return None
+    entry = json.loads(raw)
+    return entry["user"] if entry.get("fp") == fingerprint else None
+
+
+def remember_profile(user_id: int, fingerprint: str, user: Dict[str, Any]) -> None:
+    """Cache the profile an upsert with ``fingerprint`` left in the database."""
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.set(_profile_key(user_id), json.dumps({"fp": fingerprint, "user": user}),
+                   ex=_PROFILE_TTL)
+    except redis_lib.RedisError as exc:
+        logger.warning("remember_profile(user_id=%s) failed: %s", user_id, exc)
+
+
+def touch(user_id: int, when: datetime) -> bool:
+    """Record ``last_interaction`` for the next batched flush.
+
+    Returns:
+        ``False`` when batching is off or Redis is unavailable — the caller
+        then writes the column itself.
+    """
+    interval = get_settings().USER_TOUCH_FLUSH_SECONDS
+    if interval <= 0:
+        return False
+    client = _get_client()
+    if client is None:
+        return False
+    try:
+        added = client.hset(_PENDING_KEY, str(user_id), str((when - datetime(1970, 1, 1)).total_seconds()))
+    except redis_lib.RedisError as exc:
+        logger.warning("touch(user_id=%s) failed: %s", user_id, exc)
+        return False
+    if added:
+        enqueue(FLUSH_JOB, dedup_key=FLUSH_JOB, delay=interval)
+    return True
+
+
+def flush_last_interactions(db) -> int:
+    """Write every recorded ``last_interaction`` in one UPDATE and commit.
+
+    Args:
+        db: Admin session (every user's row).
+
+    Returns:
+        Number of users in the flushed batch.
+    """
+    client = _get_client()
+    if client is None:
+        return 0
+    if not client.exists(_FLUSHING_KEY):
+        try:
+            client.renamenx(_PENDING_KEY, _FLUSHING_KEY)
+        except redis_lib.ResponseError:
+            return 0  # nothing recorded since the last flush
+    batch = client.hgetall(_FLUSHING_KEY)
+    if batch:
+        db.execute(_FLUSH_SQL, {
+            "ids": [int(uid) for uid in batch],
+            "ts": [datetime.utcfromtimestamp(float(ts)) for ts in batch.values()],
+        })
+        db.commit()
+    client.delete(_FLUSHING_KEY)
+    return len(batch)
+
+
+@contextmanager
+def _admin_session():
+    """Admin session (same wiring as ``get_db``)."""
+    from app.core.database import get_db
+
+    gen = get_db({"user_id": None, "role": "admin"})
+    db = next(gen)
+    try:
+        yield db
+    finally:
+        gen.close()
+
+
+@job(FLUSH_JOB, dedup_ttl=3600)
+def flush_last_interactions_job() -> None:
+    """Background job: flush the recorded ``last_interaction`` values."""
+    start = time.perf_counter()
+    with _admin_session() as db:
+        flushed = flush_last_interactions(db)
+    logger.info("last_interaction flush: %d user(s) in %.3fs", flushed, time.perf_counter() - start)
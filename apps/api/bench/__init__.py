@@ -0,0 +1,16 @@
+"""Benchmark harness for the Core API hot paths.
+
+Not imported by the application.  Modules:
+  seed   — synthetic data generator (N users x M years of sets).
+  load   — asyncio load driver reporting p50/p95/p99 and throughput.
+  stats  — percentile / report / regression-compare helpers (pure, unit-tested).
+  roundtrips — in-process DB round trips per request (RLS GUC fold on/off).
+  prepared — plain vs prepared (PREPARE/EXECUTE) hot registered queries.
+  serialization — response render time and gzip/brotli payload size.
+  analytics_engine — per-endpoint SQL vs the NumPy analytics snapshot (50k sets).
+  covering_indexes — buffers of the per-exercise reads before/after migration 0011.
+  training_ids — primary-key size / insert throughput of the 0013 id layouts.
+  fixed_point — numeric vs integer (0014) aggregation time of the training reads.
+
+See ``bench/README.md`` for how to run against the docker-compose.local stack.
+"""
@@ -0,0 +1,217 @@
+"""Per-endpoint SQL vs the vectorized snapshot for one heavy user.
+
+Seeds (with ``--reset``) a single bench user with ``--sets`` training rows
+(default 50 000 — a decade of logging) and times, as that user under RLS,
+the history-wide analytics work in three ways:
+
+    sql        each endpoint's own statements, as ``ANALYTICS_ENGINE=sql``
+               runs them: summary (totals, PR count, active weeks),
+               week-compare buckets, exercise-trend (last two session volumes,
+               52-week e1RM) for the user's most-logged exercise, and the
+               180-day ``/training/days`` PR window.
+    snapshot   ``AnalyticsSnapshot.load`` (one history query) + every slice
+               answering the same questions — the cold path.
+    cached     ``AnalyticsSnapshot.from_bytes`` of the Redis entry + every
+               slice — what each endpoint pays on a snapshot cache hit.
+
+Prints p50 milliseconds per step and the encoded snapshot size.  Runs
+in-process against the database only (no API server, no Redis); needs the
+API's environment (``APP_DB_*``; ``--database-url`` or ``BENCH_DATABASE_URL``
+for the superuser that seeds):
+
+    python -m bench.analytics_engine --reset
+    python -m bench.analytics_engine --sets 50000 --iterations 20 --json engine.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+
+from bench.seed import BENCH_USER_BASE, _database_url, _load_catalog, generate_user_rows
+from bench.stats import percentile
+
+# One dedicated user above the ``bench.seed`` users' range.
+ENGINE_USER_ID = BENCH_USER_BASE + 1_000_000
+
+_TZ = "Europe/Berlin"
+
+
+def seed_heavy_user(superuser_url: str, sets: int, rng_seed: int = 42) -> int:
+    """(Re)create ENGINE_USER_ID with exactly ``sets`` rows of history.
+
+    Returns:
+        Number of rows written.
+    """
+    from psycopg2.extras import execute_values
+
+    engine = create_engine(superuser_url)
+    try:
+        catalog = _load_catalog(engine)
+        end = datetime.utcnow()
+        years = 1.0
+        while True:
+            # Own RNG stream: ``bench.seed`` users start from the bare seed,
+            # and reusing it would reproduce their row ids.
+            rng = random.Random(f"engine-{rng_seed}")
+            rows = generate_user_rows(rng, ENGINE_USER_ID, catalog, years, end)
+            if len(rows) >= sets:
+                break
+            years *= 1.5 * sets / max(len(rows), 1)
+        rows = sorted(rows, key=lambda r: r[1])[-sets:]
+
+        raw = engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            cur.execute("DELETE FROM training WHERE user_id = %s", (ENGINE_USER_ID,))
+            cur.execute(
+                "INSERT INTO users (id, registration_date, first_name, username)"
+                " VALUES (%s, %s, 'Bench', %s) ON CONFLICT (id) DO NOTHING",
+                (ENGINE_USER_ID, rows[0][1] - timedelta(days=1), f"bench_{ENGINE_USER_ID}"),
+            )
+            execute_values(
+                cur,
+                "INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)"
+                " VALUES %s",
+                rows,
+                page_size=5000,
+            )
+            raw.commit()
+            cur.execute("ANALYZE training")
+            raw.commit()
+        finally:
+            raw.close()
+    finally:
+        engine.dispose()
+    return len(rows)
+
+
+def _p50_ms(fn: Callable[[], object], iterations: int) -> float:
+    samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return round(percentile(samples, 50), 3)
+
+
+def run(conn, iterations: int) -> Dict[str, object]:
+    """Time every step on ``conn`` (already scoped to ENGINE_USER_ID)."""
+    from app.api.v1 import analytics_router as ar
+    from app.api.v1 import training_history_router as th
+    from app.services.analytics_snapshot import AnalyticsSnapshot
+
+    uid = ENGINE_USER_ID
+    now = datetime.utcnow()
+    eid = conn.execute(
+        text("SELECT exercise_id FROM training WHERE user_id = :uid"
+             " GROUP BY exercise_id ORDER BY COUNT(*) DESC LIMIT 1"),
+        {"uid": uid},
+    ).scalar()
+    if eid is None:
+        raise SystemExit("bench.analytics_engine: no history — run with --reset first")
+    window_start = now - timedelta(weeks=52)
+    week_start, week_end = now - timedelta(days=14), now + timedelta(days=1)
+    days_from, days_to = now - timedelta(days=180), now + timedelta(days=1)
+
+    def execute(clause, **params):
+        return lambda: conn.execute(clause, {"uid": uid, **params}).fetchall()
+
+    sql_steps = {
+        "summary.totals": execute(ar._SUMMARY_AGG_SQL),
+        "summary.prs": execute(ar._SUMMARY_PRS_SQL),
+        "summary.weeks.tz": execute(ar._SUMMARY_WEEKS_TZ_SQL, tz=_TZ),
+        "week_compare.buckets.tz": execute(
+            ar._WEEK_BUCKETS_TZ_SQL, range_start=week_start, range_end=week_end, tz=_TZ),
+        "exercise_trend.session_volumes": execute(ar._SESSION_VOLUMES_SQL, eid=eid),
+        "exercise_trend.e1rm": execute(ar._E1RM_TREND_SQL, eid=eid, window_start=window_start),
+        "training_days.pr_window.tz": execute(
+            th._TRAINING_DAYS_TZ_SQL, dt_from=days_from, dt_to=days_to, tz=_TZ),
+    }
+
+    def slices(snapshot: AnalyticsSnapshot) -> None:
+        snapshot.totals()
+        snapshot.active_weeks(_TZ)
+        snapshot.week_totals(week_start, week_end, _TZ)
+        snapshot.session_volumes(eid)
+        snapshot.e1rm_trend(eid, window_start)
+        snapshot.pr_days(days_from, days_to, _TZ)
+
+    for step in sql_steps.values():  # warm the buffer cache and catalogs
+        step()
+    snapshot = AnalyticsSnapshot.load(conn, uid)
+    entry = snapshot.to_bytes()
+
+    sql = {name: _p50_ms(step, iterations) for name, step in sql_steps.items()}
+    return {
+        "sets": len(snapshot),
+        "entry_bytes": len(entry),
+        "sql": sql,
+        "sql_total": round(sum(sql.values()), 3),
+        "snapshot": {
+            "load": _p50_ms(lambda: AnalyticsSnapshot.load(conn, uid), iterations),
+            "slices": _p50_ms(lambda: slices(AnalyticsSnapshot.from_bytes(entry)), iterations),
+            "decode": _p50_ms(lambda: AnalyticsSnapshot.from_bytes(entry), iterations),
+            "encode": _p50_ms(snapshot.to_bytes, iterations),
+        },
+    }
+
+
+def render(report: Dict[str, object]) -> str:
+    """Fixed-width table of a ``run`` report."""
+    snap = report["snapshot"]
+    lines = [f"user {ENGINE_USER_ID}: {report['sets']} sets,"
+             f" snapshot entry {report['entry_bytes']} bytes", ""]
+    lines.append(f"{'sql step':<34}{'p50 ms':>10}")
+    for name, ms in report["sql"].items():
+        lines.append(f"{name:<34}{ms:>10.3f}")
+    lines.append(f"{'TOTAL (all endpoints)':<34}{report['sql_total']:>10.3f}")
+    lines.append("")
+    lines.append(f"{'snapshot step':<34}{'p50 ms':>10}")
+    for name in ("load", "decode", "slices", "encode"):
+        lines.append(f"{name:<34}{snap[name]:>10.3f}")
+    # ``slices`` includes its own decode.
+    lines.append(f"{'TOTAL cold (load + slices)':<34}{snap['load'] + snap['slices'] - snap['decode']:>10.3f}")
+    lines.append(f"{'TOTAL cached (decode + slices)':<34}{snap['slices']:>10.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.analytics_engine``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sets", type=int, default=50_000, help="history size (default 50000)")
+    parser.add_argument("--iterations", type=int, default=20, help="timed runs per step")
+    parser.add_argument("--reset", action="store_true", help="(re)seed the heavy user first")
+    parser.add_argument("--database-url", default=None, help="superuser URL for seeding")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report here")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        seed_heavy_user(_database_url(args.database_url), args.sets)
+
+    from app.core.config import get_settings
+
+    engine = create_engine(get_settings().APP_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT set_config('app.user_id', :uid, false)"),
+                         {"uid": str(ENGINE_USER_ID)})
+            conn.execute(text("SELECT set_config('app.role', 'user', false)"))
+            report = run(conn, args.iterations)
+            conn.rollback()
+    finally:
+        engine.dispose()
+
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Buffers touched by the per-exercise reads, before vs after migration 0011.
+
+Runs ``EXPLAIN (ANALYZE, BUFFERS)`` for the queries the 0011 covering
+indexes target, as the heavy ``bench.analytics_engine`` user under RLS, in
+two modes:
+
+    before   inside a transaction that drops ``idx_training_user_exercise_date``
+             and ``idx_training_user_exercise_pr`` (rolled back afterwards),
+             with the pre-0011 recent-exercises and last-session SQL.
+    after    the migrated schema and the current registered statements.
+
+Prints, per query, the shared buffers the plan touched (hit + read), the p50
+execution time and the plan's scan node on ``training``.  ``training`` is
+VACUUM ANALYZEd first so index-only scans see a current visibility map.
+
+The ``before`` mode takes an ACCESS EXCLUSIVE lock on ``training`` for its
+duration — run it against a bench database, never production.  Needs the
+API's environment (``APP_DB_*``) plus a superuser URL (``--database-url`` or
+``BENCH_DATABASE_URL``), a seeded heavy user and, for a realistic index
+size, the ``bench.seed`` users:
+
+    python -m bench.seed --users 200 --years 3 --reset --with-catalog
+    python -m bench.analytics_engine --reset
+    python -m bench.covering_indexes --iterations 20
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+
+from bench.analytics_engine import ENGINE_USER_ID
+from bench.seed import _database_url
+from bench.stats import percentile
+
+MODES = ("before", "after")
+
+QUERIES = (
+    "analytics.recent_exercises",
+    "analytics.log_context.completed_sets",
+    "analytics.log_context.last_session_sets",
+    "analytics.log_context.personal_record",
+)
+
+NEW_INDEXES = ("idx_training_user_exercise_date", "idx_training_user_exercise_pr")
+
+# Statement text before 0011, where it changed: recent-exercises was a
+# DISTINCT ON over the whole history, and the last session's sets were joined
+# on ``date::date`` instead of a timestamp range.
+_BEFORE_SQL = {
+    "analytics.recent_exercises": """
+    SELECT muscle_name, exercise_name, last_weight, last_reps, last_date
+    FROM (
+        SELECT DISTINCT ON (t.exercise_id)
+            m.name  AS muscle_name,
+            e.name  AS exercise_name,
+            t.weight AS last_weight,
+            t.reps   AS last_reps,
+            t.date::date AS last_date
+        FROM training t
+        JOIN exercises e ON e.id = t.exercise_id
+        JOIN muscles   m ON m.id = t.muscle_id
+        WHERE t.user_id = :uid
+        ORDER BY t.exercise_id, t.date DESC
+    ) latest
+    ORDER BY last_date DESC
+    LIMIT :lim
+""",
+    "analytics.log_context.last_session_sets": """
+    WITH prior_day AS (
+        SELECT MAX(date::date) AS last_date
+        FROM training
+        WHERE user_id     = :uid
+          AND exercise_id = :eid
+          AND date < :day_start
+    )
+    SELECT t."set", t.weight, t.reps
+    FROM training t
+    JOIN prior_day pd ON t.date::date = pd.last_date
+    WHERE t.user_id     = :uid
+      AND t.exercise_id = :eid
+    ORDER BY t."set"
+""",
+}
+
+
+def _plan_nodes(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def _training_scans(plan: Dict) -> str:
+    """Distinct scan node types reading ``training`` (its partitions, indexes)."""
+    from app.core.query_registry import guarded_relation
+
+    scans = []
+    for node in _plan_nodes(plan):
+        if guarded_relation(node.get("Relation Name")) == "training" and node["Node Type"] not in scans:
+            scans.append(node["Node Type"])
+    return ", ".join(scans) or "-"
+
+
+def _measure(conn, sql: str, params: Dict[str, object], iterations: int) -> Dict[str, object]:
+    """EXPLAIN ANALYZE ``sql`` ``iterations`` times (after one warmup)."""
+    explain = text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql)
+    conn.execute(explain, params)
+    buffers: List[int] = []
+    times: List[float] = []
+    plan: Dict = {}
+    for _ in range(iterations):
+        raw = conn.execute(explain, params).scalar_one()
+        doc = raw if isinstance(raw, list) else json.loads(raw)
+        plan = doc[0]["Plan"]
+        buffers.append(plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0))
+        times.append(doc[0]["Execution Time"])
+    return {
+        "buffers": int(percentile(buffers, 50)),
+        "ms": round(percentile(times, 50), 3),
+        "scan": _training_scans(plan),
+    }
+
+
+def run(superuser_url: str, iterations: int) -> Dict[str, object]:
+    """Measure every query in both modes; returns ``{mode: {query: stats}}``."""
+    from app.api.v1 import analytics_router  # noqa: F401 — registers the queries
+    from app.core.config import get_settings
+    from app.core.query_registry import registered_queries
+
+    statements = {q.name: q.clause.text for q in registered_queries() if q.name in QUERIES}
+    app_role = get_settings().APP_DB_USER
+
+    engine = create_engine(superuser_url)
+    report: Dict[str, object] = {}
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM (ANALYZE) training"))
+        with engine.connect() as conn:
+            eid = conn.execute(
+                text("SELECT exercise_id FROM training WHERE user_id = :uid"
+                     " GROUP BY exercise_id ORDER BY COUNT(*) DESC LIMIT 1"),
+                {"uid": ENGINE_USER_ID},
+            ).scalar()
+            if eid is None:
+                raise SystemExit("bench.covering_indexes: no history — run bench.analytics_engine --reset")
+            # Log-context for the exercise's last logged day: that day's sets,
+            # and the session before it.
+            last_day = conn.execute(
+                text("SELECT MAX(date)::date FROM training WHERE user_id = :uid AND exercise_id = :eid"),
+                {"uid": ENGINE_USER_ID, "eid": eid},
+            ).scalar()
+            sets = conn.execute(text("SELECT COUNT(*) FROM training")).scalar()
+            conn.rollback()
+            day_start = datetime(last_day.year, last_day.month, last_day.day)
+            params = {
+                "uid": ENGINE_USER_ID,
+                "eid": eid,
+                "lim": 8,
+                "day_start": day_start,
+                "day_end": day_start + timedelta(days=1),
+            }
+            for mode in MODES:
+                if mode == "before":
+                    for name in NEW_INDEXES:
+                        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                conn.execute(text(f'SET LOCAL ROLE "{app_role}"'))
+                conn.execute(text("SELECT set_config('app.user_id', :uid, true),"
+                                  " set_config('app.role', 'user', true)"),
+                             {"uid": str(ENGINE_USER_ID)})
+                report[mode] = {}
+                for name in QUERIES:
+                    sql = _BEFORE_SQL.get(name, statements[name]) if mode == "before" else statements[name]
+                    bound = {k: v for k, v in params.items() if f":{k}" in sql}
+                    report[mode][name] = _measure(conn, sql, bound, iterations)
+                conn.rollback()  # restores the dropped indexes
+    finally:
+        engine.dispose()
+    report["training_rows"] = sets
+    return report
+
+
+def render(report: Dict[str, object]) -> str:
+    """Fixed-width before/after table of a ``run`` report."""
+    before, after = report["before"], report["after"]
+    header = (f"{'query':<42}{'buf before':>11}{'buf after':>10}"
+              f"{'ms before':>11}{'ms after':>10}  after scan")
+    lines = [f"training: {report['training_rows']} rows; user {ENGINE_USER_ID}", "",
+             header, "-" * len(header)]
+    for name in QUERIES:
+        b, a = before[name], after[name]
+        lines.append(f"{name:<42}{b['buffers']:>11}{a['buffers']:>10}"
+                     f"{b['ms']:>11.3f}{a['ms']:>10.3f}  {a['scan']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.covering_indexes``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20, help="EXPLAIN ANALYZE runs per query and mode")
+    parser.add_argument("--database-url", default=None, help="superuser URL (drops indexes in 'before')")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report here")
+    args = parser.parse_args(argv)
+
+    report = run(_database_url(args.database_url), args.iterations)
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Aggregation time of the training reads, numeric vs fixed point (0014).
+
+Copies the heavy ``bench.analytics_engine`` user's history into two scratch
+schemas, each holding a ``training`` table with the indexes the reads use:
+
+    numeric   weight / reps NUMERIC(5,2)                 (before 0014)
+    integer   + weight_c INTEGER (generated), reps SMALLINT  (after 0014)
+
+and runs ``EXPLAIN (ANALYZE)`` on each read with ``search_path`` pointing at
+the schema: the pre-0014 statement text against ``numeric``, the registered
+statement against ``integer``.  The week-compare buckets are asked for the
+whole history (``--weeks``) instead of two weeks, so the aggregate rather
+than the index probe dominates.  Prints the p50 execution time per read.
+
+The schemas are dropped afterwards; ``training`` is only read.  Needs a
+superuser URL (``--database-url`` or ``BENCH_DATABASE_URL``) and a seeded
+heavy user:
+
+    python -m bench.analytics_engine --reset
+    python -m bench.fixed_point --iterations 20
+"""
+import argparse
+import json
+import sys
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+
+from bench.analytics_engine import ENGINE_USER_ID
+from bench.seed import _database_url
+from bench.stats import percentile
+
+LAYOUTS = {
+    "numeric": """
+        CREATE TABLE {schema}.training AS
+        SELECT id, date, user_id, muscle_id, exercise_id, set,
+               weight::numeric(5, 2) AS weight, reps::numeric(5, 2) AS reps, local_date
+        FROM public.training WHERE user_id = :uid
+    """,
+    "integer": """
+        CREATE TABLE {schema}.training AS
+        SELECT id, date, user_id, muscle_id, exercise_id, set,
+               weight::numeric(5, 2) AS weight, reps::smallint AS reps, local_date
+        FROM public.training WHERE user_id = :uid;
+        ALTER TABLE {schema}.training
+            ADD COLUMN weight_c INTEGER GENERATED ALWAYS AS ((weight * 100)::integer) STORED
+    """,
+}
+
+_INDEXES = (
+    "CREATE INDEX ON {schema}.training (user_id, date)",
+    "CREATE INDEX ON {schema}.training (user_id, exercise_id)",
+)
+
+QUERIES = (
+    "analytics.summary.prs",
+    "analytics.week_compare.buckets.utc",
+    "analytics.exercise_trend.session_volumes",
+    "analytics.exercise_trend.e1rm",
+)
+
+# Statement text before 0014: the same reads over NUMERIC weight and reps.
+_NUMERIC_SQL = {
+    "analytics.summary.prs": """
+    WITH windowed AS (
+        SELECT
+            weight,
+            max(weight) OVER (
+                PARTITION BY exercise_id
+                ORDER BY date, "set"
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS prev_max
+        FROM training
+        WHERE user_id = :uid
+    )
+    SELECT COUNT(*) FROM windowed
+    WHERE prev_max IS NULL OR weight > prev_max
+""",
+    "analytics.week_compare.buckets.utc": """
+    SELECT
+        DATE_TRUNC('week', date)::date    AS week_start,
+        COUNT(*)             AS sets,
+        SUM(weight * reps)   AS volume
+    FROM training
+    WHERE user_id = :uid
+      AND date >= :range_start
+      AND date  < :range_end
+    GROUP BY DATE_TRUNC('week', date)
+""",
+    "analytics.exercise_trend.session_volumes": """
+    SELECT date::date AS day, SUM(weight * reps) AS volume
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+    GROUP BY date::date
+    ORDER BY day DESC
+    LIMIT 2
+""",
+    "analytics.exercise_trend.e1rm": """
+    SELECT date::date AS day, MAX(weight * (1 + reps / 30.0)) AS e1rm
+    FROM training
+    WHERE user_id     = :uid
+      AND exercise_id = :eid
+      AND date >= :window_start
+    GROUP BY date::date
+    ORDER BY day ASC
+""",
+}
+
+
+def _schema(layout: str) -> str:
+    return f"bench_fixed_{layout}"
+
+
+def _measure(conn, sql: str, params: Dict[str, object], iterations: int) -> float:
+    """p50 execution time (ms) of ``sql`` over ``iterations`` runs (after one warmup)."""
+    explain = text("EXPLAIN (ANALYZE, FORMAT JSON) " + sql)
+    conn.execute(explain, params)
+    times: List[float] = []
+    for _ in range(iterations):
+        raw = conn.execute(explain, params).scalar_one()
+        doc = raw if isinstance(raw, list) else json.loads(raw)
+        times.append(doc[0]["Execution Time"])
+    return round(percentile(times, 50), 3)
+
+
+def run(superuser_url: str, iterations: int, weeks: int) -> Dict[str, object]:
+    """Measure every read in both layouts; returns ``{layout: {query: ms}}``."""
+    from app.api.v1 import analytics_router  # noqa: F401 — registers the queries
+    from app.core.query_registry import registered_queries
+
+    statements = {q.name: q.clause.text for q in registered_queries() if q.name in QUERIES}
+    engine = create_engine(superuser_url)
+    report: Dict[str, object] = {}
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for layout, create in LAYOUTS.items():
+                schema = _schema(layout)
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+                conn.execute(text(f"CREATE SCHEMA {schema}"))
+                for statement in create.format(schema=schema).split(";"):
+                    conn.execute(text(statement), {"uid": ENGINE_USER_ID})
+                for statement in _INDEXES:
+                    conn.execute(text(statement.format(schema=schema)))
+                conn.execute(text(f"VACUUM (ANALYZE) {schema}.training"))
+
+            schema = _schema("integer")
+            sets = conn.execute(text(f"SELECT COUNT(*) FROM {schema}.training")).scalar()
+            if not sets:
+                raise SystemExit("bench.fixed_point: no history — run bench.analytics_engine --reset")
+            eid, last = conn.execute(text(
+                f"SELECT exercise_id, MAX(date) FROM {schema}.training"
+                " GROUP BY exercise_id ORDER BY COUNT(*) DESC LIMIT 1"
+            )).one()
+            range_end = last + timedelta(days=1)
+            params = {
+                "uid": ENGINE_USER_ID,
+                "eid": eid,
+                "range_start": range_end - timedelta(weeks=weeks),
+                "range_end": range_end,
+                "window_start": range_end - timedelta(weeks=weeks),
+            }
+            for layout in LAYOUTS:
+                conn.execute(text(f"SET search_path = {_schema(layout)}, public"))
+                report[layout] = {}
+                for name in QUERIES:
+                    sql = _NUMERIC_SQL[name] if layout == "numeric" else statements[name]
+                    bound = {k: v for k, v in params.items() if f":{k}" in sql}
+                    report[layout][name] = _measure(conn, sql, bound, iterations)
+            conn.execute(text("RESET search_path"))
+            for layout in LAYOUTS:
+                conn.execute(text(f"DROP SCHEMA {_schema(layout)} CASCADE"))
+    finally:
+        engine.dispose()
+    report["sets"], report["weeks"] = sets, weeks
+    return report
+
+
+def render(report: Dict[str, object]) -> str:
+    """Fixed-width numeric/integer table of a ``run`` report."""
+    numeric, integer = report["numeric"], report["integer"]
+    header = f"{'query':<44}{'numeric ms':>12}{'integer ms':>12}{'speedup':>9}"
+    lines = [f"user {ENGINE_USER_ID}: {report['sets']} sets; ranges {report['weeks']} weeks", "",
+             header, "-" * len(header)]
+    for name in QUERIES:
+        n, i = numeric[name], integer[name]
+        lines.append(f"{name:<44}{n:>12.3f}{i:>12.3f}{n / i:>8.2f}x")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.fixed_point``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20, help="EXPLAIN ANALYZE runs per query and layout")
+    parser.add_argument("--weeks", type=int, default=156, help="week-compare / e1RM range")
+    parser.add_argument("--database-url", default=None, help="superuser URL")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report here")
+    args = parser.parse_args(argv)
+
+    report = run(_database_url(args.database_url), args.iterations, args.weeks)
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
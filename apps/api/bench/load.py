@@ -0,0 +1,261 @@
+"""Asyncio load driver for the Core API hot paths.
+
+Drives a weighted scenario mix with ``--concurrency`` virtual users for
+``--duration`` seconds against a running API (default: the docker-compose.local
+``admin_backend`` published on :8001) and prints p50/p95/p99 + throughput per
+scenario.  Auth is the bot service path (``X-Service-Token`` +
+``X-Act-As-User``), impersonating the bench users created by ``bench.seed``.
+
+Scenarios (default weights):
+    summary        GET  /analytics/summary                   25
+    log_context    GET  /analytics/log-context               25
+    training_days  GET  /training/days                       15
+    training_day   GET  /training/day/{date}                 15
+    search         GET  /exercises/search                    15
+    create_set     POST /training                             5
+
+Before the timed run every sampled user's recent exercises are fetched once
+(``/analytics/recent-exercises``) so log-context / create_set use names the
+user actually trains.  A ``--warmup`` period runs the same mix untimed.
+
+Regression gate: ``--json out.json`` stores the report; ``--compare
+baseline.json`` exits non-zero when any scenario's p95 grew more than
+``--max-regression`` (default 20 %) or started returning errors.
+
+    python -m bench.load --users 20 --duration 30 --concurrency 16 --json run.json
+    python -m bench.load --compare baseline.json --max-regression 0.15
+
+NOTE: analytics responses are cached per user for 90 s in Redis, so with few
+users most summary/log-context calls measure the cache-hit path.  Use many
+users (or flush Redis db 1 between runs) to measure the DB path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from bench.seed import bench_user_ids
+from bench.stats import compare, render_table, summarize
+
+_SEARCH_TERMS = (
+    "bench", "squat", "dead", "curl", "press", "row", "pull", "fly",
+    "жим", "тяга", "присед", "extension", "raise", "lunge",
+)
+
+DEFAULT_WEIGHTS: Dict[str, int] = {
+    "summary": 25,
+    "log_context": 25,
+    "training_days": 15,
+    "training_day": 15,
+    "search": 15,
+    "create_set": 5,
+}
+
+
+@dataclass
+class _UserContext:
+    """Per-user data the scenarios need (fetched once before the run)."""
+
+    user_id: int
+    exercises: List[Tuple[str, str]] = field(default_factory=list)  # (muscle, exercise)
+
+
+@dataclass
+class _Recorder:
+    """Collects latencies/errors per scenario while ``recording`` is True."""
+
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    recording: bool = False
+
+    def record(self, scenario: str, elapsed: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        if ok:
+            self.latencies.setdefault(scenario, []).append(elapsed)
+        else:
+            self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+
+def _headers(token: str, user_id: int) -> Dict[str, str]:
+    return {"X-Service-Token": token, "X-Act-As-User": str(user_id)}
+
+
+def _random_past_day(rng: random.Random, days_back: int = 180) -> date:
+    return date.today() - timedelta(days=rng.randint(1, days_back))
+
+
+def _build_request(
+    scenario: str, ctx: _UserContext, rng: random.Random
+) -> Optional[Tuple[str, str, Dict, Optional[Dict]]]:
+    """Return ``(method, path, params, json_body)`` or None if not applicable."""
+    if scenario == "summary":
+        return "GET", "/analytics/summary", {}, None
+    if scenario == "training_days":
+        return "GET", "/training/days", {}, None
+    if scenario == "training_day":
+        return "GET", f"/training/day/{_random_past_day(rng).isoformat()}", {}, None
+    if scenario == "search":
+        return "GET", "/exercises/search", {"q": rng.choice(_SEARCH_TERMS)}, None
+    if not ctx.exercises:
+        return None
+    muscle, exercise = rng.choice(ctx.exercises)
+    if scenario == "log_context":
+        params = {"muscle": muscle, "exercise": exercise, "date": date.today().isoformat()}
+        return "GET", "/analytics/log-context", params, None
+    if scenario == "create_set":
+        body = {
+            "muscle_name": muscle,
+            "exercise_name": exercise,
+            "set": rng.randint(1, 5),
+            "weight": round(rng.uniform(20, 120) / 2.5) * 2.5,
+            "reps": float(rng.randint(5, 12)),
+        }
+        return "POST", "/training", {}, body
+    raise ValueError(f"unknown scenario {scenario!r}")
+
+
+async def _prepare_users(
+    client: httpx.AsyncClient, token: str, user_ids: Sequence[int]
+) -> List[_UserContext]:
+    """Fetch each user's recent exercises for the name-based scenarios."""
+    contexts = []
+    for uid in user_ids:
+        ctx = _UserContext(user_id=uid)
+        resp = await client.get(
+            "/analytics/recent-exercises", params={"limit": 10}, headers=_headers(token, uid)
+        )
+        if resp.status_code == 200:
+            ctx.exercises = [(r["muscle_name"], r["exercise_name"]) for r in resp.json()]
+        contexts.append(ctx)
+    return contexts
+
+
+async def _virtual_user(
+    client: httpx.AsyncClient,
+    token: str,
+    contexts: Sequence[_UserContext],
+    weights: Dict[str, int],
+    recorder: _Recorder,
+    stop_at: float,
+    rng: random.Random,
+) -> None:
+    names = list(weights)
+    cum = [weights[n] for n in names]
+    while time.perf_counter() < stop_at:
+        scenario = rng.choices(names, weights=cum, k=1)[0]
+        ctx = rng.choice(contexts)
+        req = _build_request(scenario, ctx, rng)
+        if req is None:
+            await asyncio.sleep(0)  # user has no history yet; stay cooperative
+            continue
+        method, path, params, body = req
+        started = time.perf_counter()
+        try:
+            resp = await client.request(
+                method, path, params=params, json=body, headers=_headers(token, ctx.user_id)
+            )
+            ok = resp.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        recorder.record(scenario, time.perf_counter() - started, ok)
+
+
+def _parse_weights(spec: Optional[str]) -> Dict[str, int]:
+    """Parse ``name=weight,name=weight`` (unknown names rejected)."""
+    if not spec:
+        return dict(DEFAULT_WEIGHTS)
+    weights: Dict[str, int] = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            raise SystemExit(f"bench.load: unknown scenario {name!r}")
+        weights[name] = int(value or 1)
+    return weights
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    """Execute warmup + timed run and return the report dict."""
+    weights = _parse_weights(args.scenarios)
+    user_ids = bench_user_ids(args.users)
+    recorder = _Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0, limits=limits) as client:
+        contexts = await _prepare_users(client, args.service_token, user_ids)
+
+        async def _phase(seconds: float, seed_offset: int) -> float:
+            stop_at = time.perf_counter() + seconds
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                _virtual_user(
+                    client, args.service_token, contexts, weights, recorder, stop_at,
+                    random.Random(args.seed + seed_offset + i),
+                )
+                for i in range(args.concurrency)
+            ])
+            return time.perf_counter() - started
+
+        if args.warmup > 0:
+            await _phase(args.warmup, 10_000)
+        recorder.recording = True
+        elapsed = await _phase(args.duration, 0)
+
+    scenarios = {
+        name: summarize(recorder.latencies.get(name, []), recorder.errors.get(name, 0), elapsed)
+        for name in weights
+    }
+    return {
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "base_url": args.base_url,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "scenarios": scenarios,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.load``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default=os.environ.get("BENCH_BASE_URL", "http://localhost:8001/api/v1"))
+    parser.add_argument("--service-token", default=os.environ.get("BOT_SERVICE_TOKEN", ""))
+    parser.add_argument("--users", type=int, default=20, help="bench users to spread load over")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users (default 16)")
+    parser.add_argument("--duration", type=float, default=30.0, help="timed seconds (default 30)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="untimed warmup seconds (default 5)")
+    parser.add_argument("--scenarios", default=None, help="weights, e.g. summary=3,search=1")
+    parser.add_argument("--seed", type=int, default=1, help="RNG seed (default 1)")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report to this file")
+    parser.add_argument("--compare", default=None, help="baseline report to gate against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth (default 0.2)")
+    args = parser.parse_args(argv)
+    if not args.service_token:
+        parser.error("--service-token (or BOT_SERVICE_TOKEN) is required")
+
+    report = asyncio.run(run(args))
+    print(render_table(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        problems = compare(baseline, report, args.max_regression)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Plain vs prepared execution of the hot registered queries.
+
+Runs every ``prepare=True`` registered query (``app.core.prepared``) as a bench
+user, ``--iterations`` times in each mode, on one connection per mode:
+
+    plain     an engine WITHOUT prepared statements — the statement text is
+              parsed and planned by Postgres on every call.
+    prepared  the runtime engine (``app.core.database.engine``) — PREPAREd on
+              connect, sent as ``EXECUTE``.
+
+Prints p50 per query and mode plus the prepared statements' plan-cache
+counters (``pg_prepared_statements.generic_plans`` / ``custom_plans``).
+
+Needs the API's environment (``APP_DB_*`` pointing at a database seeded with
+``bench.seed``) — run it inside the ``admin_backend`` container:
+
+    python -m bench.prepared --iterations 200
+    python -m bench.prepared --json prepared.json
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+
+from bench.seed import bench_user_ids
+from bench.stats import percentile
+
+MODES = ("plain", "prepared")
+
+
+def _sample_params(conn, uid: int) -> Dict[str, object]:
+    """Bind values for the hot queries: the user's most-logged exercise, today."""
+    eid = conn.execute(
+        text(
+            "SELECT exercise_id FROM training WHERE user_id = :uid"
+            " GROUP BY exercise_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ),
+        {"uid": uid},
+    ).scalar()
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "uid": uid,
+        "eid": eid,
+        "lim": 8,
+        "day_start": today,
+        "day_end": today + timedelta(days=1),
+        "window_start": today - timedelta(weeks=12),
+        "q": "bench",
+        "muscle_id": None,
+    }
+
+
+def _time_queries(conn, queries, params, iterations: int) -> Dict[str, float]:
+    """Return p50 milliseconds per query over ``iterations`` executions."""
+    report: Dict[str, float] = {}
+    for query in queries:
+        bound = {name: params[name] for name in query.param_names}
+        samples: List[float] = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            conn.execute(query.clause, bound).fetchall()
+            samples.append((time.perf_counter() - started) * 1000.0)
+        report[query.name] = round(percentile(samples, 50), 3)
+    return report
+
+
+def render(report: Dict) -> str:
+    """Render the two-mode report and plan-cache counters as a table."""
+    header = f"{'query':<42}{'plain p50':>11}{'prepared p50':>14}{'generic':>9}{'custom':>8}"
+    lines = [header, "-" * len(header)]
+    stats = {row["name"]: row for row in report["plan_cache"]}
+    for name, plain in report["plain"].items():
+        row = stats.get("hot_" + name.replace(".", "_"), {})
+        lines.append(
+            f"{name:<42}{plain:>11.3f}{report['prepared'][name]:>14.3f}"
+            f"{row.get('generic_plans', 0):>9}{row.get('custom_plans', 0):>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.prepared``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200, help="executions per query and mode")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    from app.api.v1 import analytics_router, exercises_router  # noqa: F401 — register queries
+    from app.core import database
+    from app.core.config import get_settings
+    from app.core.prepared import plan_cache_stats
+    from app.core.query_registry import registered_queries
+
+    queries = [q for q in registered_queries() if q.prepare]
+    uid = bench_user_ids(1)[0]
+    plain_engine = create_engine(get_settings().APP_DATABASE_URL)
+    engines = {"plain": plain_engine, "prepared": database.engine}
+    report: Dict[str, object] = {}
+    try:
+        for mode in MODES:
+            with engines[mode].connect() as conn:
+                conn.execute(text("SELECT set_config('app.user_id', :uid, true)"), {"uid": str(uid)})
+                conn.execute(text("SELECT set_config('app.role', 'user', true)"))
+                params = _sample_params(conn, uid)
+                # Untimed warmup: catalog caches, and past the five custom
+                # plans ``auto`` needs before it considers a generic plan.
+                _time_queries(conn, queries, params, 6)
+                report[mode] = _time_queries(conn, queries, params, args.iterations)
+                if mode == "prepared":
+                    report["plan_cache"] = plan_cache_stats(conn)
+                conn.rollback()
+    finally:
+        plain_engine.dispose()
+
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Database round trips per request: separate vs folded RLS GUC setup.
+
+Drives the Core API IN-PROCESS (FastAPI ``TestClient``) with the same scenario
+requests as ``bench.load`` and counts every DBAPI ``cursor.execute`` — one
+client/server round trip each — per request, in two modes:
+
+    separate  the previous ``_set_rls_gucs`` behaviour, re-created here as an
+              extra ``after_begin`` listener: a standalone
+              ``SELECT set_config(...), set_config(...)`` at the start of
+              every transaction (twice for handlers that commit mid-request).
+    folded    the current code: the ``set_config`` prefix rides on the
+              transaction's first statement.
+
+psycopg2's implicit ``BEGIN`` is one more round trip per transaction in BOTH
+modes; SQLAlchemy never sees it, so it is not counted.
+
+Needs the API's environment (``APP_DB_*`` pointing at a database seeded with
+``bench.seed``, ``BOT_SERVICE_TOKEN``, ...) — run it inside the
+``admin_backend`` container.  Point ``REDIS_URL`` at an unreachable port (or
+flush db 1) so analytics requests take the database path:
+
+    python -m bench.roundtrips --users 5 --requests 40
+    python -m bench.roundtrips --json roundtrips.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from bench.load import DEFAULT_WEIGHTS, _UserContext, _build_request, _headers
+from bench.seed import bench_user_ids
+from bench.stats import percentile
+
+MODES = ("separate", "folded")
+
+
+class _StatementCounter:
+    """Counts DBAPI executes on every engine (thread-safe; ``reset`` returns the count)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        with self._lock:
+            self.count += 1
+
+    def reset(self) -> int:
+        with self._lock:
+            value, self.count = self.count, 0
+        return value
+
+
+def _separate_set_config(session, transaction, connection) -> None:
+    """Re-create the pre-fold behaviour: one standalone set_config per transaction."""
+    connection.execute(
+        text(
+            "SELECT set_config('app.user_id', :uid, true),"
+            " set_config('app.role', :role, true)"
+        ),
+        {"uid": session.info.get("app_user_id", ""), "role": session.info.get("app_role", "")},
+    )
+
+
+def _prepare_users(client, token: str, user_ids: Sequence[int]) -> List[_UserContext]:
+    """Fetch each user's recent exercises for the name-based scenarios."""
+    contexts = []
+    for uid in user_ids:
+        ctx = _UserContext(user_id=uid)
+        resp = client.get(
+            "/api/v1/analytics/recent-exercises", params={"limit": 10}, headers=_headers(token, uid)
+        )
+        if resp.status_code == 200:
+            ctx.exercises = [(r["muscle_name"], r["exercise_name"]) for r in resp.json()]
+        contexts.append(ctx)
+    return contexts
+
+
+def _run_mode(client, token, contexts, counter, requests, seed) -> Dict[str, Dict[str, float]]:
+    """Issue ``requests`` requests per scenario; return per-scenario stats."""
+    rng = random.Random(seed)
+    report: Dict[str, Dict[str, float]] = {}
+    for scenario in DEFAULT_WEIGHTS:
+        counts: List[int] = []
+        latencies: List[float] = []
+        errors = 0
+        for _ in range(requests):
+            ctx = rng.choice(contexts)
+            req = _build_request(scenario, ctx, rng)
+            if req is None:
+                continue
+            method, path, params, body = req
+            counter.reset()
+            started = time.perf_counter()
+            resp = client.request(
+                method, "/api/v1" + path, params=params, json=body,
+                headers=_headers(token, ctx.user_id),
+            )
+            elapsed = time.perf_counter() - started
+            statements = counter.reset()
+            if resp.status_code >= 400:
+                errors += 1
+                continue
+            counts.append(statements)
+            latencies.append(elapsed * 1000.0)
+        report[scenario] = {
+            "requests": len(counts),
+            "errors": errors,
+            "statements_per_request": round(sum(counts) / len(counts), 2) if counts else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+        }
+    return report
+
+
+def render(report: Dict) -> str:
+    """Render the two-mode report as a fixed-width table."""
+    header = (
+        f"{'scenario':<16}{'separate rt':>13}{'folded rt':>11}{'saved':>8}"
+        f"{'separate p50':>14}{'folded p50':>12}"
+    )
+    lines = [header, "-" * len(header)]
+    for name in DEFAULT_WEIGHTS:
+        sep = report["separate"][name]
+        fol = report["folded"][name]
+        saved = sep["statements_per_request"] - fol["statements_per_request"]
+        lines.append(
+            f"{name:<16}{sep['statements_per_request']:>13.2f}{fol['statements_per_request']:>11.2f}"
+            f"{saved:>8.2f}{sep['p50_ms']:>14.2f}{fol['p50_ms']:>12.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.roundtrips``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=5, help="bench users to spread requests over")
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario and mode")
+    parser.add_argument("--seed", type=int, default=1, help="RNG seed (default 1)")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    from fastapi.testclient import TestClient
+
+    from app.core import database
+    from app.core.config import get_settings
+    from main import app
+
+    token = get_settings().BOT_SERVICE_TOKEN
+    counter = _StatementCounter()
+    event.listen(Engine, "after_cursor_execute", counter)
+    client = TestClient(app)
+    contexts = _prepare_users(client, token, bench_user_ids(args.users))
+
+    # Untimed warmup so the first mode does not pay connection/plan setup.
+    _run_mode(client, token, contexts, counter, max(1, args.requests // 4), args.seed + 1)
+
+    report: Dict[str, Dict] = {}
+    for mode in MODES:
+        if mode == "separate":
+            event.listen(database.SessionLocal, "after_begin", _separate_set_config)
+        try:
+            # Same seed per mode → identical request sequences.
+            report[mode] = _run_mode(client, token, contexts, counter, args.requests, args.seed)
+        finally:
+            if mode == "separate":
+                event.remove(database.SessionLocal, "after_begin", _separate_set_config)
+
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Synthetic training-data generator for benchmarks.
+
+Creates ``--users`` users (ids ``BENCH_USER_BASE + 0 .. N-1``) each with
+``--years`` of history drawn from the GLOBAL exercise catalog:
+
+- 2-5 sessions per week (per-user habit), occasional skipped weeks.
+- Each user has a personal program of 8-20 exercises picked with a Zipf-like
+  weighting over the catalog, so a few staples dominate the whole dataset the
+  way real usage does; each session trains 3-6 of them, 3-5 sets each.
+- Weights start at a per-exercise working weight and progress slowly with
+  noise and periodic deloads; reps 5-12; weights rounded to 2.5 kg.
+
+A fresh stack (or the test DB) has no catalog; ``--with-catalog`` first adds a
+small global catalog of common lifts (idempotent, ON CONFLICT DO NOTHING on
+the global name_key index) so the generator has something to reference.
+
+Rows are written with psycopg2 ``execute_values`` as the SUPERUSER (RLS would
+otherwise need the GUC per user).  The run is reproducible for a given
+``--seed``.  Bench users live in their own id range and ``--reset`` deletes
+exactly that range, so the generator is safe to point at a local stack that
+also holds real-looking data.
+
+Usage (from apps/api, or inside the admin_backend container):
+
+    python -m bench.seed --users 50 --years 3 --reset
+    python -m bench.seed --users 5 --years 1 --with-catalog    # empty DB
+    python -m bench.seed --database-url postgresql://myuser:pw@localhost:9981/gymdb
+
+Without ``--database-url`` / ``BENCH_DATABASE_URL`` the superuser URL is taken
+from ``Settings.DATABASE_URL`` (the same DB_* env vars the API uses).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+# Bench users live far above any real Telegram id range in use.
+BENCH_USER_BASE = 900_000_000_000
+
+_PAGE_SIZE = 5000
+
+# Fallback global catalog for empty databases (--with-catalog).
+_BENCH_CATALOG = {
+    "Chest": ["Bench Press", "Incline Bench Press", "Dumbbell Fly", "Chest Dip", "Cable Crossover"],
+    "Back": ["Deadlift", "Pull Up", "Barbell Row", "Lat Pulldown", "Seated Cable Row"],
+    "Legs": ["Squat", "Leg Press", "Romanian Deadlift", "Lunge", "Leg Extension", "Leg Curl"],
+    "Shoulders": ["Overhead Press", "Lateral Raise", "Rear Delt Fly", "Arnold Press"],
+    "Biceps": ["Barbell Curl", "Hammer Curl", "Preacher Curl"],
+    "Triceps": ["Triceps Pushdown", "Skull Crusher", "Close Grip Bench Press"],
+    "Abs": ["Plank", "Hanging Leg Raise", "Cable Crunch"],
+}
+
+
+def _database_url(cli_url: Optional[str]) -> str:
+    """Resolve the superuser URL: CLI flag > BENCH_DATABASE_URL > Settings."""
+    if cli_url:
+        return cli_url
+    env_url = os.environ.get("BENCH_DATABASE_URL")
+    if env_url:
+        return env_url
+    from app.core.config import get_settings
+
+    return get_settings().DATABASE_URL
+
+
+def bench_user_ids(count: int) -> List[int]:
+    """Return the ids of the first ``count`` bench users."""
+    return [BENCH_USER_BASE + i for i in range(count)]
+
+
+def ensure_catalog(engine: Engine) -> None:
+    """Insert ``_BENCH_CATALOG`` as global muscles/exercises (idempotent)."""
+    with engine.begin() as conn:
+        for muscle, exercises in _BENCH_CATALOG.items():
+            conn.execute(text(
+                "INSERT INTO muscles (name, is_global, created_by) VALUES (:n, TRUE, NULL)"
+                " ON CONFLICT DO NOTHING"
+            ), {"n": muscle})
+            mid = conn.execute(text(
+                "SELECT id FROM muscles WHERE name_key = app_name_key(:n) AND created_by IS NULL"
+            ), {"n": muscle}).scalar_one()
+            for name in exercises:
+                conn.execute(text(
+                    "INSERT INTO exercises (name, muscle, is_global, created_by)"
+                    " VALUES (:n, :mid, TRUE, NULL) ON CONFLICT DO NOTHING"
+                ), {"n": name, "mid": mid})
+
+
+def _load_catalog(engine: Engine) -> List[Tuple[int, int]]:
+    """Return ``(exercise_id, muscle_id)`` for every global exercise, by id.
+
+    Raises:
+        SystemExit: When the catalog is (nearly) empty — without
+            ``--with-catalog`` the generator never creates catalog entries.
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT id, muscle FROM exercises"
+            " WHERE is_global AND created_by IS NULL AND muscle IS NOT NULL"
+            " ORDER BY id"
+        )).fetchall()
+    if len(rows) < 10:
+        raise SystemExit(
+            f"bench.seed: only {len(rows)} global exercises found; "
+            "import the catalog or re-run with --with-catalog"
+        )
+    return [(r[0], r[1]) for r in rows]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Zipf-like popularity weights for ranks ``1..n``."""
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def generate_user_rows(
+    rng: random.Random,
+    user_id: int,
+    catalog: Sequence[Tuple[int, int]],
+    years: float,
+    end: datetime,
+) -> List[tuple]:
+    """Generate every training row for one user.
+
+    Args:
+        rng: Seeded RNG (shared across users for reproducibility).
+        user_id: Bench user id.
+        catalog: Global ``(exercise_id, muscle_id)`` pairs.
+        years: History length.
+        end: Most recent instant (naive UTC); history ends the day before.
+
+    Returns:
+        Tuples ``(id, date, user_id, muscle_id, exercise_id, set, weight, reps)``.
+    """
+    # Popularity rank follows catalog id order, so the same staples are
+    # popular across ALL users (like real usage), not per user.
+    program_size = rng.randint(8, min(20, len(catalog)))
+    program: List[Tuple[int, int]] = []
+    weights = _zipf_weights(len(catalog))
+    while len(program) < program_size:
+        pick = rng.choices(range(len(catalog)), weights=weights, k=1)[0]
+        if catalog[pick] not in program:
+            program.append(catalog[pick])
+    working = {ex: rng.uniform(15.0, 100.0) for ex, _ in program}
+
+    sessions_per_week = rng.randint(2, 5)
+    start = end - timedelta(days=int(365 * years))
+    rows: List[tuple] = []
+    week_start = start
+    week_no = 0
+    while week_start < end - timedelta(days=1):
+        week_no += 1
+        if rng.random() < 0.08:  # holiday / sick week
+            week_start += timedelta(days=7)
+            continue
+        deload = week_no % 8 == 0
+        days = sorted(rng.sample(range(7), sessions_per_week))
+        for day in days:
+            session_at = (week_start + timedelta(days=day)).replace(
+                hour=rng.randint(6, 21), minute=rng.randint(0, 59), second=0, microsecond=0
+            )
+            if session_at >= end - timedelta(days=1):
+                continue
+            todays = rng.sample(program, k=min(len(program), rng.randint(3, 6)))
+            minute = 0
+            for ex_id, muscle_id in todays:
+                base = working[ex_id] * (0.85 if deload else 1.0)
+                for set_no in range(1, rng.randint(3, 5) + 1):
+                    weight = max(2.5, round(base * rng.uniform(0.92, 1.03) / 2.5) * 2.5)
+                    reps = float(rng.randint(5, 12))
+                    rows.append((
+                        uuid.UUID(int=rng.getrandbits(128)).hex,
+                        session_at + timedelta(minutes=minute),
+                        user_id,
+                        muscle_id,
+                        ex_id,
+                        set_no,
+                        min(weight, 999.0),
+                        reps,
+                    ))
+                    minute += rng.randint(2, 4)
+                # Slow progressive overload: ~+0.4 % per session, capped.
+                working[ex_id] = min(working[ex_id] * 1.004, 400.0)
+        week_start += timedelta(days=7)
+    return rows
+
+
+def reset(engine: Engine, user_ids: Sequence[int]) -> None:
+    """Delete every row owned by the given bench users (training first)."""
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM training WHERE user_id = ANY(:ids)"), {"ids": list(user_ids)})
+        conn.execute(text("DELETE FROM users WHERE id = ANY(:ids)"), {"ids": list(user_ids)})
+
+
+def seed(engine: Engine, users: int, years: float, rng_seed: int) -> int:
+    """Create bench users and their history.  Returns the number of rows."""
+    from psycopg2.extras import execute_values
+
+    catalog = _load_catalog(engine)
+    rng = random.Random(rng_seed)
+    end = datetime.utcnow()
+    ids = bench_user_ids(users)
+    total = 0
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        execute_values(
+            cur,
+            "INSERT INTO users (id, registration_date, first_name, username) VALUES %s"
+            " ON CONFLICT (id) DO NOTHING",
+            [(uid, end - timedelta(days=int(365 * years) + 1), "Bench", f"bench_{uid}") for uid in ids],
+        )
+        for uid in ids:
+            rows = generate_user_rows(rng, uid, catalog, years, end)
+            execute_values(
+                cur,
+                "INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)"
+                " VALUES %s",
+                rows,
+                page_size=_PAGE_SIZE,
+            )
+            total += len(rows)
+        raw.commit()
+        cur.execute("ANALYZE training")
+        raw.commit()
+    finally:
+        raw.close()
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.seed``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20, help="number of bench users (default 20)")
+    parser.add_argument("--years", type=float, default=2.0, help="years of history per user (default 2)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed (default 42)")
+    parser.add_argument("--reset", action="store_true", help="delete existing bench users first")
+    parser.add_argument("--with-catalog", action="store_true", help="add a small global catalog if missing")
+    parser.add_argument("--database-url", default=None, help="superuser database URL")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(_database_url(args.database_url))
+    try:
+        if args.reset:
+            reset(engine, bench_user_ids(args.users))
+        if args.with_catalog:
+            ensure_catalog(engine)
+        started = time.perf_counter()
+        rows = seed(engine, args.users, args.years, args.seed)
+        elapsed = time.perf_counter() - started
+    finally:
+        engine.dispose()
+    print(
+        f"bench.seed: {args.users} users (ids {BENCH_USER_BASE}..{BENCH_USER_BASE + args.users - 1}),"
+        f" {rows} sets over {args.years:g} years in {elapsed:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Serialization time and payload size of the largest API responses.
+
+In-process, no database or server: builds synthetic payloads of realistic
+size for the heaviest endpoints, validates them through the endpoints'
+response models (as FastAPI does), then times
+
+    stdlib    ``JSONResponse.render`` — FastAPI's former default
+    orjson    ``ORJSONResponse.render`` — the app's default response class
+    gzip      the compression middleware's gzip encoder (level 6)
+    br        its brotli encoder (quality 4; skipped without ``brotli``)
+
+and reports the body size per encoding.
+
+Payloads (defaults):
+    exercise_progress  ``--years`` of 3 sessions/week x 5 sets, one series per set
+    training_days      the default 180-day window, one entry per training day
+    activity           the 400-day maximum range
+
+    python -m bench.serialization --years 5 --iterations 50
+    python -m bench.serialization --json serialization.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.middleware.compression import _ENCODERS
+from app.schemas import schemas
+from bench.stats import percentile
+
+_MUSCLES = ("Chest", "Back", "Legs", "Shoulders", "Arms", "Core")
+
+
+def _training_dates(days: int, per_week: int, rng: random.Random) -> List[date]:
+    """``per_week`` training days in each week of the last ``days`` days."""
+    end = date(2026, 1, 1)
+    out = []
+    for week_start in range(0, days, 7):
+        for offset in sorted(rng.sample(range(7), per_week)):
+            day = end - timedelta(days=days - week_start - offset)
+            if day <= end:
+                out.append(day)
+    return out
+
+
+def build_payloads(years: int = 5, seed: int = 7) -> Dict[str, Tuple[Any, Any]]:
+    """Synthetic ``{name: (response_model, payload)}`` for the heavy endpoints.
+
+    Args:
+        years: History length for ``exercise_progress``.
+        seed: RNG seed (same seed, same payloads).
+
+    Returns:
+        Payloads as the endpoints build them (plain dicts / lists).
+    """
+    rng = random.Random(seed)
+    progress_days = _training_dates(365 * years, 3, rng)
+    progress = {
+        "series": [
+            {
+                "set": set_num,
+                "points": [
+                    {"date": str(d), "weight": round(60 + i * 0.05 + rng.random() * 5, 1),
+                     "reps": float(rng.randint(5, 12))}
+                    for i, d in enumerate(progress_days)
+                ],
+            }
+            for set_num in range(1, 6)
+        ]
+    }
+    days = [
+        {
+            "date": str(d),
+            "muscles": rng.sample(_MUSCLES, 2),
+            "exercises_count": rng.randint(3, 6),
+            "sets_count": rng.randint(12, 25),
+            "has_pr": rng.random() < 0.1,
+        }
+        for d in reversed(_training_dates(180, 4, rng))
+    ]
+    activity = [
+        {"date": str(d), "sets_count": rng.randint(10, 30)}
+        for d in _training_dates(400, 4, rng)
+    ]
+    return {
+        "exercise_progress": (schemas.ExerciseProgress, progress),
+        "training_days": (List[schemas.TrainingDay], days),
+        "activity": (List[schemas.ActivityDay], activity),
+    }
+
+
+def _time_ms(fn: Callable[[], Any], iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentile(samples, 50) * 1000.0
+
+
+def _encode(coding: str, body: bytes) -> bytes:
+    encoder = _ENCODERS[coding]()
+    return encoder.compress(body) + encoder.finish()
+
+
+def run(years: int = 5, iterations: int = 50) -> Dict[str, Dict[str, float]]:
+    """Measure every payload; returns ``{payload: {metric: value}}``.
+
+    Times are p50 milliseconds; sizes are bytes.
+    """
+    report: Dict[str, Dict[str, float]] = {}
+    for name, (model, payload) in build_payloads(years).items():
+        adapter = TypeAdapter(model)
+        content = adapter.dump_python(adapter.validate_python(payload), mode="json")
+        body = ORJSONResponse(content).body
+        row = {
+            "items": float(sum(len(s["points"]) for s in payload["series"])
+                           if name == "exercise_progress" else len(payload)),
+            "json_bytes": float(len(body)),
+            "stdlib_ms": _time_ms(lambda: JSONResponse(content), iterations),
+            "orjson_ms": _time_ms(lambda: ORJSONResponse(content), iterations),
+        }
+        for coding in ("gzip", "br"):
+            if coding in _ENCODERS:
+                row[f"{coding}_bytes"] = float(len(_encode(coding, body)))
+                row[f"{coding}_ms"] = _time_ms(lambda: _encode(coding, body), iterations)
+        report[name] = row
+    return report
+
+
+def render(report: Dict[str, Dict[str, float]]) -> str:
+    """Fixed-width table of a ``run`` report."""
+    columns = ("items", "json_bytes", "gzip_bytes", "br_bytes",
+               "stdlib_ms", "orjson_ms", "gzip_ms", "br_ms")
+    lines = [f"{'payload':<18}" + "".join(f"{c:>12}" for c in columns)]
+    for name, row in report.items():
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            if value is None:
+                cells.append(f"{'-':>12}")
+            elif column.endswith("_ms"):
+                cells.append(f"{value:>12.3f}")
+            else:
+                cells.append(f"{int(value):>12}")
+        lines.append(f"{name:<18}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report here")
+    args = parser.parse_args(argv)
+
+    report = run(args.years, args.iterations)
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
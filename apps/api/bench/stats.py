@@ -0,0 +1,121 @@
+"""Latency statistics, report rendering, and regression comparison.
+
+Pure functions only — no I/O beyond ``json`` (de)serialisation of report
+dicts — so they are covered by ``tests/test_bench.py`` without a server.
+
+Report shape (one entry per scenario, also written by ``load --json``):
+
+    {
+      "duration_s": 30.0,
+      "scenarios": {
+        "summary": {"count": 812, "errors": 0, "rps": 27.1,
+                    "p50_ms": 4.1, "p95_ms": 9.8, "p99_ms": 14.2, "max_ms": 40.3},
+        ...
+      }
+    }
+"""
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples``.
+
+    Nearest-rank (not interpolated) so p99 of a small sample is an actually
+    observed latency rather than a blend of the two slowest requests.
+
+    Args:
+        samples: Observed values (any order).
+        pct: Percentile in ``(0, 100]``.
+
+    Returns:
+        The percentile value, or ``0.0`` for an empty sample.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_s: Sequence[float], errors: int, duration_s: float) -> Dict[str, float]:
+    """Build one scenario's report entry.
+
+    Args:
+        latencies_s: Latencies of SUCCESSFUL requests, in seconds.
+        errors: Number of failed requests (non-2xx or transport error).
+        duration_s: Measured wall time of the run, in seconds.
+
+    Returns:
+        Dict with count, errors, rps and p50/p95/p99/max in milliseconds.
+    """
+    count = len(latencies_s)
+    ms = [v * 1000.0 for v in latencies_s]
+    return {
+        "count": count,
+        "errors": errors,
+        "rps": round(count / duration_s, 2) if duration_s > 0 else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def render_table(report: Dict) -> str:
+    """Render a report as a fixed-width text table.
+
+    Args:
+        report: Report dict (see module docstring).
+
+    Returns:
+        Multi-line table string, one row per scenario plus a total row.
+    """
+    header = f"{'scenario':<16}{'count':>8}{'errors':>8}{'rps':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}"
+    lines = [header, "-" * len(header)]
+    total_count = 0
+    total_errors = 0
+    for name, s in sorted(report["scenarios"].items()):
+        total_count += s["count"]
+        total_errors += s["errors"]
+        lines.append(
+            f"{name:<16}{s['count']:>8}{s['errors']:>8}{s['rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}"
+        )
+    duration = report.get("duration_s") or 0.0
+    total_rps = total_count / duration if duration > 0 else 0.0
+    lines.append("-" * len(header))
+    lines.append(f"{'TOTAL':<16}{total_count:>8}{total_errors:>8}{total_rps:>9.1f}")
+    return "\n".join(lines)
+
+
+def compare(baseline: Dict, current: Dict, max_regression: float, metric: str = "p95_ms") -> List[str]:
+    """List scenarios whose ``metric`` regressed beyond ``max_regression``.
+
+    Only scenarios present in BOTH reports are compared; a scenario whose
+    error count grew from zero is always flagged.
+
+    Args:
+        baseline: Report from a known-good run.
+        current: Report from the run under test.
+        max_regression: Allowed relative increase, e.g. ``0.2`` for +20 %.
+        metric: Report field to compare (default ``p95_ms``).
+
+    Returns:
+        Human-readable regression descriptions; empty when within budget.
+    """
+    problems: List[str] = []
+    for name, cur in sorted(current["scenarios"].items()):
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if base["errors"] == 0 and cur["errors"] > 0:
+            problems.append(f"{name}: {cur['errors']} errors (baseline had none)")
+        base_v = base.get(metric) or 0.0
+        cur_v = cur.get(metric) or 0.0
+        if base_v > 0 and cur_v > base_v * (1.0 + max_regression):
+            problems.append(
+                f"{name}: {metric} {cur_v:.1f} vs baseline {base_v:.1f} "
+                f"(+{(cur_v / base_v - 1.0) * 100:.0f}% > {max_regression * 100:.0f}%)"
+            )
+    return problems
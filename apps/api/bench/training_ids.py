@@ -0,0 +1,152 @@
+"""Primary-key size and insert throughput of the training id layouts (0013).
+
+Loads the same rows into three scratch tables shaped like ``training``
+(PRIMARY KEY (id, date)) in a ``bench_ids`` schema, one commit per
+``--batch`` rows, ids generated client-side as the API does:
+
+    varchar_uuid4   VARCHAR(32) + ``uuid4().hex``   (before 0013)
+    uuid_uuid4      uuid + uuid4                    (the type change alone)
+    uuid_uuid7      uuid + UUIDv7                   (after 0013)
+
+Each table is first pre-filled with ``--prefill`` rows (untimed) so the
+timed load inserts into an index of realistic size.  Prints, per layout,
+the timed load's rows/s and WAL volume and the final heap and primary-key
+sizes.  The schema is dropped afterwards.  Needs a superuser URL
+(``--database-url`` or ``BENCH_DATABASE_URL``); ``training`` is not touched:
+
+    python -m bench.training_ids --prefill 2000000 --rows 500000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from psycopg2.extras import execute_values
+from sqlalchemy import create_engine
+
+from app.core.training_ids import uuid7
+from bench.seed import _database_url
+
+SCHEMA = "bench_ids"
+
+# layout -> (id column type, id generator)
+LAYOUTS: Dict[str, tuple] = {
+    "varchar_uuid4": ("VARCHAR(32)", lambda: uuid.uuid4().hex),
+    "uuid_uuid4": ("uuid", lambda: str(uuid.uuid4())),
+    "uuid_uuid7": ("uuid", lambda: str(uuid7())),
+}
+
+_PREFILL_BATCH = 10_000
+
+
+def _rows(new_id: Callable[[], str], count: int, start: datetime, rng: random.Random) -> List[tuple]:
+    return [
+        (new_id(), start + timedelta(seconds=i), rng.randint(1, 5000), 40 + rng.randint(0, 60))
+        for i in range(count)
+    ]
+
+
+def _load(cur, table: str, new_id, count: int, batch: int, start: datetime, rng) -> None:
+    for offset in range(0, count, batch):
+        execute_values(
+            cur,
+            f"INSERT INTO {table} (id, date, user_id, weight) VALUES %s",
+            _rows(new_id, min(batch, count - offset), start + timedelta(seconds=offset), rng),
+            page_size=batch,
+        )
+        cur.connection.commit()
+
+
+def _wal_lsn(cur) -> int:
+    cur.execute("SELECT pg_current_wal_lsn() - '0/0'::pg_lsn")
+    return int(cur.fetchone()[0])
+
+
+def run(superuser_url: str, prefill: int, rows: int, batch: int, seed: int = 7) -> Dict[str, object]:
+    """Load every layout; returns ``{layout: stats}``."""
+    engine = create_engine(superuser_url)
+    raw = engine.raw_connection()
+    report: Dict[str, object] = {}
+    try:
+        cur = raw.cursor()
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {SCHEMA}")
+        raw.commit()
+        for layout, (id_type, new_id) in LAYOUTS.items():
+            table = f"{SCHEMA}.{layout}"
+            cur.execute(f"""
+                CREATE TABLE {table} (
+                    id {id_type} NOT NULL,
+                    date TIMESTAMP NOT NULL,
+                    user_id BIGINT,
+                    weight DECIMAL(5, 2),
+                    PRIMARY KEY (id, date)
+                )
+            """)
+            raw.commit()
+            rng = random.Random(seed)
+            start = datetime(2020, 1, 1)
+            _load(cur, table, new_id, prefill, _PREFILL_BATCH, start, rng)
+            cur.execute("CHECKPOINT")
+            wal_before = _wal_lsn(cur)
+            began = time.perf_counter()
+            _load(cur, table, new_id, rows, batch, start + timedelta(seconds=prefill), rng)
+            elapsed = time.perf_counter() - began
+            wal = _wal_lsn(cur) - wal_before
+            cur.execute(
+                "SELECT pg_relation_size(%s::regclass), pg_relation_size(%s::regclass)",
+                (table, f"{table}_pkey"),
+            )
+            heap_bytes, pk_bytes = cur.fetchone()
+            raw.commit()
+            report[layout] = {
+                "rows_per_s": round(rows / elapsed),
+                "wal_mb": round(wal / 2**20, 1),
+                "heap_mb": round(heap_bytes / 2**20, 1),
+                "pk_mb": round(pk_bytes / 2**20, 1),
+            }
+        cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        raw.commit()
+    finally:
+        raw.close()
+        engine.dispose()
+    report["prefill"], report["rows"], report["batch"] = prefill, rows, batch
+    return report
+
+
+def render(report: Dict[str, object]) -> str:
+    """Fixed-width table of a ``run`` report."""
+    header = f"{'layout':<16}{'rows/s':>10}{'WAL MB':>10}{'heap MB':>10}{'pk MB':>10}"
+    lines = [f"prefill {report['prefill']} rows, then {report['rows']} rows"
+             f" in commits of {report['batch']}", "", header, "-" * len(header)]
+    for layout in LAYOUTS:
+        s = report[layout]
+        lines.append(f"{layout:<16}{s['rows_per_s']:>10}{s['wal_mb']:>10.1f}"
+                     f"{s['heap_mb']:>10.1f}{s['pk_mb']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.training_ids``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--prefill", type=int, default=2_000_000, help="untimed rows loaded first")
+    parser.add_argument("--rows", type=int, default=500_000, help="timed rows")
+    parser.add_argument("--batch", type=int, default=100, help="rows per commit in the timed load")
+    parser.add_argument("--database-url", default=None, help="superuser URL")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report here")
+    args = parser.parse_args(argv)
+
+    report = run(_database_url(args.database_url), args.prefill, args.rows, args.batch)
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Bulk import vs one ``POST /training`` per set.
+
+Drives the Core API IN-PROCESS (FastAPI ``TestClient``) for one bench user:
+builds a Strong CSV of ``--sets`` sets over the user's visible exercise
+catalog, dated in a year the seed never writes (2001), and times
+
+    per_set    ``POST /training`` for the first ``--per-set`` of those sets
+               (extrapolated to ``--sets``)
+    import     ``POST /training/import`` of the whole file (resolve, COPY,
+               one merge)
+    reimport   the same file again: every set is a duplicate
+
+The rows written are deleted afterwards.  Needs the API's environment
+(``APP_DB_*`` pointing at a database seeded with ``bench.seed``,
+``BOT_SERVICE_TOKEN``, ...) plus a superuser URL for the cleanup
+(``--database-url`` or ``BENCH_DATABASE_URL``):
+
+    python -m bench.training_import --sets 10000 --per-set 500
+"""
+import argparse
+import io
+import json
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+
+from bench.seed import _database_url, bench_user_ids
+
+# Strong's export header (the columns the importer reads, plus the rest).
+_STRONG_HEADER = "Date,Workout Name,Duration,Exercise Name,Set Order,Weight,Reps,Distance,Seconds,Notes,Workout Notes,RPE"
+
+_YEAR = 2001
+
+
+def _catalog(superuser_url: str, uid: int) -> List[tuple]:
+    """(muscle, exercise) names visible to ``uid``: own and global."""
+    engine = create_engine(superuser_url)
+    try:
+        with engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(text("""
+                SELECT m.name, e.name FROM exercises e JOIN muscles m ON m.id = e.muscle
+                WHERE e.created_by IS NULL OR e.created_by = :uid
+                ORDER BY e.id
+            """), {"uid": uid})]
+    finally:
+        engine.dispose()
+
+
+def _sessions(catalog: Sequence[tuple], count: int) -> List[tuple]:
+    """``count`` sets as (day, muscle, exercise, set, weight, reps): 4 exercises x 4 sets a day."""
+    sets = []
+    day = date(_YEAR, 1, 1)
+    i = 0
+    while len(sets) < count:
+        for k in range(4):
+            muscle, exercise = catalog[(i + k) % len(catalog)]
+            for set_no in range(1, 5):
+                sets.append((day, muscle, exercise, set_no, 40 + 2.5 * (i % 16), 5 + set_no))
+        day += timedelta(days=1)
+        i += 4
+    return sets[:count]
+
+
+def _strong_csv(sets: Sequence[tuple]) -> bytes:
+    buf = io.StringIO()
+    buf.write(_STRONG_HEADER + "\n")
+    for day, _, exercise, set_no, weight, reps in sets:
+        name = exercise.replace('"', '""')
+        buf.write(f'{day} 18:00:00,Bench,1h,"{name}",{set_no},{weight},{reps},0,0,,,\n')
+    return buf.getvalue().encode("utf-8")
+
+
+def _cleanup(superuser_url: str, uid: int) -> None:
+    engine = create_engine(superuser_url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                DELETE FROM training
+                WHERE user_id = :uid AND date >= :start AND date < :end
+            """), {"uid": uid, "start": date(_YEAR, 1, 1), "end": date(_YEAR + 3, 1, 1)})
+    finally:
+        engine.dispose()
+
+
+def run(superuser_url: str, uid: int, count: int, per_set: int) -> Dict[str, object]:
+    """Time the three paths for one user; returns the report."""
+    from fastapi.testclient import TestClient
+
+    from app.core.config import get_settings
+    from main import app
+
+    headers = {"X-Service-Token": get_settings().BOT_SERVICE_TOKEN, "X-Act-As-User": str(uid)}
+    client = TestClient(app)
+    sets = _sessions(_catalog(superuser_url, uid), count)
+    data = _strong_csv(sets)
+    report: Dict[str, object] = {"sets": count, "bytes": len(data)}
+    _cleanup(superuser_url, uid)
+    try:
+        began = time.perf_counter()
+        for day, muscle, exercise, set_no, weight, reps in sets[:per_set]:
+            resp = client.post("/api/v1/training", headers=headers, json={
+                "muscle_name": muscle, "exercise_name": exercise, "set": set_no,
+                "weight": weight, "reps": reps, "date": day.isoformat(),
+            })
+            resp.raise_for_status()
+        elapsed = time.perf_counter() - began
+        report["per_set"] = {"sets": per_set, "s": round(elapsed, 2),
+                             "extrapolated_s": round(elapsed * count / max(per_set, 1), 1)}
+        _cleanup(superuser_url, uid)
+
+        for label in ("import", "reimport"):
+            began = time.perf_counter()
+            resp = client.post("/api/v1/training/import", headers=headers, content=data)
+            resp.raise_for_status()
+            body = resp.json()
+            report[label] = {"s": round(time.perf_counter() - began, 2),
+                             "imported": body["imported"], "duplicates": body["duplicates"],
+                             "unresolved": sum(body["unresolved"].values())}
+    finally:
+        _cleanup(superuser_url, uid)
+    return report
+
+
+def render(report: Dict[str, object]) -> str:
+    """Fixed-width table of a ``run`` report."""
+    per_set = report["per_set"]
+    header = f"{'path':<10}{'seconds':>10}{'imported':>10}{'duplicates':>12}"
+    lines = [f"{report['sets']} sets ({report['bytes'] / 2**10:.0f} KiB of Strong CSV)", "",
+             header, "-" * len(header),
+             f"{'per_set':<10}{per_set['extrapolated_s']:>10.1f}{'':>10}{'':>12}"
+             f"   ({per_set['sets']} sets in {per_set['s']:.2f} s)"]
+    for label in ("import", "reimport"):
+        s = report[label]
+        lines.append(f"{label:<10}{s['s']:>10.2f}{s['imported']:>10}{s['duplicates']:>12}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLI entry point (``python -m bench.training_import``)."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sets", type=int, default=10_000, help="sets in the imported file")
+    parser.add_argument("--per-set", type=int, default=500, help="sets timed through POST /training")
+    parser.add_argument("--user-id", type=int, default=None, help="default: the first bench user")
+    parser.add_argument("--database-url", default=None, help="superuser URL (cleanup)")
+    parser.add_argument("--json", dest="json_out", default=None, help="write the report here")
+    args = parser.parse_args(argv)
+
+    uid = args.user_id or bench_user_ids(1)[0]
+    report = run(_database_url(args.database_url), uid, args.sets, args.per_set)
+    print(render(report))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,23 +9,55 @@ Router layout (GYM-22 + GYM-23):
   /api/v1/...               — users, muscles, training  (bot_router.py)
   /api/v1/muscles/.../exer  — exercises                 (exercises_router.py)
   /api/v1/analytics/...     — analytics                 (analytics_router.py)
+  /api/v1/events            — live change events (SSE)  (events_router.py)
   /api/v1/admin/...         — admin catalog + auth      (router.py)
   /api/v1/user/...          — legacy user training      (user_router.py)
+
+Unversioned operational endpoints:
+  /health                   — liveness probe
+  /metrics                  — Prometheus scrape target (app/core/metrics.py)
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.core.config import get_settings
+from app.core.metrics import render_latest
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import PrometheusMiddleware
 from app.api.v1.router import router as api_v1_router, admin_router
 from app.api.v1 import user_router
 from app.api.v1 import bot_router
 from app.api.v1 import exercises_router
 from app.api.v1 import analytics_router
 from app.api.v1 import training_history_router
+from app.api.v1 import events_router
 
 settings = get_settings()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+# orjson renders response bodies several times faster than the stdlib JSON
+# encoder FastAPI uses by default (bench/serialization.py).
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=ORJSONResponse)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError) -> ORJSONResponse:
+    """FastAPI's 422 body, rendered with orjson.
+
+    Reason: the error echoes the rejected ``input``; the stdlib encoder of the
+    default handler raises on a non-finite one (JSON ``1e400``, ``NaN``) and
+    turns the 422 into a 500, orjson writes it as ``null``.
+    """
+    return ORJSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors())})
+
+
+# gzip / brotli negotiated on Accept-Encoding for bodies of at least
+# RESPONSE_COMPRESSION_MIN_BYTES.  Added first so it is the INNERMOST
+# middleware: CORS headers and the latency histogram see the final response.
+if settings.RESPONSE_COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES)
 
 # CORS — allow_origins sourced from CORS_ALLOW_ORIGINS env var (comma-separated).
 # "*" is intentionally not used here because allow_credentials=True with "*"
@@ -38,6 +70,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms.  Added after CORS so it is the OUTERMOST
+# middleware and the measured time includes CORS handling.
+app.add_middleware(PrometheusMiddleware)
+
 # Bot-facing contract endpoints (GYM-22) — mounted first.
 # training_history_router (GYM-47) is included before bot_router so that
 # GET /training/days and GET /training/day/{date} take precedence over any
@@ -46,6 +82,7 @@ app.include_router(training_history_router.router, prefix=settings.API_V1_STR)
 app.include_router(bot_router.router, prefix=settings.API_V1_STR)
 app.include_router(exercises_router.router, prefix=settings.API_V1_STR)
 app.include_router(analytics_router.router, prefix=settings.API_V1_STR)
+app.include_router(events_router.router, prefix=settings.API_V1_STR)
 
 # Auth and static-data endpoints — paths unchanged from pre-GYM-23.
 app.include_router(api_v1_router, prefix=settings.API_V1_STR)
@@ -66,3 +103,10 @@ app.include_router(
 def health_check():
     """Liveness probe."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus scrape endpoint (internal network only — not proxied)."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
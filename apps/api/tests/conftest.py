@@ -36,6 +36,12 @@ _REPO_ROOT = os.path.abspath(
 _INIT_SQL = os.path.join(_REPO_ROOT, "packages", "db", "init.sql")
 _ALEMBIC_DIR = os.path.join(_REPO_ROOT, "packages", "db")
 
+# Reason: 0013 / 0014 refuse their table rewrite without this opt-in (a
+# production deploy must not take it unattended); the throwaway test
+# databases migrate through them freely.  Every Alembic subprocess below
+# inherits os.environ.
+os.environ.setdefault("MIGRATE_ALLOW_REWRITE", "1")
+
 # Hardcoded test-only credentials — never used outside the throwaway container.
 _TEST_SUPERUSER = "postgres"
 _TEST_SUPERPASSWORD = "testpw"
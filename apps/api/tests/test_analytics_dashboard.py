@@ -0,0 +1,320 @@
+"""Tests for the combined Dashboard read (GET /analytics/dashboard).
+
+Validates:
+  1. ``cache_get_many_raw`` reads every key in ONE pipeline (hits with their
+     TTL, misses as ``None``) and degrades to all-misses on a Redis error;
+     ``cache_set_many`` stores entries and their refresh index in one
+     pipeline.
+  2. Each section equals the body of its single endpoint, with and without
+     ``tz``, and with Redis unreachable.
+  3. Caching: a cold call computes every section on ONE session and stores
+     them (``hit: false``, full TTL); a warm call serves every section from
+     one pipelined read without opening a database transaction; entries are
+     shared with the single endpoints in both directions.
+  4. Validation: inverted / over-long range -> 400, bad tz / recent_limit -> 422.
+
+No Redis server is needed: ``_DashboardRedis`` adds TTL (and pipeline
+counting) to the write-behind tests' ``_RefreshRedis``.
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_refresh import _RecordingPipeline, _RefreshRedis  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core import cache, cache_codec  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+USER_DB_ID = 500380  # dedicated user for dashboard tests
+
+_TZ = "Asia/Tbilisi"
+_TODAY = datetime.utcnow().date()
+_RANGE = {"from": str(_TODAY - timedelta(days=181)), "to": str(_TODAY)}
+_SECTIONS = {
+    "summary": ("/analytics/summary", {}),
+    "activity": ("/analytics/activity", _RANGE),
+    "week_compare": ("/analytics/week-compare", {}),
+    "top_muscles": ("/analytics/top-muscles", None),
+    "recent_exercises": ("/analytics/recent-exercises", {"limit": 3}),
+}
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+class _DashboardRedis(_RefreshRedis):
+    """``_RefreshRedis`` plus ``TTL``; counts executed pipelines."""
+
+    def __init__(self):
+        super().__init__()
+        self.pipelines = 0
+
+    def ttl(self, key):
+        with self._lock:
+            if self._live(key) is None:
+                return -2
+            expires = self._data[key][1]
+        return -1 if expires is None else int(expires - time.monotonic() + 0.999)
+
+    def pipeline(self, transaction=True):
+        outer = self
+
+        class _Counting(_RecordingPipeline):
+            def execute(self):
+                outer.pipelines += 1
+                return super().execute()
+
+        return _Counting(self)
+
+
+@pytest.fixture
+def dashboard_redis(monkeypatch):
+    """Route ``cache`` to one ``_DashboardRedis``."""
+    client = _DashboardRedis()
+    monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: client)
+    monkeypatch.setattr(get_settings(), "CACHE_STALE_WHILE_REVALIDATE", False)
+    return client
+
+
+# ---------------------------------------------------------------------------
+# 1. Batched cache helpers (no DB)
+# ---------------------------------------------------------------------------
+
+class TestBatchedCache:
+    def test_get_many_one_pipeline(self, dashboard_redis):
+        hit = cache.make_key(USER_DB_ID, "summary", tz="UTC")
+        miss = cache.make_key(USER_DB_ID, "top-muscles")
+        dashboard_redis.set(hit, cache_codec.encode({"sets": 3}), ex=60)
+
+        entries = cache.cache_get_many_raw([hit, miss])
+        assert dashboard_redis.pipelines == 1
+        assert entries[hit].body == b'{"sets":3}' and 0 < entries[hit].ttl <= 60
+        assert entries[miss] == cache.RawEntry(None, None)
+
+    def test_get_many_redis_error_is_all_misses(self, monkeypatch):
+        class _Down(_DashboardRedis):
+            def pipeline(self, transaction=True):
+                raise cache.redis_lib.ConnectionError("Connection refused")
+
+        monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: _Down())
+        keys = [cache.make_key(USER_DB_ID, "summary", tz="UTC")]
+        assert cache.cache_get_many_raw(keys) == {keys[0]: cache.RawEntry(None, None)}
+
+    def test_set_many_one_pipeline_with_refresh_index(self, dashboard_redis):
+        a = cache.make_key(USER_DB_ID, "top-muscles")
+        b = cache.make_key(USER_DB_ID, "recent-exercises", limit=3)
+        assert cache.cache_set_many([(a, [], {}), (b, [{"x": 1}], {"limit": 3})])
+        assert dashboard_redis.pipelines == 1
+        assert cache_codec.decode(dashboard_redis.get(b)) == [{"x": 1}]
+        index = dashboard_redis.hgetall(cache.refresh_index_key(USER_DB_ID))
+        assert set(index) == {a, b}
+        assert cache.cache_set_many([]) is True
+
+
+# ---------------------------------------------------------------------------
+# Fixture: TestClient with a short history, counting session transactions
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def dash_client(db_setup):
+    """TestClient with USER_DB_ID's history; yields (client, begins counter)."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    eng_su = create_engine(superuser_url, poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'Dashboard', 'dashboard_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_DB_ID})
+        for m, muscle in enumerate(("muscle_dash_a", "muscle_dash_b")):
+            mid = conn.execute(text("""
+                INSERT INTO muscles (name, is_global, created_by)
+                VALUES (:name, FALSE, :uid) RETURNING id
+            """), {"name": muscle, "uid": USER_DB_ID}).scalar()
+            for e in range(2):
+                eid = conn.execute(text("""
+                    INSERT INTO exercises (name, muscle, is_global, created_by)
+                    VALUES (:name, :mid, FALSE, :uid) RETURNING id
+                """), {"name": f"ex_dash_{m}{e}", "mid": mid, "uid": USER_DB_ID}).scalar()
+                conn.execute(text("""
+                    INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+                    VALUES (:tid, :d, :uid, :mid, :eid, :s, :w, 8)
+                """), [
+                    {"tid": uuid.uuid4().hex, "uid": USER_DB_ID, "mid": mid, "eid": eid,
+                     "d": datetime.utcnow() - timedelta(days=day, hours=m + e),
+                     "s": s, "w": 40 + day % 5 + 2.5 * s}
+                    for day in range(0, 60, 3 + m) for s in (1, 2)
+                ])
+        conn.commit()
+    eng_su.dispose()
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    begins = {"count": 0}
+
+    def _count_begin(session, transaction, connection):
+        begins["count"] += 1
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    event.listen(test_session_local, "after_begin", _count_begin)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    yield TestClient(app, raise_server_exceptions=False), begins
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    eng_clean = create_engine(superuser_url, poolclass=NullPool)
+    with eng_clean.connect() as conn:
+        for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                           ("muscles", "created_by"), ("users", "id")):
+            conn.execute(text(f"DELETE FROM {table} WHERE {col} = :uid"), {"uid": USER_DB_ID})
+        conn.commit()
+    eng_clean.dispose()
+
+
+def _get(client, path, params=None, status=200):
+    resp = client.get(f"/api/v1{path}", params=params, headers=_service_headers(USER_DB_ID))
+    assert resp.status_code == status, resp.text
+    return resp.json()
+
+
+def _dashboard(client, tz=None, status=200):
+    params = {**_RANGE, "recent_limit": 3}
+    if tz:
+        params["tz"] = tz
+    return _get(client, "/analytics/dashboard", params, status)
+
+
+def _single(client, section, tz=None):
+    path, params = _SECTIONS[section]
+    if params is None:
+        return _get(client, path)
+    return _get(client, path, {**params, **({"tz": tz} if tz else {})})
+
+
+# ---------------------------------------------------------------------------
+# 2. Sections equal the single endpoints
+# ---------------------------------------------------------------------------
+
+class TestSections:
+    @pytest.mark.parametrize("tz", [None, _TZ])
+    def test_sections_match_single_endpoints(self, dash_client, tz):
+        client, _ = dash_client
+        body = _dashboard(client, tz)
+        assert set(body) == set(_SECTIONS) | {"cache"}
+        for section in _SECTIONS:
+            assert body[section] == _single(client, section, tz), section
+        assert len(body["recent_exercises"]) == 3
+        assert body["summary"]["sets"] > 0 and body["activity"]
+
+    def test_without_redis_nothing_cached(self, dash_client):
+        client, _ = dash_client
+        meta = _dashboard(client)["cache"]
+        assert meta == {s: {"hit": False, "ttl": None} for s in _SECTIONS}
+
+
+# ---------------------------------------------------------------------------
+# 3. Caching: one pipelined read, one session, shared entries
+# ---------------------------------------------------------------------------
+
+class TestCaching:
+    def test_cold_then_warm(self, dash_client, dashboard_redis):
+        client, begins = dash_client
+        before = begins["count"]
+        cold = _dashboard(client)
+        assert begins["count"] - before == 1  # every section on one session
+        assert dashboard_redis.pipelines == 2  # one read, one store
+        assert cold["cache"] == {s: {"hit": False, "ttl": 90} for s in _SECTIONS}
+
+        before = begins["count"]
+        warm = _dashboard(client)
+        assert begins["count"] == before  # no database work at all
+        assert dashboard_redis.pipelines == 3
+        assert all(m["hit"] and 0 < m["ttl"] <= 90 for m in warm["cache"].values())
+        assert {k: v for k, v in warm.items() if k != "cache"} == \
+            {k: v for k, v in cold.items() if k != "cache"}
+
+    def test_entries_shared_with_single_endpoints(self, dash_client, dashboard_redis):
+        client, _ = dash_client
+        _dashboard(client, _TZ)
+        summary_key = cache.make_key(USER_DB_ID, "summary", tz=_TZ)
+        assert cache_codec.decode(dashboard_redis.get(summary_key)) == _single(client, "summary", _TZ)
+        index = dashboard_redis.hgetall(cache.refresh_index_key(USER_DB_ID))
+        assert summary_key in index  # refreshed by the write-behind worker too
+
+        # The other direction: single-endpoint entries are dashboard hits.
+        dashboard_redis.delete(*[k for k in list(dashboard_redis._data) if k.startswith("analytics:")])
+        _single(client, "top_muscles")
+        _single(client, "recent_exercises")
+        meta = _dashboard(client, _TZ)["cache"]
+        assert meta["top_muscles"]["hit"] and meta["recent_exercises"]["hit"]
+        assert not meta["summary"]["hit"]
+
+    def test_partial_miss_recomputes_only_missing(self, dash_client, dashboard_redis, monkeypatch):
+        from app.api.v1 import analytics_router
+
+        client, _ = dash_client
+        _dashboard(client)
+        dashboard_redis.delete(cache.make_key(USER_DB_ID, "week-compare", tz="UTC"))
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("cached section recomputed")
+
+        for name in ("_compute_summary", "_compute_activity", "_compute_top_muscles",
+                     "_compute_recent_exercises"):
+            monkeypatch.setattr(analytics_router, name, _fail)
+        meta = _dashboard(client)["cache"]
+        assert [s for s, m in meta.items() if not m["hit"]] == ["week_compare"]
+
+
+# ---------------------------------------------------------------------------
+# 4. Validation
+# ---------------------------------------------------------------------------
+
+class TestValidation:
+    @pytest.mark.parametrize("params,status", [
+        ({"from": str(_TODAY), "to": str(_TODAY - timedelta(days=1))}, 400),
+        ({"from": str(_TODAY - timedelta(days=400)), "to": str(_TODAY)}, 400),
+        ({**_RANGE, "tz": "Not/AZone"}, 422),
+        ({**_RANGE, "recent_limit": 0}, 422),
+        ({"to": str(_TODAY)}, 422),
+    ])
+    def test_rejected(self, dash_client, params, status):
+        client, _ = dash_client
+        _get(client, "/analytics/dashboard", params, status)
@@ -0,0 +1,382 @@
+"""Tests for the per-user analytic snapshot (app/services/analytics_snapshot.py).
+
+Validates:
+  1. PR flags on a hand-built history: first set, strict weight PRs, equal
+     weight, reps-at-weight PRs, a first set at a lower weight, per exercise.
+  2. Slices: totals, e1RM / volume per day, Monday weeks, local days near
+     midnight for a timezone and across DST transitions, the ``[start, end)``
+     windows.
+  3. The cache entry round-trips; ``load_snapshot`` serves a hit without the
+     database, reloads on a generation mismatch, and works without Redis.
+  4. Parity with the SQL on a randomized multi-year history (USER_SN_ID =
+     500370): every slice equals the statement it replaces, UTC and tz.
+  5. Endpoint parity: summary, week-compare, exercise-trend and
+     /training/days answer identically with ANALYTICS_ENGINE=sql and
+     ANALYTICS_ENGINE=snapshot.
+"""
+
+import os
+import random
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD, rls_session
+from tests.test_cache_single_flight import _MemoryRedis, _ensure_env_defaults
+
+_ensure_env_defaults()
+
+from app.services import analytics_snapshot  # noqa: E402
+from app.services.analytics_snapshot import AnalyticsSnapshot, load_snapshot  # noqa: E402
+
+USER_SN_ID = 500370
+
+_TZ = "Asia/Tbilisi"
+_NOW = datetime.utcnow().replace(microsecond=0)
+
+# (exercise_id, date, set, weight, reps) -> expected (weight_pr, reps_pr)
+_D = datetime(2026, 3, 2, 10, 0)  # a Monday
+_HISTORY = [
+    ((1, _D, 1, 100, 5), (True, False)),                               # first set
+    ((1, _D, 2, 100, 5), (False, False)),                              # equal
+    ((1, _D + timedelta(days=1), 1, 100, 6), (False, True)),           # more reps at 100
+    ((1, _D + timedelta(days=1), 2, 90, 10), (False, False)),          # first at 90
+    ((1, _D + timedelta(days=2), 1, 90, 11), (False, True)),           # more reps at 90
+    ((1, _D + timedelta(days=2), 2, 102.5, 1), (True, False)),         # heavier
+    ((2, _D + timedelta(days=2), 1, 20, 12), (True, False)),           # other exercise
+    ((2, _D + timedelta(days=9), 1, 20, 12), (False, False)),
+]
+
+
+def _snapshot(rows=None) -> AnalyticsSnapshot:
+    return AnalyticsSnapshot.from_rows(rows if rows is not None else [r for r, _ in _HISTORY])
+
+
+# ---------------------------------------------------------------------------
+# 1-2. Derived series and slices (no DB)
+# ---------------------------------------------------------------------------
+
+class TestDerived:
+    def test_pr_flags(self):
+        # Reversed input: the snapshot sorts by (exercise, date, set) itself.
+        snap = _snapshot([r for r, _ in reversed(_HISTORY)])
+        assert list(zip(snap.weight_pr.tolist(), snap.reps_pr.tolist())) == [e for _, e in _HISTORY]
+        assert snap.is_pr.tolist() == [w or r for _, (w, r) in _HISTORY]
+
+    def test_totals(self):
+        assert _snapshot().totals() == (2, len(_HISTORY), 3)
+        assert AnalyticsSnapshot.from_rows([]).totals() == (0, 0, 0)
+
+    def test_session_volumes_newest_first(self):
+        assert _snapshot().session_volumes(1) == [
+            (date(2026, 3, 4), 90 * 11 + 102.5 * 1),
+            (date(2026, 3, 3), 100 * 6 + 90 * 10),
+        ]
+        assert _snapshot().session_volumes(3, limit=2) == []
+
+    def test_e1rm_trend_windowed(self):
+        trend = _snapshot().e1rm_trend(1, _D + timedelta(days=1))
+        assert [d for d, _ in trend] == [date(2026, 3, 3), date(2026, 3, 4)]
+        assert trend[0][1] == pytest.approx(100 * (1 + 6 / 30))
+        assert trend[1][1] == pytest.approx(max(90 * (1 + 11 / 30), 102.5 * (1 + 1 / 30)))
+
+    def test_weeks_and_window_totals(self):
+        snap = _snapshot()
+        assert snap.active_weeks() == [date(2026, 3, 9), date(2026, 3, 2)]
+        totals = snap.week_totals(_D, _D + timedelta(days=14))
+        assert totals[date(2026, 3, 2)][0] == 7
+        assert totals[date(2026, 3, 9)] == (1, 240.0)
+        assert snap.week_totals(_D + timedelta(days=30), _D + timedelta(days=31)) == {}
+
+    def test_local_days_follow_timezone(self):
+        # Sunday 22:30 UTC is already Monday 02:30 in Tbilisi (+04:00).
+        late = datetime(2026, 3, 8, 22, 30)
+        snap = _snapshot([(1, late, 1, 50, 5)])
+        assert snap.active_weeks() == [date(2026, 3, 2)]
+        assert snap.active_weeks(_TZ) == [date(2026, 3, 9)]
+        window = (late - timedelta(hours=1), late + timedelta(hours=1))
+        assert snap.pr_days(*window) == {date(2026, 3, 8): True}
+        assert snap.pr_days(*window, tz=_TZ) == {date(2026, 3, 9): True}
+
+    @pytest.mark.parametrize("tz", ["Europe/Berlin", "America/New_York", "Australia/Lord_Howe"])
+    def test_local_days_across_dst(self, tz):
+        """Sets around both transitions of two years land on their ZoneInfo day."""
+        from datetime import timezone
+        from zoneinfo import ZoneInfo
+
+        start = datetime(2025, 1, 1)
+        stamps = [start + timedelta(minutes=37 * i) for i in range(0, 2 * 365 * 24 * 60 // 37, 11)]
+        snap = _snapshot([(1, ts, 1, 50, 5) for ts in stamps])
+        expected = [
+            ts.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(tz)).date()
+            for ts in stamps
+        ]
+        assert [date.fromordinal(date(1970, 1, 1).toordinal() + int(d))
+                for d in snap.days(tz)] == expected
+
+
+class TestEncoding:
+    def test_round_trip(self):
+        snap = _snapshot()
+        snap.generation = "17"
+        back = AnalyticsSnapshot.from_bytes(snap.to_bytes())
+        assert back.generation == "17"
+        for name in ("exercise_id", "ts", "set_no", "weight_c", "reps_c"):
+            assert getattr(back, name).tolist() == getattr(snap, name).tolist()
+        assert AnalyticsSnapshot.from_bytes(AnalyticsSnapshot.from_rows([]).to_bytes()).totals() == (0, 0, 0)
+
+    def test_foreign_entry_rejected(self):
+        import zlib
+
+        with pytest.raises(ValueError):
+            AnalyticsSnapshot.from_bytes(zlib.compress(b'{"json": 1}'))
+
+
+class _FakeDb:
+    """Session stand-in returning a fixed history; counts executions."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executions = 0
+
+    def execute(self, clause, params):
+        self.executions += 1
+        outer = self
+
+        class _Result:
+            def fetchall(self):
+                return outer.rows
+
+        return _Result()
+
+
+class TestLoadSnapshot:
+    _ROWS = [(1, 1_772_445_600_000_000, 1, 10000, 500), (1, 1_772_532_000_000_000, 1, 10250, 300)]
+
+    @pytest.fixture
+    def memory_redis(self, monkeypatch):
+        client = _MemoryRedis()
+        monkeypatch.setattr(analytics_snapshot, "_get_client", lambda decode_responses=True: client)
+        return client
+
+    def test_hit_skips_database(self, memory_redis):
+        db = _FakeDb(self._ROWS)
+        assert load_snapshot(db, USER_SN_ID).totals() == (1, 2, 2)
+        assert load_snapshot(db, USER_SN_ID).totals() == (1, 2, 2)
+        assert db.executions == 1
+
+    def test_generation_change_reloads(self, memory_redis):
+        db = _FakeDb(self._ROWS)
+        load_snapshot(db, USER_SN_ID)
+        memory_redis.set(analytics_snapshot._generation_key(USER_SN_ID), b"1")  # a write committed
+        db.rows = self._ROWS[:1]
+        assert load_snapshot(db, USER_SN_ID).totals() == (1, 1, 1)
+        assert load_snapshot(db, USER_SN_ID).generation == "1"
+        assert db.executions == 2
+
+    def test_without_redis(self, monkeypatch):
+        monkeypatch.setattr(analytics_snapshot, "_get_client", lambda decode_responses=True: None)
+        db = _FakeDb(self._ROWS)
+        load_snapshot(db, USER_SN_ID)
+        load_snapshot(db, USER_SN_ID)
+        assert db.executions == 2
+
+
+# ---------------------------------------------------------------------------
+# 4-5. Parity with the SQL (DB)
+# ---------------------------------------------------------------------------
+
+def _history_rows(rng: random.Random, mid: int, exercise_ids):
+    """~3 years of sessions: repeated weights, two exercises per session, local-midnight edges."""
+    rows = []
+    day = _NOW - timedelta(days=3 * 365)
+    while day < _NOW - timedelta(hours=2):
+        # Hours 19-23 UTC cross local midnight in Tbilisi.
+        session = day.replace(hour=rng.choice([6, 12, 19, 20, 21, 23]), minute=rng.randint(0, 59))
+        for eid in rng.sample(exercise_ids, 2):
+            for set_no in range(1, rng.randint(2, 4) + 1):
+                rows.append((session + timedelta(minutes=set_no), set_no, eid,
+                             rng.choice([40, 42.5, 45, 47.5, 50, 52.5]) + rng.choice([0, 0, 0.25]),
+                             float(rng.randint(4, 10))))
+        day += timedelta(days=rng.choice([1, 2, 3, 4]))
+    return [
+        {"tid": uuid.uuid4().hex, "d": d, "uid": USER_SN_ID, "mid": mid, "eid": eid,
+         "s": s, "w": w, "r": r}
+        for d, s, eid, w, r in rows
+    ]
+
+
+@pytest.fixture(scope="module")
+def snapshot_seed(db_setup):
+    """USER_SN_ID with three private exercises and a randomized history."""
+    from sqlalchemy import create_engine, text as sa_text
+    from sqlalchemy.pool import NullPool
+
+    engine = create_engine(db_setup["superuser_url"], poolclass=NullPool)
+    with engine.connect() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'SnapshotUser', 'snapshot_test_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_SN_ID})
+        mid = conn.execute(sa_text("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES ('muscle_sn', FALSE, :uid) RETURNING id
+        """), {"uid": USER_SN_ID}).scalar_one()
+        exercise_ids = [
+            conn.execute(sa_text("""
+                INSERT INTO exercises (name, muscle, is_global, created_by)
+                VALUES (:name, :mid, FALSE, :uid) RETURNING id
+            """), {"name": f"ex_sn{i}", "mid": mid, "uid": USER_SN_ID}).scalar_one()
+            for i in range(3)
+        ]
+        conn.execute(sa_text("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (:tid, :d, :uid, :mid, :eid, :s, :w, :r)
+        """), _history_rows(random.Random(37), mid, exercise_ids))
+        conn.commit()
+
+    yield {"exercise_ids": exercise_ids}
+
+    with engine.connect() as conn:
+        conn.execute(sa_text("DELETE FROM training WHERE user_id = :uid"), {"uid": USER_SN_ID})
+        conn.execute(sa_text("DELETE FROM exercises WHERE created_by = :uid"), {"uid": USER_SN_ID})
+        conn.execute(sa_text("DELETE FROM muscles WHERE created_by = :uid"), {"uid": USER_SN_ID})
+        conn.execute(sa_text("DELETE FROM users WHERE id = :uid"), {"uid": USER_SN_ID})
+        conn.commit()
+    engine.dispose()
+
+
+class TestSqlParity:
+    @pytest.fixture
+    def session(self, snapshot_seed, app_rw_session_factory):
+        with rls_session(app_rw_session_factory, user_id=USER_SN_ID, role="user") as db:
+            yield db
+
+    @pytest.fixture
+    def snap(self, session):
+        return AnalyticsSnapshot.load(session, USER_SN_ID)
+
+    def test_totals(self, session, snap):
+        from app.api.v1 import analytics_router as ar
+
+        agg = session.execute(ar._SUMMARY_AGG_SQL, {"uid": USER_SN_ID}).fetchone()
+        prs = session.execute(ar._SUMMARY_PRS_SQL, {"uid": USER_SN_ID}).scalar()
+        assert snap.totals() == (agg[0], agg[1], prs)
+        assert len(snap) > 500
+
+    @pytest.mark.parametrize("tz", [None, _TZ])
+    def test_active_weeks(self, session, snap, tz):
+        from app.api.v1 import analytics_router as ar
+
+        sql = ar._SUMMARY_WEEKS_UTC_SQL if tz is None else ar._SUMMARY_WEEKS_TZ_SQL
+        rows = session.execute(sql, {"uid": USER_SN_ID, "tz": tz}).fetchall()
+        assert snap.active_weeks(tz) == [r[0] for r in rows]
+
+    @pytest.mark.parametrize("tz", [None, _TZ])
+    def test_week_totals(self, session, snap, tz):
+        from app.api.v1 import analytics_router as ar
+
+        start, end = _NOW - timedelta(days=120), _NOW
+        sql = ar._WEEK_BUCKETS_UTC_SQL if tz is None else ar._WEEK_BUCKETS_TZ_SQL
+        rows = session.execute(sql, {"uid": USER_SN_ID, "range_start": start,
+                                     "range_end": end, "tz": tz}).fetchall()
+        assert snap.week_totals(start, end, tz) == {r[0]: (r[1], r[2] / 100) for r in rows}
+
+    def test_exercise_trend(self, session, snap, snapshot_seed):
+        from app.api.v1 import analytics_router as ar
+
+        window_start = _NOW - timedelta(weeks=52)
+        for eid in snapshot_seed["exercise_ids"]:
+            volumes = ar._fetch_last_two_session_volumes(session, USER_SN_ID, eid)
+            assert snap.session_volumes(eid) == [(v.date, v.volume) for v in volumes]
+            trend = ar._fetch_e1rm_trend(session, USER_SN_ID, eid, window_start)
+            got = snap.e1rm_trend(eid, window_start)
+            assert [d for d, _ in got] == [p.date for p in trend]
+            assert [e for _, e in got] == pytest.approx([p.e1rm for p in trend])
+
+    @pytest.mark.parametrize("tz", [None, _TZ])
+    def test_pr_days(self, session, snap, tz):
+        from app.api.v1 import training_history_router as th
+
+        # The whole history: the early sessions carry most PRs.
+        dt_from, dt_to = _NOW - timedelta(days=4 * 365), _NOW + timedelta(days=1)
+        sql = th._TRAINING_DAYS_UTC_SQL if tz is None else th._TRAINING_DAYS_TZ_SQL
+        rows = session.execute(sql, {"uid": USER_SN_ID, "dt_from": dt_from,
+                                     "dt_to": dt_to, "tz": tz}).fetchall()
+        expected = {r.day: bool(r.has_pr) for r in rows}
+        assert snap.pr_days(dt_from, dt_to, tz) == expected
+        assert any(expected.values()) and not all(expected.values())
+
+
+@pytest.fixture(scope="module")
+def engine_client(snapshot_seed, db_setup):
+    """TestClient on the test DB (Redis unreachable: every call computes)."""
+    from urllib.parse import urlparse
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+    from fastapi.testclient import TestClient
+
+    app_rw_url = db_setup["app_rw_url"]
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+
+    from app.core.config import get_settings
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(factory, "after_begin", _set_rls_gucs)
+    original = db_module.SessionLocal
+    db_module.SessionLocal = factory
+
+    from main import app
+    yield TestClient(app, raise_server_exceptions=False)
+
+    db_module.SessionLocal = original
+    test_engine.dispose()
+
+
+def _rounded(value):
+    """``value`` with every float rounded (e1RM is float math on both sides)."""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rounded(v) for v in value]
+    return value
+
+
+class TestEngineParity:
+    @pytest.mark.parametrize("path,params", [
+        ("/analytics/summary", {}),
+        ("/analytics/summary", {"tz": _TZ}),
+        ("/analytics/week-compare", {"tz": _TZ}),
+        ("/analytics/exercise-trend", {"muscle": "muscle_sn", "exercise": "ex_sn0", "weeks": 52}),
+        ("/training/days", {"from": str((_NOW - timedelta(days=200)).date())}),
+        ("/training/days", {"tz": _TZ}),
+    ])
+    def test_same_response(self, engine_client, monkeypatch, path, params):
+        from app.core.config import get_settings
+
+        headers = {"X-Service-Token": "test_bot_service_token_rls", "X-Act-As-User": str(USER_SN_ID)}
+        bodies = {}
+        for engine in ("sql", "snapshot"):
+            monkeypatch.setattr(get_settings(), "ANALYTICS_ENGINE", engine)
+            resp = engine_client.get(f"/api/v1{path}", params=params, headers=headers)
+            assert resp.status_code == 200, resp.text
+            bodies[engine] = resp.json()
+        assert _rounded(bodies["snapshot"]) == _rounded(bodies["sql"])
@@ -0,0 +1,129 @@
+"""Unit tests for the benchmark harness helpers (apps/api/bench).
+
+Validates:
+  1. ``percentile`` uses nearest-rank and handles empty / single samples.
+  2. ``summarize`` converts to milliseconds and computes throughput.
+  3. ``compare`` flags p95 regressions beyond the budget and new errors, and
+     ignores scenarios missing from the baseline.
+  4. ``generate_user_rows`` is reproducible for a seed, stays inside the
+     requested window, and only references exercises from the catalog.
+  5. ``bench.serialization.run`` reports render times and a gzip size below
+     the JSON size for every payload.
+
+No database is needed — the generator is exercised with an in-memory catalog.
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench.seed import BENCH_USER_BASE, bench_user_ids, generate_user_rows
+from bench.stats import compare, percentile, summarize
+
+_CATALOG = [(100 + i, 1 + i % 4) for i in range(30)]
+_END = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def _report(**p95_by_scenario):
+    return {
+        "duration_s": 10.0,
+        "scenarios": {
+            name: {"count": 10, "errors": 0, "rps": 1.0, "p50_ms": v / 2,
+                   "p95_ms": v, "p99_ms": v, "max_ms": v}
+            for name, v in p95_by_scenario.items()
+        },
+    }
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        samples = list(range(1, 101))
+        assert percentile(samples, 50) == 50
+        assert percentile(samples, 95) == 95
+        assert percentile(samples, 99) == 99
+        assert percentile(samples, 100) == 100
+
+    def test_order_independent(self):
+        assert percentile([5, 1, 4, 2, 3], 50) == 3
+
+    def test_empty_and_single(self):
+        assert percentile([], 99) == 0.0
+        assert percentile([7.5], 99) == 7.5
+
+
+class TestSummarize:
+    def test_milliseconds_and_rps(self):
+        s = summarize([0.001, 0.002, 0.003, 0.004], errors=1, duration_s=2.0)
+        assert s["count"] == 4
+        assert s["errors"] == 1
+        assert s["rps"] == 2.0
+        assert s["p50_ms"] == 2.0
+        assert s["max_ms"] == 4.0
+
+    def test_no_samples(self):
+        s = summarize([], errors=3, duration_s=1.0)
+        assert s["count"] == 0
+        assert s["p99_ms"] == 0.0
+
+
+class TestCompare:
+    def test_within_budget(self):
+        assert compare(_report(summary=10.0), _report(summary=11.9), 0.2) == []
+
+    def test_regression_flagged(self):
+        problems = compare(_report(summary=10.0), _report(summary=12.5), 0.2)
+        assert len(problems) == 1
+        assert problems[0].startswith("summary: p95_ms")
+
+    def test_new_errors_flagged(self):
+        current = _report(search=5.0)
+        current["scenarios"]["search"]["errors"] = 2
+        problems = compare(_report(search=5.0), current, 0.2)
+        assert problems == ["search: 2 errors (baseline had none)"]
+
+    def test_scenario_missing_from_baseline_ignored(self):
+        assert compare(_report(summary=10.0), _report(create_set=99.0), 0.2) == []
+
+
+class TestGenerator:
+    def test_reproducible(self):
+        a = generate_user_rows(random.Random(7), BENCH_USER_BASE, _CATALOG, 0.5, _END)
+        b = generate_user_rows(random.Random(7), BENCH_USER_BASE, _CATALOG, 0.5, _END)
+        assert a == b
+        assert len(a) > 50
+
+    def test_rows_within_window_and_catalog(self):
+        rows = generate_user_rows(random.Random(3), BENCH_USER_BASE, _CATALOG, 1.0, _END)
+        catalog = set(_CATALOG)
+        start = _END - timedelta(days=365)
+        for _tid, when, uid, mid, eid, set_no, weight, reps in rows:
+            assert uid == BENCH_USER_BASE
+            assert (eid, mid) in catalog
+            assert start <= when < _END
+            assert set_no >= 1
+            assert weight > 0 and weight % 2.5 == 0
+            assert 5 <= reps <= 12
+
+    def test_unique_ids(self):
+        rows = generate_user_rows(random.Random(11), BENCH_USER_BASE, _CATALOG, 1.0, _END)
+        ids = [r[0] for r in rows]
+        assert len(ids) == len(set(ids))
+        assert all(len(i) == 32 for i in ids)
+
+    def test_bench_user_range(self):
+        assert bench_user_ids(3) == [BENCH_USER_BASE, BENCH_USER_BASE + 1, BENCH_USER_BASE + 2]
+
+
+class TestSerializationBench:
+    def test_run_reports_sizes_and_times(self):
+        from bench.serialization import render, run
+
+        report = run(years=1, iterations=1)
+        assert set(report) == {"exercise_progress", "training_days", "activity"}
+        for row in report.values():
+            assert 0 < row["gzip_bytes"] < row["json_bytes"]
+            assert row["orjson_ms"] >= 0 and row["stdlib_ms"] >= 0
+        assert render(report).splitlines()[0].startswith("payload")
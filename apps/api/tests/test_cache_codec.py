@@ -0,0 +1,113 @@
+"""Tests for the analytics cache entry encoding (app/core/cache_codec.py).
+
+Validates:
+  1. Entries round-trip; JSON entries are returned by ``to_json`` exactly as
+     stored (the bytes a hit sends).
+  2. Bodies at or above ``CACHE_COMPRESS_MIN_BYTES`` are zlib-compressed and
+     still decode / serve; 0 disables compression.
+  3. Entries written before the header layout (plain ``json.dumps`` text, as
+     ``str`` or ``bytes``) still decode.
+  4. An unavailable serializer falls back to JSON; MessagePack entries are
+     re-encoded as JSON on a hit (skipped when msgpack is not installed).
+  5. ``cache_get_raw`` / ``cache_get_or_compute(raw=True)`` return the JSON
+     body on hits, misses and with Redis down.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.test_cache_single_flight import _MemoryRedis, _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core import cache, cache_codec  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+KEY = "analytics:500340:exercise_progress:exercise=Squat&muscle=Legs"
+
+PROGRESS = {
+    "series": [
+        {"set": s, "points": [
+            {"date": f"2026-{m:02d}-{d:02d}", "weight": 100.0 + d / 2, "reps": 5.0}
+            for m in range(1, 13) for d in range(1, 29, 3)
+        ]}
+        for s in range(1, 5)
+    ]
+}
+
+
+@pytest.fixture
+def codec_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "CACHE_SERIALIZER", "json")
+    monkeypatch.setattr(settings, "CACHE_COMPRESS_MIN_BYTES", 4096)
+    monkeypatch.setattr(settings, "CACHE_STALE_WHILE_REVALIDATE", False)
+    return settings
+
+
+class TestEncoding:
+    def test_small_json_entry_served_as_stored(self, codec_settings):
+        entry = cache_codec.encode({"sets": 7, "name": "Жим"})
+        assert entry[0] == 0x01
+        assert cache_codec.decode(entry) == {"sets": 7, "name": "Жим"}
+        assert cache_codec.to_json(entry) == entry[1:]
+        assert json.loads(cache_codec.to_json(entry)) == {"sets": 7, "name": "Жим"}
+
+    def test_large_entry_compressed(self, codec_settings):
+        plain = cache_codec.dumps_json(PROGRESS)
+        entry = cache_codec.encode(PROGRESS)
+        assert entry[0] == 0x81
+        assert len(entry) < len(plain) / 3
+        assert cache_codec.decode(entry) == PROGRESS
+        assert cache_codec.to_json(entry) == plain
+
+    def test_compression_disabled(self, codec_settings):
+        codec_settings.CACHE_COMPRESS_MIN_BYTES = 0
+        assert cache_codec.encode(PROGRESS)[0] == 0x01
+
+    @pytest.mark.parametrize("legacy", ['{"sets": 3}', b'{"sets": 3}', "[]"])
+    def test_legacy_json_text_decodes(self, legacy):
+        expected = json.loads(legacy)
+        assert cache_codec.decode(legacy) == expected
+        assert json.loads(cache_codec.to_json(legacy)) == expected
+
+    def test_unknown_serializer_falls_back_to_json(self, codec_settings):
+        codec_settings.CACHE_SERIALIZER = "no-such-format"
+        assert cache_codec.encode({"a": 1})[0] == 0x01
+
+    def test_msgpack_entry_served_as_json(self, codec_settings):
+        pytest.importorskip("msgpack")
+        codec_settings.CACHE_SERIALIZER = "msgpack"
+        for value in ({"sets": 2}, PROGRESS):
+            entry = cache_codec.encode(value)
+            assert entry[0] & 0x7F == 0x02
+            assert cache_codec.decode(entry) == value
+            assert json.loads(cache_codec.to_json(entry)) == value
+
+
+class TestRawReads:
+    @pytest.fixture
+    def memory_redis(self, monkeypatch, codec_settings):
+        client = _MemoryRedis()
+        monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: client)
+        return client
+
+    def test_cache_get_raw_returns_body(self, memory_redis):
+        assert cache.cache_get_raw(KEY) is None
+        cache.cache_set(KEY, PROGRESS)
+        assert cache.cache_get_raw(KEY) == cache_codec.dumps_json(PROGRESS)
+        assert cache.cache_get(KEY) == PROGRESS
+
+    def test_get_or_compute_raw_miss_then_hit(self, memory_redis):
+        miss = cache.cache_get_or_compute(KEY, lambda: {"sets": 4}, raw=True)
+        hit = cache.cache_get_or_compute(KEY, lambda: pytest.fail("computed"), raw=True)
+        assert miss == hit == b'{"sets":4}'
+
+    def test_get_or_compute_raw_without_redis(self, monkeypatch, codec_settings):
+        monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: None)
+        assert cache.cache_get_or_compute(KEY, lambda: {"sets": 4}, raw=True) == b'{"sets":4}'
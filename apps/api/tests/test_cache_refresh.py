@@ -0,0 +1,494 @@
+"""Tests for the write-behind analytics cache refresh (app/core/cache_refresh.py).
+
+Validates:
+  1. ``is_affected``: exercise-scoped entries only for the written exercise,
+     activity ranges only around the written day, week-compare only for
+     recent writes, everything else always.
+  2. ``refresh_after_write`` deletes exactly the affected (and unindexed)
+     keys, keeps the rest, queues one job per burst of writes, and falls
+     back to the full purge with ``CACHE_WRITE_BEHIND`` off.
+  3. ``refresh_user`` stores recomputed values, and stores nothing when a
+     newer write bumped the generation meanwhile.
+  4. End to end against Postgres: after ``POST /training`` the worker
+     repopulates the written exercise's log-context and the summary with the
+     same values the endpoints return, while another exercise's log-context
+     and an unrelated activity range survive the write untouched.
+
+No Redis server is needed: ``_RefreshRedis`` extends the single-flight tests'
+``_MemoryRedis`` with the hash / set / list commands the refresh path sends.
+"""
+
+import fnmatch
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_single_flight import _MemoryRedis, _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core import cache, cache_codec, cache_refresh, jobs  # noqa: E402
+from app.core.cache_refresh import TrainingWrite, is_affected  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+USER_WB_ID = 500320  # dedicated user for write-behind tests
+TODAY = datetime.utcnow().date()
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+class _RefreshRedis(_MemoryRedis):
+    """``_MemoryRedis`` plus SCAN / hashes / sets / lists / sorted sets and the
+    refresh store / job promote scripts."""
+
+    def _put(self, key, value):
+        expires = self._data.get(key, (None, None))[1]
+        self._data[key] = (value, expires)
+
+    def scan(self, cursor, match="*", count=100):
+        with self._lock:
+            keys = [k for k in list(self._data) if self._live(k) is not None]
+        return 0, [k for k in keys if fnmatch.fnmatchcase(k, match)]
+
+    def keys(self, pattern="*"):
+        return self.scan(0, match=pattern)[1]
+
+    def expire(self, key, seconds):
+        with self._lock:
+            value = self._live(key)
+            if value is None:
+                return False
+            self._data[key] = (value, time.monotonic() + seconds)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._put(key, str(value))
+            return value
+
+    def hset(self, key, field, value):
+        with self._lock:
+            h = dict(self._live(key) or {})
+            h[field] = value
+            self._put(key, h)
+            return 1
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._live(key) or {})
+
+    def hmget(self, key, fields):
+        h = self.hgetall(key)
+        return [h.get(f) for f in fields]
+
+    def sadd(self, key, *members):
+        with self._lock:
+            s = set(self._live(key) or ())
+            s.update(members)
+            self._put(key, s)
+            return len(members)
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._live(key) or ())
+
+    def lpush(self, key, *values):
+        with self._lock:
+            items = list(self._live(key) or [])
+            items[:0] = reversed(values)
+            self._put(key, items)
+            return len(items)
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            items = list(self._live(key) or [])
+            self._put(key, items[start:end + 1])
+            return True
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = list(self._live(key) or [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def brpop(self, keys, timeout=0):
+        with self._lock:
+            for key in [keys] if isinstance(keys, str) else keys:
+                items = list(self._live(key) or [])
+                if items:
+                    value = items.pop()
+                    self._put(key, items)
+                    return key, value
+            return None
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            z = dict(self._live(key) or {})
+            z.update(mapping)
+            self._put(key, z)
+            return len(mapping)
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._live(key) or {})
+
+    def eval(self, script, numkeys, *args):
+        if script == jobs._PROMOTE_DUE_LUA:
+            delayed, queue, now, limit = args
+            with self._lock:
+                z = dict(self._live(delayed) or {})
+            due = sorted((p for p, score in z.items() if score <= float(now)),
+                         key=z.get)[:int(limit)]
+            for payload in due:
+                del z[payload]
+                self.lpush(queue, payload)
+            with self._lock:
+                self._put(delayed, z)
+            return len(due)
+        if script != cache_refresh._STORE_IF_CURRENT_LUA:
+            return super().eval(script, numkeys, *args)
+        entry, gen_key, index, seen, payload, ttl, spec, index_ttl = args
+        if (self.get(gen_key) or "") != seen:
+            return 0
+        self.set(entry, payload, ex=int(ttl))
+        self.hset(index, entry, spec)
+        self.expire(index, int(index_ttl))
+        return 1
+
+    def pipeline(self, transaction=True):
+        return _RecordingPipeline(self)
+
+
+class _RecordingPipeline:
+    """Replays queued commands on ``execute`` (no real atomicity needed)."""
+
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self._ops.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self):
+        return [getattr(self._client, n)(*a, **kw) for n, a, kw in self._ops]
+
+
+@pytest.fixture
+def refresh_redis(monkeypatch):
+    """Route ``cache``, ``cache_refresh`` and ``jobs`` to one ``_RefreshRedis``."""
+    client = _RefreshRedis()
+    monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: client)
+    monkeypatch.setattr(cache_refresh, "_get_client", lambda: client)
+    monkeypatch.setattr(jobs, "_get_client", lambda: client)
+    monkeypatch.setattr(get_settings(), "CACHE_STALE_WHILE_REVALIDATE", False)
+    monkeypatch.setattr(get_settings(), "CACHE_WRITE_BEHIND", True)
+    return client
+
+
+@pytest.fixture
+def fake_refreshers(monkeypatch):
+    """Stub refreshers (no DB) for the endpoints the unit tests cache.
+
+    The real ones register when ``app.api.v1.analytics_router`` is imported;
+    importing it here would build the global engine before any fixture has
+    pointed the DB env at the test database.
+    """
+    calls = []
+
+    def refresher(db, uid, params):
+        calls.append(params)
+        return {"fresh": True}
+
+    monkeypatch.setattr(
+        cache_refresh,
+        "_REFRESHERS",
+        {name: refresher for name in ("summary", "log-context", "activity")},
+    )
+
+    class _Session:
+        def rollback(self):
+            pass
+
+    class _NoSession:
+        def __enter__(self):
+            return _Session()
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(cache_refresh, "_user_session", lambda uid: _NoSession())
+    return calls
+
+
+def _queued_refreshes(client):
+    """User ids of the ``cache.refresh`` jobs waiting on the default queue."""
+    payloads = client.lrange(jobs._queue_key(jobs.DEFAULT_QUEUE), 0, -1)
+    return [json.loads(p)["kwargs"]["user_id"] for p in payloads
+            if json.loads(p)["name"] == cache_refresh.REFRESH_JOB]
+
+
+def _cached(key, params, value=None):
+    cache.cache_set(key, value if value is not None else {"v": key}, refresh=params)
+
+
+# ---------------------------------------------------------------------------
+# 1. Classification
+# ---------------------------------------------------------------------------
+
+class TestIsAffected:
+    WRITES = [TrainingWrite(exercise_id=7, day=date(2026, 6, 10))]
+    TODAY = date(2026, 6, 12)
+
+    def test_exercise_scoped_only_for_written_exercise(self):
+        for endpoint in cache_refresh.EXERCISE_SCOPED:
+            assert is_affected(endpoint, {"exercise_id": 7}, self.WRITES, self.TODAY)
+            assert not is_affected(endpoint, {"exercise_id": 8}, self.WRITES, self.TODAY)
+            assert is_affected(endpoint, {"exercise_id": None}, self.WRITES, self.TODAY)
+
+    def test_activity_range_with_one_day_slack(self):
+        assert is_affected("activity", {"frm": "2026-06-01", "to": "2026-06-30"}, self.WRITES, self.TODAY)
+        assert is_affected("activity", {"frm": "2026-06-11", "to": "2026-06-20"}, self.WRITES, self.TODAY)
+        assert not is_affected("activity", {"frm": "2026-06-12", "to": "2026-06-20"}, self.WRITES, self.TODAY)
+        assert not is_affected("activity", {"frm": "2025-01-01", "to": "2025-12-31"}, self.WRITES, self.TODAY)
+
+    def test_week_compare_only_for_recent_writes(self):
+        old = [TrainingWrite(exercise_id=7, day=date(2026, 5, 1))]
+        assert is_affected("week-compare", {"tz": None}, self.WRITES, self.TODAY)
+        assert not is_affected("week-compare", {"tz": None}, old, self.TODAY)
+
+    def test_user_wide_entries_always(self):
+        old = [TrainingWrite(exercise_id=7, day=date(2020, 1, 1))]
+        for endpoint in ("summary", "recent-exercises", "top-muscles"):
+            assert is_affected(endpoint, {}, old, self.TODAY)
+
+
+# ---------------------------------------------------------------------------
+# 2./3. Write path and worker against the in-memory Redis
+# ---------------------------------------------------------------------------
+
+UID = 500321
+K_SUMMARY = cache.make_key(UID, "summary", tz="UTC")
+K_LOG_7 = cache.make_key(UID, "log-context", muscle="m", exercise="e7", date="2026-06-10")
+K_LOG_8 = cache.make_key(UID, "log-context", muscle="m", exercise="e8", date="2026-06-10")
+K_OLD_ACTIVITY = cache.make_key(UID, "activity", frm="2025-01-01", to="2025-12-31", tz="UTC")
+K_UNINDEXED = cache.make_key(UID, "recent-exercises", limit=8)
+
+
+def _seed_entries():
+    _cached(K_SUMMARY, {"tz": None})
+    _cached(K_LOG_7, {"muscle": "m", "exercise": "e7", "date": "2026-06-10", "exercise_id": 7})
+    _cached(K_LOG_8, {"muscle": "m", "exercise": "e8", "date": "2026-06-10", "exercise_id": 8})
+    _cached(K_OLD_ACTIVITY, {"frm": "2025-01-01", "to": "2025-12-31", "tz": None})
+    cache.cache_set(K_UNINDEXED, ["no refresh params"])
+
+
+@pytest.mark.usefixtures("fake_refreshers")
+class TestRefreshAfterWrite:
+    WRITES = [TrainingWrite(exercise_id=7, day=date(2026, 6, 10))]
+
+    def test_drops_affected_keeps_unaffected(self, refresh_redis):
+        _seed_entries()
+        cache_refresh.refresh_after_write(UID, self.WRITES)
+
+        assert refresh_redis.get(K_SUMMARY) is None
+        assert refresh_redis.get(K_LOG_7) is None
+        assert refresh_redis.get(K_UNINDEXED) is None
+        assert refresh_redis.get(K_LOG_8) is not None
+        assert refresh_redis.get(K_OLD_ACTIVITY) is not None
+        assert refresh_redis.smembers(cache_refresh._pending_key(UID)) == {K_SUMMARY, K_LOG_7}
+
+    def test_burst_of_writes_queues_one_job(self, refresh_redis):
+        for _ in range(5):
+            _seed_entries()
+            cache_refresh.refresh_after_write(UID, self.WRITES)
+        assert _queued_refreshes(refresh_redis) == [UID]
+        assert refresh_redis.get(cache_refresh._generation_key(UID)) == "5"
+
+    def test_nothing_cached_queues_nothing(self, refresh_redis):
+        cache_refresh.refresh_after_write(UID, self.WRITES)
+        assert _queued_refreshes(refresh_redis) == []
+
+    def test_disabled_purges_everything(self, refresh_redis, monkeypatch):
+        monkeypatch.setattr(get_settings(), "CACHE_WRITE_BEHIND", False)
+        _seed_entries()
+        cache_refresh.refresh_after_write(UID, self.WRITES)
+        assert refresh_redis.keys(f"analytics:{UID}:*") == []
+        assert _queued_refreshes(refresh_redis) == []
+
+    def test_redis_error_never_raises(self, monkeypatch):
+        from tests.test_cache_single_flight import _BrokenRedis
+
+        class _BrokenScan(_BrokenRedis):
+            def scan(self, *args, **kwargs):
+                raise cache.redis_lib.ConnectionError("Connection refused")
+
+        monkeypatch.setattr(cache_refresh, "_get_client", lambda: _BrokenScan())
+        monkeypatch.setattr(get_settings(), "CACHE_WRITE_BEHIND", True)
+        cache_refresh.refresh_after_write(UID, self.WRITES)
+
+
+class TestRefreshUser:
+    WRITES = [TrainingWrite(exercise_id=7, day=date(2026, 6, 10))]
+
+    def test_recomputes_pending_entries(self, refresh_redis, fake_refreshers):
+        _seed_entries()
+        cache_refresh.refresh_after_write(UID, self.WRITES)
+        assert cache_refresh.refresh_user(refresh_redis, UID) == 2
+        assert cache_codec.decode(refresh_redis.get(K_SUMMARY)) == {"fresh": True}
+        assert cache_codec.decode(refresh_redis.get(K_LOG_7)) == {"fresh": True}
+        assert refresh_redis.smembers(cache_refresh._pending_key(UID)) == set()
+
+    def test_newer_write_supersedes_refresh(self, refresh_redis, fake_refreshers, monkeypatch):
+        _seed_entries()
+        cache_refresh.refresh_after_write(UID, self.WRITES)
+        original = cache_refresh._REFRESHERS["summary"]
+
+        def racing(db, uid, params):
+            refresh_redis.incr(cache_refresh._generation_key(UID))  # a write commits
+            return original(db, uid, params)
+
+        monkeypatch.setitem(cache_refresh._REFRESHERS, "summary", racing)
+        monkeypatch.setitem(cache_refresh._REFRESHERS, "log-context", racing)
+        assert cache_refresh.refresh_user(refresh_redis, UID) == 0
+        assert refresh_redis.get(K_SUMMARY) is None
+        assert refresh_redis.get(K_LOG_7) is None
+
+
+# ---------------------------------------------------------------------------
+# 4. End to end: POST /training → worker → warm, correct entries
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def wb_client(db_setup):
+    """TestClient with USER_WB_ID owning two exercises under one muscle."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    eng_su = create_engine(superuser_url, poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'WriteBehind', 'write_behind_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_WB_ID})
+        mid = conn.execute(text("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES ('muscle_wb', FALSE, :uid) RETURNING id
+        """), {"uid": USER_WB_ID}).scalar()
+        ex_ids = {}
+        for name in ("ex_wb1", "ex_wb2"):
+            ex_ids[name] = conn.execute(text("""
+                INSERT INTO exercises (name, muscle, is_global, created_by)
+                VALUES (:name, :mid, FALSE, :uid) RETURNING id
+            """), {"name": name, "mid": mid, "uid": USER_WB_ID}).scalar()
+            conn.execute(text("""
+                INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+                VALUES (:tid, :d, :uid, :mid, :eid, 1, 60, 10)
+            """), {
+                "tid": uuid.uuid4().hex, "d": datetime.utcnow() - timedelta(days=3),
+                "uid": USER_WB_ID, "mid": mid, "eid": ex_ids[name],
+            })
+        conn.commit()
+    eng_su.dispose()
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    yield TestClient(app, raise_server_exceptions=False), ex_ids
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    eng_clean = create_engine(superuser_url, poolclass=NullPool)
+    with eng_clean.connect() as conn:
+        for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                           ("muscles", "created_by"), ("users", "id")):
+            conn.execute(text(f"DELETE FROM {table} WHERE {col} = :uid"), {"uid": USER_WB_ID})
+        conn.commit()
+    eng_clean.dispose()
+
+
+class TestWriteBehindEndToEnd:
+    def test_post_training_refreshes_affected_entries(self, wb_client, refresh_redis):
+        client, ex_ids = wb_client
+        headers = _service_headers(USER_WB_ID)
+        log_params = {"muscle": "muscle_wb", "date": str(TODAY)}
+        old_range = {"from": "2024-01-01", "to": "2024-12-31"}
+
+        def get(path, params=None):
+            resp = client.get(f"/api/v1{path}", params=params, headers=headers)
+            assert resp.status_code == 200, resp.text
+            return resp.json()
+
+        before_ex1 = get("/analytics/log-context", {**log_params, "exercise": "ex_wb1"})
+        before_ex2 = get("/analytics/log-context", {**log_params, "exercise": "ex_wb2"})
+        before_summary = get("/analytics/summary")
+        get("/analytics/activity", old_range)
+        assert before_ex1["completed_sets"] == []
+
+        resp = client.post("/api/v1/training", headers=headers, json={
+            "muscle_name": "muscle_wb", "exercise_name": "ex_wb1",
+            "set": 1, "weight": 62.5, "reps": 8,
+        })
+        assert resp.status_code == 201, resp.text
+
+        key_ex1 = cache.make_key(USER_WB_ID, "log-context", muscle="muscle_wb",
+                                 exercise="ex_wb1", date=str(TODAY))
+        key_ex2 = cache.make_key(USER_WB_ID, "log-context", muscle="muscle_wb",
+                                 exercise="ex_wb2", date=str(TODAY))
+        key_summary = cache.make_key(USER_WB_ID, "summary", tz="UTC")
+        key_activity = cache.make_key(USER_WB_ID, "activity", frm="2024-01-01",
+                                      to="2024-12-31", tz="UTC")
+        assert refresh_redis.get(key_ex1) is None
+        assert refresh_redis.get(key_summary) is None
+        assert refresh_redis.get(key_ex2) is not None
+        assert refresh_redis.get(key_activity) is not None
+
+        assert jobs.run_worker(block_timeout=1, burst=True) == 1
+        assert cache_codec.decode(refresh_redis.get(key_ex1))["completed_sets"] == [1]
+        assert cache_codec.decode(refresh_redis.get(key_summary))["sets"] == before_summary["sets"] + 1
+
+        # Served from the warm entries == computed cold by the endpoints.
+        warm_ex1 = get("/analytics/log-context", {**log_params, "exercise": "ex_wb1"})
+        warm_summary = get("/analytics/summary")
+        refresh_redis.delete(key_ex1, key_summary)
+        assert get("/analytics/log-context", {**log_params, "exercise": "ex_wb1"}) == warm_ex1
+        assert get("/analytics/summary") == warm_summary
+        assert get("/analytics/log-context", {**log_params, "exercise": "ex_wb2"}) == before_ex2
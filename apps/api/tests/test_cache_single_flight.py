@@ -0,0 +1,255 @@
+"""Tests for single-flight / stale-while-revalidate cache misses (app/core/cache.py).
+
+Validates:
+  1. Concurrent misses on one key run ``compute`` exactly once; the other
+     callers get the leader's value.
+  2. A follower whose leader outlives the wait budget serves the stale copy
+     when one exists, otherwise computes on its own.
+  3. Stale-while-revalidate: a miss with a stale copy returns it at once and
+     schedules a background refresh that repopulates the key.  With the mode
+     off no stale copy is written or served.
+  4. ``compute`` errors release the lease and propagate; Redis errors degrade
+     to a plain ``compute()``.
+  5. A slow leader never releases a lease that expired and was re-taken.
+
+No Redis server is needed: ``_get_client`` is pointed at ``_MemoryRedis``,
+which implements exactly the commands the helper sends (GET/MGET/SET NX PX/
+pipelined SET/EVAL of the compare-and-delete script/DELETE).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _ensure_env_defaults() -> None:
+    """Set env vars required by Settings before importing the app."""
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASSWORD", "testpw")
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("DB_NAME", "gymtest")
+    os.environ.setdefault("APP_DB_PASSWORD", "app_rw_test_pw")
+    os.environ.setdefault("JWT_SECRET", "test_jwt_secret_for_rls_tests_only")
+    os.environ.setdefault("ADMIN_USER", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "adminpw")
+    os.environ.setdefault("BOT_SERVICE_TOKEN", "test_bot_service_token_rls")
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6399/1")
+
+
+_ensure_env_defaults()
+
+from app.core import cache, cache_codec  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+KEY = "analytics:500310:summary:tz=UTC"
+
+
+class _MemoryRedis:
+    """Thread-safe in-memory stand-in for the commands ``cache`` uses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}  # key -> (value, expires_at or None)
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and time.monotonic() >= expires:
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def mget(self, *keys):
+        with self._lock:
+            return [self._live(k) for k in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            ttl = ex if ex is not None else (px / 1000.0 if px is not None else None)
+            self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for k in keys if self._data.pop(k, None) is not None)
+
+    def eval(self, script, numkeys, key, token):
+        assert script == cache._RELEASE_LEASE_LUA
+        with self._lock:
+            if self._live(key) == token:
+                del self._data[key]
+                return 1
+            return 0
+
+    def pipeline(self, transaction=True):
+        return _MemoryPipeline(self)
+
+    def close(self):
+        pass
+
+
+class _MemoryPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, *args, **kwargs):
+        self._ops.append((args, kwargs))
+
+    def execute(self):
+        return [self._client.set(*a, **kw) for a, kw in self._ops]
+
+
+class _BrokenRedis(_MemoryRedis):
+    """Every command fails the way an unreachable server does."""
+
+    def get(self, key):
+        raise cache.redis_lib.ConnectionError("Connection refused")
+
+    mget = get
+
+
+@pytest.fixture
+def memory_redis(monkeypatch):
+    """Route ``cache`` to one shared ``_MemoryRedis`` with a short wait budget."""
+    client = _MemoryRedis()
+    monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: client)
+    monkeypatch.setattr(cache, "_LEASE_WAIT_S", 0.5)
+    monkeypatch.setattr(cache, "_LEASE_POLL_S", 0.01)
+    monkeypatch.setattr(get_settings(), "CACHE_STALE_WHILE_REVALIDATE", False)
+    return client
+
+
+def _value(client, key):
+    """Decoded entry stored under ``key`` (``None`` when absent)."""
+    entry = client.get(key)
+    return None if entry is None else cache_codec.decode(entry)
+
+
+def _swr_on(monkeypatch):
+    monkeypatch.setattr(get_settings(), "CACHE_STALE_WHILE_REVALIDATE", True)
+
+
+def _run_concurrently(n, fn):
+    """Call ``fn`` from ``n`` threads released together; return the results."""
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def _worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestSingleFlight:
+    """Only the lease holder recomputes a missed key."""
+
+    def test_concurrent_misses_compute_once(self, memory_redis):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.15)
+            return {"sets": 42}
+
+        results = _run_concurrently(8, lambda: cache.cache_get_or_compute(KEY, compute))
+        assert len(calls) == 1
+        assert results == [{"sets": 42}] * 8
+        assert memory_redis.get(cache._lease_key(KEY)) is None
+
+    def test_hit_skips_compute(self, memory_redis):
+        memory_redis.set(KEY, '{"sets": 7}', ex=90)
+        assert cache.cache_get_or_compute(KEY, lambda: pytest.fail("computed")) == {"sets": 7}
+
+    def test_follower_computes_after_wait_budget(self, memory_redis):
+        memory_redis.set(cache._lease_key(KEY), "someone-else", px=60_000)
+        started = time.monotonic()
+        assert cache.cache_get_or_compute(KEY, lambda: {"sets": 1}) == {"sets": 1}
+        assert time.monotonic() - started >= 0.5
+
+    def test_follower_serves_stale_after_wait_budget(self, memory_redis, monkeypatch):
+        _swr_on(monkeypatch)
+        memory_redis.set(cache._lease_key(KEY), "someone-else", px=60_000)
+        memory_redis.set(cache._stale_key(KEY), '{"sets": 3}', ex=3600)
+        value = cache.cache_get_or_compute(KEY, lambda: pytest.fail("computed"))
+        assert value == {"sets": 3}
+
+    def test_compute_error_releases_lease(self, memory_redis):
+        def boom():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            cache.cache_get_or_compute(KEY, boom)
+        assert memory_redis.get(cache._lease_key(KEY)) is None
+
+    def test_expired_lease_not_released_by_slow_leader(self, memory_redis, monkeypatch):
+        monkeypatch.setattr(cache, "_LEASE_TTL_MS", 50)
+
+        def slow():
+            time.sleep(0.1)  # lease expires meanwhile; another worker takes it
+            memory_redis.set(cache._lease_key(KEY), "next-leader", px=60_000)
+            return {"sets": 1}
+
+        cache.cache_get_or_compute(KEY, slow)
+        assert memory_redis.get(cache._lease_key(KEY)) == "next-leader"
+
+    def test_redis_error_degrades_to_compute(self, monkeypatch):
+        monkeypatch.setattr(cache, "_get_client", lambda decode_responses=True: _BrokenRedis())
+        assert cache.cache_get_or_compute(KEY, lambda: {"sets": 5}) == {"sets": 5}
+
+
+class TestStaleWhileRevalidate:
+    """Optional mode: serve the stale copy, refresh in the background."""
+
+    def test_stale_served_and_refresh_scheduled(self, memory_redis, monkeypatch):
+        _swr_on(monkeypatch)
+        memory_redis.set(cache._stale_key(KEY), '{"sets": 3}', ex=3600)
+        scheduled = []
+
+        value = cache.cache_get_or_compute(
+            KEY,
+            lambda: {"sets": 4},
+            revalidate=lambda fn, *args: scheduled.append((fn, args)),
+        )
+        assert value == {"sets": 3}
+        assert len(scheduled) == 1
+        fn, args = scheduled[0]
+        fn(*args)
+        assert _value(memory_redis, KEY) == {"sets": 4}
+        assert _value(memory_redis, cache._stale_key(KEY)) == {"sets": 4}
+
+    def test_stale_copy_survives_invalidation(self, memory_redis, monkeypatch):
+        _swr_on(monkeypatch)
+        cache.cache_get_or_compute(KEY, lambda: {"sets": 1}, revalidate=lambda *a: None)
+        memory_redis.delete(KEY)  # what invalidate_user's analytics:{uid}:* SCAN removes
+        assert _value(memory_redis, cache._stale_key(KEY)) == {"sets": 1}
+
+    def test_mode_off_writes_and_serves_no_stale(self, memory_redis):
+        memory_redis.set(cache._stale_key("analytics:1:summary:x"), '{"sets": 0}', ex=3600)
+        value = cache.cache_get_or_compute(
+            "analytics:1:summary:x", lambda: {"sets": 9}, revalidate=lambda *a: pytest.fail("scheduled")
+        )
+        assert value == {"sets": 9}
+        cache.cache_get_or_compute(KEY, lambda: {"sets": 2})
+        assert memory_redis.get(cache._stale_key(KEY)) is None
@@ -0,0 +1,115 @@
+"""Tests for the response compression middleware (app/middleware/compression.py).
+
+Validates:
+  1. ``negotiate_encoding`` honours q-values, ``*`` and ``identity``, and
+     prefers brotli on a tie only when the ``brotli`` package is installed.
+  2. Large JSON bodies are compressed with ``Content-Encoding``, ``Vary`` and
+     an exact ``Content-Length``; small, non-textual and already-encoded
+     bodies pass through untouched.
+  3. Streamed bodies are compressed incrementally without a
+     ``Content-Length`` and decode to the full stream.
+
+No database is needed: the middleware wraps a throwaway FastAPI app.
+"""
+
+import gzip
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.middleware import compression  # noqa: E402
+from app.middleware.compression import CompressionMiddleware, negotiate_encoding  # noqa: E402
+
+_ROWS = [{"date": f"2026-01-{d % 28 + 1:02d}", "sets_count": d} for d in range(400)]
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return _ROWS
+
+    @app.get("/small")
+    def small():
+        return {"status": "ok"}
+
+    @app.get("/binary")
+    def binary():
+        return Response(content=b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/encoded")
+    def encoded():
+        body = gzip.compress(b"x" * 5000)
+        return Response(content=body, media_type="text/plain",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    def stream():
+        lines = (f'{{"n":{n}}}\n'.encode() for n in range(2000))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+class TestNegotiation:
+    @pytest.mark.parametrize("header,expected", [
+        ("gzip", "gzip"),
+        ("gzip, deflate", "gzip"),
+        ("deflate", None),
+        ("identity", None),
+        ("", None),
+        ("gzip;q=0", None),
+        ("*;q=0", None),
+        ("GZIP;Q=0.5", "gzip"),
+        ("gzip;q=bogus", None),
+    ])
+    def test_gzip_choices(self, header, expected):
+        assert negotiate_encoding(header) == expected
+
+    def test_brotli_only_when_installed(self):
+        expected = "br" if "br" in compression._ENCODERS else "gzip"
+        assert negotiate_encoding("gzip, deflate, br") == expected
+        assert negotiate_encoding("*") == expected
+        assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+
+
+class TestMiddleware:
+    def test_large_json_gzipped(self, client):
+        resp = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in resp.headers["vary"]
+        assert resp.json() == _ROWS
+        assert int(resp.headers["content-length"]) < len(resp.content) / 4
+
+    def test_identity_client_gets_plain_body(self, client):
+        resp = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in resp.headers
+        assert int(resp.headers["content-length"]) == len(resp.content)
+
+    @pytest.mark.parametrize("path", ["/small", "/binary"])
+    def test_small_and_binary_pass_through(self, client, path):
+        resp = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in resp.headers
+        assert int(resp.headers["content-length"]) == len(resp.content)
+
+    def test_already_encoded_untouched(self, client):
+        resp = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.content == b"x" * 5000  # decoded once by the client
+
+    def test_stream_compressed_incrementally(self, client):
+        resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "content-length" not in resp.headers
+        lines = resp.text.splitlines()
+        assert len(lines) == 2000 and lines[-1] == '{"n":1999}'
@@ -0,0 +1,242 @@
+"""Tests for the live change events (app/core/events.py, GET /events).
+
+Validates:
+  1. ``training_event`` lists the distinct (exercise, day) pairs, sorted.
+  2. ``publish_training_change`` publishes on the user's channel and never
+     raises when Redis fails; ``refresh_after_write`` publishes after the
+     purge on every path: write-behind on or off, and with no Redis client
+     for the purge.
+  3. ``relay`` sends the retry hint, one ``event:`` frame per message and a
+     ``: ping`` per quiet heartbeat, and closes the subscription at the end.
+  4. ``GET /events`` streams the caller's channel as ``text/event-stream``
+     (uncompressed) and answers 503 when Redis is unreachable.
+
+No Redis server is needed: the publisher is the cache refresh tests'
+``_RefreshRedis`` with a PUBLISH recorder, the subscriber a fake async
+pub/sub.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+import pytest
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.test_cache_refresh import _RefreshRedis  # noqa: E402
+from tests.test_cache_single_flight import _BrokenRedis, _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core import cache_refresh, events  # noqa: E402
+from app.core.cache_refresh import TrainingWrite  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+USER_ID = 500500
+
+WRITES = [
+    TrainingWrite(exercise_id=8, day=date(2026, 6, 11)),
+    TrainingWrite(exercise_id=7, day=date(2026, 6, 10)),
+    TrainingWrite(exercise_id=8, day=date(2026, 6, 11)),
+]
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _published(outcome):
+    value = REGISTRY.get_sample_value(
+        "gym_api_events_published_total", {"type": "training", "outcome": outcome}
+    )
+    return value or 0.0
+
+
+class _PublishRedis(_RefreshRedis):
+    """``_RefreshRedis`` recording PUBLISH."""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+
+class _FakePubSub:
+    """Async pub/sub handing out queued messages, then silence."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+
+    async def get_message(self, timeout=0.0):
+        if self.messages:
+            return self.messages.pop(0)
+        await asyncio.sleep(min(timeout, 0.01))
+        return None
+
+    async def aclose(self):
+        self.closed = True
+
+
+class _FakeAsyncRedis:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+        self.closed = False
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self._pubsub
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _message(payload):
+    return {"type": "message", "channel": events.channel(USER_ID), "data": payload}
+
+
+@pytest.fixture
+def publish_redis(monkeypatch):
+    client = _PublishRedis()
+    monkeypatch.setattr(events, "_get_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def short_streams(monkeypatch):
+    monkeypatch.setattr(get_settings(), "EVENTS_STREAM_SECONDS", 0.2)
+    monkeypatch.setattr(get_settings(), "EVENTS_HEARTBEAT_SECONDS", 0.05)
+
+
+# ---------------------------------------------------------------------------
+# 1-2. Publishing
+# ---------------------------------------------------------------------------
+
+class TestPublish:
+    def test_payload_is_distinct_sorted_pairs(self):
+        assert json.loads(events.training_event(WRITES)) == {
+            "type": "training",
+            "changes": [
+                {"exercise_id": 7, "day": "2026-06-10"},
+                {"exercise_id": 8, "day": "2026-06-11"},
+            ],
+        }
+
+    def test_publishes_on_user_channel(self, publish_redis):
+        before = _published("published")
+        events.publish_training_change(USER_ID, WRITES)
+        assert publish_redis.published == [(f"events:{USER_ID}", events.training_event(WRITES))]
+        assert _published("published") == before + 1
+
+    def test_redis_error_never_raises(self, monkeypatch):
+        class _BrokenPublish(_BrokenRedis):
+            def publish(self, *args):
+                raise events.redis_lib.ConnectionError("Connection refused")
+
+        monkeypatch.setattr(events, "_get_client", lambda: _BrokenPublish())
+        before = _published("error")
+        events.publish_training_change(USER_ID, WRITES)
+        assert _published("error") == before + 1
+
+    @pytest.mark.parametrize("write_behind", [True, False])
+    def test_refresh_after_write_publishes(self, publish_redis, monkeypatch, write_behind):
+        monkeypatch.setattr(cache_refresh, "_get_client", lambda: publish_redis)
+        monkeypatch.setattr(get_settings(), "CACHE_WRITE_BEHIND", write_behind)
+        monkeypatch.setattr(cache_refresh, "invalidate_user", lambda uid: None)
+        cache_refresh.refresh_after_write(USER_ID, iter(WRITES))  # a one-shot iterable
+        assert publish_redis.published == [(f"events:{USER_ID}", events.training_event(WRITES))]
+
+    def test_published_when_the_purge_has_no_redis(self, publish_redis, monkeypatch):
+        monkeypatch.setattr(cache_refresh, "_get_client", lambda: None)
+        monkeypatch.setattr(get_settings(), "CACHE_WRITE_BEHIND", True)
+        cache_refresh.refresh_after_write(USER_ID, WRITES)
+        assert publish_redis.published == [(f"events:{USER_ID}", events.training_event(WRITES))]
+
+
+# ---------------------------------------------------------------------------
+# 3. Relay
+# ---------------------------------------------------------------------------
+
+class TestRelay:
+    def test_frames_and_close(self, short_streams):
+        payload = events.training_event(WRITES)
+        pubsub = _FakePubSub([_message(payload)])
+        client = _FakeAsyncRedis(pubsub)
+
+        async def collect():
+            return [frame async for frame in events.relay(pubsub, client)]
+
+        frames = asyncio.run(collect())
+        assert frames[0] == "retry: 3000\n\n"
+        assert frames[1] == f"event: training\ndata: {payload}\n\n"
+        assert frames[2] == ": ping\n\n"
+        assert set(frames[2:]) == {": ping\n\n"}
+        assert pubsub.closed and client.closed
+        assert REGISTRY.get_sample_value("gym_api_event_streams") == 0
+
+    def test_redis_error_ends_stream(self, short_streams):
+        class _DroppedPubSub(_FakePubSub):
+            async def get_message(self, timeout=0.0):
+                raise events.redis_lib.ConnectionError("Connection reset")
+
+        pubsub = _DroppedPubSub([])
+        client = _FakeAsyncRedis(pubsub)
+
+        async def collect():
+            return [frame async for frame in events.relay(pubsub, client)]
+
+        assert asyncio.run(collect()) == ["retry: 3000\n\n"]
+        assert pubsub.closed and client.closed
+
+
+# ---------------------------------------------------------------------------
+# 4. GET /events
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def events_client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestEventsEndpoint:
+    def test_streams_callers_channel(self, events_client, short_streams, monkeypatch):
+        payload = events.training_event(WRITES)
+        pubsub = _FakePubSub([_message(payload)])
+        monkeypatch.setattr(events.aioredis, "from_url",
+                            lambda url, **kwargs: _FakeAsyncRedis(pubsub))
+
+        resp = events_client.get(
+            "/api/v1/events",
+            headers={**_service_headers(USER_ID), "Accept-Encoding": "gzip"},
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert "content-encoding" not in resp.headers
+        assert resp.headers["x-accel-buffering"] == "no"
+        assert pubsub.channels == [f"events:{USER_ID}"]
+        assert f"event: training\ndata: {payload}\n\n" in resp.text
+        assert pubsub.closed
+
+    def test_redis_unreachable_is_503(self, events_client):
+        resp = events_client.get("/api/v1/events", headers=_service_headers(USER_ID))
+        assert resp.status_code == 503
+
+    def test_requires_auth(self, events_client):
+        resp = events_client.get("/api/v1/events")
+        assert resp.status_code in (401, 403)
@@ -0,0 +1,286 @@
+"""Tests for exercise-progress ``resolution`` / ``max_points`` bounding.
+
+Validates:
+  1. ``lttb`` (app/services/downsample.py): keeps the endpoints, returns a
+     subset in input order of exactly ``threshold`` points, keeps a spike,
+     leaves short series untouched and rejects thresholds below 3.
+  2. Default request: every set is returned (unchanged behaviour).
+  3. ``resolution=day|week|month``: one point per period per set number —
+     the period's heaviest set (most reps on a weight tie), dated at the
+     period start (Monday / 1st of the month).
+  4. ``max_points``: every series is capped, real points only, first / last /
+     PR spike kept; combined with ``resolution`` it caps the bucketed series.
+  5. Validation: unknown ``resolution`` and ``max_points`` outside 3..5000
+     are rejected with 422.
+
+Seed layout (USER_DS_ID = 500360), fixed dates from Monday 2024-01-01:
+  ex_ds, set 1: 200 sessions every 2nd day at 10:00, weight 60 + i % 10,
+    reps 5 + i % 3, one 200 kg spike (i = 100); two extra evening sets —
+    day 0 (59 x 12, lighter) and day 2 (61 x 20, same weight, more reps).
+  ex_ds, set 2: 5 weekly sessions.
+"""
+
+import os
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD
+
+USER_DS_ID = 500360
+
+_BASE = datetime(2024, 1, 1, 10, 0)
+_SPIKE = 100
+
+_SET1_ROWS = [
+    (_BASE + timedelta(days=2 * i), 1, 200.0 if i == _SPIKE else 60.0 + i % 10, 5.0 + i % 3)
+    for i in range(200)
+] + [
+    (_BASE + timedelta(hours=8), 1, 59.0, 12.0),
+    (_BASE + timedelta(days=2, hours=8), 1, 61.0, 20.0),
+]
+_SET2_ROWS = [(_BASE + timedelta(weeks=w), 2, 40.0 + w, 10.0) for w in range(5)]
+_ROWS = _SET1_ROWS + _SET2_ROWS
+
+
+def _service_headers(user_id: int) -> dict:
+    """Build service-token auth headers impersonating user_id."""
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _ensure_env_defaults() -> None:
+    """Set env vars required by Settings before importing the app."""
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASSWORD", "testpw")
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("DB_NAME", "gymtest")
+    os.environ.setdefault("JWT_SECRET", "test_jwt_secret_for_rls_tests_only")
+    os.environ.setdefault("ADMIN_USER", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "adminpw")
+    os.environ.setdefault("BOT_SERVICE_TOKEN", "test_bot_service_token_rls")
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+    # Redis unreachable — every request computes from the DB.
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6399/1")
+
+
+def _expected_buckets(set_num: int, period_start) -> list:
+    """Top set per period for one set number, as the endpoint returns it."""
+    best = {}
+    for dt, s, w, r in _ROWS:
+        if s != set_num:
+            continue
+        start = period_start(dt.date())
+        if start not in best or (w, r) > best[start]:
+            best[start] = (w, r)
+    return [
+        {"date": str(d), "weight": w, "reps": r}
+        for d, (w, r) in sorted(best.items())
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 1. LTTB (no DB)
+# ---------------------------------------------------------------------------
+
+class TestLttb:
+    @staticmethod
+    def _run(points, threshold):
+        from app.services.downsample import lttb
+
+        return lttb(points, threshold, x=lambda p: p[0], y=lambda p: p[1])
+
+    def test_subset_of_threshold_size_in_order(self):
+        points = [(i, (i * 37) % 11) for i in range(1000)]
+        for threshold in (3, 4, 50, 999):
+            out = self._run(points, threshold)
+            assert len(out) == threshold
+            assert out == sorted(out) and set(out) <= set(points)
+            assert out[0] == points[0] and out[-1] == points[-1]
+
+    def test_keeps_spike(self):
+        points = [(i, 100.0 if i == 613 else 50.0 + (i % 2)) for i in range(1000)]
+        assert (613, 100.0) in self._run(points, 20)
+
+    def test_short_series_unchanged(self):
+        points = [(0, 1.0), (1, 2.0), (2, 3.0)]
+        assert self._run(points, 3) == points
+        assert self._run(points, 10) == points
+        assert self._run([], 10) == []
+
+    def test_threshold_below_three_rejected(self):
+        with pytest.raises(ValueError):
+            self._run([(i, i) for i in range(10)], 2)
+
+
+# ---------------------------------------------------------------------------
+# Fixture: TestClient with a long single-exercise history
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def ds_client(db_setup):
+    """TestClient with USER_DS_ID's ex_ds history seeded (see module docstring)."""
+    from urllib.parse import urlparse
+    from sqlalchemy import create_engine, event, text as sa_text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+    from fastapi.testclient import TestClient
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    eng_su = create_engine(superuser_url, poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'DownsampleUser', 'downsample_test_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_DS_ID})
+        mid = conn.execute(sa_text("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES ('muscle_ds', FALSE, :uid)
+            RETURNING id
+        """), {"uid": USER_DS_ID}).scalar_one()
+        eid = conn.execute(sa_text("""
+            INSERT INTO exercises (name, muscle, is_global, created_by)
+            VALUES ('ex_ds', :mid, FALSE, :uid)
+            RETURNING id
+        """), {"mid": mid, "uid": USER_DS_ID}).scalar_one()
+        conn.execute(sa_text("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (:tid, :d, :uid, :mid, :eid, :s, :w, :r)
+        """), [
+            {"tid": uuid.uuid4().hex[:32], "d": d, "uid": USER_DS_ID,
+             "mid": mid, "eid": eid, "s": s, "w": w, "r": r}
+            for d, s, w, r in _ROWS
+        ])
+        conn.commit()
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    _ensure_env_defaults()
+
+    from app.core.config import get_settings
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    yield TestClient(app, raise_server_exceptions=False)
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("DELETE FROM training WHERE user_id = :uid"), {"uid": USER_DS_ID})
+        conn.execute(sa_text("DELETE FROM exercises WHERE created_by = :uid"), {"uid": USER_DS_ID})
+        conn.execute(sa_text("DELETE FROM muscles WHERE created_by = :uid"), {"uid": USER_DS_ID})
+        conn.execute(sa_text("DELETE FROM users WHERE id = :uid"), {"uid": USER_DS_ID})
+        conn.commit()
+    eng_su.dispose()
+
+
+def _progress(client, **params):
+    """GET /analytics/exercise-progress for ex_ds; returns the response."""
+    return client.get(
+        "/api/v1/analytics/exercise-progress",
+        params={"muscle": "muscle_ds", "exercise": "ex_ds", **params},
+        headers=_service_headers(USER_DS_ID),
+    )
+
+
+def _series(resp) -> dict:
+    assert resp.status_code == 200, resp.text
+    return {s["set"]: s["points"] for s in resp.json()["series"]}
+
+
+# ---------------------------------------------------------------------------
+# 2-3. resolution
+# ---------------------------------------------------------------------------
+
+class TestResolution:
+    def test_default_returns_every_set(self, ds_client):
+        series = _series(_progress(ds_client))
+        assert len(series[1]) == len(_SET1_ROWS)
+        assert len(series[2]) == len(_SET2_ROWS)
+
+    @pytest.mark.parametrize("resolution,period_start", [
+        ("day", lambda d: d),
+        ("week", lambda d: d - timedelta(days=d.weekday())),
+        ("month", lambda d: d.replace(day=1)),
+    ])
+    def test_top_set_per_period(self, ds_client, resolution, period_start):
+        series = _series(_progress(ds_client, resolution=resolution))
+        for set_num in (1, 2):
+            assert series[set_num] == _expected_buckets(set_num, period_start)
+
+    def test_day_keeps_heaviest_then_most_reps(self, ds_client):
+        points = _series(_progress(ds_client, resolution="day"))[1]
+        assert len(points) == 200
+        by_day = {p["date"]: p for p in points}
+        assert by_day["2024-01-01"] == {"date": "2024-01-01", "weight": 60.0, "reps": 5.0}
+        assert by_day["2024-01-03"] == {"date": "2024-01-03", "weight": 61.0, "reps": 20.0}
+
+    def test_week_dates_are_mondays(self, ds_client):
+        points = _series(_progress(ds_client, resolution="week"))[1]
+        assert all(date.fromisoformat(p["date"]).weekday() == 0 for p in points)
+        assert max(p["weight"] for p in points) == 200.0
+
+
+# ---------------------------------------------------------------------------
+# 4. max_points
+# ---------------------------------------------------------------------------
+
+class TestMaxPoints:
+    def test_series_capped_to_real_points(self, ds_client):
+        full = _series(_progress(ds_client))
+        capped = _series(_progress(ds_client, max_points=30))
+        assert len(capped[1]) == 30
+        assert capped[2] == full[2]  # 5 points: below the cap, untouched
+        assert [p for p in capped[1] if p not in full[1]] == []
+        assert capped[1][0] == full[1][0] and capped[1][-1] == full[1][-1]
+        assert 200.0 in {p["weight"] for p in capped[1]}
+
+    def test_combined_with_resolution(self, ds_client):
+        weekly = _series(_progress(ds_client, resolution="week"))
+        capped = _series(_progress(ds_client, resolution="week", max_points=10))
+        assert len(weekly[1]) > 10 and len(capped[1]) == 10
+        assert [p for p in capped[1] if p not in weekly[1]] == []
+
+    def test_variants_do_not_share_results(self, ds_client):
+        """Each parameter combination computes (and caches) its own payload."""
+        first = _series(_progress(ds_client, max_points=20))
+        assert len(_series(_progress(ds_client, max_points=40))[1]) == 40
+        assert len(_series(_progress(ds_client, max_points=20))[1]) == len(first[1]) == 20
+
+
+# ---------------------------------------------------------------------------
+# 5. Validation
+# ---------------------------------------------------------------------------
+
+class TestValidation:
+    @pytest.mark.parametrize("params", [
+        {"resolution": "year"},
+        {"max_points": 2},
+        {"max_points": 5001},
+    ])
+    def test_rejected(self, ds_client, params):
+        assert _progress(ds_client, **params).status_code == 422
@@ -12,7 +12,7 @@ Tests:
   9. Non-resolvable exercise -> 422/404.
   10. Collision: move creates duplicate set@day+exercise -> 409.
   11. Cross-user / unknown id -> 404.
-  12. Cache invalidate_user called on successful move.
+  12. Cache refresh_after_write called on successful move (source + target).
 
 Seed (USER_51_ID = 500051, USER_51_B_ID = 500052):
   muscle_51:   private muscle owned by USER_51_ID
@@ -748,10 +748,10 @@ class TestMoveOwnership:
 # ---------------------------------------------------------------------------
 
 class TestMoveCacheInvalidation:
-    """Successful move calls invalidate_user(uid)."""
+    """Successful move calls refresh_after_write(uid, [source, target])."""
 
     def test_move_invalidates_cache(self, gym51_client, db_setup):
-        """PATCH /training/{id}/move calls invalidate_user on success."""
+        """PATCH /training/{id}/move refreshes both the source and target day."""
         seed = gym51_client._seed51
         superuser_url = gym51_client._superuser_url
 
@@ -763,7 +763,7 @@ class TestMoveCacheInvalidation:
         )
         try:
             with patch(
-                "app.api.v1.training_history_router.invalidate_user"
+                "app.api.v1.training_history_router.refresh_after_write"
             ) as mock_inv:
                 resp = gym51_client.patch(
                     f"/api/v1/training/{tid}/move",
@@ -771,6 +771,13 @@ class TestMoveCacheInvalidation:
                     headers=_service_headers(USER_51_ID),
                 )
                 assert resp.status_code == 200, f"PATCH move failed: {resp.text}"
-                mock_inv.assert_called_once_with(USER_51_ID)
+                mock_inv.assert_called_once()
+                uid, writes = mock_inv.call_args.args
+                assert uid == USER_51_ID
+                assert [w.day for w in writes] == [
+                    (datetime.utcnow() - timedelta(days=1)).date(),
+                    target_date,
+                ]
+                assert {w.exercise_id for w in writes} == {seed["ex_a"]}
         finally:
             _delete_training_direct(superuser_url, tid)
@@ -0,0 +1,157 @@
+"""Tests for the Redis-backed background job runner (app/core/jobs.py).
+
+Validates:
+  1. ``enqueue`` → ``run_worker(burst=True)`` runs the registered function
+     with the payload kwargs, FIFO, and counts the outcomes.
+  2. Dedup keys: a second enqueue is a no-op while the first job is queued
+     and allowed again once it started.
+  3. A failing job is retried with backoff up to ``max_retries`` times, then
+     dead-lettered; ``delay`` parks a job on the delayed set.
+  4. Misuse fails loudly (unknown / duplicate names); an unreachable Redis
+     makes ``enqueue`` return ``None`` instead of raising.
+  5. The CLI enqueues with ``key=value`` kwargs parsed as JSON.
+
+No Redis server is needed: the cache refresh tests' ``_RefreshRedis``
+implements the list / sorted-set commands and the promote script.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.test_cache_refresh import _RefreshRedis  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core import jobs  # noqa: E402
+
+
+def _count(job, outcome):
+    value = REGISTRY.get_sample_value("gym_api_jobs_total", {"job": job, "outcome": outcome})
+    return value or 0.0
+
+
+@pytest.fixture
+def job_redis(monkeypatch):
+    """An empty job registry wired to one shared ``_RefreshRedis``."""
+    client = _RefreshRedis()
+    monkeypatch.setattr(jobs, "_get_client", lambda: client)
+    monkeypatch.setattr(jobs, "_JOBS", {})
+    monkeypatch.setattr(jobs, "JOB_MODULES", ())
+    return client
+
+
+@pytest.fixture
+def calls(job_redis):
+    """Register ``test.echo`` (records its kwargs) and return the record."""
+    seen = []
+    jobs.job("test.echo")(lambda **kwargs: seen.append(kwargs))
+    return seen
+
+
+def _queued(client, queue=jobs.DEFAULT_QUEUE):
+    return [json.loads(p) for p in client.lrange(jobs._queue_key(queue), 0, -1)]
+
+
+class TestEnqueueAndRun:
+    def test_runs_jobs_in_order(self, job_redis, calls):
+        before = _count("test.echo", "succeeded")
+        assert jobs.enqueue("test.echo", n=1)
+        assert jobs.enqueue("test.echo", n=2)
+        assert jobs.run_worker(block_timeout=1, burst=True) == 2
+        assert calls == [{"n": 1}, {"n": 2}]
+        assert _count("test.echo", "succeeded") == before + 2
+
+    def test_routes_to_the_job_queue(self, job_redis):
+        jobs.register_job(jobs.JobSpec("test.export", lambda: None, queue="exports"))
+        jobs.enqueue("test.export")
+        assert _queued(job_redis) == []
+        assert [p["name"] for p in _queued(job_redis, "exports")] == ["test.export"]
+
+    def test_delay_parks_job_on_delayed_set(self, job_redis, calls):
+        jobs.enqueue("test.echo", delay=60, n=1)
+        assert _queued(job_redis) == []
+        assert job_redis.zcard(jobs._delayed_key(jobs.DEFAULT_QUEUE)) == 1
+
+
+class TestDedup:
+    def test_duplicate_skipped_while_queued(self, job_redis, calls):
+        before = _count("test.echo", "deduplicated")
+        assert jobs.enqueue("test.echo", dedup_key="user:1", n=1)
+        assert jobs.enqueue("test.echo", dedup_key="user:1", n=2) is None
+        assert len(_queued(job_redis)) == 1
+        assert _count("test.echo", "deduplicated") == before + 1
+
+    def test_key_released_when_job_starts(self, job_redis):
+        inner = []
+
+        def reenqueue():
+            inner.append(jobs.enqueue("test.reenqueue", dedup_key="k"))
+
+        jobs.job("test.reenqueue")(reenqueue)
+        jobs.enqueue("test.reenqueue", dedup_key="k")
+        jobs.run_worker(block_timeout=1, max_jobs=1)
+        assert inner[0] is not None  # a write during the run schedules one more
+        assert len(_queued(job_redis)) == 1
+
+
+class TestRetries:
+    def test_retried_then_dead_lettered(self, job_redis):
+        attempts = []
+
+        def flaky(**kwargs):
+            attempts.append(kwargs)
+            raise RuntimeError("db down")
+
+        jobs.register_job(jobs.JobSpec("test.flaky", flaky, max_retries=2, backoff=0.0))
+        before = (_count("test.flaky", "retried"), _count("test.flaky", "failed"))
+        jobs.enqueue("test.flaky", n=1)
+        assert jobs.run_worker(block_timeout=1, burst=True) == 3
+        assert attempts == [{"n": 1}] * 3
+        dead = job_redis.lrange(jobs._dead_key(jobs.DEFAULT_QUEUE), 0, -1)
+        assert [json.loads(p)["attempt"] for p in dead] == [2]
+        assert _count("test.flaky", "retried") == before[0] + 2
+        assert _count("test.flaky", "failed") == before[1] + 1
+
+    def test_backoff_doubles_per_attempt(self, job_redis):
+        def boom():
+            raise RuntimeError("boom")
+
+        jobs.register_job(jobs.JobSpec("test.boom", boom, max_retries=5, backoff=10.0))
+        payload = json.dumps({"id": "x", "name": "test.boom", "kwargs": {}, "attempt": 2})
+        assert jobs.run_job(job_redis, payload) == "retried"
+        ((retry, due),) = job_redis._live(jobs._delayed_key(jobs.DEFAULT_QUEUE)).items()
+        assert json.loads(retry)["attempt"] == 3
+        assert due - jobs.time.time() == pytest.approx(40.0, abs=5.0)
+
+
+class TestMisuse:
+    def test_unknown_job_raises(self, job_redis):
+        with pytest.raises(ValueError):
+            jobs.enqueue("test.missing")
+
+    def test_duplicate_registration_raises(self, job_redis, calls):
+        with pytest.raises(ValueError):
+            jobs.job("test.echo")(lambda: None)
+
+    def test_unknown_payload_dead_lettered(self, job_redis):
+        payload = json.dumps({"id": "x", "name": "test.gone", "kwargs": {}})
+        assert jobs.run_job(job_redis, payload) == "unknown"
+        assert job_redis.lrange(jobs._dead_key(jobs.DEFAULT_QUEUE), 0, -1) == [payload]
+
+    def test_redis_unavailable_returns_none(self, job_redis, calls, monkeypatch):
+        monkeypatch.setattr(jobs, "_get_client", lambda: None)
+        assert jobs.enqueue("test.echo", n=1) is None
+
+
+def test_cli_enqueue_parses_kwargs(job_redis, calls):
+    assert jobs.main(["enqueue", "test.echo", "user_id=42", "label=warm", "--dedup-key", "d"]) == 0
+    (payload,) = _queued(job_redis)
+    assert payload["kwargs"] == {"user_id": 42, "label": "warm"}
+    assert payload["dedup_key"] == "d"
@@ -0,0 +1,227 @@
+"""Tests for the Prometheus /metrics surface (app/core/metrics.py).
+
+Validates:
+  1. GET /metrics returns the Prometheus text format and is excluded from the
+     OpenAPI schema.
+  2. Request latency is labelled by route TEMPLATE, not the concrete path.
+  3. Analytics cache lookups are counted per ``make_key`` endpoint name
+     (Redis is unreachable in tests → ``result="error"``).
+  4. ``invalidate_user`` is timed even when Redis is down.
+  5. ``InstrumentedQueuePool`` counts checkouts and observes wait time.
+  6. ``cache_endpoint_of`` parses the endpoint segment of a cache key.
+
+Seed layout:
+  USER_MX_ID (500260) — registered, no training rows.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD
+
+USER_MX_ID = 500260
+
+
+def _service_headers(user_id: int) -> dict:
+    """Build service-token auth headers impersonating user_id."""
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _ensure_env_defaults() -> None:
+    """Set env vars required by Settings before importing the app."""
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASSWORD", "testpw")
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("DB_NAME", "gymtest")
+    os.environ.setdefault("JWT_SECRET", "test_jwt_secret_for_rls_tests_only")
+    os.environ.setdefault("ADMIN_USER", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "adminpw")
+    os.environ.setdefault("BOT_SERVICE_TOKEN", "test_bot_service_token_rls")
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+    # Redis unreachable — graceful cache miss path is exercised.
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6399/1")
+
+
+def _sample(name: str, labels: dict) -> float:
+    """Read one sample from the default registry (0.0 when absent)."""
+    from prometheus_client import REGISTRY
+
+    value = REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+# ---------------------------------------------------------------------------
+# Unit tests (no DB)
+# ---------------------------------------------------------------------------
+
+class TestCacheEndpointOf:
+    """``cache_endpoint_of`` extracts only the endpoint segment."""
+
+    def test_plain_key(self):
+        from app.core.metrics import cache_endpoint_of
+
+        assert cache_endpoint_of("analytics:42:summary:tz=UTC") == "summary"
+
+    def test_params_with_colons_are_ignored(self):
+        from app.core.metrics import cache_endpoint_of
+
+        key = "analytics:42:exercise-trend:exercise=a:b&muscle=c"
+        assert cache_endpoint_of(key) == "exercise-trend"
+
+    def test_malformed_key(self):
+        from app.core.metrics import cache_endpoint_of
+
+        assert cache_endpoint_of("garbage") == "unknown"
+
+
+# ---------------------------------------------------------------------------
+# Integration tests
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def metrics_client(db_setup):
+    """TestClient with USER_MX seeded.
+
+    Args:
+        db_setup: Session-scoped fixture providing the ephemeral test DB.
+
+    Yields:
+        TestClient bound to the app_rw test engine.
+    """
+    from urllib.parse import urlparse
+    from sqlalchemy import create_engine, event, text as sa_text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+    from fastapi.testclient import TestClient
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    eng_su = create_engine(superuser_url, poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'MxUser', 'mx_test_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_MX_ID})
+        conn.commit()
+    eng_su.dispose()
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    _ensure_env_defaults()
+
+    from app.core.config import get_settings
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    client = TestClient(app, raise_server_exceptions=False)
+    yield client
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+
+
+class TestMetricsEndpoint:
+    """GET /metrics exposes the Prometheus text format."""
+
+    def test_metrics_text_format(self, metrics_client):
+        resp = metrics_client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "gym_api_http_request_duration_seconds" in resp.text
+        assert "gym_api_db_pool_checked_out" in resp.text
+
+    def test_metrics_not_in_openapi(self, metrics_client):
+        paths = metrics_client.get("/openapi.json").json()["paths"]
+        assert "/metrics" not in paths
+
+
+class TestRequestLatency:
+    """Latency histograms are keyed by route template."""
+
+    def test_route_template_label(self, metrics_client):
+        labels = {
+            "method": "GET",
+            "route": "/api/v1/training/day/{day_date}",
+            "status": "200",
+        }
+        before = _sample("gym_api_http_request_duration_seconds_count", labels)
+        for day in ("2024-01-01", "2024-01-02"):
+            resp = metrics_client.get(
+                f"/api/v1/training/day/{day}", headers=_service_headers(USER_MX_ID)
+            )
+            assert resp.status_code == 200
+        after = _sample("gym_api_http_request_duration_seconds_count", labels)
+        assert after - before == 2
+
+    def test_unmatched_route_label(self, metrics_client):
+        labels = {"method": "GET", "route": "<unmatched>", "status": "404"}
+        before = _sample("gym_api_http_request_duration_seconds_count", labels)
+        assert metrics_client.get("/no/such/route").status_code == 404
+        after = _sample("gym_api_http_request_duration_seconds_count", labels)
+        assert after - before == 1
+
+
+class TestCacheMetrics:
+    """Cache lookups and invalidations are recorded."""
+
+    def test_cache_lookup_counted_per_endpoint(self, metrics_client):
+        labels = {"endpoint": "summary", "result": "error"}
+        before = _sample("gym_api_cache_requests_total", labels)
+        resp = metrics_client.get(
+            "/api/v1/analytics/summary", headers=_service_headers(USER_MX_ID)
+        )
+        assert resp.status_code == 200
+        after = _sample("gym_api_cache_requests_total", labels)
+        assert after - before == 1
+
+    def test_invalidate_user_timed(self, metrics_client):
+        from app.core.cache import invalidate_user
+
+        before = _sample("gym_api_cache_invalidate_duration_seconds_count", {})
+        invalidate_user(USER_MX_ID)
+        after = _sample("gym_api_cache_invalidate_duration_seconds_count", {})
+        assert after - before == 1
+
+
+class TestInstrumentedPool:
+    """``InstrumentedQueuePool`` records checkouts and wait time."""
+
+    def test_checkout_counted(self, db_setup):
+        from sqlalchemy import create_engine, text as sa_text
+        from app.core.metrics import InstrumentedQueuePool
+
+        engine = create_engine(db_setup["app_rw_url"], poolclass=InstrumentedQueuePool)
+        try:
+            before = _sample("gym_api_db_pool_checkouts_total", {})
+            waits_before = _sample("gym_api_db_pool_wait_seconds_count", {})
+            for _ in range(3):
+                with engine.connect() as conn:
+                    conn.execute(sa_text("SELECT 1"))
+            assert _sample("gym_api_db_pool_checkouts_total", {}) - before == 3
+            assert _sample("gym_api_db_pool_wait_seconds_count", {}) - waits_before == 3
+        finally:
+            engine.dispose()
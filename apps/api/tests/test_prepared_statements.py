@@ -0,0 +1,350 @@
+"""Tests for server-side prepared hot queries (app/core/prepared.py).
+
+Validates:
+  1. ``to_positional`` / ``build_prepared_query`` turn the psycopg2 pyformat
+     text into PREPARE / EXECUTE form (repeated binds, escaped ``%``).
+  2. Every ``prepare=True`` registered query is PREPAREd on a new pooled
+     connection and returns exactly what the plain statement returns.
+  3. The prepared EXECUTE still carries the folded RLS ``set_config``.
+  4. ``plan_cache_mode`` is honoured per statement, also when queries with
+     different modes share a transaction.
+  5. Server-side cursors run the plain SQL; a connection whose statements
+     were deallocated fails one query and is replaced by a re-PREPAREd one.
+
+Seed layout:
+  USER_PREP_ID (500300) — one private muscle, two private exercises, 3 days
+  of sets on each.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import rls_session
+
+USER_PREP_ID = 500300
+
+_TODAY = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ensure_env_defaults() -> None:
+    """Set env vars required by Settings before importing the routers."""
+    from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD
+
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASSWORD", "testpw")
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("DB_NAME", "gymtest")
+    os.environ.setdefault("APP_DB_USER", _APP_ROLE)
+    os.environ.setdefault("APP_DB_PASSWORD", _APP_ROLE_PASSWORD)
+    os.environ.setdefault("JWT_SECRET", "test_jwt_secret_for_rls_tests_only")
+    os.environ.setdefault("ADMIN_USER", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "adminpw")
+    os.environ.setdefault("BOT_SERVICE_TOKEN", "test_bot_service_token_rls")
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6399/1")
+
+
+def _hot_registered():
+    """Import every router module and return the ``prepare=True`` queries."""
+    _ensure_env_defaults()
+    from app.api.v1 import analytics_router, exercises_router, training_history_router  # noqa: F401
+    from app.core.query_registry import registered_queries
+
+    return [q for q in registered_queries() if q.prepare]
+
+
+# ---------------------------------------------------------------------------
+# Unit tests (no DB)
+# ---------------------------------------------------------------------------
+
+class TestPositionalConversion:
+    """pyformat → ``$n`` conversion and the EXECUTE text."""
+
+    def test_repeated_bind_reuses_number(self):
+        _ensure_env_defaults()
+        from app.core.prepared import to_positional
+
+        sql, order = to_positional(
+            "SELECT 1 WHERE a = %(uid)s AND b = %(eid)s AND c = %(uid)s"
+        )
+        assert sql == "SELECT 1 WHERE a = $1 AND b = $2 AND c = $1"
+        assert order == ("uid", "eid")
+
+    def test_escaped_percent_unescaped(self):
+        _ensure_env_defaults()
+        from app.core.prepared import to_positional
+
+        sql, order = to_positional("SELECT 1 WHERE k LIKE %(q)s || '%%'")
+        assert sql == "SELECT 1 WHERE k LIKE $1 || '%'"
+        assert order == ("q",)
+
+    def test_execute_sql_carries_plan_cache_mode(self):
+        _ensure_env_defaults()
+        from sqlalchemy import text
+        from app.core.prepared import build_prepared_query
+        from app.core.query_registry import RegisteredQuery
+
+        query = RegisteredQuery(
+            name="t.search", clause=text("SELECT :q"), max_cost=1.0,
+            prepare=True, plan_cache_mode="force_custom_plan",
+        )
+        prepared = build_prepared_query(query, "SELECT %(q)s")
+        assert prepared.statement_name == "hot_t_search"
+        assert prepared.prepare_sql == "SELECT $1"
+        assert prepared.execute_sql == (
+            "SET LOCAL plan_cache_mode = force_custom_plan; EXECUTE hot_t_search(%(q)s)"
+        )
+
+    def test_unknown_plan_cache_mode_rejected(self, monkeypatch):
+        from app.core import query_registry
+
+        monkeypatch.setattr(query_registry, "_REGISTRY", {})
+        with pytest.raises(ValueError):
+            query_registry.register_query("t.bad", "SELECT 1", prepare=True, plan_cache_mode="never")
+
+    def test_hot_queries_marked(self):
+        names = {q.name for q in _hot_registered()}
+        assert names == {
+            "analytics.recent_exercises",
+            "analytics.log_context.completed_sets",
+            "analytics.log_context.last_session_sets",
+            "analytics.log_context.personal_record",
+            "analytics.exercise_trend.e1rm",
+            "exercises.search",
+        }
+
+
+# ---------------------------------------------------------------------------
+# Integration tests
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def prepared_engine(db_setup):
+    """Seed USER_PREP_ID and build a single-connection prepared app_rw engine.
+
+    Args:
+        db_setup: Session-scoped fixture providing the ephemeral test DB.
+
+    Yields:
+        Dict with ``engine``, ``factory``, ``statements`` (SQL text of every
+        DBAPI execute on the engine) and ``exercise_id``.
+    """
+    from sqlalchemy import create_engine, event, text as sa_text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool, QueuePool
+
+    hot = _hot_registered()
+    eng_su = create_engine(db_setup["superuser_url"], poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'PrepUser', 'prep_test_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_PREP_ID})
+        muscle_id = conn.execute(sa_text("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES ('Prep Muscle', FALSE, :uid)
+            RETURNING id
+        """), {"uid": USER_PREP_ID}).scalar_one()
+        exercise_ids = [
+            conn.execute(sa_text("""
+                INSERT INTO exercises (name, muscle, is_global, created_by)
+                VALUES (:name, :mid, FALSE, :uid)
+                RETURNING id
+            """), {"name": name, "mid": muscle_id, "uid": USER_PREP_ID}).scalar_one()
+            for name in ("Prep Bench Press", "Prep Row")
+        ]
+        conn.execute(sa_text("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            SELECT md5('prep-' || e::text || '-' || d::text || '-' || s::text)::uuid,
+                   CAST(:today AS timestamp) - d * INTERVAL '2 days' + s * INTERVAL '3 minutes',
+                   :uid, :mid, e, s, 40 + d * 2.5 + s, 8 - s
+            FROM unnest(CAST(:eids AS int[])) AS e,
+                 generate_series(0, 2) AS d,
+                 generate_series(1, 3) AS s
+        """), {"today": _TODAY + timedelta(hours=10), "uid": USER_PREP_ID,
+               "mid": muscle_id, "eids": exercise_ids})
+        conn.commit()
+
+    from app.core.database import _set_rls_gucs
+    from app.core.prepared import enable_prepared_statements
+
+    engine = create_engine(
+        db_setup["app_rw_url"], poolclass=QueuePool, pool_size=1, max_overflow=0
+    )
+    enable_prepared_statements(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    event.listen(factory, "after_begin", _set_rls_gucs)
+    statements = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    yield {
+        "engine": engine,
+        "factory": factory,
+        "statements": statements,
+        "exercise_id": exercise_ids[0],
+        "hot": hot,
+    }
+
+    engine.dispose()
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("DELETE FROM training WHERE user_id = :uid"), {"uid": USER_PREP_ID})
+        conn.execute(sa_text("DELETE FROM exercises WHERE created_by = :uid"), {"uid": USER_PREP_ID})
+        conn.execute(sa_text("DELETE FROM muscles WHERE created_by = :uid"), {"uid": USER_PREP_ID})
+        conn.commit()
+    eng_su.dispose()
+
+
+def _session(factory):
+    """Open a session carrying USER_PREP_ID the way ``get_db`` does."""
+    session = factory()
+    session.info["app_user_id"] = str(USER_PREP_ID)
+    session.info["app_role"] = "user"
+    return session
+
+
+def _params(query, exercise_id):
+    """Bind values for one hot query."""
+    samples = {
+        "uid": USER_PREP_ID,
+        "eid": exercise_id,
+        "lim": 10,
+        "day_start": _TODAY,
+        "day_end": _TODAY + timedelta(days=1),
+        "window_start": _TODAY - timedelta(weeks=12),
+        "q": "prep bench",
+        "muscle_id": None,
+    }
+    return {name: samples[name] for name in query.param_names}
+
+
+class TestPreparedExecution:
+    """Hot queries run as EXECUTE and return the plain statement's rows."""
+
+    def test_statements_prepared_on_connect(self, prepared_engine):
+        from app.core.prepared import STATEMENT_PREFIX, plan_cache_stats
+
+        session = _session(prepared_engine["factory"])
+        try:
+            names = {row["name"] for row in plan_cache_stats(session)}
+        finally:
+            session.close()
+        assert names == {
+            STATEMENT_PREFIX + q.name.replace(".", "_") for q in prepared_engine["hot"]
+        }
+
+    def test_results_match_plain_execution(self, prepared_engine, app_rw_session_factory):
+        hot, eid = prepared_engine["hot"], prepared_engine["exercise_id"]
+        with rls_session(app_rw_session_factory, user_id=USER_PREP_ID, role="user") as plain:
+            expected = {q.name: plain.execute(q.clause, _params(q, eid)).fetchall() for q in hot}
+        statements = prepared_engine["statements"]
+        session = _session(prepared_engine["factory"])
+        try:
+            statements.clear()
+            actual = {q.name: session.execute(q.clause, _params(q, eid)).fetchall() for q in hot}
+        finally:
+            session.close()
+        assert actual == expected
+        assert any(expected.values())
+        assert all("EXECUTE hot_" in s for s in statements)
+
+    def test_execute_carries_folded_gucs(self, prepared_engine):
+        from sqlalchemy import text as sa_text
+
+        hot = {q.name: q for q in prepared_engine["hot"]}
+        query = hot["analytics.log_context.personal_record"]
+        statements = prepared_engine["statements"]
+        session = _session(prepared_engine["factory"])
+        try:
+            statements.clear()
+            row = session.execute(
+                query.clause, _params(query, prepared_engine["exercise_id"])
+            ).fetchone()
+            uid = session.execute(
+                sa_text("SELECT current_setting('app.user_id', true)")
+            ).scalar_one()
+        finally:
+            session.close()
+        assert row is not None
+        assert uid == str(USER_PREP_ID)
+        assert statements[0].startswith("SELECT set_config('app.user_id'")
+        assert "EXECUTE hot_analytics_log_context_personal_record(" in statements[0]
+
+    def test_plan_cache_mode_per_statement(self, prepared_engine):
+        from app.core.prepared import plan_cache_stats
+
+        hot = {q.name: q for q in prepared_engine["hot"]}
+        custom = hot["analytics.log_context.completed_sets"]
+        generic = hot["analytics.exercise_trend.e1rm"]
+        eid = prepared_engine["exercise_id"]
+        session = _session(prepared_engine["factory"])
+        try:
+            before = {row["name"]: row for row in plan_cache_stats(session)}
+            # Alternate within ONE transaction: the custom-mode SET LOCAL must
+            # not leak into the generic-mode statement that follows it.
+            for _ in range(3):
+                session.execute(custom.clause, _params(custom, eid)).fetchall()
+                session.execute(generic.clause, _params(generic, eid)).fetchall()
+            after = {row["name"]: row for row in plan_cache_stats(session)}
+        finally:
+            session.close()
+
+        def delta(name, kind):
+            return after[name][kind] - before[name][kind]
+
+        assert delta("hot_analytics_log_context_completed_sets", "custom_plans") == 3
+        assert delta("hot_analytics_log_context_completed_sets", "generic_plans") == 0
+        assert delta("hot_analytics_exercise_trend_e1rm", "generic_plans") == 3
+        assert delta("hot_analytics_exercise_trend_e1rm", "custom_plans") == 0
+
+
+class TestPreparedFallback:
+    """Statements the connection cannot EXECUTE run as plain SQL."""
+
+    def test_server_side_cursor_runs_plain_sql(self, prepared_engine):
+        hot = {q.name: q for q in prepared_engine["hot"]}
+        query = hot["analytics.recent_exercises"]
+        statements = prepared_engine["statements"]
+        session = _session(prepared_engine["factory"])
+        try:
+            statements.clear()
+            result = session.execute(
+                query.clause, _params(query, None), execution_options={"stream_results": True}
+            )
+            rows = result.fetchall()
+        finally:
+            session.close()
+        assert rows
+        assert not any("EXECUTE" in s for s in statements)
+
+    def test_deallocated_connection_replaced(self, prepared_engine):
+        from sqlalchemy import text as sa_text
+        from sqlalchemy.exc import DBAPIError
+
+        hot = {q.name: q for q in prepared_engine["hot"]}
+        query = hot["analytics.log_context.completed_sets"]
+        params = _params(query, prepared_engine["exercise_id"])
+        session = _session(prepared_engine["factory"])
+        try:
+            session.execute(sa_text("DEALLOCATE ALL"))
+            session.commit()
+            with pytest.raises(DBAPIError) as excinfo:
+                session.execute(query.clause, params)
+            assert excinfo.value.connection_invalidated
+            session.rollback()
+            statements = prepared_engine["statements"]
+            statements.clear()
+            rows = session.execute(query.clause, params).fetchall()
+        finally:
+            session.close()
+        assert [r[0] for r in rows] == [1, 2, 3]
+        assert "EXECUTE hot_analytics_log_context_completed_sets(" in statements[0]
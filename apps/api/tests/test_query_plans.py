@@ -0,0 +1,328 @@
+"""Query-plan regression guard for the registered router SQL.
+
+Every raw SQL statement the routers execute is declared through
+``app.core.query_registry.register_query``.  This module seeds a large
+``training`` table, runs ``EXPLAIN (FORMAT JSON)`` for EVERY registered query
+as ``app_rw`` with the RLS GUCs of a typical user set, and fails when a plan:
+
+  1. contains a Seq Scan on ``training`` (or on a non-empty partition of it);
+  2. reads ``training`` without any index;
+  3. exceeds the query's cost ceiling (``max_cost``).
+
+A new registered query whose bind parameters have no sample value below fails
+``test_every_param_has_a_sample`` — extend ``_SAMPLE_PARAMS`` with a value of
+the realistic worst-case shape (widest allowed window, etc.).
+
+Seed layout (removed again at module teardown):
+  PLAN_USER_BASE .. PLAN_USER_BASE + _PLAN_USERS - 1 — _PLAN_USERS users,
+  _SETS_PER_USER sets each spread over ~2 years, sharing one private muscle and
+  _PLAN_EXERCISES private exercises owned by the probe user (PLAN_USER_BASE).
+  The plan user id range sits far above every other test range.
+"""
+
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import rls_session
+
+PLAN_USER_BASE = 800_000_000_000
+PROBE_USER_ID = PLAN_USER_BASE
+
+_PLAN_USERS = 400
+_SETS_PER_USER = 500
+_PLAN_EXERCISES = 20
+
+_TODAY = date.today()
+_NOW = datetime(_TODAY.year, _TODAY.month, _TODAY.day)
+
+# Sample bind values per parameter NAME, shaped like the widest request each
+# endpoint accepts (e.g. the 180-day default window of /training/days, the
+# 400-day maximum of /analytics/activity).  ``eid`` is filled in once the
+# seed's exercise ids are known.
+_SAMPLE_PARAMS = {
+    "uid": PROBE_USER_ID,
+    "lim": 20,
+    "tz": "Asia/Tbilisi",
+    "from_dt": _NOW - timedelta(days=399),
+    "to_exclusive": _NOW + timedelta(days=1),
+    "day_start": _NOW,
+    "day_end": _NOW + timedelta(days=1),
+    "window_start": _NOW - timedelta(weeks=12),
+    "range_start": _NOW - timedelta(days=14),
+    "range_end": _NOW,
+    "dt_from": _NOW - timedelta(days=180),
+    "dt_to": _NOW + timedelta(days=1),
+    "q": "bench",
+    "muscle_id": None,
+    "resolution": "week",
+    "batch": 5000,
+    "years_ahead": 1,
+}
+
+
+def _ensure_env_defaults() -> None:
+    """Set env vars required by Settings before importing the routers."""
+    from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD
+
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASSWORD", "testpw")
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("DB_NAME", "gymtest")
+    os.environ.setdefault("APP_DB_USER", _APP_ROLE)
+    os.environ.setdefault("APP_DB_PASSWORD", _APP_ROLE_PASSWORD)
+    os.environ.setdefault("JWT_SECRET", "test_jwt_secret_for_rls_tests_only")
+    os.environ.setdefault("ADMIN_USER", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "adminpw")
+    os.environ.setdefault("BOT_SERVICE_TOKEN", "test_bot_service_token_rls")
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+    os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6399/1")
+
+
+def _registered():
+    """Import every router / job module and return the registered queries."""
+    _ensure_env_defaults()
+    from app.api.v1 import analytics_router, exercises_router, training_history_router  # noqa: F401
+    from app.services import training_partitions  # noqa: F401
+    from app.core.query_registry import registered_queries
+
+    return registered_queries()
+
+
+# ---------------------------------------------------------------------------
+# Unit tests (no DB)
+# ---------------------------------------------------------------------------
+
+class TestPlanRules:
+    """``plan_problems`` flags guarded seq scans, unindexed reads and cost."""
+
+    @staticmethod
+    def _query(max_cost=100.0):
+        from sqlalchemy import text
+        from app.core.query_registry import RegisteredQuery
+
+        return RegisteredQuery(name="t.q", clause=text("SELECT 1"), max_cost=max_cost)
+
+    def test_index_scan_passes(self):
+        from app.core.query_registry import plan_problems
+
+        plan = {
+            "Node Type": "Aggregate", "Total Cost": 50.0,
+            "Plans": [{"Node Type": "Index Scan", "Relation Name": "training"}],
+        }
+        assert plan_problems(self._query(), plan) == []
+
+    def test_nested_seq_scan_on_training_fails(self):
+        from app.core.query_registry import plan_problems
+
+        plan = {
+            "Node Type": "Hash Join", "Total Cost": 50.0,
+            "Plans": [
+                {"Node Type": "Bitmap Heap Scan", "Relation Name": "training"},
+                {"Node Type": "Hash", "Plans": [
+                    {"Node Type": "Seq Scan", "Relation Name": "training"},
+                ]},
+            ],
+        }
+        assert plan_problems(self._query(), plan) == ["t.q: Seq Scan on training"]
+
+    def test_seq_scan_on_partition_fails(self):
+        from app.core.query_registry import plan_problems
+
+        plan = {
+            "Node Type": "Append", "Total Cost": 50.0,
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "training_history", "Total Cost": 40.0},
+                {"Node Type": "Seq Scan", "Relation Name": "training_p2026", "Total Cost": 9.0},
+            ],
+        }
+        assert plan_problems(self._query(), plan) == [
+            "t.q: Seq Scan on training",
+            "t.q: training is never read through an index",
+        ]
+
+    def test_seq_scan_on_empty_partition_allowed(self):
+        from app.core.query_registry import plan_problems
+
+        plan = {
+            "Node Type": "Append", "Total Cost": 50.0,
+            "Plans": [
+                {"Node Type": "Index Scan", "Relation Name": "training_history", "Total Cost": 40.0},
+                {"Node Type": "Seq Scan", "Relation Name": "training_default", "Total Cost": 0.0},
+            ],
+        }
+        assert plan_problems(self._query(), plan) == []
+
+    def test_seq_scan_on_catalog_allowed(self):
+        from app.core.query_registry import plan_problems
+
+        plan = {
+            "Node Type": "Seq Scan", "Relation Name": "exercises", "Total Cost": 10.0,
+        }
+        assert plan_problems(self._query(), plan) == []
+
+    def test_cost_ceiling(self):
+        from app.core.query_registry import plan_problems
+
+        plan = {"Node Type": "Result", "Total Cost": 150.0}
+        problems = plan_problems(self._query(max_cost=100.0), plan)
+        assert problems == ["t.q: plan cost 150 exceeds ceiling 100"]
+
+    def test_duplicate_name_rejected(self, monkeypatch):
+        from app.core import query_registry
+
+        monkeypatch.setattr(query_registry, "_REGISTRY", {})
+        query_registry.register_query("t.duplicate", "SELECT 1")
+        with pytest.raises(ValueError):
+            query_registry.register_query("t.duplicate", "SELECT 2")
+
+
+class TestRegistryCoverage:
+    """The registry covers the router SQL and the samples cover the registry."""
+
+    def test_router_queries_registered(self):
+        names = {q.name for q in _registered()}
+        for expected in (
+            "analytics.recent_exercises",
+            "analytics.activity.utc",
+            "analytics.activity.tz",
+            "analytics.week_compare.buckets.tz",
+            "analytics.week_compare.buckets.local",
+            "analytics.summary.weeks.local",
+            "training_history.days.utc",
+            "training_history.days.local",
+            "training_history.day",
+            "exercises.search",
+        ):
+            assert expected in names
+
+    def test_every_param_has_a_sample(self):
+        missing = {
+            q.name: sorted(set(q.param_names) - set(_SAMPLE_PARAMS) - {"eid"})
+            for q in _registered()
+        }
+        assert {k: v for k, v in missing.items() if v} == {}
+
+
+# ---------------------------------------------------------------------------
+# Integration: EXPLAIN every registered query against the seeded dataset
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def plan_dataset(db_setup):
+    """Seed _PLAN_USERS × _SETS_PER_USER training rows, ANALYZE, clean up after.
+
+    Args:
+        db_setup: Session-scoped fixture providing the ephemeral test DB.
+
+    Yields:
+        Dict with ``exercise_ids`` of the probe user's exercises.
+    """
+    from sqlalchemy import create_engine, text as sa_text
+    from sqlalchemy.pool import NullPool
+
+    user_ids = list(range(PLAN_USER_BASE, PLAN_USER_BASE + _PLAN_USERS))
+    eng_su = create_engine(db_setup["superuser_url"], poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            SELECT u, NOW() - INTERVAL '3 years', 'Plan', 'plan_' || u
+            FROM unnest(CAST(:ids AS bigint[])) AS u
+            ON CONFLICT (id) DO NOTHING
+        """), {"ids": user_ids})
+        muscle_id = conn.execute(sa_text("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES ('Plan Muscle', FALSE, :uid)
+            RETURNING id
+        """), {"uid": PROBE_USER_ID}).scalar_one()
+        exercise_ids = [
+            conn.execute(sa_text("""
+                INSERT INTO exercises (name, muscle, is_global, created_by)
+                VALUES (:name, :mid, FALSE, :uid)
+                RETURNING id
+            """), {"name": f"Plan Exercise {i}", "mid": muscle_id, "uid": PROBE_USER_ID}).scalar_one()
+            for i in range(_PLAN_EXERCISES)
+        ]
+        # ~35h apart → each user's history spans ~2 years; 5 exercises per
+        # user, rotating across the shared pool.
+        conn.execute(sa_text("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            SELECT
+                md5(u::text || '-' || g::text)::uuid,
+                NOW() - g * INTERVAL '35 hours',
+                u,
+                :mid,
+                (CAST(:eids AS int[]))[1 + ((u + g % 5) % :n_ex)],
+                1 + g % 4,
+                20 + (g % 40) * 2.5,
+                5 + g % 8
+            FROM unnest(CAST(:ids AS bigint[])) AS u,
+                 generate_series(1, :per_user) AS g
+        """), {
+            "mid": muscle_id,
+            "eids": exercise_ids,
+            "n_ex": _PLAN_EXERCISES,
+            "ids": user_ids,
+            "per_user": _SETS_PER_USER,
+        })
+        conn.commit()
+        conn.execute(sa_text("ANALYZE training"))
+        conn.commit()
+
+    yield {"exercise_ids": exercise_ids}
+
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("DELETE FROM training WHERE user_id = ANY(:ids)"), {"ids": user_ids})
+        conn.execute(sa_text("DELETE FROM exercises WHERE created_by = :uid"), {"uid": PROBE_USER_ID})
+        conn.execute(sa_text("DELETE FROM muscles WHERE created_by = :uid"), {"uid": PROBE_USER_ID})
+        conn.execute(sa_text("DELETE FROM users WHERE id = ANY(:ids)"), {"ids": user_ids})
+        conn.commit()
+        conn.execute(sa_text("ANALYZE training"))
+        conn.commit()
+    eng_su.dispose()
+
+
+def _explain(session, query, params):
+    """Return the root ``Plan`` node of ``EXPLAIN (FORMAT JSON)`` for a query."""
+    from sqlalchemy import text as sa_text
+
+    sql = "EXPLAIN (FORMAT JSON) " + query.clause.text
+    raw = session.execute(sa_text(sql), params).scalar_one()
+    doc = raw if isinstance(raw, list) else json.loads(raw)
+    return doc[0]["Plan"]
+
+
+class TestRegisteredQueryPlans:
+    """EXPLAIN every registered query as the probe user."""
+
+    def test_no_plan_violations(self, plan_dataset, app_rw_session_factory):
+        from app.core.query_registry import plan_problems
+
+        samples = dict(_SAMPLE_PARAMS, eid=plan_dataset["exercise_ids"][0])
+        problems = []
+        with rls_session(app_rw_session_factory, user_id=PROBE_USER_ID, role="user") as s:
+            for query in _registered():
+                params = {name: samples[name] for name in query.param_names}
+                problems.extend(plan_problems(query, _explain(s, query, params)))
+        assert problems == []
+
+    def test_guard_catches_unindexed_predicate(self, plan_dataset, app_rw_session_factory):
+        """A non-sargable rewrite (function on ``date`` in WHERE, no user filter
+        the index can use) is reported — proves the guard is not vacuous."""
+        from sqlalchemy import text as sa_text
+        from app.core.query_registry import RegisteredQuery, plan_problems
+
+        query = RegisteredQuery(
+            name="t.unsargable",
+            clause=sa_text("SELECT COUNT(*) FROM training WHERE date::date = :day"),
+            max_cost=1_000_000.0,
+        )
+        with rls_session(app_rw_session_factory, user_id=PROBE_USER_ID, role="user") as s:
+            plan = _explain(s, query, {"day": _TODAY})
+        assert "t.unsargable: Seq Scan on training" in plan_problems(query, plan)
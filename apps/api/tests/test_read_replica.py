@@ -0,0 +1,308 @@
+"""Tests for read-replica routing of the analytics / history GETs.
+
+The "replica" is a second engine on the test database (a streaming standby
+serves the same rows); every statement it runs is counted, so each test can
+tell which engine served a request.
+
+Validates:
+  1. Without a replica the GETs run on the primary and nothing is counted
+     in ``gym_api_db_read_routes_total``.
+  2. With one, the analytics and training-day GETs run on the replica with
+     the caller's RLS context (own rows only).
+  3. Read-your-writes: a POST /training keeps its user on the primary for
+     the sticky window — in this worker and, through Redis, in any other —
+     while other users keep reading the replica; the window expires.
+  4. Failing towards the primary: an unreachable Redis and a replica that
+     refuses connections both route to the primary; the replica is then
+     skipped until the retry deadline.
+"""
+
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_single_flight import _BrokenRedis, _MemoryRedis, _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core import read_routing  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+USER_DB_ID = 500440  # dedicated user for read-replica tests
+OTHER_USER_DB_ID = 500441
+
+# Private catalog per user: (muscle, exercise).
+_CATALOG = {
+    USER_DB_ID: ("muscle_replica", "ex_replica"),
+    OTHER_USER_DB_ID: ("muscle_replica_other", "ex_replica_other"),
+}
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _routes(target: str, reason: str) -> float:
+    from prometheus_client import REGISTRY
+
+    value = REGISTRY.get_sample_value(
+        "gym_api_db_read_routes_total", {"target": target, "reason": reason}
+    )
+    return value or 0.0
+
+
+@pytest.fixture(scope="module")
+def replica_env(db_setup):
+    """Seed two users, a primary and a counting "replica" sessionmaker."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    for uid in (USER_DB_ID, OTHER_USER_DB_ID):
+        sql("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'Replica', :username)
+            ON CONFLICT (id) DO NOTHING
+        """, uid=uid, username=f"replica_user_{uid}")
+    for uid, (muscle, exercise) in _CATALOG.items():
+        mid = sql("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES (:name, FALSE, :uid) RETURNING id
+        """, name=muscle, uid=uid)[0][0]
+        eid = sql("""
+            INSERT INTO exercises (name, muscle, is_global, created_by)
+            VALUES (:name, :mid, FALSE, :uid) RETURNING id
+        """, name=exercise, mid=mid, uid=uid)[0][0]
+        sql("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (gen_random_uuid(), NOW() - interval '1 day', :uid, :mid, :eid, 1, 60, 5)
+        """, uid=uid, mid=mid, eid=eid)
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    def counting_factory(url):
+        engine = create_engine(url, poolclass=NullPool)
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        event.listen(factory, "after_begin", _set_rls_gucs)
+        return engine, factory, statements
+
+    primary_engine, primary_local, primary_statements = counting_factory(app_rw_url)
+    replica_engine, replica_local, replica_statements = counting_factory(app_rw_url)
+    original = db_module.SessionLocal, db_module.ReadSessionLocal
+    db_module.SessionLocal = primary_local
+
+    from main import app
+    client = TestClient(app, raise_server_exceptions=False)
+
+    yield {
+        "client": client,
+        "db_module": db_module,
+        "replica_local": replica_local,
+        "primary": primary_statements,
+        "replica": replica_statements,
+        "counting_factory": counting_factory,
+        "sql": sql,
+    }
+
+    db_module.SessionLocal, db_module.ReadSessionLocal = original
+    primary_engine.dispose()
+    replica_engine.dispose()
+    for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                       ("muscles", "created_by"), ("users", "id")):
+        sql(f"DELETE FROM {table} WHERE {col} IN (:a, :b)", a=USER_DB_ID, b=OTHER_USER_DB_ID)
+    su.dispose()
+
+
+@pytest.fixture
+def routed(replica_env, monkeypatch):
+    """Replica configured, an in-memory Redis, clean sticky / down state."""
+    redis = _MemoryRedis()
+    monkeypatch.setattr(replica_env["db_module"], "ReadSessionLocal", replica_env["replica_local"])
+    monkeypatch.setattr(read_routing, "_get_client", lambda: redis)
+    monkeypatch.setattr(read_routing, "_local_sticky", {})
+    monkeypatch.setattr(read_routing, "_replica_down_until", 0.0)
+    replica_env["primary"].clear()
+    replica_env["replica"].clear()
+    return SimpleNamespace(env=replica_env, redis=redis)
+
+
+def _get(env, path: str, user_id: int = USER_DB_ID, **params):
+    resp = env["client"].get(f"/api/v1{path}", headers=_service_headers(user_id), params=params)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _served_by(env) -> str:
+    """Which engine ran statements since the last call; clears both counters."""
+    primary, replica = bool(env["primary"]), bool(env["replica"])
+    env["primary"].clear()
+    env["replica"].clear()
+    assert primary != replica, f"primary={primary} replica={replica}"
+    return "replica" if replica else "primary"
+
+
+def _log_set(env, user_id: int = USER_DB_ID) -> None:
+    resp = env["client"].post("/api/v1/training", headers=_service_headers(user_id), json={
+        "muscle_name": _CATALOG[user_id][0], "exercise_name": _CATALOG[user_id][1], "set": 2,
+        "weight": 62.5, "reps": 5, "date": datetime.utcnow().date().isoformat(),
+    })
+    assert resp.status_code == 201, resp.text
+    env["primary"].clear()
+    env["replica"].clear()
+
+
+class TestWithoutReplica:
+    def test_reads_use_the_primary(self, replica_env, monkeypatch):
+        monkeypatch.setattr(replica_env["db_module"], "ReadSessionLocal", None)
+        before = sum(_routes(t, r) for t in ("primary", "replica")
+                     for r in ("routed", "sticky", "sticky_unknown", "replica_down"))
+        replica_env["primary"].clear()
+        replica_env["replica"].clear()
+        _get(replica_env, "/analytics/summary")
+        assert _served_by(replica_env) == "primary"
+        after = sum(_routes(t, r) for t in ("primary", "replica")
+                    for r in ("routed", "sticky", "sticky_unknown", "replica_down"))
+        assert after == before
+
+    def test_writes_do_not_mark_sticky(self, replica_env, monkeypatch):
+        monkeypatch.setattr(replica_env["db_module"], "ReadSessionLocal", None)
+        monkeypatch.setattr(read_routing, "_local_sticky", {})
+        _log_set(replica_env, OTHER_USER_DB_ID)
+        assert read_routing._local_sticky == {}
+
+
+class TestRouting:
+    @pytest.mark.parametrize("path", [
+        "/analytics/summary",
+        "/analytics/week-compare",
+        "/analytics/top-muscles",
+        "/training/days",
+    ])
+    def test_gets_run_on_the_replica(self, routed, path):
+        before = _routes("replica", "routed")
+        _get(routed.env, path)
+        assert _served_by(routed.env) == "replica"
+        assert _routes("replica", "routed") == before + 1
+
+    def test_replica_session_carries_rls(self, routed):
+        body = _get(routed.env, "/training/days")
+        assert _served_by(routed.env) == "replica"
+        # RLS on the replica session: the other user's rows are not counted.
+        (own,) = routed.env["sql"]("SELECT COUNT(*) FROM training WHERE user_id = :uid",
+                                   uid=USER_DB_ID)[0]
+        assert sum(day["sets_count"] for day in body) == own
+        assert _get(routed.env, "/analytics/summary")["sets"] == own
+
+    def test_writes_stay_on_the_primary(self, routed):
+        _log_set(routed.env, OTHER_USER_DB_ID)
+        resp = routed.env["client"].post("/api/v1/training", headers=_service_headers(OTHER_USER_DB_ID),
+                                         json={"muscle_name": _CATALOG[OTHER_USER_DB_ID][0],
+                                               "exercise_name": _CATALOG[OTHER_USER_DB_ID][1],
+                                               "set": 3, "weight": 65, "reps": 3})
+        assert resp.status_code == 201, resp.text
+        assert routed.env["replica"] == []
+
+
+class TestReadYourWrites:
+    def test_writer_is_sticky_to_the_primary(self, routed):
+        _log_set(routed.env)
+        before = _routes("primary", "sticky")
+        _get(routed.env, "/analytics/summary")
+        assert _served_by(routed.env) == "primary"
+        assert _routes("primary", "sticky") == before + 1
+        assert routed.redis.get(read_routing.sticky_key(str(USER_DB_ID))) == "1"
+
+    def test_other_users_keep_the_replica(self, routed):
+        _log_set(routed.env)
+        _get(routed.env, "/analytics/summary", user_id=OTHER_USER_DB_ID)
+        assert _served_by(routed.env) == "replica"
+
+    def test_other_workers_see_the_mark_in_redis(self, routed, monkeypatch):
+        _log_set(routed.env)
+        # Another worker: no local deadline, only the shared key.
+        monkeypatch.setattr(read_routing, "_local_sticky", {})
+        _get(routed.env, "/training/days")
+        assert _served_by(routed.env) == "primary"
+
+    def test_window_expires(self, routed, monkeypatch):
+        monkeypatch.setattr(read_routing, "get_settings",
+                            lambda: SimpleNamespace(DB_REPLICA_STICKY_SECONDS=0.05))
+        _log_set(routed.env)
+        import time
+        time.sleep(0.1)
+        _get(routed.env, "/analytics/summary")
+        assert _served_by(routed.env) == "replica"
+
+    def test_admin_sessions_do_not_mark(self, routed):
+        read_routing.mark_written("")
+        assert read_routing._local_sticky == {}
+
+
+class TestFailTowardsPrimary:
+    def test_unreachable_redis_reads_the_primary(self, routed, monkeypatch):
+        monkeypatch.setattr(read_routing, "_get_client", lambda: _BrokenRedis())
+        before = _routes("primary", "sticky_unknown")
+        _get(routed.env, "/analytics/summary")
+        assert _served_by(routed.env) == "primary"
+        assert _routes("primary", "sticky_unknown") == before + 1
+
+    def test_unreachable_redis_does_not_fail_writes(self, routed, monkeypatch):
+        monkeypatch.setattr(read_routing, "_get_client", lambda: _BrokenRedis())
+        _log_set(routed.env)
+        assert str(USER_DB_ID) in read_routing._local_sticky
+
+    def test_replica_refusing_connections_falls_back(self, routed, monkeypatch):
+        from sqlalchemy.engine import make_url
+
+        url = make_url(str(routed.env["db_module"].SessionLocal.kw["bind"].url))
+        dead_url = url.set(host="127.0.0.1", port=1).render_as_string(hide_password=False)
+        dead_engine, dead_local, _ = routed.env["counting_factory"](dead_url)
+        try:
+            monkeypatch.setattr(routed.env["db_module"], "ReadSessionLocal", dead_local)
+            body = _get(routed.env, "/analytics/summary")
+            assert body["sets"] >= 1
+            assert _served_by(routed.env) == "primary"
+            assert not read_routing.replica_available()
+
+            # Skipped, not retried, until the deadline passes.
+            before = _routes("primary", "replica_down")
+            _get(routed.env, "/training/days")
+            assert _served_by(routed.env) == "primary"
+            assert _routes("primary", "replica_down") == before + 1
+        finally:
+            dead_engine.dispose()
@@ -0,0 +1,228 @@
+"""Tests for the folded RLS GUC setup (app/core/database.py).
+
+Validates:
+  1. ``_rls_guc_prefix`` inlines only literal-safe values.
+  2. The GUCs ride on the transaction's FIRST statement — zero extra
+     statements per transaction, including after a mid-session commit.
+  3. Non-literal-safe values fall back to a separate bound-parameter
+     ``set_config`` (one extra statement) and still apply.
+  4. A prefix armed by a transaction that ran no statement is dropped at
+     commit, so it never leaks into the pooled connection's next user.
+  5. Server-side (named) cursors still see the GUCs.
+
+Seed layout:
+  USER_GUC_ID (500290) — registered, no training rows.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD
+
+USER_GUC_ID = 500290
+
+_READ_GUCS = (
+    "SELECT current_setting('app.user_id', true), current_setting('app.role', true)"
+)
+
+
+def _ensure_env_defaults() -> None:
+    """Set env vars required by Settings before importing the app."""
+    os.environ.setdefault("DB_USER", "postgres")
+    os.environ.setdefault("DB_PASSWORD", "testpw")
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("DB_NAME", "gymtest")
+    os.environ.setdefault("APP_DB_USER", _APP_ROLE)
+    os.environ.setdefault("APP_DB_PASSWORD", _APP_ROLE_PASSWORD)
+    os.environ.setdefault("JWT_SECRET", "test_jwt_secret_for_rls_tests_only")
+    os.environ.setdefault("ADMIN_USER", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "adminpw")
+    os.environ.setdefault("BOT_SERVICE_TOKEN", "test_bot_service_token_rls")
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+
+
+# ---------------------------------------------------------------------------
+# Unit tests (no DB)
+# ---------------------------------------------------------------------------
+
+class TestRlsGucPrefix:
+    """``_rls_guc_prefix`` only inlines digits and lowercase role names."""
+
+    def test_principal_values_inlined(self):
+        _ensure_env_defaults()
+        from app.core.database import _rls_guc_prefix
+
+        prefix = _rls_guc_prefix("123456", "user")
+        assert prefix == (
+            "SELECT set_config('app.user_id', '123456', true),"
+            " set_config('app.role', 'user', true); "
+        )
+
+    def test_empty_values_inlined(self):
+        _ensure_env_defaults()
+        from app.core.database import _rls_guc_prefix
+
+        assert "'app.user_id', ''" in _rls_guc_prefix("", "")
+
+    @pytest.mark.parametrize("uid,role", [
+        ("1'; DROP TABLE training; --", "user"),
+        ("12", "user'); SELECT 1; --"),
+        ("12", "Admin"),
+        ("1.5", "user"),
+    ])
+    def test_unsafe_values_rejected(self, uid, role):
+        _ensure_env_defaults()
+        from app.core.database import _rls_guc_prefix
+
+        assert _rls_guc_prefix(uid, role) is None
+
+
+# ---------------------------------------------------------------------------
+# Integration tests
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def guc_engine(db_setup):
+    """Single-connection app_rw engine with a statement counter.
+
+    Args:
+        db_setup: Session-scoped fixture providing the ephemeral test DB.
+
+    Yields:
+        ``(engine, session_factory, statements)`` — ``statements`` collects
+        the SQL text of every DBAPI execute on the engine.
+    """
+    from sqlalchemy import create_engine, event, text as sa_text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool, QueuePool
+
+    eng_su = create_engine(db_setup["superuser_url"], poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(sa_text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'GucUser', 'guc_test_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_GUC_ID})
+        conn.commit()
+    eng_su.dispose()
+
+    _ensure_env_defaults()
+    from app.core.database import _set_rls_gucs
+
+    # pool_size=1 / no overflow: every checkout reuses the SAME DBAPI
+    # connection, which is what the leak test needs.
+    engine = create_engine(
+        db_setup["app_rw_url"], poolclass=QueuePool, pool_size=1, max_overflow=0
+    )
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    event.listen(factory, "after_begin", _set_rls_gucs)
+    statements = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    yield engine, factory, statements
+    engine.dispose()
+
+
+def _session(factory, uid, role="user"):
+    """Open a session carrying the principal the way ``get_db`` does."""
+    session = factory()
+    session.info["app_user_id"] = uid
+    session.info["app_role"] = role
+    return session
+
+
+class TestFoldedGucs:
+    """GUCs are applied without an extra statement per transaction."""
+
+    def test_first_statement_carries_gucs(self, guc_engine):
+        from sqlalchemy import text as sa_text
+
+        _, factory, statements = guc_engine
+        session = _session(factory, str(USER_GUC_ID))
+        try:
+            statements.clear()
+            row = session.execute(sa_text(_READ_GUCS)).fetchone()
+            assert tuple(row) == (str(USER_GUC_ID), "user")
+            assert len(statements) == 1
+            assert statements[0].startswith("SELECT set_config('app.user_id'")
+        finally:
+            session.close()
+
+    def test_refolded_after_mid_session_commit(self, guc_engine):
+        from sqlalchemy import text as sa_text
+
+        _, factory, statements = guc_engine
+        session = _session(factory, str(USER_GUC_ID))
+        try:
+            statements.clear()
+            session.execute(sa_text("SELECT 1"))
+            session.commit()
+            row = session.execute(sa_text(_READ_GUCS)).fetchone()
+            assert tuple(row) == (str(USER_GUC_ID), "user")
+            assert len(statements) == 2
+        finally:
+            session.close()
+
+    def test_only_first_statement_prefixed(self, guc_engine):
+        from sqlalchemy import text as sa_text
+
+        _, factory, statements = guc_engine
+        session = _session(factory, str(USER_GUC_ID))
+        try:
+            statements.clear()
+            session.execute(sa_text("SELECT 1"))
+            row = session.execute(sa_text(_READ_GUCS)).fetchone()
+            assert tuple(row) == (str(USER_GUC_ID), "user")
+            assert "set_config" in statements[0]
+            assert "set_config" not in statements[1]
+        finally:
+            session.close()
+
+    def test_unsafe_value_falls_back_to_bound_set_config(self, guc_engine):
+        from sqlalchemy import text as sa_text
+
+        _, factory, statements = guc_engine
+        session = _session(factory, "not-a-number", role="user")
+        try:
+            statements.clear()
+            row = session.execute(sa_text(_READ_GUCS)).fetchone()
+            assert tuple(row) == ("not-a-number", "user")
+            assert len(statements) == 2
+        finally:
+            session.close()
+
+    def test_unconsumed_prefix_does_not_leak(self, guc_engine):
+        from sqlalchemy import text as sa_text
+
+        engine, factory, _ = guc_engine
+        session = _session(factory, str(USER_GUC_ID))
+        try:
+            session.connection()  # begins the transaction → arms the prefix
+            session.commit()      # ends it with no statement executed
+        finally:
+            session.close()
+        with engine.connect() as conn:
+            row = conn.execute(sa_text(_READ_GUCS)).fetchone()
+        assert row[0] in (None, "")
+
+    def test_server_side_cursor_sees_gucs(self, guc_engine):
+        from sqlalchemy import text as sa_text
+
+        _, factory, _ = guc_engine
+        session = _session(factory, str(USER_GUC_ID))
+        try:
+            result = session.execute(
+                sa_text(_READ_GUCS), execution_options={"stream_results": True}
+            )
+            assert tuple(result.fetchone()) == (str(USER_GUC_ID), "user")
+            result.close()
+        finally:
+            session.close()
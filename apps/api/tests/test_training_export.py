@@ -0,0 +1,263 @@
+"""Tests for the streamed training export (``app.services.training_export``).
+
+Validates:
+  1. ``GET /training/export`` returns the caller's whole history, oldest set
+     first, as CSV (default), NDJSON or Parquet, with exact weights and an
+     attachment filename — and nothing of another user's (RLS).
+  2. The rows are read through a server-side (named) cursor in
+     ``EXPORT_BATCH_ROWS`` batches, and the session is closed once the
+     stream is done.
+  3. ``GET /admin/training/export`` adds ``user_id`` and covers every user;
+     it requires an admin token.
+  4. Errors surface before streaming: an unknown format is 422, Parquet
+     without pyarrow is 501.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core.config import get_settings  # noqa: E402
+
+USER_DB_ID = 500450  # dedicated user for export tests
+OTHER_USER_DB_ID = 500451
+
+_MUSCLE = "muscle_export"
+_EXERCISE = "ex_export"
+
+# (days ago, set, weight, reps) — inserted oldest last to check the ordering.
+_SETS = (
+    (1, 2, 52.25, 8),
+    (1, 1, 50.5, 10),
+    (3, 1, 40, 12),
+    (10, 3, 0, 15),
+    (10, 1, 37.75, 6),
+)
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _admin_headers() -> dict:
+    from app.core.auth import create_session_token
+
+    token = create_session_token({"id": "admin", "auth_type": "password"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="module")
+def export_env(db_setup):
+    """Seed two users' histories; TestClient on a NullPool engine that tracks cursors."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    now = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    for uid in (USER_DB_ID, OTHER_USER_DB_ID):
+        sql("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'Export', :username)
+            ON CONFLICT (id) DO NOTHING
+        """, uid=uid, username=f"export_user_{uid}")
+        mid = sql("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES (:name, FALSE, :uid) RETURNING id
+        """, name=f"{_MUSCLE}_{uid}", uid=uid)[0][0]
+        eid = sql("""
+            INSERT INTO exercises (name, muscle, is_global, created_by)
+            VALUES (:name, :mid, FALSE, :uid) RETURNING id
+        """, name=f"{_EXERCISE}_{uid}", mid=mid, uid=uid)[0][0]
+        for days_ago, set_no, weight, reps in _SETS:
+            sql("""
+                INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+                VALUES (gen_random_uuid(), :date, :uid, :mid, :eid, :set, :weight, :reps)
+            """, date=now - timedelta(days=days_ago), uid=uid, mid=mid, eid=eid,
+                set=set_no, weight=weight, reps=reps)
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    cursors = []
+    closed = []
+    event.listen(test_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: cursors.append((getattr(cursor, "name", None), statement)))
+    event.listen(test_engine, "checkin", lambda dbapi_conn, record: closed.append(True))
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    from app.services import training_export
+    client = TestClient(app, raise_server_exceptions=False)
+
+    yield {
+        "client": client,
+        "export": training_export,
+        "sql": sql,
+        "cursors": cursors,
+        "closed": closed,
+    }
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                       ("muscles", "created_by"), ("users", "id")):
+        sql(f"DELETE FROM {table} WHERE {col} IN (:a, :b)", a=USER_DB_ID, b=OTHER_USER_DB_ID)
+    su.dispose()
+
+
+def _expected(env, uid: int = USER_DB_ID):
+    """The user's rows as (id, date, set, weight, reps), oldest first."""
+    return env["sql"]("""
+        SELECT replace(id::text, '-', ''), date, set, weight, reps FROM training
+        WHERE user_id = :uid ORDER BY date, set
+    """, uid=uid)
+
+
+def _export(env, fmt=None, headers=None, path="/training/export"):
+    params = {"format": fmt} if fmt else {}
+    resp = env["client"].get(f"/api/v1{path}", params=params,
+                             headers=headers or _service_headers(USER_DB_ID))
+    assert resp.status_code == 200, resp.text
+    return resp
+
+
+class TestUserExport:
+    def test_csv_is_the_default(self, export_env):
+        resp = _export(export_env)
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert resp.headers["content-disposition"] == f'attachment; filename="training-{USER_DB_ID}.csv"'
+        rows = list(csv.reader(io.StringIO(resp.text)))
+        assert rows[0] == list(export_env["export"].COLUMNS)
+        assert [(r[0], r[1], r[4], r[5], r[6]) for r in rows[1:]] == [
+            (tid, date.isoformat(), str(s), str(w), str(r)) for tid, date, s, w, r in _expected(export_env)
+        ]
+        assert {(r[2], r[3]) for r in rows[1:]} == {(f"{_MUSCLE}_{USER_DB_ID}", f"{_EXERCISE}_{USER_DB_ID}")}
+
+    def test_csv_weights_are_exact(self, export_env):
+        rows = list(csv.DictReader(io.StringIO(_export(export_env, "csv").text)))
+        assert sorted(r["weight"] for r in rows) == ["0.00", "37.75", "40.00", "50.50", "52.25"]
+
+    def test_ndjson(self, export_env):
+        resp = _export(export_env, "ndjson")
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        lines = resp.content.split(b"\n")
+        assert lines[-1] == b""
+        records = [json.loads(line) for line in lines[:-1]]
+        assert list(records[0]) == list(export_env["export"].COLUMNS)
+        assert [(r["id"], r["set"], r["weight"], r["reps"]) for r in records] == [
+            (tid, s, float(w), r) for tid, _, s, w, r in _expected(export_env)
+        ]
+
+    def test_parquet(self, export_env):
+        pq = pytest.importorskip("pyarrow.parquet")
+        import pyarrow as pa
+
+        resp = _export(export_env, "parquet")
+        assert resp.headers["content-disposition"].endswith('.parquet"')
+        table = pq.read_table(io.BytesIO(resp.content))
+        assert table.schema.field("weight").type == pa.decimal128(5, 2)
+        assert table.schema.field("reps").type == pa.int16()
+        assert str(table.schema.field("date").type) == "timestamp[us, tz=UTC]"
+        expected = _expected(export_env)
+        assert table.column("id").to_pylist() == [row[0] for row in expected]
+        assert table.column("weight").to_pylist() == [row[3] for row in expected]
+
+    def test_rows_stream_from_a_server_side_cursor(self, export_env, monkeypatch):
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        monkeypatch.setattr(export_env["export"], "EXPORT_BATCH_ROWS", 2)
+        export_env["cursors"].clear()
+        resp = _export(export_env, "parquet")
+        named = [name for name, statement in export_env["cursors"] if "FROM training t" in statement]
+        assert len(named) == 1 and named[0]
+        # One row group per fetched batch: 5 rows in batches of 2.
+        assert pq.ParquetFile(io.BytesIO(resp.content)).metadata.num_row_groups == 3
+
+    def test_session_is_closed_after_the_stream(self, export_env):
+        export_env["closed"].clear()
+        _export(export_env, "ndjson")
+        assert export_env["closed"] == [True]
+
+    def test_other_users_rows_are_invisible(self, export_env):
+        body = _export(export_env, "ndjson", headers=_service_headers(OTHER_USER_DB_ID)).content
+        ids = {json.loads(line)["id"] for line in body.splitlines()}
+        assert ids == {row[0] for row in _expected(export_env, OTHER_USER_DB_ID)}
+
+    def test_empty_history_is_a_header(self, export_env):
+        resp = _export(export_env, headers=_service_headers(999_999_450))
+        assert resp.text == ",".join(export_env["export"].COLUMNS) + "\n"
+
+
+class TestAdminExport:
+    def test_every_user_with_user_id(self, export_env):
+        resp = _export(export_env, "csv", headers=_admin_headers(), path="/admin/training/export")
+        assert resp.headers["content-disposition"] == 'attachment; filename="training-all.csv"'
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert list(rows[0]) == list(export_env["export"].ADMIN_COLUMNS)
+        (total,) = export_env["sql"]("SELECT COUNT(*) FROM training")[0]
+        assert len(rows) == total
+        for uid in (USER_DB_ID, OTHER_USER_DB_ID):
+            assert {r["id"] for r in rows if r["user_id"] == str(uid)} == {
+                row[0] for row in _expected(export_env, uid)
+            }
+
+    def test_requires_admin(self, export_env):
+        resp = export_env["client"].get("/api/v1/admin/training/export",
+                                        headers=_service_headers(USER_DB_ID))
+        assert resp.status_code in (401, 403)
+
+
+class TestErrors:
+    def test_unknown_format(self, export_env):
+        resp = export_env["client"].get("/api/v1/training/export", params={"format": "xlsx"},
+                                        headers=_service_headers(USER_DB_ID))
+        assert resp.status_code == 422
+
+    def test_parquet_without_pyarrow(self, export_env, monkeypatch):
+        monkeypatch.setattr(export_env["export"], "pa", None)
+        for path, headers in (("/training/export", _service_headers(USER_DB_ID)),
+                              ("/admin/training/export", _admin_headers())):
+            resp = export_env["client"].get(f"/api/v1{path}", params={"format": "parquet"},
+                                            headers=headers)
+            assert resp.status_code == 501
@@ -0,0 +1,299 @@
+"""Tests for the fixed-point training columns (migration 0014).
+
+Validates:
+  1. ``training.reps`` is SMALLINT within CHECK training_reps_range, and
+     ``weight_c`` is the generated ``weight * 100`` integer, also after an
+     update; the covering index carries ``weight_c``.
+  2. Reads are unchanged: weights with hundredths and whole reps round-trip
+     as numbers; writes follow the documented reps rule (fractional,
+     out-of-range or non-finite reps are a 422, never rounded by the column
+     cast or a 500); and the integer
+     aggregates — week-compare volume, summary PRs, exercise-trend volume and
+     e1RM, last-session sets, the training day's PR flags — return the same
+     values the numeric columns gave.
+  3. The migration refuses to rewrite without ``MIGRATE_ALLOW_REWRITE=1``
+     and refuses fractional reps, and downgrade / upgrade round trip the
+     column types.
+"""
+
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _ALEMBIC_DIR, _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core.config import get_settings  # noqa: E402
+
+USER_DB_ID = 500430  # dedicated user for fixed-point tests
+
+_MUSCLE = "muscle_fixed"
+_EXERCISE = "ex_fixed"
+
+# (days ago, set, weight, reps) — logged through POST /training.
+_SETS = (
+    (7, 1, 50.5, 6),
+    (0, 1, 52.25, 8),
+    (0, 2, 52.25, 10),
+    (0, 3, 40, 12),
+)
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _column_type(sql, column: str) -> str:
+    return sql("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'training' AND column_name = :col
+    """, col=column)[0][0]
+
+
+@pytest.fixture(scope="module")
+def fixed_env(db_setup):
+    """Seed USER_DB_ID with the ``_SETS`` history and a TestClient."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    sql("""
+        INSERT INTO users (id, registration_date, first_name, username)
+        VALUES (:uid, NOW(), 'Fixed', 'training_fixed_user')
+        ON CONFLICT (id) DO NOTHING
+    """, uid=USER_DB_ID)
+    mid = sql("""
+        INSERT INTO muscles (name, is_global, created_by)
+        VALUES (:name, FALSE, :uid) RETURNING id
+    """, name=_MUSCLE, uid=USER_DB_ID)[0][0]
+    eid = sql("""
+        INSERT INTO exercises (name, muscle, is_global, created_by)
+        VALUES (:name, :mid, FALSE, :uid) RETURNING id
+    """, name=_EXERCISE, mid=mid, uid=USER_DB_ID)[0][0]
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    client = TestClient(app, raise_server_exceptions=False)
+    today = datetime.utcnow().date()
+    ids = {}
+    for days_ago, set_no, weight, reps in _SETS:
+        resp = client.post("/api/v1/training", headers=_service_headers(USER_DB_ID), json={
+            "muscle_name": _MUSCLE, "exercise_name": _EXERCISE, "set": set_no,
+            "weight": weight, "reps": reps,
+            "date": (today - timedelta(days=days_ago)).isoformat(),
+        })
+        assert resp.status_code == 201, resp.text
+        ids[(days_ago, set_no)] = resp.json()["id"]
+
+    yield {
+        "client": client,
+        "sql": sql,
+        "mid": mid,
+        "eid": eid,
+        "ids": ids,
+        "today": today,
+        "superuser_url": superuser_url,
+    }
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                       ("muscles", "created_by"), ("users", "id")):
+        sql(f"DELETE FROM {table} WHERE {col} = :uid", uid=USER_DB_ID)
+    su.dispose()
+
+
+def _get(env, path: str, **params) -> dict:
+    resp = env["client"].get(f"/api/v1{path}", headers=_service_headers(USER_DB_ID), params=params)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+class TestSchema:
+    def test_column_types(self, fixed_env):
+        sql = fixed_env["sql"]
+        assert _column_type(sql, "reps") == "smallint"
+        assert _column_type(sql, "weight_c") == "integer"
+        assert _column_type(sql, "weight") == "numeric"
+
+    def test_weight_c_is_generated(self, fixed_env):
+        rows = fixed_env["sql"]("""
+            SELECT weight, weight_c FROM training WHERE user_id = :uid ORDER BY date, set
+        """, uid=USER_DB_ID)
+        assert [(float(w), c) for w, c in rows] == [
+            (50.5, 5050), (52.25, 5225), (52.25, 5225), (40.0, 4000)
+        ]
+
+    def test_reps_range_check(self, fixed_env):
+        from sqlalchemy.exc import IntegrityError
+
+        with pytest.raises(IntegrityError, match="training_reps_range"):
+            fixed_env["sql"]("""
+                INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+                VALUES (gen_random_uuid(), NOW(), :uid, :mid, :eid, 9, 10, 1000)
+            """, uid=USER_DB_ID, mid=fixed_env["mid"], eid=fixed_env["eid"])
+
+    def test_covering_index_carries_weight_c(self, fixed_env):
+        (definition,) = fixed_env["sql"](
+            "SELECT pg_get_indexdef('idx_training_user_exercise_date'::regclass)"
+        )[0]
+        assert "INCLUDE (muscle_id, set, weight_c, reps)" in definition
+
+
+class TestContract:
+    def test_update_regenerates_weight_c(self, fixed_env):
+        tid = fixed_env["sql"]("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (gen_random_uuid(), NOW() - interval '400 days', :uid, :mid, :eid, 1, 10, 5)
+            RETURNING replace(id::text, '-', '')
+        """, uid=USER_DB_ID, mid=fixed_env["mid"], eid=fixed_env["eid"])[0][0]
+        try:
+            resp = fixed_env["client"].put(f"/api/v1/training/{tid}",
+                                           headers=_service_headers(USER_DB_ID),
+                                           json={"weight": 12.75, "reps": 12})
+            assert resp.status_code == 200, resp.text
+            assert (resp.json()["weight"], resp.json()["reps"]) == (12.75, 12.0)
+            assert fixed_env["sql"]("SELECT weight_c, reps FROM training WHERE id = :tid",
+                                    tid=tid)[0] == (1275, 12)
+        finally:
+            fixed_env["sql"]("DELETE FROM training WHERE id = :tid", tid=tid)
+
+    def test_fractional_or_out_of_range_reps_are_422(self, fixed_env):
+        tid = fixed_env["sql"]("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (gen_random_uuid(), NOW() - interval '400 days', :uid, :mid, :eid, 1, 10, 5)
+            RETURNING replace(id::text, '-', '')
+        """, uid=USER_DB_ID, mid=fixed_env["mid"], eid=fixed_env["eid"])[0][0]
+        try:
+            for reps in (7.5, 1000, -1000):
+                resp = fixed_env["client"].put(f"/api/v1/training/{tid}",
+                                               headers=_service_headers(USER_DB_ID),
+                                               json={"weight": 10, "reps": reps})
+                assert resp.status_code == 422, reps
+            assert fixed_env["sql"]("SELECT reps FROM training WHERE id = :tid",
+                                    tid=tid)[0][0] == 5
+        finally:
+            fixed_env["sql"]("DELETE FROM training WHERE id = :tid", tid=tid)
+        resp = fixed_env["client"].post("/api/v1/training", headers=_service_headers(USER_DB_ID),
+                                        json={"muscle_name": "m", "exercise_name": "e",
+                                              "set": 1, "weight": 10, "reps": 7.5})
+        assert resp.status_code == 422
+
+    @pytest.mark.parametrize("reps", ["1e400", "-1e400", "Infinity", "NaN"])
+    def test_non_finite_reps_are_422(self, fixed_env, reps):
+        resp = fixed_env["client"].post(
+            "/api/v1/training",
+            headers={**_service_headers(USER_DB_ID), "Content-Type": "application/json"},
+            content=('{"muscle_name": "m", "exercise_name": "e", "set": 1, "weight": 10, '
+                     f'"reps": {reps}}}'),
+        )
+        assert resp.status_code == 422, resp.text
+
+    def test_week_compare_volume(self, fixed_env):
+        body = _get(fixed_env, "/analytics/week-compare")
+        assert body["this_week"] == {"sets": 3, "volume": 1420.5}
+        assert body["last_week"] == {"sets": 1, "volume": 303.0}
+
+    def test_summary_prs(self, fixed_env):
+        # 50.5 (first), then 52.25; the second 52.25 and 40 are not heavier.
+        assert _get(fixed_env, "/analytics/summary")["prs"] == 2
+
+    def test_exercise_trend(self, fixed_env):
+        body = _get(fixed_env, "/analytics/exercise-trend", muscle=_MUSCLE, exercise=_EXERCISE)
+        assert body["last_session"]["volume"] == 1420.5
+        assert body["prev_session"]["volume"] == 303.0
+        e1rm = [p["e1rm"] for p in body["e1rm_trend"]]
+        assert e1rm == pytest.approx([50.5 * (1 + 6 / 30), 52.25 * (1 + 10 / 30)])
+
+    def test_last_session_sets(self, fixed_env):
+        body = _get(fixed_env, "/analytics/log-context", muscle=_MUSCLE, exercise=_EXERCISE,
+                    date=fixed_env["today"].isoformat())
+        assert body["last_session_sets"] == [{"set": 1, "weight": 50.5, "reps": 6.0}]
+
+    def test_training_day_pr_flags(self, fixed_env):
+        body = _get(fixed_env, f"/training/day/{fixed_env['today'].isoformat()}")
+        (exercise,) = body["exercises"]
+        assert [(s["weight"], s["reps"], s["pr_kind"]) for s in exercise["sets"]] == [
+            (52.25, 8.0, "weight"), (52.25, 10.0, "reps"), (40.0, 12.0, None)
+        ]
+
+
+class TestMigration:
+    @staticmethod
+    def _alembic(url: str, *args: str) -> subprocess.CompletedProcess:
+        env = {**os.environ, "DATABASE_URL": url}
+        return subprocess.run(["alembic", *args], cwd=_ALEMBIC_DIR, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def test_rewrite_needs_the_opt_in(self, fixed_env, monkeypatch):
+        sql, url = fixed_env["sql"], fixed_env["superuser_url"]
+        assert self._alembic(url, "downgrade", "0013_training_uuid_id").returncode == 0
+        try:
+            monkeypatch.delenv("MIGRATE_ALLOW_REWRITE")
+            failed = self._alembic(url, "upgrade", "head")
+            assert failed.returncode != 0
+            assert "MIGRATE_ALLOW_REWRITE=1" in failed.stderr
+            assert _column_type(sql, "reps") == "numeric"  # nothing rewritten
+        finally:
+            monkeypatch.undo()
+            assert self._alembic(url, "upgrade", "head").returncode == 0
+        assert _column_type(sql, "reps") == "smallint"
+
+    def test_fractional_reps_block_the_upgrade(self, fixed_env):
+        sql, url = fixed_env["sql"], fixed_env["superuser_url"]
+        assert self._alembic(url, "downgrade", "0013_training_uuid_id").returncode == 0
+        try:
+            assert _column_type(sql, "reps") == "numeric"
+            sql("""
+                INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+                VALUES (gen_random_uuid(), NOW() - interval '500 days', :uid, :mid, :eid, 1, 20, 7.5)
+            """, uid=USER_DB_ID, mid=fixed_env["mid"], eid=fixed_env["eid"])
+            failed = self._alembic(url, "upgrade", "head")
+            assert failed.returncode != 0
+            assert "fractional reps" in failed.stderr
+        finally:
+            sql("DELETE FROM training WHERE user_id = :uid AND reps <> trunc(reps)", uid=USER_DB_ID)
+            assert self._alembic(url, "upgrade", "head").returncode == 0
+        assert _column_type(sql, "reps") == "smallint"
+        assert sql("SELECT COUNT(*) FROM training WHERE user_id = :uid AND weight_c IS NOT NULL",
+                   uid=USER_DB_ID)[0][0] == len(_SETS)
@@ -4,9 +4,10 @@ Tests:
   GET  /training/days       — shape, reverse-chrono, counts, window, isolation
   GET  /training/day/{date} — grouping with exercise/muscle names, sets, empty day
   DELETE /training/{id}     — removes own row; 404 cross-user; 404 unknown id
-  Cache invalidation        — POST/PUT/DELETE each bust the user's analytics cache
-                              (assert invalidate_user is called / keys cleared via
-                               mocking since Redis is unreachable in test env)
+  Cache invalidation        — POST/PUT/DELETE each refresh the user's analytics cache
+                              (assert refresh_after_write is called with the
+                               touched exercise via mocking since Redis is
+                               unreachable in test env)
 
 Reuses the session-scoped ``db_setup`` fixture from conftest.py (two-user
 seeded postgres:16).  Extra training rows are inserted per-test where needed
@@ -513,19 +514,28 @@ class TestDeleteTraining:
 
 
 # ---------------------------------------------------------------------------
-# 4. Cache invalidation — POST/PUT/DELETE each call invalidate_user
+# 4. Cache invalidation — POST/PUT/DELETE each call refresh_after_write
 # ---------------------------------------------------------------------------
 
+def _assert_refreshed(mock_refresh, user_id: int, exercise_id: int) -> None:
+    """Assert one ``refresh_after_write(user_id, writes)`` call naming exercise_id."""
+    mock_refresh.assert_called_once()
+    uid, writes = mock_refresh.call_args.args
+    assert uid == user_id
+    assert [w.exercise_id for w in writes] == [exercise_id]
+
+
 class TestCacheInvalidation:
-    """Every training mutation calls cache.invalidate_user for the principal.
+    """Every training mutation calls cache_refresh.refresh_after_write.
 
-    Uses unittest.mock.patch to intercept ``invalidate_user`` calls because
-    Redis is unreachable in the test environment (port 6399).  We verify the
-    function is called with the correct user_id on each mutation path.
+    Uses unittest.mock.patch to intercept ``refresh_after_write`` calls
+    because Redis is unreachable in the test environment (port 6399).  We
+    verify the function is called with the correct user_id and the touched
+    exercise on each mutation path.
     """
 
     def test_post_training_invalidates_cache(self, history_client, db_setup):
-        """POST /training calls invalidate_user(uid) on success."""
+        """POST /training calls refresh_after_write(uid, ...) on success."""
         seed = db_setup["seed"]
         superuser_url = db_setup["superuser_url"]
 
@@ -540,7 +550,7 @@ class TestCacheInvalidation:
         eng.dispose()
         muscle_name, ex_name = row[0], row[1]
 
-        with patch("app.api.v1.bot_router.invalidate_user") as mock_inv:
+        with patch("app.api.v1.bot_router.refresh_after_write") as mock_inv:
             resp = history_client.post(
                 "/api/v1/training",
                 json={
@@ -553,14 +563,14 @@ class TestCacheInvalidation:
                 headers=_service_headers(USER_A_ID),
             )
             assert resp.status_code == 201, f"POST failed: {resp.text}"
-            mock_inv.assert_called_once_with(USER_A_ID)
+            _assert_refreshed(mock_inv, USER_A_ID, seed["priv_ex_a"])
 
             # Clean up the inserted row.
             created_id = resp.json()["id"]
             _delete_training_direct(superuser_url, created_id)
 
     def test_put_training_invalidates_cache(self, history_client, db_setup):
-        """PUT /training/{id} calls invalidate_user(uid) on success."""
+        """PUT /training/{id} calls refresh_after_write(uid, ...) on success."""
         superuser_url = db_setup["superuser_url"]
         seed = db_setup["seed"]
         tid = _insert_training(
@@ -569,19 +579,19 @@ class TestCacheInvalidation:
             7, datetime.utcnow() - timedelta(days=5),
         )
         try:
-            with patch("app.api.v1.bot_router.invalidate_user") as mock_inv:
+            with patch("app.api.v1.bot_router.refresh_after_write") as mock_inv:
                 resp = history_client.put(
                     f"/api/v1/training/{tid}",
                     json={"weight": 75.0, "reps": 8.0},
                     headers=_service_headers(USER_A_ID),
                 )
                 assert resp.status_code == 200, f"PUT failed: {resp.text}"
-                mock_inv.assert_called_once_with(USER_A_ID)
+                _assert_refreshed(mock_inv, USER_A_ID, seed["priv_ex_a"])
         finally:
             _delete_training_direct(superuser_url, tid)
 
     def test_delete_training_invalidates_cache(self, history_client, db_setup):
-        """DELETE /training/{id} calls invalidate_user(uid) on success."""
+        """DELETE /training/{id} calls refresh_after_write(uid, ...) on success."""
         superuser_url = db_setup["superuser_url"]
         seed = db_setup["seed"]
         tid = _insert_training(
@@ -589,10 +599,10 @@ class TestCacheInvalidation:
             seed["priv_muscle_a"], seed["priv_ex_a"],
             8, datetime.utcnow() - timedelta(days=6),
         )
-        with patch("app.api.v1.training_history_router.invalidate_user") as mock_inv:
+        with patch("app.api.v1.training_history_router.refresh_after_write") as mock_inv:
             resp = history_client.delete(
                 f"/api/v1/training/{tid}",
                 headers=_service_headers(USER_A_ID),
             )
             assert resp.status_code == 204, f"DELETE failed: {resp.text}"
-            mock_inv.assert_called_once_with(USER_A_ID)
+            _assert_refreshed(mock_inv, USER_A_ID, seed["priv_ex_a"])
@@ -0,0 +1,242 @@
+"""Tests for the uuid training ids (migration 0013, ``app.core.training_ids``).
+
+Validates:
+  1. ``uuid7``: version 7, RFC variant, the current millisecond in the
+     leading 48 bits, strictly increasing within the process.
+  2. ``parse_training_id`` accepts the 32-char hex alias (any case) and the
+     canonical text, and maps any other string exactly as the migration's
+     ``md5(id)::uuid`` does.
+  3. ``training.id`` is ``uuid``; POST /training assigns a UUIDv7 returned
+     as 32 lower-case hex chars; PUT / GET /training/day / DELETE work with
+     the hex form, the canonical form and a legacy (non-hex) id.
+  4. Downgrading to 0012 restores VARCHAR(32) holding the same hex ids, and
+     upgrading converts them back.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _ALEMBIC_DIR, _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.training_ids import (  # noqa: E402
+    new_training_id,
+    parse_training_id,
+    training_id_hex,
+    uuid7,
+)
+
+USER_DB_ID = 500420  # dedicated user for training id tests
+
+_HEX = re.compile(r"[0-9a-f]{32}")
+
+_MUSCLE = "muscle_ids"
+_EXERCISE = "ex_ids"
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+@pytest.fixture(scope="module")
+def ids_env(db_setup):
+    """Seed USER_DB_ID with a private muscle/exercise and a TestClient."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    sql("""
+        INSERT INTO users (id, registration_date, first_name, username)
+        VALUES (:uid, NOW(), 'Ids', 'training_ids_user')
+        ON CONFLICT (id) DO NOTHING
+    """, uid=USER_DB_ID)
+    mid = sql("""
+        INSERT INTO muscles (name, is_global, created_by)
+        VALUES (:name, FALSE, :uid) RETURNING id
+    """, name=_MUSCLE, uid=USER_DB_ID)[0][0]
+    eid = sql("""
+        INSERT INTO exercises (name, muscle, is_global, created_by)
+        VALUES (:name, :mid, FALSE, :uid) RETURNING id
+    """, name=_EXERCISE, mid=mid, uid=USER_DB_ID)[0][0]
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    yield {
+        "client": TestClient(app, raise_server_exceptions=False),
+        "sql": sql,
+        "mid": mid,
+        "eid": eid,
+        "superuser_url": superuser_url,
+    }
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                       ("muscles", "created_by"), ("users", "id")):
+        sql(f"DELETE FROM {table} WHERE {col} = :uid", uid=USER_DB_ID)
+    su.dispose()
+
+
+def _create(env, set_no: int = 1) -> dict:
+    resp = env["client"].post("/api/v1/training", headers=_service_headers(USER_DB_ID), json={
+        "muscle_name": _MUSCLE, "exercise_name": _EXERCISE,
+        "set": set_no, "weight": 50, "reps": 8,
+    })
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+class TestUuid7:
+    def test_layout(self):
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+        assert before <= value.int >> 80 <= after
+
+    def test_explicit_timestamp(self):
+        assert uuid7(1_700_000_000_123).int >> 80 == 1_700_000_000_123
+
+    def test_strictly_increasing(self):
+        ids = [uuid7() for _ in range(20_000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_new_training_id_is_hex(self):
+        assert _HEX.fullmatch(new_training_id())
+
+
+class TestParse:
+    def test_hex_and_canonical(self):
+        value = uuid.uuid4()
+        assert parse_training_id(value.hex) == value
+        assert parse_training_id(value.hex.upper()) == value
+        assert parse_training_id(str(value)) == value
+        assert parse_training_id(value) == value
+
+    def test_legacy_matches_the_migration(self, ids_env):
+        (mapped,) = ids_env["sql"]("SELECT md5(:id)::uuid", id="bot-legacy-42")[0]
+        assert parse_training_id("bot-legacy-42") == uuid.UUID(str(mapped))
+
+    def test_hex_output(self):
+        value = uuid.uuid4()
+        assert training_id_hex(value) == value.hex
+        assert training_id_hex(str(value)) == value.hex
+
+
+class TestEndpoints:
+    def test_column_is_uuid(self, ids_env):
+        assert ids_env["sql"]("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'training' AND column_name = 'id'
+        """)[0][0] == "uuid"
+
+    def test_create_assigns_uuid7_hex(self, ids_env):
+        body = _create(ids_env)
+        assert _HEX.fullmatch(body["id"])
+        assert uuid.UUID(body["id"]).version == 7
+        stored = ids_env["sql"]("SELECT id FROM training WHERE id = :tid", tid=body["id"])
+        assert uuid.UUID(str(stored[0][0])).hex == body["id"]
+
+    def test_update_and_day_accept_both_forms(self, ids_env):
+        client = ids_env["client"]
+        tid = _create(ids_env, set_no=2)["id"]
+        canonical = str(uuid.UUID(tid))
+        resp = client.put(f"/api/v1/training/{canonical}", headers=_service_headers(USER_DB_ID),
+                          json={"weight": 55, "reps": 6})
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["id"] == tid
+
+        day = datetime.utcnow().date().isoformat()
+        resp = client.get(f"/api/v1/training/day/{day}", headers=_service_headers(USER_DB_ID))
+        assert resp.status_code == 200, resp.text
+        ids = {s["training_id"] for ex in resp.json()["exercises"] for s in ex["sets"]}
+        assert tid in ids
+        assert all(_HEX.fullmatch(i) for i in ids)
+
+    def test_legacy_id_still_resolves(self, ids_env):
+        legacy = "bot-legacy-7"
+        ids_env["sql"]("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (md5(:legacy)::uuid, NOW(), :uid, :mid, :eid, 5, 40, 10)
+        """, legacy=legacy, uid=USER_DB_ID, mid=ids_env["mid"], eid=ids_env["eid"])
+        resp = ids_env["client"].delete(f"/api/v1/training/{legacy}",
+                                        headers=_service_headers(USER_DB_ID))
+        assert resp.status_code == 204, resp.text
+        assert ids_env["sql"]("SELECT COUNT(*) FROM training WHERE id = md5(:legacy)::uuid",
+                              legacy=legacy)[0][0] == 0
+
+    def test_unknown_id_404(self, ids_env):
+        resp = ids_env["client"].delete(f"/api/v1/training/{uuid.uuid4()}",
+                                        headers=_service_headers(USER_DB_ID))
+        assert resp.status_code == 404
+
+
+class TestMigration:
+    @staticmethod
+    def _alembic(url: str, *args: str) -> None:
+        env = {**os.environ, "DATABASE_URL": url}
+        subprocess.run(["alembic", *args], cwd=_ALEMBIC_DIR, env=env, check=True,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def test_downgrade_keeps_hex_then_upgrade_converts(self, ids_env):
+        sql, url = ids_env["sql"], ids_env["superuser_url"]
+        tid = _create(ids_env, set_no=3)["id"]
+        type_sql = """
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'training' AND column_name = 'id'
+        """
+
+        self._alembic(url, "downgrade", "0012_training_partitioning")
+        assert sql(type_sql)[0][0] == "character varying"
+        assert sql("SELECT COUNT(*) FROM training WHERE id = :tid", tid=tid)[0][0] == 1
+
+        self._alembic(url, "upgrade", "head")
+        assert sql(type_sql)[0][0] == "uuid"
+        assert sql("SELECT COUNT(*) FROM training WHERE id = :tid", tid=tid)[0][0] == 1
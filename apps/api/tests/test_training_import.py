@@ -0,0 +1,329 @@
+"""Tests for the bulk history import (``app.services.training_import``).
+
+Validates:
+  1. Parsing: Strong (``,`` and ``;`` CSV, lb weights), Hevy, our own export
+     and JSON; sets numbered in file order; rows without reps skipped; a bad
+     value names its row.
+  2. ``POST /training/import`` resolves names in bulk — as written, through
+     ``exercise_alias``, and the "Name (Equipment)" spellings — prefers the
+     file's muscle, reports unresolved names, and writes with ONE INSERT.
+  3. Re-importing the same file (or our own export) adds nothing: sets the
+     user already has are duplicates.
+  4. Errors are 422 before anything is written; the CLI prints the report.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core.config import get_settings  # noqa: E402
+
+USER_DB_ID = 500460  # dedicated user for import tests
+OTHER_USER_DB_ID = 500461
+
+_STRONG_CSV = """Date,Workout Name,Duration,Exercise Name,Set Order,Weight,Reps,Distance,Seconds,Notes,Workout Notes,RPE
+2024-03-15 18:22:01,Push,1h,Importpress (Barbell),1,60,10,0,0,,,
+2024-03-15 18:22:01,Push,1h,Importpress (Barbell),2,62.5,8,0,0,,,
+2024-03-15 18:22:01,Push,1h,Import Fly,1,20,12,0,0,,,
+2024-03-15 18:22:01,Push,1h,Treadmill,1,0,,5,1200,,,
+2024-03-17 09:00:00,Pull,1h,Import Row (Cable),1,50,10,0,0,,,
+2024-03-17 09:00:00,Pull,1h,Mystery Machine,1,40,10,0,0,,,
+2024-03-17 09:00:00,Pull,1h,Mystery Machine,2,40,9,0,0,,,
+"""
+
+_HEVY_CSV = """title,start_time,end_time,description,exercise_title,superset_id,exercise_notes,set_index,set_type,weight_lbs,reps,distance_miles,duration_seconds,rpe
+Push,"16 Mar 2024, 07:30","16 Mar 2024, 08:30",,Importpress (Barbell),,,0,normal,135,5,,,
+Push,"16 Mar 2024, 07:30","16 Mar 2024, 08:30",,Importpress (Barbell),,,1,normal,135,5,,,
+"""
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+@pytest.fixture(scope="module")
+def import_env(db_setup):
+    """Per-user catalog; TestClient on a NullPool engine that records statements."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    catalog = {}
+    for uid in (USER_DB_ID, OTHER_USER_DB_ID):
+        sql("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'Import', :username)
+            ON CONFLICT (id) DO NOTHING
+        """, uid=uid, username=f"import_user_{uid}")
+        ids = {}
+        for muscle in ("Import Chest", "Import Back"):
+            ids[muscle] = sql("""
+                INSERT INTO muscles (name, is_global, created_by)
+                VALUES (:name, FALSE, :uid) RETURNING id
+            """, name=f"{muscle} {uid}", uid=uid)[0][0]
+        for muscle, exercise in (("Import Chest", "Barbell Importpress"),
+                                 ("Import Chest", "Cable Importfly"),
+                                 ("Import Back", "Import Row"),
+                                 ("Import Back", "Import Twin"),
+                                 ("Import Chest", "Import Twin")):
+            ids[(muscle, exercise)] = sql("""
+                INSERT INTO exercises (name, muscle, is_global, created_by)
+                VALUES (:name, :mid, FALSE, :uid) RETURNING id
+            """, name=exercise, mid=ids[muscle], uid=uid)[0][0]
+        sql("""
+            INSERT INTO exercise_alias (canonical_id, alias_name, lang, is_global, created_by)
+            VALUES (:eid, 'Import Fly', 'en', FALSE, :uid)
+        """, eid=ids[("Import Chest", "Cable Importfly")], uid=uid)
+        catalog[uid] = ids
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    statements = []
+    event.listen(test_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    from main import app
+    from app.services import training_import
+    client = TestClient(app, raise_server_exceptions=False)
+
+    yield {
+        "client": client,
+        "imp": training_import,
+        "sql": sql,
+        "catalog": catalog,
+        "statements": statements,
+    }
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    for table, col in (("training", "user_id"), ("exercise_alias", "created_by"),
+                       ("exercises", "created_by"), ("muscles", "created_by"), ("users", "id")):
+        sql(f"DELETE FROM {table} WHERE {col} IN (:a, :b)", a=USER_DB_ID, b=OTHER_USER_DB_ID)
+    su.dispose()
+
+
+@pytest.fixture
+def clean_history(import_env):
+    import_env["sql"]("DELETE FROM training WHERE user_id IN (:a, :b)",
+                      a=USER_DB_ID, b=OTHER_USER_DB_ID)
+
+
+def _import(env, body, user_id=USER_DB_ID, **params):
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    return env["client"].post("/api/v1/training/import", content=data, params=params,
+                              headers=_service_headers(user_id))
+
+
+def _history(env, user_id=USER_DB_ID):
+    return env["sql"]("""
+        SELECT t.date, e.name, m.name, t.set, t.weight, t.reps
+        FROM training t
+        JOIN exercises e ON e.id = t.exercise_id
+        JOIN muscles m ON m.id = t.muscle_id
+        WHERE t.user_id = :uid ORDER BY t.date, e.name, t.set
+    """, uid=user_id)
+
+
+class TestParsing:
+    """``parse_sets`` / ``detect_source`` without a database."""
+
+    def test_detect_source(self, import_env):
+        imp = import_env["imp"]
+        assert imp.detect_source(_STRONG_CSV.encode()) == "strong"
+        assert imp.detect_source(_HEVY_CSV.encode()) == "hevy"
+        assert imp.detect_source(b"id,date,muscle,exercise,set,weight,reps\n") == "gymbot"
+        assert imp.detect_source(b'  [{"date": "2024-01-01"}]') == "json"
+        assert imp.detect_source(b'{"date": "2024-01-01"}\n') == "json"
+        with pytest.raises(imp.ImportFormatError):
+            imp.detect_source(b"foo,bar\n1,2\n")
+
+    def test_strong_rows(self, import_env):
+        sets, rows, skipped = import_env["imp"].parse_sets(_STRONG_CSV.encode(), "strong")
+        assert (rows, skipped, len(sets)) == (7, 1, 6)
+        first = sets[0]
+        assert first.date == datetime(2024, 3, 15, 12, 0)
+        assert (first.exercise, first.set, first.weight, first.reps) == (
+            "Importpress (Barbell)", 1, Decimal("60.00"), 10)
+        assert [s.set for s in sets if s.exercise == "Mystery Machine"] == [1, 2]
+
+    def test_strong_semicolons_comma_decimals_and_pounds(self, import_env):
+        data = ("﻿Date;Exercise Name;Set Order;Weight;Weight Unit;Reps\n"
+                "2024-03-15 18:22:01;Importpress (Barbell);1;100,5;lbs;8\n").encode()
+        (only,), _, _ = import_env["imp"].parse_sets(data, "strong")
+        assert only.weight == Decimal("45.59")
+        assert only.reps == 8
+
+    def test_hevy_rows(self, import_env):
+        sets, rows, skipped = import_env["imp"].parse_sets(_HEVY_CSV.encode(), "hevy")
+        assert (rows, skipped) == (2, 0)
+        assert [(s.date, s.set, s.weight) for s in sets] == [
+            (datetime(2024, 3, 16, 12, 0), 1, Decimal("61.23")),
+            (datetime(2024, 3, 16, 12, 0), 2, Decimal("61.23")),
+        ]
+
+    def test_json_keeps_utc_times_and_set_numbers(self, import_env):
+        data = json.dumps([
+            {"date": "2024-03-15T18:22:01+02:00", "muscle": " Import  Chest ", "exercise": "X",
+             "set": 3, "weight": 52.25, "reps": 6},
+            {"date": "2024-03-16", "exercise": "X", "reps": 10},
+        ]).encode()
+        first, second = import_env["imp"].parse_sets(data, "json")[0]
+        assert (first.date, first.muscle, first.set, first.weight) == (
+            datetime(2024, 3, 15, 16, 22, 1), "Import Chest", 3, Decimal("52.25"))
+        assert (second.date, second.set, second.weight) == (datetime(2024, 3, 16, 12, 0), 1, Decimal("0.00"))
+
+    def test_bad_value_names_the_row(self, import_env):
+        imp = import_env["imp"]
+        data = _STRONG_CSV.replace("62.5", "heavy").encode()
+        with pytest.raises(imp.ImportFormatError, match="Row 2"):
+            imp.parse_sets(data, "strong")
+        with pytest.raises(imp.ImportFormatError, match="missing column 'start_time'"):
+            imp.parse_sets(_STRONG_CSV.encode(), "hevy")
+
+    def test_name_candidates(self, import_env):
+        assert import_env["imp"].name_candidates("Bench Press (Barbell)") == [
+            "Bench Press (Barbell)", "Barbell Bench Press", "Bench Press"]
+        assert import_env["imp"].name_candidates("Bench Press") == ["Bench Press"]
+
+
+class TestImportEndpoint:
+    def test_strong_import(self, import_env, clean_history):
+        import_env["statements"].clear()
+        resp = _import(import_env, _STRONG_CSV)
+        assert resp.status_code == 200, resp.text
+        assert resp.json() | {"seconds": 0} == {
+            "source": "strong", "rows": 7, "imported": 4, "duplicates": 0, "skipped": 1,
+            "unresolved": {"Mystery Machine": 2}, "seconds": 0,
+        }
+        assert _history(import_env) == [
+            (datetime(2024, 3, 15, 12), "Barbell Importpress", f"Import Chest {USER_DB_ID}", 1, Decimal("60.00"), 10),
+            (datetime(2024, 3, 15, 12), "Barbell Importpress", f"Import Chest {USER_DB_ID}", 2, Decimal("62.50"), 8),
+            (datetime(2024, 3, 15, 12), "Cable Importfly", f"Import Chest {USER_DB_ID}", 1, Decimal("20.00"), 12),
+            (datetime(2024, 3, 17, 12), "Import Row", f"Import Back {USER_DB_ID}", 1, Decimal("50.00"), 10),
+        ]
+        inserts = [s for s in import_env["statements"] if "INSERT INTO training" in s]
+        assert len(inserts) == 1
+
+    def test_reimport_adds_nothing(self, import_env, clean_history):
+        assert _import(import_env, _STRONG_CSV).json()["imported"] == 4
+        again = _import(import_env, _STRONG_CSV).json()
+        assert (again["imported"], again["duplicates"]) == (0, 4)
+        hevy = _import(import_env, _HEVY_CSV).json()
+        assert (hevy["source"], hevy["imported"]) == ("hevy", 2)
+        assert len(_history(import_env)) == 6
+
+    def test_own_export_round_trip(self, import_env, clean_history):
+        _import(import_env, _STRONG_CSV)
+        exported = import_env["client"].get("/api/v1/training/export",
+                                            headers=_service_headers(USER_DB_ID))
+        assert exported.status_code == 200
+        report = _import(import_env, exported.content).json()
+        assert (report["source"], report["imported"], report["duplicates"]) == ("gymbot", 0, 4)
+
+        ndjson = import_env["client"].get("/api/v1/training/export", params={"format": "ndjson"},
+                                          headers=_service_headers(USER_DB_ID)).content
+        import_env["sql"]("DELETE FROM training WHERE user_id = :uid", uid=USER_DB_ID)
+        assert _import(import_env, ndjson).json()["imported"] == 4
+
+    def test_muscle_in_the_file_wins(self, import_env, clean_history):
+        body = "\n".join(json.dumps(record) for record in (
+            {"date": "2024-04-01", "muscle": f"Import Back {USER_DB_ID}", "exercise": "Import Twin", "reps": 5},
+            {"date": "2024-04-01", "muscle": f"Import Chest {USER_DB_ID}", "exercise": "Import Twin", "reps": 7},
+        ))
+        assert _import(import_env, body).json()["imported"] == 2
+        assert {(row[2], row[5]) for row in _history(import_env)} == {
+            (f"Import Back {USER_DB_ID}", 5), (f"Import Chest {USER_DB_ID}", 7)}
+
+    def test_other_users_catalog_is_invisible(self, import_env, clean_history):
+        _import(import_env, _STRONG_CSV, user_id=OTHER_USER_DB_ID)
+        rows = _history(import_env, OTHER_USER_DB_ID)
+        assert {row[2] for row in rows} == {f"Import Chest {OTHER_USER_DB_ID}", f"Import Back {OTHER_USER_DB_ID}"}
+        assert _history(import_env) == []
+
+    def test_pounds_query_param(self, import_env, clean_history):
+        body = "Date,Exercise Name,Set Order,Weight,Reps\n2024-05-01 10:00:00,Import Row,1,100,5\n"
+        assert _import(import_env, body, unit="lb").json()["imported"] == 1
+        assert _history(import_env)[0][4] == Decimal("45.36")
+
+
+class TestErrors:
+    def test_unreadable_files_are_422(self, import_env, clean_history):
+        for body, params in ((b"", {}), (b"foo,bar\n1,2\n", {}), (b"[1, 2]", {}),
+                             (b"not json", {"source": "json"}),
+                             (_STRONG_CSV.replace("62.5", "heavy").encode(), {})):
+            resp = _import(import_env, body, **params)
+            assert resp.status_code == 422, body
+        assert _history(import_env) == []
+
+    def test_unknown_source_is_422(self, import_env):
+        assert _import(import_env, _STRONG_CSV, source="fitbod").status_code == 422
+
+    def test_too_large_is_413(self, import_env, monkeypatch):
+        monkeypatch.setattr(import_env["imp"], "MAX_IMPORT_BYTES", 10)
+        assert _import(import_env, _STRONG_CSV).status_code == 413
+
+    def test_chunked_body_is_counted_while_read(self, import_env, clean_history, monkeypatch):
+        monkeypatch.setattr(import_env["imp"], "MAX_IMPORT_BYTES", 64)
+        chunks = iter([_STRONG_CSV[:40].encode(), _STRONG_CSV[40:].encode()])
+        resp = import_env["client"].post("/api/v1/training/import", content=chunks,
+                                         headers=_service_headers(USER_DB_ID))
+        assert resp.status_code == 413
+        assert _history(import_env) == []
+
+
+class TestCli:
+    def test_prints_the_report(self, import_env, clean_history, tmp_path, capsys):
+        path = tmp_path / "strong.csv"
+        path.write_text(_STRONG_CSV)
+        assert import_env["imp"].main([str(path), "--user-id", str(USER_DB_ID)]) == 0
+        out = capsys.readouterr()
+        assert json.loads(out.out)["imported"] == 4
+        assert "merge: 4/4" in out.err
+
+    def test_bad_file_exits_2(self, import_env, tmp_path, capsys):
+        path = tmp_path / "bad.csv"
+        path.write_text("foo,bar\n")
+        assert import_env["imp"].main([str(path), "--user-id", str(USER_DB_ID)]) == 2
+        assert "error:" in capsys.readouterr().err
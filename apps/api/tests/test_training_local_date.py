@@ -0,0 +1,386 @@
+"""Tests for the write-time ``training.local_date`` (migration 0010).
+
+Validates:
+  1. The ``training_local_date`` trigger fills ``local_date`` from the owner's
+     ``users.timezone`` (UTC when unset) on insert and on a date change, and
+     leaves it alone when only weight/reps change.
+  2. ``PUT /users/me``: an unknown timezone -> 422; a new user is consistent
+     at once (``local_date_tz`` = their zone); a changed zone clears
+     ``local_date_tz`` and enqueues the backfill.
+  3. ``backfill_local_dates`` rewrites stale rows in batches, then sets
+     ``local_date_tz``; it does not flip the switch when the zone changed
+     mid-run.
+  4. Reads: with the switch on, activity / training days / summary /
+     week-compare take the ``.local`` statements and answer exactly as the
+     AT TIME ZONE path does.  End to end: a user registered without a zone
+     (the bot's upsert) who sends one (the Mini App's sign-in upsert) reads
+     through ``local_date`` once the queued backfill has run.
+
+Redis is unreachable in the test environment, so every read computes.
+"""
+
+import os
+import re
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD, rls_session  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core.config import get_settings  # noqa: E402
+
+USER_DB_ID = 500390  # dedicated user for local_date tests
+NEW_USER_ID = 500391  # registered through PUT /users/me
+
+_TZ = "Asia/Tbilisi"  # UTC+4, no DST
+_TODAY = datetime.utcnow().date()
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+@pytest.fixture(scope="module")
+def local_env(db_setup):
+    """Seed USER_DB_ID (zone ``_TZ``) and a TestClient; yields helpers."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    eng_su = create_engine(superuser_url, poolclass=NullPool)
+    with eng_su.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, registration_date, first_name, username, timezone)
+            VALUES (:uid, NOW(), 'Local', 'local_date_user', :tz)
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_DB_ID, "tz": _TZ})
+        mid = conn.execute(text("""
+            INSERT INTO muscles (name, is_global, created_by)
+            VALUES ('muscle_local', FALSE, :uid) RETURNING id
+        """), {"uid": USER_DB_ID}).scalar()
+        eids = [
+            conn.execute(text("""
+                INSERT INTO exercises (name, muscle, is_global, created_by)
+                VALUES (:name, :mid, FALSE, :uid) RETURNING id
+            """), {"name": f"ex_local_{e}", "mid": mid, "uid": USER_DB_ID}).scalar()
+            for e in range(2)
+        ]
+        # Late-evening UTC sets: most land on the NEXT local day in Tbilisi.
+        conn.execute(text("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (:tid, :d, :uid, :mid, :eid, :s, :w, 8)
+        """), [
+            {"tid": uuid.uuid4().hex, "uid": USER_DB_ID, "mid": mid, "eid": eids[day % 2],
+             "d": datetime(_TODAY.year, _TODAY.month, _TODAY.day)
+             - timedelta(days=day) + timedelta(hours=18 + day % 5, minutes=30),
+             "s": s, "w": 40 + day % 7 + 2.5 * s}
+            for day in range(1, 90, 2) for s in (1, 2)
+        ])
+        conn.commit()
+    eng_su.dispose()
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    from main import app
+    yield {
+        "client": TestClient(app, raise_server_exceptions=False),
+        "sql": sql,
+        "session_factory": test_session_local,
+        "mid": mid,
+        "eids": eids,
+    }
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    for uid in (USER_DB_ID, NEW_USER_ID):
+        for table, col in (("training", "user_id"), ("exercises", "created_by"),
+                           ("muscles", "created_by"), ("users", "id")):
+            sql(f"DELETE FROM {table} WHERE {col} = :uid", uid=uid)
+    su.dispose()
+
+
+def _stale_rows(sql, uid=USER_DB_ID):
+    """Rows whose local_date disagrees with the owner's current zone."""
+    return sql("""
+        SELECT COUNT(*) FROM training t JOIN users u ON u.id = t.user_id
+        WHERE t.user_id = :uid AND t.local_date IS DISTINCT FROM
+              (t.date AT TIME ZONE 'UTC' AT TIME ZONE COALESCE(u.timezone, 'UTC'))::date
+    """, uid=uid)[0][0]
+
+
+def _backfill(env, uid=USER_DB_ID, batch=5000):
+    from app.services.local_date import backfill_local_dates
+
+    with rls_session(env["session_factory"], user_id=uid, role="user") as db:
+        db.info["app_user_id"], db.info["app_role"] = str(uid), "user"
+        return backfill_local_dates(db, uid, batch=batch)
+
+
+# ---------------------------------------------------------------------------
+# 1. Trigger
+# ---------------------------------------------------------------------------
+
+class TestTrigger:
+    def test_seeded_rows_follow_the_user_zone(self, local_env):
+        assert _stale_rows(local_env["sql"]) == 0
+        shifted = local_env["sql"]("""
+            SELECT COUNT(*) FROM training
+            WHERE user_id = :uid AND local_date = date::date + 1
+        """, uid=USER_DB_ID)[0][0]
+        assert shifted > 0  # 20:00+ UTC is already tomorrow in Tbilisi
+
+    def test_insert_update_move(self, local_env):
+        sql, tid = local_env["sql"], uuid.uuid4().hex
+        sql("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (:tid, '2024-03-15 22:30', :uid, :mid, :eid, 9, 50, 5)
+        """, tid=tid, uid=USER_DB_ID, mid=local_env["mid"], eid=local_env["eids"][0])
+        local = "SELECT local_date::text FROM training WHERE id = :tid"
+        assert sql(local, tid=tid)[0][0] == "2024-03-16"
+
+        sql("UPDATE training SET weight = 55 WHERE id = :tid", tid=tid)
+        assert sql(local, tid=tid)[0][0] == "2024-03-16"
+
+        sql("UPDATE training SET date = '2024-03-20 12:00' WHERE id = :tid", tid=tid)
+        assert sql(local, tid=tid)[0][0] == "2024-03-20"
+        sql("DELETE FROM training WHERE id = :tid", tid=tid)
+
+    def test_move_endpoint_recomputes(self, local_env):
+        sql, tid = local_env["sql"], uuid.uuid4().hex
+        sql("""
+            INSERT INTO training (id, date, user_id, muscle_id, exercise_id, set, weight, reps)
+            VALUES (:tid, '2024-01-10 23:00', :uid, :mid, :eid, 9, 50, 5)
+        """, tid=tid, uid=USER_DB_ID, mid=local_env["mid"], eid=local_env["eids"][0])
+        resp = local_env["client"].patch(
+            f"/api/v1/training/{tid}/move", json={"date": "2024-01-05"},
+            headers=_service_headers(USER_DB_ID),
+        )
+        assert resp.status_code == 200, resp.text
+        assert sql("SELECT local_date::text FROM training WHERE id = :tid", tid=tid)[0][0] == "2024-01-05"
+        sql("DELETE FROM training WHERE id = :tid", tid=tid)
+
+
+# ---------------------------------------------------------------------------
+# 2. PUT /users/me
+# ---------------------------------------------------------------------------
+
+class TestUpsertTimezone:
+    def test_unknown_zone_422(self, local_env):
+        resp = local_env["client"].put(
+            "/api/v1/users/me", json={"timezone": "Mars/Olympus"},
+            headers=_service_headers(USER_DB_ID),
+        )
+        assert resp.status_code == 422
+
+    def test_new_user_is_consistent(self, local_env):
+        resp = local_env["client"].put(
+            "/api/v1/users/me", json={"first_name": "New", "timezone": "Europe/Berlin"},
+            headers=_service_headers(NEW_USER_ID),
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["timezone"] == "Europe/Berlin"
+        assert local_env["sql"](
+            "SELECT local_date_tz FROM users WHERE id = :uid", uid=NEW_USER_ID
+        )[0][0] == "Europe/Berlin"
+
+    def test_zone_change_clears_switch_and_enqueues(self, local_env, monkeypatch):
+        from app.api.v1 import bot_router
+
+        queued = []
+        monkeypatch.setattr(bot_router, "enqueue_backfill", queued.append)
+        sql = local_env["sql"]
+        sql("UPDATE users SET local_date_tz = :tz WHERE id = :uid", tz=_TZ, uid=USER_DB_ID)
+        client = local_env["client"]
+
+        same = client.put("/api/v1/users/me", json={"timezone": _TZ},
+                          headers=_service_headers(USER_DB_ID))
+        assert same.status_code == 200 and queued == []
+
+        try:
+            changed = client.put("/api/v1/users/me", json={"timezone": "America/New_York"},
+                                 headers=_service_headers(USER_DB_ID))
+            assert changed.status_code == 200 and queued == [USER_DB_ID]
+            assert sql("SELECT local_date_tz FROM users WHERE id = :uid", uid=USER_DB_ID)[0][0] is None
+            # Existing rows keep the old zone until the backfill runs.
+            assert _stale_rows(sql) > 0
+        finally:
+            sql("UPDATE users SET timezone = :tz, local_date_tz = NULL WHERE id = :uid",
+                tz=_TZ, uid=USER_DB_ID)
+
+
+# ---------------------------------------------------------------------------
+# 3. Backfill
+# ---------------------------------------------------------------------------
+
+class TestBackfill:
+    def test_batches_then_switch(self, local_env):
+        sql = local_env["sql"]
+        sql("UPDATE training SET local_date = NULL WHERE user_id = :uid", uid=USER_DB_ID)
+        sql("UPDATE users SET local_date_tz = NULL WHERE id = :uid", uid=USER_DB_ID)
+        total = sql("SELECT COUNT(*) FROM training WHERE user_id = :uid", uid=USER_DB_ID)[0][0]
+
+        assert _backfill(local_env, batch=7) == total
+        assert _stale_rows(sql) == 0
+        assert sql("SELECT local_date_tz FROM users WHERE id = :uid", uid=USER_DB_ID)[0][0] == _TZ
+        assert _backfill(local_env) == 0  # idempotent
+
+    def test_zone_changed_mid_run_keeps_switch_off(self, local_env, monkeypatch):
+        from sqlalchemy import text
+        from app.services import local_date
+
+        sql = local_env["sql"]
+        sql("UPDATE users SET local_date_tz = NULL WHERE id = :uid", uid=USER_DB_ID)
+        monkeypatch.setattr(local_date, "_LOCK_USER_SQL", text("SELECT 'Europe/Paris'"))
+        try:
+            _backfill(local_env)
+            assert sql("SELECT local_date_tz FROM users WHERE id = :uid", uid=USER_DB_ID)[0][0] is None
+        finally:
+            monkeypatch.undo()
+            _backfill(local_env)
+
+    def test_jobs_registered(self):
+        from app.core import jobs
+
+        jobs._import_job_modules()
+        names = {spec.name for spec in jobs.registered_jobs()}
+        assert {"training.local_date.backfill", "training.local_date.backfill_all"} <= names
+
+
+# ---------------------------------------------------------------------------
+# 4. Reads: .local statements answer like the AT TIME ZONE path
+# ---------------------------------------------------------------------------
+
+_READS = (
+    ("/analytics/activity", {"from": str(_TODAY - timedelta(days=120)), "to": str(_TODAY)}),
+    ("/training/days", {"from": str(_TODAY - timedelta(days=120)), "to": str(_TODAY)}),
+    ("/analytics/summary", {}),
+    ("/analytics/week-compare", {}),
+)
+
+
+class TestLocalReads:
+    @pytest.fixture
+    def switch_log(self, local_env, monkeypatch):
+        """Record every ``use_local_date`` decision the routers make."""
+        from app.api.v1 import analytics_router, training_history_router
+        from app.services.local_date import use_local_date
+
+        decisions = []
+
+        def _spy(db, uid, tz):
+            decision = use_local_date(db, uid, tz)
+            decisions.append(decision)
+            return decision
+
+        for module in (analytics_router, training_history_router):
+            monkeypatch.setattr(module, "use_local_date", _spy)
+        _backfill(local_env)
+        return decisions
+
+    @pytest.mark.parametrize("path,params", _READS)
+    def test_local_matches_tz_path(self, local_env, switch_log, path, params):
+        client, sql = local_env["client"], local_env["sql"]
+        params = {**params, "tz": _TZ}
+
+        local = client.get(f"/api/v1{path}", params=params, headers=_service_headers(USER_DB_ID))
+        assert local.status_code == 200, local.text
+        assert switch_log and all(switch_log)
+
+        sql("UPDATE users SET local_date_tz = NULL WHERE id = :uid", uid=USER_DB_ID)
+        switch_log.clear()
+        fallback = client.get(f"/api/v1{path}", params=params, headers=_service_headers(USER_DB_ID))
+        assert fallback.status_code == 200
+        assert switch_log and not any(switch_log)
+        assert local.json() == fallback.json()
+        assert local.json()  # the comparison is not vacuous
+
+    def test_other_zone_uses_tz_path(self, local_env, switch_log):
+        resp = local_env["client"].get(
+            "/api/v1/analytics/activity",
+            params={"from": str(_TODAY - timedelta(days=30)), "to": str(_TODAY),
+                    "tz": "Europe/Berlin"},
+            headers=_service_headers(USER_DB_ID),
+        )
+        assert resp.status_code == 200
+        assert switch_log == [False]
+
+    def test_zone_upsert_then_backfill_reads_local_date(self, local_env, switch_log, monkeypatch):
+        from sqlalchemy import event
+        from app.api.v1 import bot_router
+
+        client, sql = local_env["client"], local_env["sql"]
+        queued = []
+        monkeypatch.setattr(bot_router, "enqueue_backfill", queued.append)
+        # Registered by the bot: no zone, local days in UTC.
+        sql("UPDATE users SET timezone = NULL, local_date_tz = NULL WHERE id = :uid", uid=USER_DB_ID)
+        _backfill(local_env)
+        try:
+            resp = client.put("/api/v1/users/me", json={"timezone": _TZ},
+                              headers=_service_headers(USER_DB_ID))
+            assert resp.status_code == 200 and queued == [USER_DB_ID]
+            for uid in queued:  # what the job worker runs
+                _backfill(local_env, uid)
+
+            statements = []
+            engine = local_env["session_factory"].kw["bind"]
+
+            def _record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(engine, "before_cursor_execute", _record)
+            switch_log.clear()
+            try:
+                read = client.get(
+                    "/api/v1/analytics/activity",
+                    params={"from": str(_TODAY - timedelta(days=30)), "to": str(_TODAY), "tz": _TZ},
+                    headers=_service_headers(USER_DB_ID),
+                )
+            finally:
+                event.remove(engine, "before_cursor_execute", _record)
+            assert read.status_code == 200, read.text
+            assert switch_log == [True]
+            reads = [st for st in statements if re.search(r"\blocal_date\b", st)
+                     and "FROM training" in st]
+            assert reads and all("AT TIME ZONE" not in st for st in reads)
+        finally:
+            sql("UPDATE users SET timezone = :tz WHERE id = :uid", tz=_TZ, uid=USER_DB_ID)
+            _backfill(local_env)
@@ -0,0 +1,347 @@
+"""Tests for the yearly RANGE partitioning of ``training`` (migration 0012).
+
+Validates:
+  1. Layout: ``training`` is partitioned on ``date`` with a (id, date) primary
+     key; ``training_history``, ``training_default`` and this and next year's
+     partitions exist, and EVERY partition carries the 0002 RLS policies.
+  2. ``training_ensure_partitions`` (through ``ensure_partitions`` as
+     ``app_rw``) creates missing years, moves rows out of the default
+     partition, is idempotent, and restores the caller's ``app.role``.
+  3. Pruning: recent-window statements plan against the current year's
+     partition only; the ``/training/day`` PR window never reads partitions
+     after the requested day.
+  4. The online path: downgrade to a plain table and upgrade again keeps
+     every row, attaches the heap as ``training_history`` and leaves no
+     temporary constraint behind.
+  5. The history split (``split_history`` as ``app_rw``): seeded history rows
+     end up in their year's partition with the RLS policies, the history is
+     left empty, a second run is a no-op, and a recent window no longer
+     scans ``training_history`` while an old-year window reads only its
+     year.  Runs after 4, so it also splits the partial current year that
+     the online path leaves behind.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _ALEMBIC_DIR, rls_session  # noqa: E402
+from tests.test_query_plans import _registered  # noqa: E402
+
+USER_DB_ID = 500410  # dedicated user for partition tests
+
+_NOW = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+_YEAR = _NOW.year
+_YEAR_START = datetime(_YEAR, 1, 1)
+_NEXT_YEAR_START = datetime(_YEAR + 1, 1, 1)
+
+_PARTITIONS_SQL = """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'public.training'::regclass
+    ORDER BY c.relname
+"""
+
+
+@pytest.fixture(scope="module")
+def su_engine(db_setup):
+    """Superuser engine; seeds USER_DB_ID, removes it again after the module."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import NullPool
+
+    eng = create_engine(db_setup["superuser_url"], poolclass=NullPool)
+    with eng.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO users (id, registration_date, first_name, username)
+            VALUES (:uid, NOW(), 'Part', 'partition_user')
+            ON CONFLICT (id) DO NOTHING
+        """), {"uid": USER_DB_ID})
+        conn.commit()
+    yield eng
+    with eng.connect() as conn:
+        conn.execute(text("DELETE FROM training WHERE user_id = :uid"), {"uid": USER_DB_ID})
+        conn.execute(text("DELETE FROM users WHERE id = :uid"), {"uid": USER_DB_ID})
+        conn.commit()
+    eng.dispose()
+
+
+def _partitions(conn) -> list:
+    from sqlalchemy import text
+
+    return [row[0] for row in conn.execute(text(_PARTITIONS_SQL))]
+
+
+def _scanned_partitions(plan: dict) -> set:
+    from app.core.query_registry import guarded_relation, iter_plan_nodes
+
+    return {
+        node["Relation Name"]
+        for node in iter_plan_nodes(plan)
+        if guarded_relation(node.get("Relation Name")) == "training"
+    }
+
+
+def _explain(session, name: str, params: dict) -> dict:
+    from sqlalchemy import text
+
+    query = next(q for q in _registered() if q.name == name)
+    raw = session.execute(text("EXPLAIN (FORMAT JSON) " + query.clause.text), params).scalar_one()
+    doc = raw if isinstance(raw, list) else json.loads(raw)
+    return doc[0]["Plan"]
+
+
+class TestLayout:
+    def test_training_is_range_partitioned_on_date(self, su_engine):
+        from sqlalchemy import text
+
+        with su_engine.connect() as conn:
+            key = conn.execute(text(
+                "SELECT pg_get_partkeydef('public.training'::regclass)"
+            )).scalar()
+            pk = conn.execute(text("""
+                SELECT pg_get_constraintdef(oid) FROM pg_constraint
+                WHERE conrelid = 'public.training'::regclass AND contype = 'p'
+            """)).scalar()
+        assert key == "RANGE (date)"
+        assert pk == "PRIMARY KEY (id, date)"
+
+    def test_history_default_and_yearly_partitions_exist(self, su_engine):
+        with su_engine.connect() as conn:
+            names = set(_partitions(conn))
+        assert {
+            "training_history", "training_default",
+            f"training_p{_YEAR}", f"training_p{_YEAR + 1}",
+        } <= names
+
+    def test_every_partition_has_the_user_rls_policies(self, su_engine):
+        from sqlalchemy import text
+
+        with su_engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT c.relname, c.relrowsecurity, c.relforcerowsecurity,
+                       ARRAY(SELECT p.polname::text FROM pg_policy p
+                             WHERE p.polrelid = c.oid ORDER BY p.polname)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'public.training'::regclass
+            """)).fetchall()
+        assert rows
+        for name, enabled, forced, policies in rows:
+            assert enabled and forced, name
+            assert policies == [
+                "rls_user_delete", "rls_user_insert", "rls_user_select", "rls_user_update",
+            ], name
+
+
+class TestEnsurePartitions:
+    def test_creates_years_and_moves_default_rows(self, su_engine, app_rw_session_factory):
+        from sqlalchemy import text
+        from app.services.training_partitions import ensure_partitions
+
+        far = datetime(_YEAR + 3, 2, 1, 12)
+        tid = uuid.uuid4().hex
+        with su_engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO training (id, date, user_id, set, weight, reps)
+                VALUES (:tid, :d, :uid, 1, 50, 5)
+            """), {"tid": tid, "d": far, "uid": USER_DB_ID})
+            conn.commit()
+            assert conn.execute(text(
+                "SELECT tableoid::regclass::text FROM training WHERE id = :tid"
+            ), {"tid": tid}).scalar() == "training_default"
+
+        try:
+            with rls_session(app_rw_session_factory, user_id=USER_DB_ID, role="user") as s:
+                assert ensure_partitions(s, years_ahead=3) == 2
+                assert ensure_partitions(s, years_ahead=3) == 0
+
+            with su_engine.connect() as conn:
+                assert conn.execute(text(
+                    "SELECT tableoid::regclass::text FROM training WHERE id = :tid"
+                ), {"tid": tid}).scalar() == f"training_p{_YEAR + 3}"
+                assert conn.execute(text(
+                    "SELECT COUNT(*) FROM training_default"
+                )).scalar() == 0
+                policies = conn.execute(text(
+                    "SELECT COUNT(*) FROM pg_policy WHERE polrelid = CAST(:t AS regclass)"
+                ), {"t": f"training_p{_YEAR + 3}"}).scalar()
+                assert policies == 4
+        finally:
+            with su_engine.connect() as conn:
+                conn.execute(text("DELETE FROM training WHERE id = :tid"), {"tid": tid})
+                for year in (_YEAR + 2, _YEAR + 3):
+                    conn.execute(text(f"DROP TABLE IF EXISTS training_p{year}"))
+                conn.commit()
+
+    def test_restores_the_callers_role(self, su_engine, app_rw_session_factory):
+        from sqlalchemy import text
+
+        with rls_session(app_rw_session_factory, user_id=USER_DB_ID, role="user") as s:
+            assert s.execute(text("SELECT public.training_ensure_partitions(1)")).scalar() == 0
+            assert s.execute(text("SELECT current_setting('app.role', true)")).scalar() == "user"
+            s.rollback()
+
+
+class TestPartitionPruning:
+    """Plan-time pruning of the registered statements (bound parameters)."""
+
+    # A window inside the current year, ending today.
+    _FROM = max(_NOW - timedelta(days=7), _YEAR_START)
+    _TO = min(_NOW + timedelta(days=1), _NEXT_YEAR_START)
+
+    @pytest.mark.parametrize("name, params", [
+        ("analytics.activity.utc", {"from_dt": _FROM, "to_exclusive": _TO}),
+        ("training_history.days.plain.utc", {"dt_from": _FROM, "dt_to": _TO}),
+    ])
+    def test_recent_window_reads_only_the_current_year(
+        self, su_engine, app_rw_session_factory, name, params
+    ):
+        with rls_session(app_rw_session_factory, user_id=USER_DB_ID, role="user") as s:
+            plan = _explain(s, name, {"uid": USER_DB_ID, **params})
+        assert _scanned_partitions(plan) == {f"training_p{_YEAR}"}
+
+    def test_pr_window_stops_at_the_requested_day(self, su_engine, app_rw_session_factory):
+        with rls_session(app_rw_session_factory, user_id=USER_DB_ID, role="user") as s:
+            plan = _explain(s, "training_history.day", {
+                "uid": USER_DB_ID, "dt_from": self._FROM, "dt_to": self._TO,
+            })
+        scanned = _scanned_partitions(plan)
+        assert "training_history" in scanned  # earlier years are "prior" sets
+        assert f"training_p{_YEAR + 1}" not in scanned
+        assert "training_default" not in scanned
+
+
+class TestOnlineMigration:
+    """Round trip through the plain-table layout (0011) and back to head."""
+
+    @staticmethod
+    def _alembic(url: str, *args: str) -> None:
+        env = {**os.environ, "DATABASE_URL": url}
+        subprocess.run(["alembic", *args], cwd=_ALEMBIC_DIR, env=env, check=True,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def test_downgrade_then_upgrade_attaches_the_heap(self, db_setup, su_engine):
+        from sqlalchemy import text
+
+        url = db_setup["superuser_url"]
+        with su_engine.connect() as conn:
+            conn.execute(text("""
+                INSERT INTO training (id, date, user_id, set, weight, reps)
+                VALUES (:tid, :d, :uid, 1, 60, 5)
+            """), {"tid": uuid.uuid4().hex, "d": _NOW - timedelta(days=400), "uid": USER_DB_ID})
+            conn.commit()
+            before = conn.execute(text("SELECT COUNT(*) FROM training")).scalar()
+
+        self._alembic(url, "downgrade", "0011_training_covering_indexes")
+        with su_engine.connect() as conn:
+            assert conn.execute(text(
+                "SELECT relkind FROM pg_class WHERE oid = 'public.training'::regclass"
+            )).scalar() == "r"
+            assert conn.execute(text("SELECT COUNT(*) FROM training")).scalar() == before
+
+        self._alembic(url, "upgrade", "head")
+        with su_engine.connect() as conn:
+            assert conn.execute(text(
+                "SELECT relkind FROM pg_class WHERE oid = 'public.training'::regclass"
+            )).scalar() == "p"
+            assert conn.execute(text("SELECT COUNT(*) FROM training")).scalar() == before
+            assert conn.execute(text(
+                "SELECT COUNT(*) FROM training_history"
+            )).scalar() == before
+            assert conn.execute(text("""
+                SELECT COUNT(*) FROM pg_constraint
+                WHERE conname = 'training_history_bound'
+            """)).scalar() == 0
+            # Every parent index has its attached counterpart on the history.
+            parent, history = conn.execute(text("""
+                SELECT
+                    (SELECT COUNT(*) FROM pg_index WHERE indrelid = 'public.training'::regclass),
+                    (SELECT COUNT(*) FROM pg_index WHERE indrelid = 'public.training_history'::regclass)
+            """)).one()
+            assert parent == history
+            assert "training_default" in _partitions(conn)
+
+
+class TestHistorySplit:
+    """``training_split_history_*`` through the ``split_history`` service."""
+
+    _FROM = TestPartitionPruning._FROM
+    _TO = TestPartitionPruning._TO
+
+    @staticmethod
+    def _history_to(conn) -> datetime:
+        from sqlalchemy import text
+
+        bound = conn.execute(text("""
+            SELECT substring(pg_get_expr(relpartbound, oid) FROM $re$TO \('([^']+)'\)$re$)
+            FROM pg_class WHERE oid = 'public.training_history'::regclass
+        """)).scalar()
+        return datetime.fromisoformat(bound)
+
+    def _window_plan(self, session_factory, dt_from, dt_to) -> set:
+        with rls_session(session_factory, user_id=USER_DB_ID, role="user") as s:
+            plan = _explain(s, "training_history.days.plain.utc", {
+                "uid": USER_DB_ID, "dt_from": dt_from, "dt_to": dt_to,
+            })
+        return _scanned_partitions(plan)
+
+    def test_split_moves_history_into_years(self, su_engine, app_rw_session_factory):
+        from sqlalchemy import text
+        from app.services.training_partitions import split_history
+
+        old_year = _YEAR - 2
+        seeded = {
+            uuid.uuid4().hex: datetime(old_year, 3, 14, 9),
+            uuid.uuid4().hex: datetime(_YEAR - 1, 11, 2, 18),
+        }
+        with su_engine.connect() as conn:
+            if self._history_to(conn) > self._FROM:
+                seeded[uuid.uuid4().hex] = self._FROM
+            for tid, day in seeded.items():
+                conn.execute(text("""
+                    INSERT INTO training (id, date, user_id, set, weight, reps)
+                    VALUES (:tid, :d, :uid, 1, 70, 5)
+                """), {"tid": tid, "d": day, "uid": USER_DB_ID})
+            conn.commit()
+            before = conn.execute(text("SELECT COUNT(*) FROM training")).scalar()
+            assert conn.execute(text("SELECT COUNT(*) FROM training_history")).scalar() >= 2
+
+        with rls_session(app_rw_session_factory, user_id=USER_DB_ID, role="user") as s:
+            assert split_history(s, batch=2) > 0
+            assert split_history(s, batch=2) == 0
+
+        with su_engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM training")).scalar() == before
+            assert conn.execute(text("SELECT COUNT(*) FROM training_history")).scalar() == 0
+            for tid, day in seeded.items():
+                assert conn.execute(text(
+                    "SELECT tableoid::regclass::text FROM training WHERE id = :tid"
+                ), {"tid": tid}).scalar() == f"training_p{day.year}"
+            assert self._history_to(conn) <= datetime(old_year, 1, 1)
+            policies = conn.execute(text(
+                "SELECT COUNT(*) FROM pg_policy WHERE polrelid = CAST(:t AS regclass)"
+            ), {"t": f"training_p{old_year}"}).scalar()
+            assert policies == 4
+            assert conn.execute(text(
+                "SELECT to_regclass('public.training_split')"
+            )).scalar() is None
+
+    def test_recent_window_skips_training_history(self, su_engine, app_rw_session_factory):
+        assert self._window_plan(app_rw_session_factory, self._FROM, self._TO) == {
+            f"training_p{_YEAR}"
+        }
+
+    def test_old_window_reads_only_its_year(self, su_engine, app_rw_session_factory):
+        old_year = _YEAR - 2
+        scanned = self._window_plan(
+            app_rw_session_factory, datetime(old_year, 3, 1), datetime(old_year, 4, 1)
+        )
+        assert scanned == {f"training_p{old_year}"}
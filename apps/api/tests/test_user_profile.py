@@ -0,0 +1,275 @@
+"""Tests for the conditional ``PUT /users/me`` (app/services/user_profile.py).
+
+Validates:
+  1. The first upsert creates the user; repeating the same body is answered
+     from the cached profile without a single ``users`` statement.
+  2. On a cache miss, a body that changes nothing issues no UPDATE; a changed
+     name is written.
+  3. ``last_interaction`` is recorded in Redis (the flush job enqueued once)
+     and ``flush_last_interactions`` writes the batch in one UPDATE that only
+     moves the column forward.
+  4. Redis down, or ``USER_TOUCH_FLUSH_SECONDS=0``: every upsert writes
+     ``last_interaction`` with the row, as before.
+
+No Redis server is needed: ``_ProfileRedis`` adds the hash / rename commands
+the touch and flush use to the cache refresh tests' ``_RefreshRedis``.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tests.conftest import _APP_ROLE, _APP_ROLE_PASSWORD, rls_session  # noqa: E402
+from tests.test_cache_refresh import _RefreshRedis  # noqa: E402
+from tests.test_cache_single_flight import _ensure_env_defaults  # noqa: E402
+
+_ensure_env_defaults()
+
+from app.core.config import get_settings  # noqa: E402
+
+USER_ID = 500470  # registered through PUT /users/me
+OTHER_ID = 500471  # second user for the batched flush
+
+_BODY = {"first_name": "Profile", "lastname": "Tester", "username": "profile_tester"}
+
+
+def _service_headers(user_id: int) -> dict:
+    return {
+        "X-Service-Token": "test_bot_service_token_rls",
+        "X-Act-As-User": str(user_id),
+    }
+
+
+def _upserts(outcome):
+    value = REGISTRY.get_sample_value("gym_api_user_upserts_total", {"outcome": outcome})
+    return value or 0.0
+
+
+class _ProfileRedis(_RefreshRedis):
+    """``_RefreshRedis`` with HSET's new-field count, EXISTS and RENAMENX."""
+
+    def hset(self, key, field, value):
+        with self._lock:
+            h = dict(self._live(key) or {})
+            added = int(field not in h)
+            h[field] = value
+            self._put(key, h)
+            return added
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._live(key) is not None)
+
+    def renamenx(self, src, dst):
+        import redis
+
+        with self._lock:
+            value = self._live(src)
+            if value is None:
+                raise redis.ResponseError("no such key")
+            if self._live(dst) is not None:
+                return False
+            self._data[dst] = self._data.pop(src)
+            return True
+
+
+@pytest.fixture(scope="module")
+def profile_env(db_setup):
+    """TestClient on the RLS role plus a log of the statements it runs."""
+    from urllib.parse import urlparse
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    superuser_url = db_setup["superuser_url"]
+    app_rw_url = db_setup["app_rw_url"]
+
+    parsed = urlparse(app_rw_url)
+    os.environ["APP_DB_USER"] = _APP_ROLE
+    os.environ["APP_DB_PASSWORD"] = _APP_ROLE_PASSWORD
+    os.environ["DB_HOST"] = parsed.hostname or "127.0.0.1"
+    os.environ["DB_PORT"] = str(parsed.port or 5432)
+    os.environ["DB_NAME"] = parsed.path.lstrip("/")
+    get_settings.cache_clear()
+
+    import app.core.database as db_module
+    from app.core.database import _set_rls_gucs
+
+    statements = []
+    test_engine = create_engine(app_rw_url, poolclass=NullPool)
+    event.listen(test_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    test_session_local = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    event.listen(test_session_local, "after_begin", _set_rls_gucs)
+    original_session_local = db_module.SessionLocal
+    db_module.SessionLocal = test_session_local
+
+    su = create_engine(superuser_url, poolclass=NullPool)
+
+    def sql(statement, **params):
+        with su.connect() as conn:
+            result = conn.execute(text(statement), params)
+            rows = result.fetchall() if result.returns_rows else None
+            conn.commit()
+        return rows
+
+    for uid in (USER_ID, OTHER_ID):
+        sql("DELETE FROM users WHERE id = :uid", uid=uid)
+
+    from main import app
+    yield {
+        "client": TestClient(app, raise_server_exceptions=False),
+        "sql": sql,
+        "statements": statements,
+        "session_factory": test_session_local,
+    }
+
+    db_module.SessionLocal = original_session_local
+    test_engine.dispose()
+    for uid in (USER_ID, OTHER_ID):
+        sql("DELETE FROM users WHERE id = :uid", uid=uid)
+    su.dispose()
+
+
+@pytest.fixture
+def profile_redis(profile_env, monkeypatch):
+    """A fresh ``_ProfileRedis``; flush enqueues are recorded, not queued."""
+    from app.services import user_profile
+
+    client = _ProfileRedis()
+    queued = []
+    monkeypatch.setattr(user_profile, "_get_client", lambda: client)
+    monkeypatch.setattr(user_profile, "enqueue",
+                        lambda name, **kwargs: queued.append((name, kwargs)))
+    client.queued = queued
+    return client
+
+
+def _put(env, body, uid=USER_ID):
+    resp = env["client"].put("/api/v1/users/me", json=body, headers=_service_headers(uid))
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _user_statements(env):
+    return [s for s in env["statements"] if "users" in s]
+
+
+def _last_interaction(env, uid=USER_ID):
+    return env["sql"]("SELECT last_interaction FROM users WHERE id = :uid", uid=uid)[0][0]
+
+
+def _flush(env):
+    from app.services.user_profile import flush_last_interactions
+
+    with rls_session(env["session_factory"], role="admin") as db:
+        db.info["app_user_id"], db.info["app_role"] = "", "admin"
+        return flush_last_interactions(db)
+
+
+# ---------------------------------------------------------------------------
+# 1. Fingerprint hits
+# ---------------------------------------------------------------------------
+
+class TestConditionalUpsert:
+    def test_repeat_is_served_from_cache(self, profile_env, profile_redis):
+        created = _put(profile_env, _BODY)
+        assert created["first_name"] == "Profile"
+        assert _last_interaction(profile_env) is not None  # written with the new row
+
+        before = _upserts("cached")
+        profile_env["statements"].clear()
+        again = _put(profile_env, _BODY)
+        assert _user_statements(profile_env) == []
+        assert _upserts("cached") == before + 1
+        assert {k: again[k] for k in _BODY} == _BODY
+        assert again["registration_date"] == created["registration_date"]
+
+    def test_unchanged_body_issues_no_update(self, profile_env, profile_redis):
+        _put(profile_env, _BODY)  # cache miss (fresh Redis): reads the row
+        profile_env["statements"].clear()
+        before = _upserts("unchanged")
+        _put(profile_env, {"first_name": "Profile"})  # other fingerprint, same value
+        assert _upserts("unchanged") == before + 1
+        assert not [s for s in _user_statements(profile_env) if "UPDATE users" in s]
+
+    def test_changed_name_is_written(self, profile_env, profile_redis):
+        _put(profile_env, _BODY)
+        before = _upserts("updated")
+        renamed = _put(profile_env, dict(_BODY, first_name="Renamed"))
+        assert renamed["first_name"] == "Renamed"
+        assert _upserts("updated") == before + 1
+        assert profile_env["sql"](
+            "SELECT first_name FROM users WHERE id = :uid", uid=USER_ID
+        )[0][0] == "Renamed"
+        # The new body is the cached one now; the old one reads the row again.
+        _put(profile_env, _BODY)
+        assert profile_env["sql"](
+            "SELECT first_name FROM users WHERE id = :uid", uid=USER_ID
+        )[0][0] == "Profile"
+
+
+# ---------------------------------------------------------------------------
+# 2. Batched last_interaction
+# ---------------------------------------------------------------------------
+
+class TestBatchedLastInteraction:
+    def test_touch_defers_and_flush_writes(self, profile_env, profile_redis):
+        from app.services import user_profile
+
+        _put(profile_env, _BODY)
+        _put(profile_env, _BODY, uid=OTHER_ID)
+        _flush(profile_env)
+        old = datetime(2020, 1, 1)
+        profile_env["sql"]("UPDATE users SET last_interaction = :ts WHERE id IN (:a, :b)",
+                           ts=old, a=USER_ID, b=OTHER_ID)
+
+        profile_redis.queued.clear()
+        _put(profile_env, _BODY)
+        _put(profile_env, _BODY, uid=OTHER_ID)
+        _put(profile_env, _BODY)
+        assert _last_interaction(profile_env) == old  # recorded, not written
+        assert [name for name, _ in profile_redis.queued] == [user_profile.FLUSH_JOB] * 2
+
+        profile_env["statements"].clear()
+        assert _flush(profile_env) == 2
+        updates = [s for s in profile_env["statements"] if "UPDATE users" in s]
+        assert len(updates) == 1
+        for uid in (USER_ID, OTHER_ID):
+            assert _last_interaction(profile_env, uid) > old
+        assert _flush(profile_env) == 0  # nothing recorded since
+
+    def test_flush_only_moves_forward(self, profile_env, profile_redis):
+        from app.services import user_profile
+
+        _put(profile_env, _BODY)
+        future = datetime.utcnow() + timedelta(days=1)
+        profile_env["sql"]("UPDATE users SET last_interaction = :ts WHERE id = :uid",
+                           ts=future, uid=USER_ID)
+        assert user_profile.touch(USER_ID, datetime.utcnow())
+        assert _flush(profile_env) == 1
+        assert _last_interaction(profile_env) == future
+
+    def test_redis_down_writes_with_the_row(self, profile_env, monkeypatch):
+        from app.services import user_profile
+
+        monkeypatch.setattr(user_profile, "_get_client", lambda: None)
+        profile_env["sql"]("UPDATE users SET last_interaction = :ts WHERE id = :uid",
+                           ts=datetime(2020, 1, 1), uid=USER_ID)
+        _put(profile_env, _BODY)
+        assert _last_interaction(profile_env) > datetime(2020, 1, 1)
+
+    def test_interval_zero_disables_batching(self, profile_env, profile_redis, monkeypatch):
+        monkeypatch.setattr(get_settings(), "USER_TOUCH_FLUSH_SECONDS", 0.0)
+        _put(profile_env, _BODY)
+        profile_env["sql"]("UPDATE users SET last_interaction = :ts WHERE id = :uid",
+                           ts=datetime(2020, 1, 1), uid=USER_ID)
+        _put(profile_env, _BODY)  # cached fingerprint, but the touch is refused
+        assert _last_interaction(profile_env) > datetime(2020, 1, 1)
+        assert profile_redis.hgetall("users:last_interaction") == {}
@@ -1,17 +1,20 @@
 from aiogram.utils.callback_answer import CallbackAnswerMiddleware
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.redis import RedisStorage
 from aiogram import Bot, Dispatcher, F
 from aiogram.types import Update
 from aiogram.enums import ParseMode
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import redis.asyncio as redis
 import secrets
+import time
 import uvicorn
 import os
 from modules import router, Logger
+from modules.fsm_buffer import BufferedRedisStorage
+from modules.metrics import WEBHOOK_DURATION, render_latest
+from modules.outbound import OutboundDispatcher
 
 logger = Logger(name="Main")
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -36,10 +39,14 @@ redis_client = redis.Redis(
     db=0,
     decode_responses=True,
 )
-storage = RedisStorage(redis_client, state_ttl=86400)  # 24 hour expiration
+# BufferedRedisStorage = RedisStorage + per-call latency metrics + one read and
+# one pipelined write per update inside storage.buffered().
+storage = BufferedRedisStorage(redis_client, state_ttl=86400)  # 24 hour expiration
 
 # Initialize bot and dispatcher with Redis storage
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+# Outbound requests: per-chat and global rate limits, edit coalescing, 429 retries.
+bot.session.middleware(OutboundDispatcher())
 dp = Dispatcher(storage=storage)
 dp.include_router(router)
 
@@ -86,17 +93,27 @@ async def webhook(request: Request) -> JSONResponse:
         )
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+    start = time.perf_counter()
     try:
         json_data = await request.json()
         update = Update.model_validate(json_data, context={"bot": bot})
         logger.info(f"Webhook request received from {request.client.host}")
-        await dp.feed_update(bot, update)
+        async with storage.buffered():
+            await dp.feed_update(bot, update)
+        WEBHOOK_DURATION.labels(outcome="ok").observe(time.perf_counter() - start)
         return JSONResponse({"status": "ok"}, status_code=200)
     except Exception as e:
+        WEBHOOK_DURATION.labels(outcome="error").observe(time.perf_counter() - start)
         logger.error(f"Error processing webhook: {e}", exc_info=True)
         # Return 200 to prevent Telegram retries on permanent errors
         return JSONResponse({"status": "error", "message": str(e)}, status_code=200)
 
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus scrape endpoint (internal network only; nginx proxies /webhook only)."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run(
         app,
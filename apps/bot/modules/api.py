@@ -2,6 +2,8 @@
 
 The client uses serviceAuth: X-Service-Token set at construction time,
 and X-Act-As-User supplied per request via act_as_user=<telegram_id>.
+Every public client method is timed into ``gym_bot_api_call_duration_seconds``
+(modules/metrics.py).
 """
 
 from __future__ import annotations
@@ -10,13 +12,17 @@ import os
 
 from gym_api_client import GymApiClient
 
+from .metrics import instrument_api_client
+
 _API_BASE_URL: str = os.environ.get("API_BASE_URL", "http://admin_backend:8000/api/v1")
 _BOT_SERVICE_TOKEN: str = os.environ.get("BOT_SERVICE_TOKEN", "")
 
 # Single shared client; the underlying httpx.AsyncClient is connection-pooled.
-api: GymApiClient = GymApiClient(
-    base_url=_API_BASE_URL,
-    service_token=_BOT_SERVICE_TOKEN,
+api: GymApiClient = instrument_api_client(
+    GymApiClient(
+        base_url=_API_BASE_URL,
+        service_token=_BOT_SERVICE_TOKEN,
+    )
 )
 
 __all__ = ["api"]
@@ -3,6 +3,7 @@
 Split out of handlers.py (which is over the size limit per CLAUDE.md):
 the result table, the weight-format normalizer it needs, and the
 last-session delta note fetched from `GET /analytics/log-context`.
+`parse_reps` mirrors the API's reps rule so a bad value never reaches it.
 """
 
 from __future__ import annotations
@@ -30,6 +31,30 @@ def normalize_weight_format(weight_str: str) -> str:
     return weight_str.replace(",", ".") if "," in weight_str else weight_str
 
 
+# The API stores reps as a SMALLINT (migration 0014) and answers a fractional
+# or out-of-range value with 422 — see docs/validation.md "Reps".
+REPS_MAX = 999
+
+
+def parse_reps(reps_str: str) -> int | None:
+    """Parse reps as the API accepts them: a whole number within ±REPS_MAX.
+
+    Args:
+        reps_str: Reps value as string, e.g. "12" or "12.0".
+
+    Returns:
+        The reps as an int, or None when the value is not a whole number
+        in range (fractional, out of range, not a number).
+    """
+    try:
+        value = float(reps_str)
+    except ValueError:
+        return None
+    if not value.is_integer() or abs(value) > REPS_MAX:
+        return None
+    return int(value)
+
+
 def format_result_message(data: dict) -> str:
     """Format a single training record as an HTML-wrapped PrettyTable.
 
@@ -0,0 +1,154 @@
+"""FSM storage that reads once and writes once per update.
+
+A handler talks to its ``FSMContext`` several times — ``process_reps`` does
+``get_data``, then ``clear`` (``set_state(None)`` + ``set_data({})``), then
+``set_state`` — on top of the ``get_state`` aiogram's FSM middleware makes
+before every handler.  On the plain ``RedisStorage`` each call is its own
+Redis round trip.
+
+Inside ``BufferedRedisStorage.buffered()`` (``main_webhook.py`` wraps every
+``dp.feed_update`` in it):
+
+    first access     one MGET loads both the state and the data key of the
+                     chat/user
+    get / set        served from and applied to the in-memory copy
+    block exit       the parts that were set are written in ONE MULTI/EXEC
+                     pipeline — SET with ``state_ttl`` / ``data_ttl``, or DEL
+                     for a cleared state / empty data, exactly as
+                     ``RedisStorage`` writes them
+
+Outside a ``buffered()`` block every call goes straight to Redis as before.
+
+Design choices:
+- Data is kept as the JSON string Redis would hold: ``set_data`` serializes
+  at call time (a non-serializable value still fails inside the handler) and
+  every ``get_data`` returns a fresh dict, so callers cannot mutate the
+  buffer behind its back.
+- A ``set_state`` is always written, even to the same state, so the 24h
+  ``state_ttl`` is refreshed exactly as often as before; data that did not
+  change is only rewritten when it has a ``data_ttl`` to refresh.
+- Crash safety: the flush runs in ``finally``, so a handler that raises
+  keeps what it set before raising (the unbuffered storage had written it
+  already), and MULTI/EXEC applies state and data together — a dying process
+  leaves either the old pair or the new one, never a new state with stale
+  data.  A failed flush raises out of the block.
+- Nested ``buffered()`` blocks join the outer one.
+"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+
+from .metrics import FSM_STORAGE_DURATION, InstrumentedRedisStorage, _timed
+
+
+@dataclass
+class _Entry:
+    """Buffered state and data of one storage key."""
+
+    state: Optional[str]
+    data: Optional[str]  # JSON, None when the data key is absent
+    loaded_state: Optional[str]
+    loaded_data: Optional[str]
+    state_set: bool = False
+    data_set: bool = False
+
+
+# StorageKey -> _Entry for the update being processed; None outside buffered().
+_BUFFER: ContextVar[Optional[dict[StorageKey, _Entry]]] = ContextVar("fsm_buffer", default=None)
+
+
+def _decode(value: Any) -> Optional[str]:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class BufferedRedisStorage(InstrumentedRedisStorage):
+    """``InstrumentedRedisStorage`` that buffers calls made inside ``buffered()``.
+
+    The MGET and the flush are timed as the ``load`` / ``flush`` operations
+    of ``gym_bot_fsm_storage_duration_seconds``; buffered get/set calls are
+    not Redis calls and are not observed.
+    """
+
+    @asynccontextmanager
+    async def buffered(self) -> AsyncIterator[None]:
+        """Buffer every state/data call in the block; flush them at exit."""
+        if _BUFFER.get() is not None:
+            yield
+            return
+        token = _BUFFER.set({})
+        try:
+            yield
+        finally:
+            entries = _BUFFER.get()
+            _BUFFER.reset(token)
+            await self._flush(entries)
+
+    async def _entry(self, key: StorageKey) -> Optional[_Entry]:
+        """The buffered entry for ``key`` (loaded on first use), or ``None`` when unbuffered."""
+        entries = _BUFFER.get()
+        if entries is None:
+            return None
+        entry = entries.get(key)
+        if entry is None:
+            state, data = await _timed(
+                FSM_STORAGE_DURATION,
+                self.redis.mget(self.key_builder.build(key, "state"), self.key_builder.build(key, "data")),
+                operation="load",
+            )
+            state, data = _decode(state), _decode(data)
+            entry = entries[key] = _Entry(state=state, data=data, loaded_state=state, loaded_data=data)
+        return entry
+
+    async def _flush(self, entries: dict[StorageKey, _Entry]) -> None:
+        """Write the parts set inside the block in one MULTI/EXEC pipeline."""
+        writes: list[tuple[str, Optional[str], Optional[int]]] = []  # (key, value or None = DEL, ttl)
+        for key, entry in entries.items():
+            if entry.state_set and (entry.state is not None or entry.loaded_state is not None):
+                writes.append((self.key_builder.build(key, "state"), entry.state, self.state_ttl))
+            if entry.data_set and (entry.data != entry.loaded_data or (entry.data and self.data_ttl)):
+                writes.append((self.key_builder.build(key, "data"), entry.data, self.data_ttl))
+        if not writes:
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        for redis_key, value, ttl in writes:
+            if value is None:
+                pipe.delete(redis_key)
+            else:
+                pipe.set(redis_key, value, ex=ttl)
+        await _timed(FSM_STORAGE_DURATION, pipe.execute(), operation="flush")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._entry(key)
+        if entry is None:
+            return await super().set_state(key, state)
+        entry.state = state.state if isinstance(state, State) else state
+        entry.state_set = True
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        entry = await self._entry(key)
+        if entry is None:
+            return await super().get_state(key)
+        return entry.state
+
+    async def set_data(self, key: StorageKey, data: Any) -> None:
+        entry = await self._entry(key)
+        if entry is None:
+            return await super().set_data(key, data)
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        entry.data = self.json_dumps(data) if data else None
+        entry.data_set = True
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        entry = await self._entry(key)
+        if entry is None:
+            return await super().get_data(key)
+        return self.json_loads(entry.data) if entry.data is not None else {}
@@ -17,7 +17,7 @@ from aiogram.types import CallbackQuery, Message
 
 from gym_api_client import models as api_models
 from modules.api import api
-from modules.confirmation import build_save_confirmation, normalize_weight_format
+from modules.confirmation import build_save_confirmation, normalize_weight_format, parse_reps
 from modules.logging import Logger
 from modules.states import UserStates
 from templates.exercise import sets, weights, reps
@@ -284,6 +284,13 @@ async def process_reps(callback_query: CallbackQuery, state: FSMContext) -> None
 
     logger.info(f"{user_id}: {reps_value} reps selected")
 
+    reps_number = parse_reps(reps_value)
+    if reps_number is None:
+        # Reason: the API answers anything but whole reps with 422.
+        logger.warning(f"{user_id}: invalid reps {reps_value!r}")
+        await callback_query.answer("Reps must be a whole number.", show_alert=True)
+        return
+
     message = ""
     ikm = None
 
@@ -294,7 +301,7 @@ async def process_reps(callback_query: CallbackQuery, state: FSMContext) -> None
                 exercise_name=exercise_name,
                 set=int(set_number),
                 weight=float(normalize_weight_format(weight_value)),
-                reps=float(reps_value),
+                reps=reps_number,
             ),
             act_as_user=user_id,
         )
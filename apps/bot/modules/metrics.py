@@ -0,0 +1,155 @@
+"""Prometheus metrics for the bot process.
+
+Rendered by ``GET /metrics`` on the webhook FastAPI app (``main_webhook.py``,
+port 5400) and scraped from inside the Docker network by the local Prometheus
+container (``infra/prometheus/prometheus.yml``). nginx only proxies
+``/webhook`` to this container, so the endpoint is not public.
+
+Exported series:
+    gym_bot_webhook_duration_seconds{outcome}
+        Wall time of ``dp.feed_update`` per webhook request (``ok``/``error``).
+    gym_bot_fsm_storage_duration_seconds{operation,outcome}
+        Latency of each FSM storage call (get_state/set_state/get_data/set_data,
+        or the per-update load/flush of ``modules.fsm_buffer``).
+    gym_bot_api_call_duration_seconds{method,outcome}
+        Latency of each ``GymApiClient`` call, labelled by client method name.
+    gym_bot_outbound_requests_total{method,outcome}
+        Telegram requests through ``modules.outbound`` (``sent``, ``coalesced``
+        into a newer edit, ``retry_after`` = a 429 that was retried, ``error``).
+    gym_bot_outbound_wait_seconds
+        Time a chat request waited for its chat / global rate budget.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from gym_api_client import GymApiClient
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# Handler latency is dominated by API + Telegram round trips, so the buckets
+# reach further than the API's own request histogram.
+_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+WEBHOOK_DURATION = Histogram(
+    "gym_bot_webhook_duration_seconds",
+    "Webhook handler latency (dp.feed_update).",
+    ["outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+FSM_STORAGE_DURATION = Histogram(
+    "gym_bot_fsm_storage_duration_seconds",
+    "FSM storage call latency.",
+    ["operation", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+API_CALL_DURATION = Histogram(
+    "gym_bot_api_call_duration_seconds",
+    "GymApiClient call latency per client method.",
+    ["method", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+OUTBOUND_REQUESTS = Counter(
+    "gym_bot_outbound_requests_total",
+    "Outbound Telegram requests through the rate-limited dispatcher.",
+    ["method", "outcome"],
+)
+
+OUTBOUND_WAIT = Histogram(
+    "gym_bot_outbound_wait_seconds",
+    "Time an outbound chat request waited for its rate budget.",
+    buckets=_LATENCY_BUCKETS,
+)
+
+_T = TypeVar("_T")
+
+
+async def _timed(histogram: Histogram, awaitable: Awaitable[_T], **labels: str) -> _T:
+    """Await ``awaitable`` and observe its wall time on ``histogram``.
+
+    Args:
+        histogram: Histogram to observe.
+        awaitable: The call being measured.
+        **labels: Label values except ``outcome``, which is derived here
+            (``ok`` or ``error`` when the awaitable raises).
+
+    Returns:
+        Whatever the awaitable returns.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await awaitable
+        outcome = "ok"
+        return result
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - start)
+
+
+class InstrumentedRedisStorage(RedisStorage):
+    """``RedisStorage`` that times every state/data call.
+
+    ``update_data`` and ``FSMContext.clear`` are built on top of these four
+    primitives in aiogram, so they are covered transitively.
+    """
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await _timed(FSM_STORAGE_DURATION, super().set_state(key, state), operation="set_state")
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return await _timed(FSM_STORAGE_DURATION, super().get_state(key), operation="get_state")
+
+    async def set_data(self, key: StorageKey, data: Any) -> None:
+        await _timed(FSM_STORAGE_DURATION, super().set_data(key, data), operation="set_data")
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return await _timed(FSM_STORAGE_DURATION, super().get_data(key), operation="get_data")
+
+
+def _wrap_api_method(name: str, method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap one bound client coroutine method with latency timing."""
+
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await _timed(API_CALL_DURATION, method(*args, **kwargs), method=name)
+
+    return wrapper
+
+
+def instrument_api_client(client: GymApiClient) -> GymApiClient:
+    """Time every public ``GymApiClient`` coroutine method on ``client``.
+
+    Shadows each public async method with a timed wrapper on the INSTANCE, so
+    the shared client keeps its type and the generated client package stays
+    free of any Prometheus dependency.
+
+    Args:
+        client: The shared client instance (``modules.api.api``).
+
+    Returns:
+        The same instance, for chaining at construction time.
+    """
+    for name, _ in inspect.getmembers(type(client), inspect.iscoroutinefunction):
+        if name.startswith("_") or name == "aclose":
+            continue
+        setattr(client, name, _wrap_api_method(name, getattr(client, name)))
+    return client
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Render the default registry in the Prometheus text format.
+
+    Returns:
+        ``(body, content_type)`` ready to wrap in a ``Response``.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,251 @@
+"""Rate-limit-aware outbound Telegram requests with edit coalescing.
+
+Handlers call ``bot.edit_message_text`` / ``message.answer`` directly.
+``OutboundDispatcher`` is an aiogram session middleware
+(``bot.session.middleware(...)`` in ``main_webhook.py``), so every request
+the bot makes passes through it without touching the handlers.  A request
+that targets a chat (it has a ``chat_id``) goes through:
+
+    chat lane        requests to one chat leave one at a time, in order,
+                     paced by the chat's token bucket (private chats
+                     ``chat_rate``/s with a burst, groups ``group_rate``/s)
+    global bucket    all chats together stay under ``global_rate``/s
+    edit coalescing  an edit of a message still waiting for its turn is
+                     replaced by a newer edit of the same message (same
+                     method): one request goes out with the last content and
+                     every caller gets its result
+    retry-after      a 429 pauses the chat lane for ``retry_after`` seconds
+                     and the request is retried, up to ``max_retries`` times
+
+Requests without a chat (``answerCallbackQuery``, ``setWebhook``, inline
+message edits) pass straight through — callback answers must stay instant.
+
+Design choices:
+- Buckets hand out tokens by reservation: a caller takes its token up front
+  (the balance may go negative) and sleeps for the deficit, so waiters are
+  served in arrival order without a lock on the shared global bucket.  The
+  global token is reserved only once the chat lane lets the request go, so
+  a paused chat never holds global budget.
+- Defaults follow Telegram's published limits (about one message per second
+  per chat, 20 per minute in a group, 30 per second overall).
+- A ``retry_after`` above ``max_retry_after`` is not waited out in the
+  handler (the webhook request would time out): the lane is still paused
+  and the error is raised.
+- A queued edit is sent by its own task, not by the caller that queued it:
+  every caller (the first one included) only waits for the shared result, so
+  a cancelled caller never takes the newest edit of its followers down with
+  it.
+- Idle lanes (nobody queued, bucket full again) are dropped once there are
+  more than ``_MAX_LANES``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Hashable
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageCaption, EditMessageReplyMarkup, EditMessageText
+from aiogram.methods.base import TelegramType
+
+from .metrics import OUTBOUND_REQUESTS, OUTBOUND_WAIT
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.methods import TelegramMethod
+
+_EDIT_METHODS = (EditMessageText, EditMessageCaption, EditMessageReplyMarkup)
+
+_MAX_LANES = 10_000
+
+
+class _TokenBucket:
+    """Token bucket refilled at ``rate`` tokens/s up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token; returns how long to wait before using it."""
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold the bucket empty for ``seconds`` (Telegram's ``retry_after``)."""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.burst
+
+
+@dataclass
+class _PendingEdit:
+    """An edit waiting for its turn; ``method`` is replaced by newer edits."""
+
+    method: Any
+    future: asyncio.Future
+
+
+@dataclass
+class _Lane:
+    """Per-chat pacing state."""
+
+    bucket: _TokenBucket
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    edits: dict[Hashable, _PendingEdit] = field(default_factory=dict)
+    users: int = 0
+
+
+class OutboundDispatcher(BaseRequestMiddleware):
+    """Session middleware pacing, coalescing and retrying chat requests.
+
+    Args:
+        global_rate: Requests/s across all chats.
+        chat_rate: Requests/s to one private chat.
+        chat_burst: Requests a private chat may receive back to back.
+        group_rate: Requests/s to one group or channel.
+        max_retries: Retries of a request answered with 429.
+        max_retry_after: Longest ``retry_after`` (s) waited out in place.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_retry_after: float = 30.0,
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self._global = _TokenBucket(global_rate, global_rate)
+        self._lanes: dict[Any, _Lane] = {}
+        self._sends: set[asyncio.Task] = set()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        lane = self._lane(chat_id)
+        lane.users += 1
+        try:
+            if isinstance(method, _EDIT_METHODS) and method.message_id is not None:
+                return await self._edit(make_request, bot, lane, method)
+            async with lane.lock:
+                await self._wait(lane)
+                return await self._request(make_request, bot, lane, method)
+        finally:
+            lane.users -= 1
+
+    async def _edit(self, make_request: Any, bot: Bot, lane: _Lane, method: Any) -> Any:
+        """Queue an edit, or fold it into the queued edit of the same message."""
+        edit_key = (type(method).__name__, method.message_id)
+        pending = lane.edits.get(edit_key)
+        if pending is not None:
+            pending.method = method  # last write wins
+            OUTBOUND_REQUESTS.labels(method=type(method).__name__, outcome="coalesced").inc()
+        else:
+            pending = lane.edits[edit_key] = _PendingEdit(method, asyncio.get_running_loop().create_future())
+            # Reason: every caller may be gone — never leave an exception
+            # unretrieved on the shared future.
+            pending.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            lane.users += 1
+            task = asyncio.create_task(self._send_edit(make_request, bot, lane, edit_key, pending))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+        return await asyncio.shield(pending.future)
+
+    async def _send_edit(
+        self, make_request: Any, bot: Bot, lane: _Lane, edit_key: Hashable, pending: _PendingEdit
+    ) -> None:
+        """Send the newest method of ``pending`` in turn and resolve its future."""
+        try:
+            async with lane.lock:
+                await self._wait(lane)
+                del lane.edits[edit_key]  # edits from now on queue a new request
+                result = await self._request(make_request, bot, lane, pending.method)
+        except BaseException as exc:
+            if lane.edits.get(edit_key) is pending:
+                del lane.edits[edit_key]
+            if isinstance(exc, asyncio.CancelledError):
+                pending.future.cancel()
+                raise
+            pending.future.set_exception(exc)
+        else:
+            pending.future.set_result(result)
+        finally:
+            lane.users -= 1
+
+    async def _request(self, make_request: Any, bot: Bot, lane: _Lane, method: Any) -> Any:
+        """``make_request`` with 429 handling; the caller holds the lane."""
+        name = type(method).__name__
+        attempt = 0
+        while True:
+            try:
+                result = await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                lane.bucket.pause(exc.retry_after)
+                if attempt >= self.max_retries or exc.retry_after > self.max_retry_after:
+                    OUTBOUND_REQUESTS.labels(method=name, outcome="error").inc()
+                    raise
+                OUTBOUND_REQUESTS.labels(method=name, outcome="retry_after").inc()
+                attempt += 1
+                await self._wait(lane)
+                continue
+            except Exception:
+                OUTBOUND_REQUESTS.labels(method=name, outcome="error").inc()
+                raise
+            OUTBOUND_REQUESTS.labels(method=name, outcome="sent").inc()
+            return result
+
+    async def _wait(self, lane: _Lane) -> None:
+        """Sleep until the chat's and then the global budget allow one request."""
+        start = time.perf_counter()
+        delay = lane.bucket.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        delay = self._global.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        OUTBOUND_WAIT.observe(time.perf_counter() - start)
+
+    def _lane(self, chat_id: Any) -> _Lane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            if len(self._lanes) >= _MAX_LANES:
+                self._prune()
+            if isinstance(chat_id, int) and chat_id > 0:
+                bucket = _TokenBucket(self.chat_rate, self.chat_burst)
+            else:  # groups, supergroups, channels (negative ids or @username)
+                bucket = _TokenBucket(self.group_rate, self.chat_burst)
+            lane = self._lanes[chat_id] = _Lane(bucket)
+        return lane
+
+    def _prune(self) -> None:
+        for chat_id, lane in list(self._lanes.items()):
+            if lane.users == 0 and lane.bucket.full():
+                del self._lanes[chat_id]
@@ -0,0 +1,30 @@
+"""Tests for the reps rule the bot checks before saving (modules/confirmation.py).
+
+Validates:
+  1. ``parse_reps`` returns whole reps within ±REPS_MAX as an int.
+  2. Fractional, out-of-range, non-finite and non-numeric values are None —
+     the values the API answers with 422.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.confirmation import REPS_MAX, parse_reps  # noqa: E402
+
+
+class TestParseReps:
+    @pytest.mark.parametrize("text,expected", [
+        ("12", 12), ("12.0", 12), ("0", 0), (str(REPS_MAX), REPS_MAX), (f"-{REPS_MAX}", -REPS_MAX),
+    ])
+    def test_whole_reps_in_range(self, text, expected):
+        assert parse_reps(text) == expected
+
+    @pytest.mark.parametrize("text", [
+        "7.5", str(REPS_MAX + 1), f"-{REPS_MAX + 1}", "1e400", "inf", "nan", "", "ten",
+    ])
+    def test_rejected(self, text):
+        assert parse_reps(text) is None
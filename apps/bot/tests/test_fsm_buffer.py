@@ -0,0 +1,241 @@
+"""Tests for the per-update FSM buffer (modules/fsm_buffer.py).
+
+Validates:
+  1. A ``process_reps``-style update (get_state, get_data, clear, set_state)
+     costs one MGET and one MULTI/EXEC pipeline, and leaves exactly the keys,
+     values and TTLs the plain ``RedisStorage`` leaves.
+  2. A read-only update makes only the MGET; unchanged data without a
+     ``data_ttl`` is not rewritten, while every ``set_state`` is (its TTL is
+     refreshed).
+  3. A handler that raises keeps what it set before raising.
+  4. Buffered reads return copies; non-dict data is refused; outside
+     ``buffered()`` every call goes to Redis; nested blocks join the outer.
+
+No Redis server is needed: ``_MemoryRedis`` keeps (value, ttl) per key and
+logs every round trip.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.fsm_buffer import BufferedRedisStorage  # noqa: E402
+
+STATE_TTL = 86400
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self.ops = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append(("set", key, value, ex))
+        return self
+
+    def delete(self, key):
+        self.ops.append(("delete", key))
+        return self
+
+    async def execute(self):
+        self._redis.round_trips.append(("execute", tuple(self.ops)))
+        for op in self.ops:
+            if op[0] == "set":
+                self._redis.data[op[1]] = (op[2], op[3])
+            else:
+                self._redis.data.pop(op[1], None)
+        return [True] * len(self.ops)
+
+
+class _MemoryRedis:
+    """The async commands ``RedisStorage`` / ``BufferedRedisStorage`` send."""
+
+    def __init__(self):
+        self.data = {}  # key -> (value, ttl)
+        self.round_trips = []
+
+    async def get(self, key):
+        self.round_trips.append(("get", key))
+        return self.data.get(key, (None, None))[0]
+
+    async def mget(self, *keys):
+        self.round_trips.append(("mget", keys))
+        return [self.data.get(k, (None, None))[0] for k in keys]
+
+    async def set(self, key, value, ex=None):
+        self.round_trips.append(("set", key))
+        self.data[key] = (value, ex)
+
+    async def delete(self, *keys):
+        self.round_trips.append(("delete", keys))
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        assert transaction
+        return _Pipeline(self)
+
+
+def _storages():
+    """A buffered and a plain storage, each on its own seeded ``_MemoryRedis``."""
+    pair = []
+    for cls in (BufferedRedisStorage, RedisStorage):
+        redis = _MemoryRedis()
+        storage = cls(redis, state_ttl=STATE_TTL)
+        asyncio.run(_seed(storage))
+        redis.round_trips.clear()
+        pair.append((storage, redis))
+    return pair
+
+
+async def _seed(storage):
+    await storage.set_state(KEY, "Record:reps")
+    await storage.set_data(KEY, {"muscle": "Chest", "exercise": "Bench", "set": "2", "weight": "50"})
+
+
+async def _process_reps(ctx):
+    """The FSM calls of one ``process_reps`` update (middleware get_state included)."""
+    await ctx.get_state()
+    data = await ctx.get_data()
+    assert data["weight"] == "50"
+    await ctx.clear()
+    await ctx.set_state("Record:muscle")
+
+
+def _ops(redis):
+    return [op for op, *_ in redis.round_trips]
+
+
+# ---------------------------------------------------------------------------
+# 1. One read, one write, same result as RedisStorage
+# ---------------------------------------------------------------------------
+
+class TestProcessReps:
+    def test_one_mget_one_pipeline_same_keys_as_plain_storage(self):
+        (buffered, buffered_redis), (plain, plain_redis) = _storages()
+
+        async def run_buffered():
+            async with buffered.buffered():
+                await _process_reps(FSMContext(buffered, KEY))
+
+        asyncio.run(run_buffered())
+        asyncio.run(_process_reps(FSMContext(plain, KEY)))
+
+        assert _ops(buffered_redis) == ["mget", "execute"]
+        assert len(_ops(plain_redis)) > 2
+        assert buffered_redis.data == plain_redis.data
+        state_key = buffered.key_builder.build(KEY, "state")
+        assert buffered_redis.data == {state_key: ("Record:muscle", STATE_TTL)}
+
+
+# ---------------------------------------------------------------------------
+# 2. What the flush skips and what it always writes
+# ---------------------------------------------------------------------------
+
+class TestFlush:
+    def test_read_only_update_makes_one_mget(self):
+        (storage, redis), _ = _storages()
+
+        async def scenario():
+            async with storage.buffered():
+                ctx = FSMContext(storage, KEY)
+                assert await ctx.get_state() == "Record:reps"
+                assert (await ctx.get_data())["muscle"] == "Chest"
+
+        asyncio.run(scenario())
+        assert _ops(redis) == ["mget"]
+
+    def test_same_state_is_rewritten_unchanged_data_is_not(self):
+        (storage, redis), _ = _storages()
+        state_key = storage.key_builder.build(KEY, "state")
+        redis.data[state_key] = ("Record:reps", 5)  # TTL nearly run out
+
+        async def scenario():
+            async with storage.buffered():
+                ctx = FSMContext(storage, KEY)
+                await ctx.set_state("Record:reps")
+                await ctx.set_data(await ctx.get_data())
+
+        asyncio.run(scenario())
+        [(_, ops)] = [trip for trip in redis.round_trips if trip[0] == "execute"]
+        assert ops == (("set", state_key, "Record:reps", STATE_TTL),)
+        assert redis.data[state_key] == ("Record:reps", STATE_TTL)
+
+    def test_clearing_an_empty_state_writes_nothing(self):
+        storage = BufferedRedisStorage(_MemoryRedis(), state_ttl=STATE_TTL)
+
+        async def scenario():
+            async with storage.buffered():
+                await FSMContext(storage, KEY).clear()
+
+        asyncio.run(scenario())
+        assert _ops(storage.redis) == ["mget"]
+
+    def test_handler_error_still_flushes(self):
+        (storage, redis), _ = _storages()
+
+        async def scenario():
+            async with storage.buffered():
+                ctx = FSMContext(storage, KEY)
+                await ctx.update_data(weight="55")
+                raise RuntimeError("handler failed")
+
+        with pytest.raises(RuntimeError, match="handler failed"):
+            asyncio.run(scenario())
+        assert _ops(redis) == ["mget", "execute"]
+        assert asyncio.run(storage.get_data(KEY))["weight"] == "55"
+
+
+# ---------------------------------------------------------------------------
+# 3. Buffer semantics
+# ---------------------------------------------------------------------------
+
+class TestBufferSemantics:
+    def test_get_data_returns_a_copy(self):
+        (storage, _), _ = _storages()
+
+        async def scenario():
+            async with storage.buffered():
+                data = await storage.get_data(KEY)
+                data["weight"] = "999"
+                return await storage.get_data(KEY)
+
+        assert asyncio.run(scenario())["weight"] == "50"
+
+    def test_non_dict_data_is_refused(self):
+        (storage, _), _ = _storages()
+
+        async def scenario():
+            async with storage.buffered():
+                await storage.set_data(KEY, ["not", "a", "dict"])
+
+        with pytest.raises(DataNotDictLikeError):
+            asyncio.run(scenario())
+
+    def test_unbuffered_calls_go_to_redis(self):
+        (storage, redis), _ = _storages()
+        asyncio.run(storage.get_state(KEY))
+        asyncio.run(storage.set_state(KEY, "Record:set"))
+        assert _ops(redis) == ["get", "set"]
+
+    def test_nested_blocks_flush_once(self):
+        (storage, redis), _ = _storages()
+
+        async def scenario():
+            async with storage.buffered():
+                async with storage.buffered():
+                    await storage.set_state(KEY, "Record:set")
+                assert _ops(redis) == ["mget"]  # not flushed by the inner block
+                await storage.set_data(KEY, {})
+
+        asyncio.run(scenario())
+        assert _ops(redis) == ["mget", "execute"]
@@ -0,0 +1,202 @@
+"""Tests for the outbound Telegram request middleware (modules/outbound.py).
+
+Validates:
+  1. Edits of the same queued message collapse into ONE request carrying the
+     last content, and every caller gets its result — also when the first
+     caller is cancelled while the edit waits.
+  2. Requests to one chat are paced by its token bucket; requests without a
+     chat pass straight through.
+  3. A 429 pauses the chat for ``retry_after`` and the request is retried,
+     up to ``max_retries``; a ``retry_after`` above ``max_retry_after`` is
+     raised at once and still pauses the chat.
+
+No Telegram and no real waiting: ``make_request`` is a recorder, and the
+module's clock and ``asyncio.sleep`` are replaced by a fake clock that only
+advances when slept on.
+"""
+
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules import outbound  # noqa: E402
+from modules.outbound import OutboundDispatcher  # noqa: E402
+
+_real_sleep = asyncio.sleep
+
+
+class _Clock:
+    """Monotonic clock that advances only through ``sleep``."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+        await _real_sleep(0)
+
+
+class _Telegram:
+    """``make_request`` recorder; ``failures`` are raised before succeeding."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent = []
+
+    async def __call__(self, bot, method):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((type(method).__name__, getattr(method, "text", None)))
+        return f"ok:{getattr(method, 'text', None)}"
+
+
+def _retry_after(seconds):
+    return TelegramRetryAfter(method=SendMessage(chat_id=1, text="x"), message="Flood control",
+                              retry_after=seconds)
+
+
+def _edit(text, message_id=7):
+    return EditMessageText(chat_id=1, message_id=message_id, text=text)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    fake_asyncio = types.ModuleType("asyncio")
+    fake_asyncio.__dict__.update(vars(asyncio))
+    fake_asyncio.sleep = clock.sleep
+    monkeypatch.setattr(outbound, "asyncio", fake_asyncio)
+    monkeypatch.setattr(outbound, "time",
+                        types.SimpleNamespace(monotonic=clock.monotonic, perf_counter=clock.monotonic))
+    return clock
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+# ---------------------------------------------------------------------------
+# 1. Edit coalescing
+# ---------------------------------------------------------------------------
+
+class TestCoalescing:
+    def test_queued_edits_send_the_last_one(self, clock):
+        telegram = _Telegram()
+        dispatcher = OutboundDispatcher()
+
+        async def scenario():
+            return await asyncio.gather(*[
+                dispatcher(telegram, None, _edit(f"v{i}")) for i in range(5)
+            ])
+
+        assert _run(scenario()) == ["ok:v4"] * 5
+        assert telegram.sent == [("EditMessageText", "v4")]
+
+    def test_other_messages_are_not_merged(self, clock):
+        telegram = _Telegram()
+        dispatcher = OutboundDispatcher()
+
+        async def scenario():
+            return await asyncio.gather(dispatcher(telegram, None, _edit("a", 7)),
+                                        dispatcher(telegram, None, _edit("b", 8)))
+
+        assert _run(scenario()) == ["ok:a", "ok:b"]
+        assert telegram.sent == [("EditMessageText", "a"), ("EditMessageText", "b")]
+
+    def test_cancelled_first_caller_keeps_the_newest_edit(self, clock):
+        telegram = _Telegram()
+        dispatcher = OutboundDispatcher(chat_burst=1)
+
+        async def scenario():
+            await dispatcher(telegram, None, SendMessage(chat_id=1, text="first"))  # drains the burst
+            leader = asyncio.create_task(dispatcher(telegram, None, _edit("v1")))
+            follower = asyncio.create_task(dispatcher(telegram, None, _edit("v2")))
+            await _real_sleep(0)  # both queued: the follower folded into the leader's edit
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        assert _run(scenario()) == "ok:v2"
+        assert telegram.sent == [("SendMessage", "first"), ("EditMessageText", "v2")]
+
+
+# ---------------------------------------------------------------------------
+# 2. Pacing
+# ---------------------------------------------------------------------------
+
+class TestPacing:
+    def test_chat_bucket_spaces_requests(self, clock):
+        telegram = _Telegram()
+        dispatcher = OutboundDispatcher(chat_rate=1.0, chat_burst=1)
+
+        async def scenario():
+            for i in range(3):
+                await dispatcher(telegram, None, SendMessage(chat_id=1, text=str(i)))
+
+        _run(scenario())
+        assert len(telegram.sent) == 3
+        assert sum(clock.slept) == pytest.approx(2.0)
+
+    def test_requests_without_a_chat_pass_through(self, clock):
+        telegram = _Telegram()
+        dispatcher = OutboundDispatcher(chat_burst=1)
+
+        async def scenario():
+            for _ in range(3):
+                await dispatcher(telegram, None, AnswerCallbackQuery(callback_query_id="q"))
+
+        _run(scenario())
+        assert len(telegram.sent) == 3
+        assert clock.slept == []
+        assert dispatcher._lanes == {}
+
+
+# ---------------------------------------------------------------------------
+# 3. Retry-after
+# ---------------------------------------------------------------------------
+
+class TestRetryAfter:
+    def test_retried_after_the_pause(self, clock):
+        telegram = _Telegram(failures=[_retry_after(5)])
+        dispatcher = OutboundDispatcher()
+
+        result = _run(dispatcher(telegram, None, SendMessage(chat_id=1, text="hi")))
+        assert result == "ok:hi"
+        assert telegram.sent == [("SendMessage", "hi")]
+        assert sum(clock.slept) >= 5
+
+    def test_gives_up_after_max_retries(self, clock):
+        telegram = _Telegram(failures=[_retry_after(1)] * 3)
+        dispatcher = OutboundDispatcher(max_retries=2)
+
+        with pytest.raises(TelegramRetryAfter):
+            _run(dispatcher(telegram, None, SendMessage(chat_id=1, text="hi")))
+        assert telegram.failures == []  # tried 1 + 2 times
+        assert telegram.sent == []
+
+    def test_long_retry_after_is_raised_and_pauses_the_chat(self, clock):
+        telegram = _Telegram(failures=[_retry_after(60)])
+        dispatcher = OutboundDispatcher(max_retry_after=30)
+
+        async def scenario():
+            with pytest.raises(TelegramRetryAfter):
+                await dispatcher(telegram, None, SendMessage(chat_id=1, text="a"))
+            assert clock.slept == []  # not waited out in the handler
+            await dispatcher(telegram, None, SendMessage(chat_id=1, text="b"))
+
+        _run(scenario())
+        assert telegram.sent == [("SendMessage", "b")]
+        assert sum(clock.slept) >= 60
@@ -0,0 +1,39 @@
+/**
+ * Unit tests for the device-timezone sync after sign-in.
+ *
+ * Locks the request (`PUT /users/me` with only `timezone`), that nothing is
+ * sent without a zone, and that a failure never rejects. The API client is
+ * mocked.
+ */
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import { apiRequest } from "./client";
+import { syncDeviceTimezone } from "./auth";
+
+vi.mock("./client", () => ({ apiRequest: vi.fn() }));
+
+const request = vi.mocked(apiRequest);
+
+beforeEach(() => {
+    request.mockReset();
+});
+
+describe("syncDeviceTimezone", () => {
+    it("puts the zone on the profile", async () => {
+        request.mockResolvedValue({});
+        await syncDeviceTimezone("Asia/Tbilisi");
+        expect(request).toHaveBeenCalledWith("/users/me", {
+            method: "PUT",
+            body: { timezone: "Asia/Tbilisi" },
+        });
+    });
+
+    it("sends nothing without a zone", async () => {
+        await syncDeviceTimezone(undefined);
+        expect(request).not.toHaveBeenCalled();
+    });
+
+    it("swallows a rejected zone", async () => {
+        request.mockRejectedValue(new Error("422"));
+        await expect(syncDeviceTimezone("Mars/Olympus")).resolves.toBeUndefined();
+    });
+});
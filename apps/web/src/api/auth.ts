@@ -5,6 +5,11 @@
  * Core API's `/auth/telegram/webapp` (`verify_telegram_webapp_auth`) path,
  * receive a session JWT, and stash it. RLS then scopes every later call to the
  * caller server-side (fail-closed) — the frontend never sends a user id.
+ *
+ * After sign-in the device timezone is recorded on the profile
+ * (`syncDeviceTimezone`): the server precomputes each set's local day in the
+ * STORED zone (`training.local_date`), and only the Mini App knows the zone —
+ * Telegram never tells the bot.
  */
 import type { Schemas } from "./client";
 import { apiRequest } from "./client";
@@ -31,3 +36,27 @@ export async function authenticateWithInitData(
     setSessionToken(res.token);
     return res.user;
 }
+
+/**
+ * Store the device timezone on the caller's profile (`PUT /users/me`).
+ *
+ * Sent on every sign-in: an unchanged zone is a cached no-op server-side, a
+ * changed one re-queues the `local_date` backfill. Best-effort — a failure
+ * (unknown zone → 422, network) only leaves the reads on the `tz` fallback.
+ *
+ * @param timezone - IANA zone to store (`DEVICE_TZ`); nothing is sent when
+ *   it is undefined.
+ */
+export async function syncDeviceTimezone(
+    timezone: string | undefined,
+): Promise<void> {
+    if (!timezone) return;
+    try {
+        await apiRequest<Schemas["User"]>("/users/me", {
+            method: "PUT",
+            body: { timezone } satisfies Schemas["UserRegistration"],
+        });
+    } catch {
+        // Best-effort: local-day reads still work through `tz`.
+    }
+}
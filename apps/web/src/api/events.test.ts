@@ -0,0 +1,49 @@
+/**
+ * Unit tests for the `text/event-stream` parser behind `GET /events`.
+ *
+ * Locks the framing the API sends (retry hint, `event:` + `data:` frames,
+ * `: ping` comments) and chunk boundaries falling anywhere in a frame.
+ */
+import { describe, expect, it } from "vitest";
+import { createEventParser, type ServerEvent } from "./events";
+
+function parse(chunks: string[]) {
+    const events: ServerEvent[] = [];
+    const retries: number[] = [];
+    const feed = createEventParser(
+        (e) => events.push(e),
+        (ms) => retries.push(ms),
+    );
+    chunks.forEach(feed);
+    return { events, retries };
+}
+
+const DATA = '{"type":"training","changes":[{"exercise_id":7,"day":"2026-06-10"}]}';
+
+describe("createEventParser", () => {
+    it("parses the API's frames and skips pings", () => {
+        const { events, retries } = parse([
+            "retry: 3000\n\n",
+            ": ping\n\n",
+            `event: training\ndata: ${DATA}\n\n`,
+        ]);
+        expect(retries).toEqual([3000]);
+        expect(events).toEqual([{ event: "training", data: DATA }]);
+    });
+
+    it("reassembles a frame split across chunks", () => {
+        const frame = `event: training\r\ndata: ${DATA}\r\n\r\n`;
+        const { events } = parse([frame.slice(0, 9), frame.slice(9, 40), frame.slice(40)]);
+        expect(events).toEqual([{ event: "training", data: DATA }]);
+    });
+
+    it("defaults the event name and joins multi-line data", () => {
+        const { events } = parse(["data: a\ndata: b\n\n"]);
+        expect(events).toEqual([{ event: "message", data: "a\nb" }]);
+    });
+
+    it("dispatches nothing until the blank line", () => {
+        const { events } = parse([`event: training\ndata: ${DATA}\n`]);
+        expect(events).toEqual([]);
+    });
+});
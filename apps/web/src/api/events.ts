@@ -0,0 +1,156 @@
+/**
+ * Live change events — `GET /events` (server-sent events).
+ *
+ * The Core API publishes an `event: training` frame whenever one of the
+ * caller's sets changes (bot, Mini App or import), so an open Mini App can
+ * refetch what changed instead of waiting for staleTime.
+ *
+ * Read with fetch, not EventSource: EventSource cannot send the Bearer JWT.
+ * The connection loop mirrors apiRequest's auth rules — one initData→JWT
+ * re-auth on a 401 (./reauth), then give up (no retry loop outside
+ * Telegram). Any other failure reconnects with a doubling backoff; a stream
+ * the server ended normally (every 10 minutes) reconnects after the server's
+ * `retry:` hint.
+ */
+import type { Schemas } from "./client";
+import { API_BASE } from "./client";
+import { getSessionToken } from "./session";
+
+export type TrainingChangeEvent = Schemas["TrainingChangeEvent"];
+
+/** One dispatched SSE message. */
+export interface ServerEvent {
+    event: string;
+    data: string;
+}
+
+/** Reconnect delay until the server sends its own `retry:` hint. */
+const DEFAULT_RETRY_MS = 3_000;
+/** Backoff ceiling after repeated failed connects (Redis down → 503). */
+const MAX_BACKOFF_MS = 60_000;
+
+/**
+ * Incremental `text/event-stream` parser.
+ *
+ * Feed it decoded chunks as they arrive (a chunk may end mid-line); it calls
+ * `onEvent` for every complete message and `onRetry` for a `retry:` field.
+ * Comments (`: ping`) and unknown fields are ignored, per the SSE spec.
+ */
+export function createEventParser(
+    onEvent: (event: ServerEvent) => void,
+    onRetry?: (ms: number) => void,
+): (chunk: string) => void {
+    let buffer = "";
+    let eventName = "";
+    let data: string[] = [];
+
+    const line = (raw: string) => {
+        if (raw === "") {
+            if (data.length > 0) {
+                onEvent({ event: eventName || "message", data: data.join("\n") });
+            }
+            eventName = "";
+            data = [];
+            return;
+        }
+        if (raw.startsWith(":")) return;
+        const colon = raw.indexOf(":");
+        const field = colon === -1 ? raw : raw.slice(0, colon);
+        let value = colon === -1 ? "" : raw.slice(colon + 1);
+        if (value.startsWith(" ")) value = value.slice(1);
+        if (field === "event") eventName = value;
+        else if (field === "data") data.push(value);
+        else if (field === "retry" && /^\d+$/.test(value)) onRetry?.(Number(value));
+    };
+
+    return (chunk: string) => {
+        buffer += chunk;
+        let newline = buffer.indexOf("\n");
+        while (newline !== -1) {
+            line(buffer.slice(0, newline).replace(/\r$/, ""));
+            buffer = buffer.slice(newline + 1);
+            newline = buffer.indexOf("\n");
+        }
+    };
+}
+
+interface EventHandlers {
+    onEvent: (event: ServerEvent) => void;
+    /** Called on every successful (re)connect, before its first event. */
+    onOpen?: () => void;
+}
+
+/**
+ * Stay subscribed to the caller's change events until the returned function
+ * is called.
+ */
+export function subscribeEvents(handlers: EventHandlers): () => void {
+    const controller = new AbortController();
+    void run(handlers, controller.signal);
+    return () => controller.abort();
+}
+
+async function run(handlers: EventHandlers, signal: AbortSignal): Promise<void> {
+    let retryMs = DEFAULT_RETRY_MS;
+    let failures = 0;
+    let reauthed = false;
+
+    while (!signal.aborted) {
+        let opened = false;
+        try {
+            const headers: Record<string, string> = {
+                Accept: "text/event-stream",
+            };
+            const token = getSessionToken();
+            if (token) headers["Authorization"] = `Bearer ${token}`;
+
+            const res = await fetch(`${API_BASE}/events`, {
+                headers,
+                signal,
+                cache: "no-store",
+            });
+            if (res.status === 401) {
+                if (reauthed) return;
+                reauthed = true;
+                const { reauthenticate } = await import("./reauth");
+                if (!(await reauthenticate())) return;
+                continue;
+            }
+            if (res.ok && res.body) {
+                opened = true;
+                failures = 0;
+                reauthed = false;
+                handlers.onOpen?.();
+                const feed = createEventParser(handlers.onEvent, (ms) => {
+                    retryMs = ms;
+                });
+                const reader = res.body.getReader();
+                const decoder = new TextDecoder();
+                for (;;) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    feed(decoder.decode(value, { stream: true }));
+                }
+            }
+        } catch {
+            // Network drop, or the abort below — the loop condition decides.
+        }
+        if (signal.aborted) return;
+        if (!opened) failures += 1;
+        const delay = opened
+            ? retryMs
+            : Math.min(MAX_BACKOFF_MS, retryMs * 2 ** (failures - 1));
+        await sleep(delay, signal);
+    }
+}
+
+function sleep(ms: number, signal: AbortSignal): Promise<void> {
+    return new Promise((resolve) => {
+        const done = () => {
+            clearTimeout(timer);
+            resolve();
+        };
+        const timer = setTimeout(done, ms);
+        signal.addEventListener("abort", done, { once: true });
+    });
+}
@@ -0,0 +1,77 @@
+/**
+ * Unit tests for the live-event invalidation scope (GET /events).
+ *
+ * Locks which query keys a training change hits — user-wide numbers always,
+ * windows and days only around the changed day (±1), per-exercise keys only
+ * for the changed exercise — and the fallback to every exercise when the
+ * catalog is not cached.
+ */
+import { describe, expect, it } from "vitest";
+import type { Exercise, Muscle } from "./analytics";
+import { EVERYTHING, isAffected, resolveExerciseNames } from "./liveInvalidation";
+import { queryKeys } from "./queryKeys";
+
+const SCOPE = {
+    days: ["2026-06-10"],
+    exercises: [{ muscle: "Chest", exercise: "Bench Press" }],
+};
+
+const MUSCLES = [
+    { id: 1, name: "Chest" },
+    { id: 2, name: "Back" },
+] as Muscle[];
+
+const EXERCISES: Record<number, Exercise[]> = {
+    1: [{ id: 7, name: "Bench Press", muscle: 1 }] as Exercise[],
+    2: [{ id: 8, name: "Row", muscle: 2 }] as Exercise[],
+};
+
+describe("isAffected", () => {
+    it("user-wide numbers always refetch", () => {
+        expect(isAffected(queryKeys.analytics.summary(), SCOPE)).toBe(true);
+        expect(isAffected(queryKeys.analytics.weekCompare(), SCOPE)).toBe(true);
+        expect(isAffected(queryKeys.analytics.topMuscles, SCOPE)).toBe(true);
+    });
+
+    it("windows and days only around the changed day", () => {
+        const k = queryKeys;
+        expect(isAffected(k.analytics.activity("2026-06-01", "2026-06-30"), SCOPE)).toBe(true);
+        expect(isAffected(k.analytics.activity("2026-06-11", "2026-06-30"), SCOPE)).toBe(true);
+        expect(isAffected(k.analytics.activity("2026-06-12", "2026-06-30"), SCOPE)).toBe(false);
+        expect(isAffected(k.training.days("2026-01-01", "2026-06-09"), SCOPE)).toBe(true);
+        expect(isAffected(k.training.days("2026-01-01", "2026-06-08"), SCOPE)).toBe(false);
+        expect(isAffected(k.training.day("2026-06-09"), SCOPE)).toBe(true);
+        expect(isAffected(k.training.day("2026-06-12"), SCOPE)).toBe(false);
+    });
+
+    it("per-exercise keys only for the changed exercise", () => {
+        const a = queryKeys.analytics;
+        expect(isAffected(a.logContext("Chest", "Bench Press", "2026-07-01"), SCOPE)).toBe(true);
+        expect(isAffected(a.logContext("Back", "Row", "2026-06-10"), SCOPE)).toBe(false);
+        expect(isAffected(a.exerciseProgress("Chest", "Bench Press"), SCOPE)).toBe(true);
+        expect(isAffected(a.exerciseTrend("Chest", "Incline", 12), SCOPE)).toBe(false);
+        expect(isAffected(a.topExercises("Chest", 5), SCOPE)).toBe(true);
+        expect(isAffected(a.topExercises("Back", 5), SCOPE)).toBe(false);
+    });
+
+    it("catalog keys never; everything after a reconnect", () => {
+        expect(isAffected(queryKeys.muscles.list, EVERYTHING)).toBe(false);
+        expect(isAffected(queryKeys.analytics.logContext("Back", "Row", "2026-06-10"), EVERYTHING)).toBe(true);
+        expect(isAffected(queryKeys.training.day("2020-01-01"), EVERYTHING)).toBe(true);
+    });
+});
+
+describe("resolveExerciseNames", () => {
+    it("maps ids through the cached catalog", () => {
+        expect(resolveExerciseNames([7, 8], MUSCLES, (id) => EXERCISES[id])).toEqual([
+            { muscle: "Chest", exercise: "Bench Press" },
+            { muscle: "Back", exercise: "Row" },
+        ]);
+    });
+
+    it("an uncached id widens to every exercise", () => {
+        expect(resolveExerciseNames([7, 9], MUSCLES, (id) => EXERCISES[id])).toBeNull();
+        expect(resolveExerciseNames([7], undefined, (id) => EXERCISES[id])).toBeNull();
+        expect(isAffected(queryKeys.analytics.logContext("Back", "Row", "x"), { ...SCOPE, exercises: null })).toBe(true);
+    });
+});
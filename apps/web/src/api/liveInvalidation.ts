@@ -0,0 +1,124 @@
+/**
+ * Which cached queries a live change event affects (`GET /events`).
+ *
+ * An `event: training` frame lists the (exercise id, UTC day) pairs one
+ * mutation touched. Rather than the broad prefixes the app's own mutations
+ * invalidate (useTraining / useRecord), a change made elsewhere (the bot)
+ * refetches only what it can move:
+ *
+ *  - summary, week-compare, top-muscles: always (user-wide numbers);
+ *  - activity / training.days windows overlapping a changed day, and the
+ *    training.day detail of a changed day — with ±1 day of slack, since the
+ *    event carries the UTC day and the keys are in the device timezone;
+ *  - log-context, exercise-progress, exercise-trend and the muscle's
+ *    top-exercises of a changed exercise.
+ *
+ * Keys name exercises by (muscle, exercise) NAME while events carry ids; the
+ * names are looked up in the cached catalog (`muscles.list` +
+ * `muscles.exercises(id)`). An id that is not cached there widens the scope
+ * to every exercise — the same broad prefixes a history edit uses.
+ */
+import type { QueryKey } from "@tanstack/react-query";
+import type { Exercise, Muscle } from "./analytics";
+
+/** An exercise as the query keys name it. */
+export interface ExerciseName {
+    muscle: string;
+    exercise: string;
+}
+
+export interface ChangeScope {
+    /** UTC days touched; `null` = any day. */
+    days: readonly string[] | null;
+    /** Exercises touched; `null` = unknown, so every exercise. */
+    exercises: readonly ExerciseName[] | null;
+}
+
+/** Everything an event could touch — used after a reconnect (events missed). */
+export const EVERYTHING: ChangeScope = { days: null, exercises: null };
+
+/**
+ * Map exercise ids to the names the keys use, from the cached catalog.
+ *
+ * @param ids - Exercise ids from the event.
+ * @param muscles - Cached `muscles.list` data.
+ * @param exercisesOf - Cached `muscles.exercises(muscleId)` data.
+ * @returns the names, or `null` when any id is not in the cache.
+ */
+export function resolveExerciseNames(
+    ids: readonly number[],
+    muscles: readonly Muscle[] | undefined,
+    exercisesOf: (muscleId: number) => readonly Exercise[] | undefined,
+): ExerciseName[] | null {
+    if (!muscles) return null;
+    const byId = new Map<number, ExerciseName>();
+    for (const muscle of muscles) {
+        for (const ex of exercisesOf(muscle.id) ?? []) {
+            byId.set(ex.id, { muscle: muscle.name, exercise: ex.name });
+        }
+    }
+    const names: ExerciseName[] = [];
+    for (const id of ids) {
+        const name = byId.get(id);
+        if (!name) return null;
+        names.push(name);
+    }
+    return names;
+}
+
+/** `day` moved by `delta` days (ISO `YYYY-MM-DD`, calendar arithmetic). */
+function shiftDay(day: string, delta: number): string {
+    const d = new Date(`${day}T00:00:00Z`);
+    d.setUTCDate(d.getUTCDate() + delta);
+    return d.toISOString().slice(0, 10);
+}
+
+/** True when [from, to] overlaps a changed day ±1. ISO dates compare as strings. */
+function overlaps(scope: ChangeScope, from: unknown, to: unknown): boolean {
+    if (scope.days === null) return true;
+    if (typeof from !== "string" || typeof to !== "string") return true;
+    return scope.days.some(
+        (day) => shiftDay(day, -1) <= to && shiftDay(day, 1) >= from,
+    );
+}
+
+function touchesExercise(
+    scope: ChangeScope,
+    muscle: unknown,
+    exercise?: unknown,
+): boolean {
+    if (scope.exercises === null) return true;
+    return scope.exercises.some(
+        (name) =>
+            name.muscle === muscle &&
+            (exercise === undefined || name.exercise === exercise),
+    );
+}
+
+/** Whether the query stored under `key` can change with `scope`. */
+export function isAffected(key: QueryKey, scope: ChangeScope): boolean {
+    const [family, kind, a, b] = key;
+    if (family === "analytics") {
+        switch (kind) {
+            case "summary":
+            case "week-compare":
+            case "top-muscles":
+                return true;
+            case "activity":
+                return overlaps(scope, a, b);
+            case "top-exercises":
+                return touchesExercise(scope, a);
+            case "log-context":
+            case "exercise-progress":
+            case "exercise-trend":
+                return touchesExercise(scope, a, b);
+            default:
+                return false;
+        }
+    }
+    if (family === "training") {
+        if (kind === "days") return overlaps(scope, a, b);
+        if (kind === "day") return overlaps(scope, a, a);
+    }
+    return false;
+}
@@ -2,7 +2,8 @@
  * Auth gate (spec §4): runs the initData -> JWT round-trip once on mount and
  * exposes the resulting status to the tree. While pending it shows a skeleton
  * shell; on failure it renders an ErrorState with retry. Children only mount
- * once a session exists, so every authed call has a token.
+ * once a session exists, so every authed call has a token. Once authed, the
+ * device timezone is stored on the profile (`syncDeviceTimezone`, best-effort).
  */
 import {
     createContext,
@@ -14,7 +15,8 @@ import {
 import type { Schemas } from "@/api/client";
 import { ApiError } from "@/api/client";
 import { t } from "@/i18n/catalog";
-import { authenticateWithInitData } from "@/api/auth";
+import { authenticateWithInitData, syncDeviceTimezone } from "@/api/auth";
+import { DEVICE_TZ } from "@/lib/timezone";
 import { getInitData, isTelegramEnv } from "@/telegram/webapp";
 
 type SessionIdentity = Schemas["SessionIdentity"];
@@ -63,6 +65,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
                 if (cancelled) return;
                 setIdentity(id);
                 setStatus("authed");
+                void syncDeviceTimezone(DEVICE_TZ);
             })
             .catch((err: unknown) => {
                 if (cancelled) return;
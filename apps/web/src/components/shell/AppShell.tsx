@@ -21,6 +21,7 @@ import { useScrollRestoration } from "./useScrollRestoration";
 import { formatDayHeading } from "@/components/history/historyWindow";
 import { RecordSheet } from "@/components/record/RecordSheet";
 import { RecordSheetContext } from "@/components/record/RecordSheetContext";
+import { useLiveInvalidation } from "@/hooks/useLiveInvalidation";
 
 /**
  * Resolve the header title for the current route. Tab routes use the nav label
@@ -49,6 +50,10 @@ export function AppShell() {
     const mainRef = useRef<HTMLElement>(null);
     useScrollRestoration(mainRef);
 
+    // Sets logged in the bot while the app is open refetch the screens they
+    // change (GET /events); the shell is mounted for the whole session.
+    useLiveInvalidation();
+
     // The record sheet lives at the shell so the center FAB (in <BottomNav>) can
     // open it from anywhere without per-page wiring (spec §12.2 / GYM-69).
     const [recordOpen, setRecordOpen] = useState(false);
@@ -0,0 +1,65 @@
+/**
+ * Keep the open Mini App current with changes made elsewhere (the bot).
+ *
+ * Subscribes to `GET /events` for as long as the shell is mounted and turns
+ * each training change into ONE predicate invalidation over the affected
+ * keys (see api/liveInvalidation). Active queries refetch at once, inactive
+ * ones on their next mount. `cancelRefetch: false` lets a fetch already in
+ * flight finish instead of being restarted.
+ *
+ * After a reconnect, every event-affected family is invalidated once: events
+ * published while the stream was down were missed, not queued.
+ */
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import type { Exercise, Muscle } from "@/api/analytics";
+import { subscribeEvents, type TrainingChangeEvent } from "@/api/events";
+import {
+    EVERYTHING,
+    isAffected,
+    resolveExerciseNames,
+    type ChangeScope,
+} from "@/api/liveInvalidation";
+import { queryKeys } from "@/api/queryKeys";
+
+export function useLiveInvalidation(): void {
+    const qc = useQueryClient();
+
+    useEffect(() => {
+        const invalidate = (scope: ChangeScope) => {
+            void qc.invalidateQueries(
+                { predicate: (query) => isAffected(query.queryKey, scope) },
+                { cancelRefetch: false },
+            );
+        };
+
+        let connectedBefore = false;
+        return subscribeEvents({
+            onOpen: () => {
+                if (connectedBefore) invalidate(EVERYTHING);
+                connectedBefore = true;
+            },
+            onEvent: ({ event, data }) => {
+                if (event !== "training") return;
+                let payload: TrainingChangeEvent;
+                try {
+                    payload = JSON.parse(data) as TrainingChangeEvent;
+                } catch {
+                    return;
+                }
+                const ids = [...new Set(payload.changes.map((c) => c.exercise_id))];
+                invalidate({
+                    days: payload.changes.map((c) => c.day),
+                    exercises: resolveExerciseNames(
+                        ids,
+                        qc.getQueryData<Muscle[]>(queryKeys.muscles.list),
+                        (muscleId) =>
+                            qc.getQueryData<Exercise[]>(
+                                queryKeys.muscles.exercises(muscleId),
+                            ),
+                    ),
+                });
+            },
+        });
+    }, [qc]);
+}
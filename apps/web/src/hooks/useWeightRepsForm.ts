@@ -8,7 +8,8 @@
  *    the user — the parse runs beside the text, spec §11.7);
  *  - parsing via the Stepper's own `parseNumeric` contract (comma→dot,
  *    weight decimal / reps integer);
- *  - the shared validity rule: both parse non-null and are >= 0;
+ *  - the shared validity rule: both parse non-null and are >= 0, reps at
+ *    most REPS_MAX;
  *  - spread-ready `weightProps` / `repsProps` for the two <Stepper>s
  *    (min/step/inputMode/integer baked in — WEIGHT_STEP lives here once).
  *
@@ -25,7 +26,7 @@
  */
 import { useCallback, useState } from "react";
 import { parseNumeric } from "@/components/ui/Stepper";
-import { WEIGHT_STEP } from "@/validation";
+import { REPS_MAX, WEIGHT_STEP } from "@/validation";
 
 /** Initial / reset payload — raw text, matching what the fields hold. */
 export interface WeightRepsTexts {
@@ -78,7 +79,7 @@ export function useWeightRepsForm(initial?: WeightRepsTexts): WeightRepsForm {
     const reps = parseNumeric(repsText, true);
 
     const valid =
-        weight !== null && weight >= 0 && reps !== null && reps >= 0;
+        weight !== null && weight >= 0 && reps !== null && reps >= 0 && reps <= REPS_MAX;
 
     const reset = useCallback((next?: WeightRepsTexts): void => {
         setWeightText(next?.weightText ?? "");
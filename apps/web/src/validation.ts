@@ -21,3 +21,9 @@ export const EXERCISE_NAME_MAX = 40;
  * GYM-126 owns any further constant dedup.
  */
 export const WEIGHT_STEP = 2.5;
+
+/**
+ * Largest reps the API accepts — reps are whole numbers stored as a SMALLINT
+ * (docs/validation.md "Reps"); anything above is a 422.
+ */
+export const REPS_MAX = 999;
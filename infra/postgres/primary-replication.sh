@@ -0,0 +1,20 @@
+#!/bin/bash
+# Primary side of the optional local streaming replica (docker-compose
+# profile "replica").  Runs once, from docker-entrypoint-initdb.d, when the
+# primary's data directory is initialised; on an existing data directory run
+# the CREATE ROLE and the pg_hba.conf line by hand (then SELECT pg_reload_conf()).
+#
+# wal_level=replica and max_wal_senders are already the postgres:16 defaults.
+set -euo pipefail
+
+if [ -z "${DB_REPLICATION_PASSWORD:-}" ]; then
+    echo "primary-replication: DB_REPLICATION_PASSWORD unset, no replication role created"
+    exit 0
+fi
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" \
+     -v pw="$DB_REPLICATION_PASSWORD" <<'EOSQL'
+CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD :'pw';
+EOSQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
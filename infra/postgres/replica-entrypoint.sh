@@ -0,0 +1,30 @@
+#!/bin/bash
+# Hot-standby streaming replica of gymbot_db (docker-compose profile
+# "replica").  On an empty data directory it clones the primary with
+# pg_basebackup (-R writes standby.signal and primary_conninfo, -C -S a
+# physical slot so the primary keeps the WAL the replica still needs), then
+# runs postgres as a read-only hot standby.
+#
+# Dropping the replica for good: also SELECT pg_drop_replication_slot('gymbot_replica')
+# on the primary, or the slot retains WAL forever.
+set -euo pipefail
+
+SLOT=gymbot_replica
+export PGPASSWORD="$DB_REPLICATION_PASSWORD"
+
+clone() {
+    pg_basebackup -h "$PRIMARY_HOST" -p "$PRIMARY_PORT" -U replicator \
+        -D "$PGDATA" -R -X stream -S "$SLOT" "$@"
+}
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    # The slot survives a failed clone: retry without creating it.
+    until clone -C || { rm -rf "${PGDATA:?}"/*; clone; }; do
+        echo "replica-entrypoint: primary not ready, retrying"
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chmod 0700 "$PGDATA"
+fi
+
+exec postgres -c hot_standby=on -c hot_standby_feedback=on
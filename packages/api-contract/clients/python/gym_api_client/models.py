@@ -8,7 +8,7 @@ from datetime import date as date_aliased
 from datetime import datetime
 from enum import Enum, StrEnum
 
-from pydantic import BaseModel, ConfigDict, Field, constr
+from pydantic import BaseModel, ConfigDict, Field, confloat, constr
 
 
 class Error(BaseModel):
@@ -57,6 +57,9 @@ class User(BaseModel):
     lastname: str | None = None
     username: str | None = None
     bio: str | None = None
+    timezone: str | None = Field(
+        None, description='IANA timezone for local calendar days; null means UTC.'
+    )
     registration_date: datetime | None = None
     last_interaction: datetime | None = None
 
@@ -66,6 +69,10 @@ class UserRegistration(BaseModel):
     lastname: str | None = None
     username: str | None = None
     bio: str | None = None
+    timezone: str | None = Field(
+        None,
+        description="IANA timezone name (e.g. 'Asia/Tbilisi'); 422 when unknown. Local-day analytics for this zone switch to the precomputed day once the background backfill of existing sets completes.\n",
+    )
 
 
 class Resolution(Enum):
@@ -200,7 +207,9 @@ class AdminExerciseCreate(BaseModel):
 
 
 class Training(BaseModel):
-    id: str = Field(..., description='Server-assigned record id.')
+    id: str = Field(
+        ..., description='Server-assigned record id (a UUIDv7 as 32 lower-case hex chars).'
+    )
     date: datetime
     user_id: int
     muscle_id: int
@@ -221,7 +230,10 @@ class TrainingCreate(BaseModel):
     )
     set: int
     weight: float
-    reps: float
+    reps: confloat(ge=-999.0, le=999.0, multiple_of=1.0) = Field(
+        ...,
+        description='Whole reps (a number for compatibility; stored as an integer). A fractional value or one outside ±999 is rejected with 422.\n',
+    )
     date: date_aliased | None = Field(
         None,
         description='Optional calendar day to log the set on (date part only; naive-tolerant per GYM-30). When provided, the set is recorded on that day (retroactive add). When omitted, the server uses now() — unchanged, backward-compatible.\n',
@@ -230,7 +242,10 @@ class TrainingCreate(BaseModel):
 
 class TrainingUpdate(BaseModel):
     weight: float
-    reps: float
+    reps: confloat(ge=-999.0, le=999.0, multiple_of=1.0) = Field(
+        ...,
+        description='Whole reps (a number for compatibility; stored as an integer). A fractional value or one outside ±999 is rejected with 422.\n',
+    )
 
 
 class TrainingMove(BaseModel):
@@ -270,7 +285,10 @@ class PrKind(Enum):
 
 
 class TrainingSet(BaseModel):
-    training_id: str = Field(..., description='Server-assigned record id of the set.')
+    training_id: str = Field(
+        ...,
+        description='Server-assigned record id of the set (32 lower-case hex chars).',
+    )
     set: int
     weight: float
     reps: float
@@ -429,6 +447,28 @@ class WeekCompare(BaseModel):
     last_week: WeekStats
 
 
+class DashboardSectionCache(BaseModel):
+    hit: bool = Field(
+        ..., description='True when the section was served from the cache.'
+    )
+    ttl: int | None = Field(
+        ...,
+        description="Seconds the section's cache entry has left (the full TTL for a freshly stored entry), or null when it is not cached.\n",
+    )
+
+
+class AnalyticsDashboard(BaseModel):
+    summary: AnalyticsSummary
+    activity: list[ActivityDay]
+    week_compare: WeekCompare
+    top_muscles: list[TopMuscle]
+    recent_exercises: list[RecentExercise]
+    cache: dict[str, DashboardSectionCache] = Field(
+        ...,
+        description='Per section name (summary, activity, ...), its cache outcome.',
+    )
+
+
 class StaticData(BaseModel):
     sets: list[str]
     weights: list[str]
@@ -93,6 +93,10 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # Reason: one transaction per revision, so a revision that fails
+            # (e.g. 0013 without MIGRATE_ALLOW_REWRITE) keeps the ones before
+            # it applied instead of rolling back the whole upgrade.
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
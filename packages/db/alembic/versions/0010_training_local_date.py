@@ -0,0 +1,121 @@
+"""user timezone + write-time training.local_date
+
+Revision ID: 0010_training_local_date
+Revises: 0009_seed_ru_aliases
+Create Date: 2026-10-19 00:00:00.000000+00:00
+
+Materializes each set's local calendar day so tz-aware reads group by a plain
+indexed column instead of evaluating ``date AT TIME ZONE 'UTC' AT TIME ZONE
+:tz`` per row.
+
+WHAT THIS DOES
+--------------
+1. ``users.timezone``       TEXT NULL — the user's IANA zone (set through
+   ``PUT /users/me``). NULL means UTC.
+2. ``users.local_date_tz``  TEXT NULL — the zone every one of the user's
+   ``training.local_date`` values currently reflects. Written ONLY by the
+   backfill job (``app/services/local_date.py``) once the user's rows are
+   consistent, and cleared whenever ``timezone`` changes. Readers use
+   ``local_date`` only when the requested tz equals this column.
+3. ``training.local_date``  DATE NULL — ``date`` (naive UTC) as a calendar
+   day in the owner's zone.
+4. ``training_local_date()`` + BEFORE INSERT / UPDATE OF date, user_id
+   trigger — computes ``local_date`` from ``users.timezone`` on every write
+   path (create, move, imports), so the app never sets it. Runs as the
+   invoker: under RLS the writing session can always read its own users row.
+5. ``idx_training_user_local_date`` on training (user_id, local_date) — the
+   streak's week list becomes an index-only scan.  Built CONCURRENTLY (no
+   write lock on training) inside Alembic's ``autocommit_block``, with the
+   invalid-leftover handling of 0011: a failed concurrent build leaves an
+   INVALID index that ``IF NOT EXISTS`` would keep, so it is dropped and
+   rebuilt.  The column and trigger changes before it are catalog-only.
+
+Existing rows are NOT backfilled here (one UPDATE over the whole table would
+hold row locks for the duration): ``local_date`` stays NULL and
+``local_date_tz`` stays NULL, so every read keeps the AT TIME ZONE path until
+the ``training.local_date.backfill`` job has run for that user. Enqueue the
+whole fleet after deploying with:
+
+    python -m app.core.jobs enqueue training.local_date.backfill_all
+
+Idempotent (IF NOT EXISTS / OR REPLACE / DROP TRIGGER IF EXISTS) so it is a
+no-op when bootstrapped from init.sql first. Mirrored into init.sql.
+
+Backward compatibility: additive. downgrade() drops the trigger, function,
+index (CONCURRENTLY) and the three columns.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_training_local_date"
+down_revision: Union[str, Sequence[str], None] = "0009_seed_ru_aliases"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEX_NAME = "idx_training_user_local_date"
+_INDEX_DEFINITION = "ON training (user_id, local_date)"
+
+_INVALID_INDEX = text("""
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND NOT i.indisvalid
+""")
+
+_VALID_INDEX = text("""
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND i.indisvalid
+""")
+
+_CREATE_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION public.training_local_date()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $func$
+BEGIN
+    NEW.local_date := (NEW.date AT TIME ZONE 'UTC' AT TIME ZONE COALESCE(
+        (SELECT u.timezone FROM users u WHERE u.id = NEW.user_id), 'UTC'))::date;
+    RETURN NEW;
+END;
+$func$;
+"""
+
+
+def upgrade() -> None:
+    """Add the timezone / local_date columns, the trigger and its index."""
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone TEXT")
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS local_date_tz TEXT")
+    op.execute("ALTER TABLE training ADD COLUMN IF NOT EXISTS local_date DATE")
+
+    op.execute(_CREATE_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS training_local_date ON training")
+    op.execute(
+        "CREATE TRIGGER training_local_date "
+        "BEFORE INSERT OR UPDATE OF date, user_id ON training "
+        "FOR EACH ROW EXECUTE FUNCTION public.training_local_date()"
+    )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        # Present already (init.sql bootstrap): skip — CONCURRENTLY is
+        # rejected outright on a partitioned table (0012).
+        if bind.execute(_VALID_INDEX, {"name": _INDEX_NAME}).first() is None:
+            if bind.execute(_INVALID_INDEX, {"name": _INDEX_NAME}).first() is not None:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_INDEX_NAME}")
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {_INDEX_NAME} {_INDEX_DEFINITION}")
+
+
+def downgrade() -> None:
+    """Drop the trigger, function, index and columns (IF EXISTS)."""
+    op.execute("DROP TRIGGER IF EXISTS training_local_date ON training")
+    op.execute("DROP FUNCTION IF EXISTS public.training_local_date()")
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_INDEX_NAME}")
+    op.execute("ALTER TABLE training DROP COLUMN IF EXISTS local_date")
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS local_date_tz")
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS timezone")
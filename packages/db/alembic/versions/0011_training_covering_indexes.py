@@ -0,0 +1,104 @@
+"""covering indexes for recent-exercises and the log-context reads
+
+Revision ID: 0011_training_covering_indexes
+Revises: 0010_training_local_date
+Create Date: 2026-10-19 01:00:00.000000+00:00
+
+The per-exercise reads all filter ``(user_id, exercise_id)`` and then sort.
+``idx_training_user_exercise`` (0003) finds the rows but neither orders nor
+covers them, so each query visits every matching heap row:
+
+  * analytics.recent_exercises           DISTINCT ON (exercise_id)
+                                         ORDER BY exercise_id, date DESC
+  * analytics.log_context.last_session_sets  MAX(date) before a day, then
+                                         that day's (set, weight, reps)
+  * analytics.log_context.completed_sets one day's DISTINCT set
+  * analytics.log_context.personal_record ORDER BY weight DESC, reps DESC,
+                                         date DESC LIMIT 1
+
+WHAT THIS DOES
+--------------
+1. ``idx_training_user_exercise_date``
+   ON training (user_id, exercise_id, date DESC)
+   INCLUDE (muscle_id, "set", weight, reps)
+   Carries every selected column: recent-exercises, last-session and
+   completed-sets become index-only scans (once VACUUM has set the
+   visibility map). recent-exercises is rewritten alongside as a skip scan
+   (one probe per distinct exercise, then its newest entry), so it no
+   longer reads the user's whole history.
+2. ``idx_training_user_exercise_pr``
+   ON training (user_id, exercise_id, weight DESC, reps DESC, date DESC)
+   The personal record is the first entry of the (user, exercise) range.
+
+Both are built CONCURRENTLY (no write lock on training) inside Alembic's
+``autocommit_block``: CREATE INDEX CONCURRENTLY cannot run in a transaction.
+A concurrent build that failed leaves an INVALID index behind which
+``IF NOT EXISTS`` would silently keep, so an invalid leftover is dropped
+(CONCURRENTLY) and rebuilt. Mirrored into init.sql (plain CREATE INDEX — a
+fresh volume has no writers).
+
+``idx_training_user_exercise`` is now a prefix of (1). It is kept for this
+release; drop it once ``pg_stat_user_indexes.idx_scan`` shows it unused.
+
+Measured with ``python -m bench.covering_indexes`` (apps/api/bench/README.md).
+
+Backward compatibility: index-only. downgrade() drops both (CONCURRENTLY).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_training_covering_indexes"
+down_revision: Union[str, Sequence[str], None] = "0010_training_local_date"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    (
+        "idx_training_user_exercise_date",
+        'ON training (user_id, exercise_id, date DESC) INCLUDE (muscle_id, "set", weight, reps)',
+    ),
+    (
+        "idx_training_user_exercise_pr",
+        "ON training (user_id, exercise_id, weight DESC, reps DESC, date DESC)",
+    ),
+)
+
+_INVALID_INDEX = text("""
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND NOT i.indisvalid
+""")
+
+_VALID_INDEX = text("""
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND i.indisvalid
+""")
+
+
+def upgrade() -> None:
+    """Build both covering indexes CONCURRENTLY (idempotent)."""
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for name, definition in INDEXES:
+            # Present already (init.sql bootstrap): skip — CONCURRENTLY is
+            # rejected outright on a partitioned table (0012), even with
+            # IF NOT EXISTS.
+            if bind.execute(_VALID_INDEX, {"name": name}).first() is not None:
+                continue
+            if bind.execute(_INVALID_INDEX, {"name": name}).first() is not None:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+
+
+def downgrade() -> None:
+    """Drop both indexes CONCURRENTLY (IF EXISTS), reversing upgrade()."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,304 @@
+"""range-partition training by date (yearly), online
+
+Revision ID: 0012_training_partitioning
+Revises: 0011_training_covering_indexes
+Create Date: 2026-10-19 02:00:00.000000+00:00
+
+``training`` was one heap: every user's rows for every year interleaved, so
+old history inflated vacuum, index size and every recent-window read.  After
+this migration ``training`` is a partitioned table, RANGE on ``date``:
+
+    training_history   FROM (MINVALUE) TO (<cutoff>)  — the pre-existing heap
+    training_p<YYYY>   one per calendar year from <cutoff> on
+    training_default   DEFAULT — rows beyond the created years (never fails
+                       a write; moved out when their year is created)
+
+Yearly, not monthly: the per-exercise full-history reads (recent-exercises,
+PRs, the ``/training/days`` PR window) scan every partition, so the count is
+kept small; recent-window reads prune to one or two partitions either way.
+
+WHAT THIS DOES (existing plain table — the online path)
+--------------------------------------------------------
+The old heap is ATTACHED as ``training_history``, not copied.  Everything that
+scans or builds runs first, outside a transaction, while writes continue:
+
+1. ``<cutoff>`` = start of next month (or later, past the newest row).
+   CHECK (date < cutoff) NOT VALID, then VALIDATE (SHARE UPDATE EXCLUSIVE —
+   concurrent writes proceed) so the ATTACH below needs no scan.
+2. CREATE UNIQUE INDEX CONCURRENTLY on (id, date): the new primary key
+   must contain the partition key.
+
+Then one short transaction under ``lock_timeout`` (catalog work only):
+
+3. rename the heap (and its indexes / pkey) to ``training_history``, create
+   the partitioned ``training`` with the same columns, PK (id, date) and
+   foreign keys, and ATTACH the heap — its validated CHECK proves the bound,
+   its (id, date) index becomes the partition's primary key.
+4. re-create every index of the old heap on the parent under its old name:
+   Postgres attaches the existing identical index, nothing is rebuilt.
+5. move the ``training_local_date`` trigger to the parent, apply the 0002
+   RLS helper to the parent (the history partition keeps its policies).
+6. ``training_ensure_partitions()`` creates the years from <cutoff> on and
+   the default partition.
+
+Rows before <cutoff> stay in ``training_history`` (cold after the cutoff:
+frozen by vacuum, pruned by recent-window reads).
+
+Future partitions: ``public.training_ensure_partitions(years_ahead)`` —
+SECURITY DEFINER so ``app_rw`` may call it — creates missing years up to
+``years_ahead`` past the current one (moving rows out of the default
+partition), applying ``enable_user_rls`` to each.  The
+``training.partitions.ensure`` job (``app/services/training_partitions.py``)
+runs it daily; start it once after deploying with:
+
+    python -m app.core.jobs enqueue training.partitions.ensure \
+        --dedup-key training.partitions.ensure
+
+Idempotent: on a table that is already partitioned (bootstrapped from
+init.sql) only the function, the partition RLS and the grant are
+(re)applied. Mirrored into init.sql.
+
+Backward compatibility: same columns, same index names.  ``training.id`` is
+unique per partition only (uuid4 hex ids are unique anyway).
+downgrade() copies the rows back into a plain table under an exclusive lock
+(offline).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_training_partitioning"
+down_revision: Union[str, Sequence[str], None] = "0011_training_covering_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+APP_ROLE = "app_rw"
+
+HISTORY = "training_history"
+
+# Temporary objects of the online path (steps 1-2).
+_BOUND_CHECK = "training_history_bound"
+_PK_INDEX = "training_history_pkey"
+
+# How long the swap transaction waits for its ACCESS EXCLUSIVE lock before
+# failing (re-run the migration) instead of queueing every request behind it.
+_SWAP_LOCK_TIMEOUT = "10s"
+
+# The version in packages/db/init.sql is the latest one (0014).
+_ENSURE_PARTITIONS = r"""
+CREATE OR REPLACE FUNCTION public.training_ensure_partitions(p_years_ahead int DEFAULT 1)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_year_start timestamp := date_trunc('year', now() AT TIME ZONE 'UTC');
+    v_history_to timestamp;
+    v_from       timestamp;
+    v_to         timestamp;
+    v_name       text;
+    v_role       text := current_setting('app.role', true);
+    v_rls        boolean := to_regprocedure('public.enable_user_rls(regclass,text)') IS NOT NULL;
+    v_created    int := 0;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.training'::regclass) <> 'p' THEN
+        RETURN 0;
+    END IF;
+    -- FORCE ROW LEVEL SECURITY applies to the owner too: moving rows out of
+    -- the default partition must see every user's rows.
+    PERFORM set_config('app.role', 'admin', true);
+
+    IF to_regclass('public.training_history') IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.training_history PARTITION OF public.training'
+            ' FOR VALUES FROM (MINVALUE) TO (%L)', v_year_start);
+        IF v_rls THEN PERFORM public.enable_user_rls('public.training_history', 'user_id'); END IF;
+        v_created := v_created + 1;
+    END IF;
+    IF to_regclass('public.training_default') IS NULL THEN
+        CREATE TABLE public.training_default PARTITION OF public.training DEFAULT;
+        IF v_rls THEN PERFORM public.enable_user_rls('public.training_default', 'user_id'); END IF;
+        v_created := v_created + 1;
+    END IF;
+
+    SELECT substring(pg_get_expr(c.relpartbound, c.oid) FROM $re$TO \('([^']+)'\)$re$)::timestamp
+      INTO v_history_to
+      FROM pg_class c WHERE c.oid = 'public.training_history'::regclass;
+
+    FOR i IN 0..p_years_ahead LOOP
+        v_from := v_year_start + make_interval(years => i);
+        v_to   := v_from + interval '1 year';
+        v_name := 'training_p' || to_char(v_from, 'YYYY');
+        CONTINUE WHEN v_to <= v_history_to OR to_regclass('public.' || v_name) IS NOT NULL;
+        -- The first year after the cutoff of an attached heap is partial.
+        v_from := GREATEST(v_from, v_history_to);
+
+        -- Rows already routed to the default partition for this range move
+        -- into the new table before it is attached.
+        EXECUTE format('CREATE TABLE public.%I (LIKE public.training INCLUDING DEFAULTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM public.training_default'
+            ' WHERE date >= %L AND date < %L RETURNING *)'
+            ' INSERT INTO public.%I SELECT * FROM moved', v_from, v_to, v_name);
+        EXECUTE format(
+            'ALTER TABLE public.training ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_to);
+        IF v_rls THEN PERFORM public.enable_user_rls(format('public.%I', v_name)::regclass, 'user_id'); END IF;
+        v_created := v_created + 1;
+    END LOOP;
+
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN v_created;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_ensure_partitions(int) FROM PUBLIC;
+"""
+
+# Conditional like 0002_rls: skipped on a dev DB without the app role.
+_GRANT_TEMPLATE = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = '{role}') THEN
+        {grants}
+    END IF;
+END
+$$;
+"""
+_GRANT_TABLE = f"GRANT SELECT, INSERT, UPDATE, DELETE ON training TO {APP_ROLE};"
+_GRANT_ENSURE = f"GRANT EXECUTE ON FUNCTION public.training_ensure_partitions(int) TO {APP_ROLE};"
+
+_ENABLE_PARTITION_RLS = """
+SELECT public.enable_user_rls(i.inhrelid::regclass, 'user_id')
+FROM pg_inherits i
+WHERE i.inhparent = 'public.training'::regclass
+"""
+
+_CREATE_TRIGGER = (
+    "CREATE TRIGGER training_local_date "
+    "BEFORE INSERT OR UPDATE OF date, user_id ON training "
+    "FOR EACH ROW EXECUTE FUNCTION public.training_local_date()"
+)
+
+_RELKIND = text("SELECT relkind FROM pg_class WHERE oid = 'public.training'::regclass")
+
+_INVALID_INDEX = text("""
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND NOT i.indisvalid
+""")
+
+# Secondary indexes of the heap (everything but the pkey and step 2's index).
+_HEAP_INDEXES = text("""
+    SELECT c.relname, pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = 'public.training'::regclass
+      AND NOT i.indisprimary
+      AND c.relname <> :pk_index
+    ORDER BY c.relname
+""")
+
+_FOREIGN_KEYS = text("""
+    SELECT conname, pg_get_constraintdef(oid)
+    FROM pg_constraint
+    WHERE conrelid = 'public.training'::regclass AND contype = 'f'
+    ORDER BY conname
+""")
+
+
+def _history_index_name(name: str) -> str:
+    """``idx_training_user_date`` -> ``idx_training_history_user_date``."""
+    return name.replace("training_", f"{HISTORY}_", 1)
+
+
+def _prepare_heap(bind) -> str:
+    """Steps 1-2 (autocommit, concurrent with writes); returns the cutoff."""
+    cutoff = bind.execute(text("""
+        SELECT GREATEST(
+            date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month',
+            date_trunc('month', MAX(date)) + interval '1 month'
+        ) FROM training
+    """)).scalar()
+    op.execute(f"ALTER TABLE training DROP CONSTRAINT IF EXISTS {_BOUND_CHECK}")
+    op.execute(
+        f"ALTER TABLE training ADD CONSTRAINT {_BOUND_CHECK} "
+        f"CHECK (date < '{cutoff.isoformat(sep=' ')}') NOT VALID"
+    )
+    op.execute(f"ALTER TABLE training VALIDATE CONSTRAINT {_BOUND_CHECK}")
+    if bind.execute(_INVALID_INDEX, {"name": _PK_INDEX}).first() is not None:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_PK_INDEX}")
+    op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {_PK_INDEX} ON training (id, date)")
+    return cutoff.isoformat(sep=" ")
+
+
+def _swap(bind, cutoff: str) -> None:
+    """Steps 3-6: one transaction, catalog changes only."""
+    op.execute(f"SET LOCAL lock_timeout = '{_SWAP_LOCK_TIMEOUT}'")
+    op.execute("LOCK TABLE training IN ACCESS EXCLUSIVE MODE")
+    indexes = bind.execute(_HEAP_INDEXES, {"pk_index": _PK_INDEX}).fetchall()
+    foreign_keys = bind.execute(_FOREIGN_KEYS).fetchall()
+
+    op.execute(f"ALTER TABLE training RENAME TO {HISTORY}")
+    op.execute(f"ALTER TABLE {HISTORY} DROP CONSTRAINT training_pkey")
+    op.execute(f"ALTER TABLE {HISTORY} ADD CONSTRAINT {_PK_INDEX} PRIMARY KEY USING INDEX {_PK_INDEX}")
+    for name, _ in indexes:
+        op.execute(f"ALTER INDEX {name} RENAME TO {_history_index_name(name)}")
+    op.execute(f"DROP TRIGGER IF EXISTS training_local_date ON {HISTORY}")
+
+    op.execute(f"CREATE TABLE training (LIKE {HISTORY} INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+    op.execute("ALTER TABLE training ADD PRIMARY KEY (id, date)")
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE training ADD CONSTRAINT {name} {definition}")
+    op.execute(
+        f"ALTER TABLE training ATTACH PARTITION {HISTORY} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{cutoff}')"
+    )
+    op.execute(f"ALTER TABLE {HISTORY} DROP CONSTRAINT {_BOUND_CHECK}")
+    for _, definition in indexes:
+        op.execute(definition)
+    op.execute(_CREATE_TRIGGER)
+    op.execute("SELECT public.enable_user_rls('training', 'user_id')")
+
+
+def upgrade() -> None:
+    """Partition ``training`` (online when it is still a plain table)."""
+    bind = op.get_bind()
+    op.execute(_ENSURE_PARTITIONS)
+    if bind.execute(_RELKIND).scalar() != "p":
+        with op.get_context().autocommit_block():
+            cutoff = _prepare_heap(bind)
+        _swap(bind, cutoff)
+    op.execute("SELECT public.training_ensure_partitions()")
+    op.execute(_ENABLE_PARTITION_RLS)
+    op.execute(_GRANT_TEMPLATE.format(role=APP_ROLE, grants=f"{_GRANT_TABLE}\n        {_GRANT_ENSURE}"))
+
+
+def downgrade() -> None:
+    """Copy every row back into a plain ``training`` table (offline)."""
+    bind = op.get_bind()
+    op.execute("LOCK TABLE training IN ACCESS EXCLUSIVE MODE")
+    indexes = bind.execute(text("""
+        SELECT pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = 'public.training'::regclass AND NOT i.indisprimary
+    """)).scalars().all()
+    foreign_keys = bind.execute(_FOREIGN_KEYS).fetchall()
+
+    op.execute("ALTER TABLE training RENAME TO training_partitioned")
+    op.execute("CREATE TABLE training (LIKE training_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO training SELECT * FROM training_partitioned")
+    op.execute("DROP TABLE training_partitioned CASCADE")
+    op.execute("ALTER TABLE training ADD PRIMARY KEY (id)")
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE training ADD CONSTRAINT {name} {definition}")
+    for definition in indexes:
+        op.execute(definition.replace(" ON ONLY public.training ", " ON public.training "))
+    op.execute(_CREATE_TRIGGER)
+    op.execute("SELECT public.enable_user_rls('training', 'user_id')")
+    op.execute("DROP FUNCTION IF EXISTS public.training_ensure_partitions(int)")
+    op.execute(_GRANT_TEMPLATE.format(role=APP_ROLE, grants=_GRANT_TABLE))
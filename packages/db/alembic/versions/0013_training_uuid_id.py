@@ -0,0 +1,103 @@
+"""training.id as native uuid (UUIDv7 for new rows)
+
+Revision ID: 0013_training_uuid_id
+Revises: 0012_training_partitioning
+Create Date: 2026-10-19 04:00:00.000000+00:00
+
+``training.id`` was VARCHAR(32) holding ``uuid4().hex`` — a 33-byte varlena
+in the heap and in every primary-key entry, and a random key: each insert
+lands on an arbitrary leaf of the (id, date) btree.  After this migration the
+column is ``uuid`` (16 bytes) and the API assigns UUIDv7 ids, whose leading
+48 bits are the creation time in milliseconds, so new entries append to the
+right edge of the index (``app/core/training_ids.py``).
+
+WHAT THIS DOES
+--------------
+ALTER COLUMN id TYPE uuid on the partitioned parent (recurses into every
+partition).  Existing ids convert losslessly: uuid4 hex ids and the bot's
+legacy md5 hex digests are both 32 hex chars, ``id::uuid`` keeps their value
+and their hex form.  Any other legacy string becomes ``md5(id)::uuid`` — the
+API applies the same mapping to a non-hex ``training_id`` path parameter, so
+such ids keep resolving during the dual-read period.
+
+The API keeps returning the 32-char hex form (``uuid.hex``), so ids the bot
+and the Mini App already hold stay valid and look the same; path parameters
+also accept the canonical 8-4-4-4-12 text.
+
+Cost: a table rewrite under ACCESS EXCLUSIVE (every index is rebuilt).
+Measured 27 s for 1.9M rows on a local Postgres 16.  Not taken by the
+automatic deploy: the rewrite refuses to start without
+``MIGRATE_ALLOW_REWRITE=1``, which the operator sets for a manual run in a
+maintenance window (packages/db/RUNBOOK.md, "Table rewrites").
+``lock_timeout`` only bounds the wait for the lock: the migration fails
+(re-run it) instead of queueing every request behind a long reader.
+Primary-key size on the same data: 122 MB -> 73 MB; see ``bench.training_ids``
+for index size and insert throughput of the three layouts.
+
+Idempotent: a no-op when the column is already ``uuid`` (bootstrapped from
+init.sql). Mirrored into init.sql.
+
+Backward compatibility: the database accepts hex strings for a uuid
+parameter, so code still sending ``uuid4().hex`` keeps working.  downgrade()
+converts back to VARCHAR(32) hex (also a rewrite); ids mapped through md5
+keep their mapped value.
+"""
+
+import os
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_training_uuid_id"
+down_revision: Union[str, Sequence[str], None] = "0012_training_partitioning"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# How long ALTER TABLE waits for its ACCESS EXCLUSIVE lock before failing.
+_LOCK_TIMEOUT = "10s"
+
+# Also in app/core/training_ids.parse_training_id — keep both in sync.
+_TO_UUID = "CASE WHEN id ~ '^[0-9a-fA-F]{32}$' THEN id::uuid ELSE md5(id)::uuid END"
+
+_ID_TYPE = text("""
+    SELECT data_type FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = 'training' AND column_name = 'id'
+""")
+
+
+# The rewrite runs only when the operator opts in (packages/db/RUNBOOK.md,
+# "Table rewrites"): the unattended deploy step must stop here, before the
+# ACCESS EXCLUSIVE lock, instead of taking the table down mid-deploy.
+_ALLOW_REWRITE_ENV = "MIGRATE_ALLOW_REWRITE"
+
+
+def _require_rewrite_window() -> None:
+    """Refuse the table rewrite unless ``MIGRATE_ALLOW_REWRITE=1`` is set.
+
+    Raises:
+        RuntimeError: when the variable is not set to ``1``.
+    """
+    if os.getenv(_ALLOW_REWRITE_ENV) != "1":
+        raise RuntimeError(
+            f"{revision} rewrites the training table under ACCESS EXCLUSIVE; "
+            f"run it in a maintenance window with {_ALLOW_REWRITE_ENV}=1 "
+            "(packages/db/RUNBOOK.md, \"Table rewrites\")"
+        )
+
+def upgrade() -> None:
+    """Convert ``training.id`` to ``uuid``."""
+    if op.get_bind().execute(_ID_TYPE).scalar() == "uuid":
+        return
+    _require_rewrite_window()
+    op.execute(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+    op.execute(f"ALTER TABLE training ALTER COLUMN id TYPE uuid USING {_TO_UUID}")
+
+
+def downgrade() -> None:
+    """Convert ``training.id`` back to its VARCHAR(32) hex form."""
+    if op.get_bind().execute(_ID_TYPE).scalar() != "uuid":
+        return
+    op.execute(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+    op.execute("ALTER TABLE training ALTER COLUMN id TYPE VARCHAR(32) USING replace(id::text, '-', '')")
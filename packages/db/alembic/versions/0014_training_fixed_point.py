@@ -0,0 +1,241 @@
+"""integer weight_c / smallint reps for the training aggregates
+
+Revision ID: 0014_training_fixed_point
+Revises: 0013_training_uuid_id
+Create Date: 2026-10-19 05:00:00.000000+00:00
+
+``weight`` and ``reps`` were both NUMERIC(5,2): every aggregate over them
+(``SUM(weight * reps)``, ``MAX(weight * (1 + reps / 30.0))``, the running-max
+PR windows) ran in arbitrary-precision numeric, and every value reached the
+routers as a ``Decimal`` to convert with ``float()``.
+
+WHAT THIS DOES
+--------------
+One ALTER TABLE (a single rewrite of every partition):
+
+1. ``weight_c`` INTEGER GENERATED ALWAYS AS ((weight * 100)::integer) STORED
+   — the weight in hundredths of a kg, exact for NUMERIC(5,2) (the unit the
+   NumPy snapshot already uses).  ``weight`` stays the written column, so
+   every writer (API, imports, fixtures) is unchanged; the reads aggregate
+   ``weight_c``.
+2. ``reps`` NUMERIC(5,2) -> SMALLINT, with CHECK (reps BETWEEN -999 AND 999)
+   (``training_reps_range``) — the range NUMERIC(5,2) allowed, which also
+   keeps ``weight_c * reps`` and ``weight_c * (30 + reps)`` inside int4.
+   The migration refuses to run while a row holds fractional reps (nothing
+   is rounded silently).
+3. ``idx_training_user_exercise_date`` (0011) INCLUDEs ``weight_c`` instead
+   of ``weight`` so the per-exercise reads stay index-only.  It is dropped
+   before the ALTER and built after it: the rewrite rebuilds every index
+   anyway.
+4. ``training_ensure_partitions()`` (0012) creates a new year's table with
+   the generated column and the CHECK (``INCLUDING GENERATED INCLUDING
+   CONSTRAINTS`` — ATTACH requires both) and moves default-partition rows by
+   their stored columns only.  The new body is also valid for the 0013
+   schema, so downgrade() leaves it in place.
+
+Cost: a table rewrite under ACCESS EXCLUSIVE, like 0013 — 19 s for 1.9M rows
+on a local Postgres 16; ``lock_timeout`` bounds only the wait for the lock.
+Gated like 0013: run by hand with ``MIGRATE_ALLOW_REWRITE=1`` in the same
+maintenance window (packages/db/RUNBOOK.md, "Table rewrites").
+Size is about unchanged (562 MB -> 547 MB with indexes: the 4 bytes of
+``weight_c`` against the bytes saved on ``reps``).  Aggregation time of the
+reads: ``bench.fixed_point``.
+
+Idempotent: when ``weight_c`` exists only the function and the index are
+(re)applied. Mirrored into init.sql.
+
+CONTRACT CHANGE (writes): ``reps`` stays ``type: number`` in openapi.yaml
+and still reads as a number, but TrainingCreate / TrainingUpdate now answer
+a fractional value or one outside ±999 with 422 (``multipleOf: 1``,
+``minimum``/``maximum``; docs/validation.md "Reps").  The clients check the
+same rule before calling: the bot in ``confirmation.parse_reps``, the Mini
+App in ``useWeightRepsForm`` (integer field, ``REPS_MAX``), and the
+generated Python client through its ``confloat`` constraint.
+
+Backward compatibility: columns are only added; reads are unchanged.
+downgrade() drops ``weight_c``, converts ``reps`` back to
+NUMERIC(5,2) and restores the 0011 index.
+"""
+
+import os
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "0014_training_fixed_point"
+down_revision: Union[str, Sequence[str], None] = "0013_training_uuid_id"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_LOCK_TIMEOUT = "10s"
+
+COVERING_INDEX = "idx_training_user_exercise_date"
+_COVERING_ON = "ON training (user_id, exercise_id, date DESC) INCLUDE (muscle_id, \"set\", {weight}, reps)"
+
+# training_ensure_partitions (0012) with the 0014 create-and-move step.  It
+# also works on the 0013 schema, so downgrade() keeps it.
+# Also in packages/db/init.sql — keep both in sync.
+_ENSURE_PARTITIONS = r"""
+CREATE OR REPLACE FUNCTION public.training_ensure_partitions(p_years_ahead int DEFAULT 1)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_year_start timestamp := date_trunc('year', now() AT TIME ZONE 'UTC');
+    v_history_to timestamp;
+    v_from       timestamp;
+    v_to         timestamp;
+    v_name       text;
+    v_role       text := current_setting('app.role', true);
+    v_rls        boolean := to_regprocedure('public.enable_user_rls(regclass,text)') IS NOT NULL;
+    v_created    int := 0;
+    v_columns    text;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.training'::regclass) <> 'p' THEN
+        RETURN 0;
+    END IF;
+    -- FORCE ROW LEVEL SECURITY applies to the owner too: moving rows out of
+    -- the default partition must see every user's rows.
+    PERFORM set_config('app.role', 'admin', true);
+
+    IF to_regclass('public.training_history') IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.training_history PARTITION OF public.training'
+            ' FOR VALUES FROM (MINVALUE) TO (%L)', v_year_start);
+        IF v_rls THEN PERFORM public.enable_user_rls('public.training_history', 'user_id'); END IF;
+        v_created := v_created + 1;
+    END IF;
+    IF to_regclass('public.training_default') IS NULL THEN
+        CREATE TABLE public.training_default PARTITION OF public.training DEFAULT;
+        IF v_rls THEN PERFORM public.enable_user_rls('public.training_default', 'user_id'); END IF;
+        v_created := v_created + 1;
+    END IF;
+
+    SELECT substring(pg_get_expr(c.relpartbound, c.oid) FROM $re$TO \('([^']+)'\)$re$)::timestamp
+      INTO v_history_to
+      FROM pg_class c WHERE c.oid = 'public.training_history'::regclass;
+
+    -- Generated columns (weight_c) cannot be inserted: move the stored ones.
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+      INTO v_columns
+      FROM pg_attribute
+     WHERE attrelid = 'public.training'::regclass
+       AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    FOR i IN 0..p_years_ahead LOOP
+        v_from := v_year_start + make_interval(years => i);
+        v_to   := v_from + interval '1 year';
+        v_name := 'training_p' || to_char(v_from, 'YYYY');
+        CONTINUE WHEN v_to <= v_history_to OR to_regclass('public.' || v_name) IS NOT NULL;
+        -- The first year after the cutoff of an attached heap is partial.
+        v_from := GREATEST(v_from, v_history_to);
+
+        -- Rows already routed to the default partition for this range move
+        -- into the new table before it is attached.
+        EXECUTE format(
+            'CREATE TABLE public.%I (LIKE public.training'
+            ' INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM public.training_default'
+            ' WHERE date >= %L AND date < %L RETURNING %s)'
+            ' INSERT INTO public.%I (%s) SELECT * FROM moved',
+            v_from, v_to, v_columns, v_name, v_columns);
+        EXECUTE format(
+            'ALTER TABLE public.training ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_to);
+        IF v_rls THEN PERFORM public.enable_user_rls(format('public.%I', v_name)::regclass, 'user_id'); END IF;
+        v_created := v_created + 1;
+    END LOOP;
+
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN v_created;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_ensure_partitions(int) FROM PUBLIC;
+"""
+
+_HAS_WEIGHT_C = text("""
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = 'training' AND column_name = 'weight_c'
+""")
+
+_FRACTIONAL_REPS = text("SELECT COUNT(*) FROM training WHERE reps <> trunc(reps)")
+
+_INDEX_DEF = text("""
+    SELECT pg_get_indexdef(c.oid) FROM pg_class c
+    WHERE c.relname = :name AND c.relnamespace = 'public'::regnamespace
+""")
+
+
+def _covering_index(weight: str) -> None:
+    """(Re)create the 0011 covering index carrying ``weight``."""
+    definition = _COVERING_ON.format(weight=weight)
+    current = op.get_bind().execute(_INDEX_DEF, {"name": COVERING_INDEX}).scalar()
+    if current is not None and f"{weight}, reps)" in current:
+        return
+    op.execute(f"DROP INDEX IF EXISTS {COVERING_INDEX}")
+    op.execute(f"CREATE INDEX {COVERING_INDEX} {definition}")
+
+
+# The rewrite runs only when the operator opts in (packages/db/RUNBOOK.md,
+# "Table rewrites"): the unattended deploy step must stop here, before the
+# ACCESS EXCLUSIVE lock, instead of taking the table down mid-deploy.
+_ALLOW_REWRITE_ENV = "MIGRATE_ALLOW_REWRITE"
+
+
+def _require_rewrite_window() -> None:
+    """Refuse the table rewrite unless ``MIGRATE_ALLOW_REWRITE=1`` is set.
+
+    Raises:
+        RuntimeError: when the variable is not set to ``1``.
+    """
+    if os.getenv(_ALLOW_REWRITE_ENV) != "1":
+        raise RuntimeError(
+            f"{revision} rewrites the training table under ACCESS EXCLUSIVE; "
+            f"run it in a maintenance window with {_ALLOW_REWRITE_ENV}=1 "
+            "(packages/db/RUNBOOK.md, \"Table rewrites\")"
+        )
+
+def upgrade() -> None:
+    """Add ``weight_c``, make ``reps`` a smallint, re-cover the index."""
+    bind = op.get_bind()
+    if bind.execute(_HAS_WEIGHT_C).first() is None:
+        _require_rewrite_window()
+        fractional = bind.execute(_FRACTIONAL_REPS).scalar()
+        if fractional:
+            raise RuntimeError(
+                f"{fractional} training rows have fractional reps; round or fix them "
+                "(UPDATE training SET reps = round(reps) WHERE reps <> trunc(reps)) "
+                "and re-run the migration"
+            )
+        op.execute(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+        op.execute(f"DROP INDEX IF EXISTS {COVERING_INDEX}")
+        op.execute("""
+            ALTER TABLE training
+                ADD COLUMN weight_c INTEGER GENERATED ALWAYS AS ((weight * 100)::integer) STORED,
+                ALTER COLUMN reps TYPE SMALLINT USING reps::smallint,
+                ADD CONSTRAINT training_reps_range CHECK (reps BETWEEN -999 AND 999)
+        """)
+    _covering_index("weight_c")
+    # Unconditional: bootstrapping from init.sql re-runs 0012, which puts
+    # back the function version that cannot attach a partition here.
+    op.execute(_ENSURE_PARTITIONS)
+
+
+def downgrade() -> None:
+    """Drop ``weight_c``, ``reps`` back to NUMERIC(5,2), restore the 0011 index."""
+    bind = op.get_bind()
+    if bind.execute(_HAS_WEIGHT_C).first() is not None:
+        op.execute(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+        op.execute(f"DROP INDEX IF EXISTS {COVERING_INDEX}")
+        op.execute("""
+            ALTER TABLE training
+                DROP CONSTRAINT IF EXISTS training_reps_range,
+                DROP COLUMN weight_c,
+                ALTER COLUMN reps TYPE NUMERIC(5, 2)
+        """)
+    _covering_index("weight")
@@ -0,0 +1,378 @@
+"""split training_history into yearly partitions, online
+
+Revision ID: 0015_training_history_split
+Revises: 0014_training_fixed_point
+Create Date: 2026-10-19 06:00:00.000000+00:00
+
+0012 attached the whole pre-partitioning heap as ``training_history`` FROM
+(MINVALUE) TO (<cutoff>), <cutoff> being the start of the month after the
+deploy: every existing row, including this year's, sits in that one
+partition, so a recent-window read still scans it and only data written
+after the cutoff prunes.  Postgres 16 cannot split a partition, and
+re-bounding it in place needs a validation scan under ACCESS EXCLUSIVE.
+
+WHAT THIS DOES
+--------------
+Installs the SQL functions that move the history out year by year; the
+``training.partitions.split_history`` job (``app/services/training_partitions.py``)
+runs them.  Afterwards:
+
+    training_history   FROM (MINVALUE) TO (<first year with rows>) — empty
+    training_p<YYYY>   one full year each, from the oldest row on
+
+1. ``training_split_history_prepare()`` — creates ``training_split``, a
+   partitioned shadow of ``training`` (same columns, CHECKs, PK, foreign keys
+   and indexes) with one ``training_split_p<YYYY>`` per year from the oldest
+   history row up to the end of the cutoff's year, and
+   ``training_split_history`` below the oldest year; each carries a CHECK on
+   its bounds.  AFTER row triggers on the sources (``training_history`` and the
+   partial ``training_p<YYYY>`` that starts at the cutoff) mirror every
+   INSERT / UPDATE / DELETE into the shadow from then on.
+2. ``training_split_history_copy(batch)`` — copies the next ``batch`` source
+   rows in (id, date) order (``FOR SHARE``: a concurrent update waits or is
+   read in its new version) and keeps the cursor in
+   ``training_split_progress``; one call per committed batch.
+3. ``training_split_history_swap()`` — one short transaction under
+   ``lock_timeout``, catalog changes only: DETACH and drop the sources,
+   DETACH every shadow year and ATTACH it to ``training`` (its CHECK proves
+   the bound, its indexes and foreign keys are adopted, nothing is scanned
+   but ``training_default``) and drop the ``split_`` from its name.  Refuses
+   to run before the copy has finished.
+
+All three are SECURITY DEFINER (``app_rw`` owns no table) and set
+``app.role`` to admin while they read or write rows: the partitions FORCE
+row level security.  Each step is idempotent, so a failed or killed job is
+simply re-run; nothing is visible to the API before the swap.
+
+Cost: one extra write per row written to the sources while the split runs
+(the mirror), and the history's size again in the shadow until the swap
+drops the old tables.
+
+Run once after deploying:
+
+    python -m app.core.jobs enqueue training.partitions.split_history \\
+        --dedup-key training.partitions.split_history
+
+Mirrored into init.sql (where the history is empty and the job a no-op).
+
+Backward compatibility: same columns, same parent indexes; only partitions
+change.  downgrade() drops the functions and an unfinished shadow; a
+finished split stays (0014's ``training_ensure_partitions`` reads the new
+history bound like the old one).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0015_training_history_split"
+down_revision: Union[str, Sequence[str], None] = "0014_training_fixed_point"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+APP_ROLE = "app_rw"
+
+# Also in packages/db/init.sql — keep both in sync.
+_SPLIT_FUNCTIONS = r"""
+CREATE OR REPLACE FUNCTION public.training_split_mirror()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_role    text := current_setting('app.role', true);
+    v_columns text;
+BEGIN
+    PERFORM set_config('app.role', 'admin', true);
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM public.training_split WHERE id = OLD.id AND date = OLD.date;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        -- Generated columns (weight_c) cannot be inserted.
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+          INTO v_columns
+          FROM pg_attribute
+         WHERE attrelid = 'public.training_split'::regclass
+           AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+        EXECUTE format(
+            'INSERT INTO public.training_split (%1$s) SELECT %1$s FROM (SELECT ($1).*) r'
+            ' ON CONFLICT (id, date) DO NOTHING', v_columns)
+        USING NEW;
+    END IF;
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN NULL;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_mirror() FROM PUBLIC;
+
+CREATE OR REPLACE FUNCTION public.training_split_history_prepare()
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_role       text := current_setting('app.role', true);
+    v_rls        boolean := to_regprocedure('public.enable_user_rls(regclass,text)') IS NOT NULL;
+    v_history_to timestamp;
+    v_first      timestamp;
+    v_end        timestamp;
+    v_from       timestamp;
+    v_name       text;
+    v_def        text;
+    v_sources    text[] := ARRAY['training_history'];
+    v_created    int := 0;
+BEGIN
+    IF to_regclass('public.training_split') IS NOT NULL THEN
+        RETURN (SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'public.training_split'::regclass);
+    END IF;
+    IF to_regclass('public.training_history') IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    PERFORM set_config('app.role', 'admin', true);
+    SELECT date_trunc('year', MIN(date)) INTO v_first FROM public.training_history;
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    IF v_first IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    SELECT substring(pg_get_expr(c.relpartbound, c.oid) FROM $re$TO \('([^']+)'\)$re$)::timestamp
+      INTO v_history_to
+      FROM pg_class c WHERE c.oid = 'public.training_history'::regclass;
+    v_end := date_trunc('year', v_history_to - interval '1 microsecond') + interval '1 year';
+    -- A cutoff inside a year: that year's partition starts at the cutoff
+    -- and is re-created whole.
+    IF v_history_to < v_end AND to_regclass('public.training_p' || to_char(v_history_to, 'YYYY')) IS NOT NULL THEN
+        v_sources := v_sources || ('training_p' || to_char(v_history_to, 'YYYY'));
+    END IF;
+
+    CREATE TABLE public.training_split (LIKE public.training
+        INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) PARTITION BY RANGE (date);
+    ALTER TABLE public.training_split ADD PRIMARY KEY (id, date);
+    FOR v_name, v_def IN
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+         WHERE conrelid = 'public.training'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE public.training_split ADD CONSTRAINT %I %s', v_name, v_def);
+    END LOOP;
+    FOR v_def IN
+        SELECT pg_get_indexdef(indexrelid) FROM pg_index
+         WHERE indrelid = 'public.training'::regclass AND NOT indisprimary
+    LOOP
+        EXECUTE regexp_replace(v_def, '^CREATE (UNIQUE )?INDEX \S+ ON ONLY public\.training ',
+                               'CREATE \1INDEX ON public.training_split ');
+    END LOOP;
+    -- app_rw inherits CRUD on new tables (0002's default privileges).
+    IF v_rls THEN PERFORM public.enable_user_rls('public.training_split', 'user_id'); END IF;
+
+    -- The future training_history: a write dated before the oldest year
+    -- must find a shadow partition too.
+    EXECUTE format(
+        'CREATE TABLE public.training_split_history PARTITION OF public.training_split'
+        ' FOR VALUES FROM (MINVALUE) TO (%L)', v_first);
+    EXECUTE format(
+        'ALTER TABLE public.training_split_history ADD CONSTRAINT training_split_history_bound'
+        ' CHECK (date < %L)', v_first);
+    IF v_rls THEN PERFORM public.enable_user_rls('public.training_split_history', 'user_id'); END IF;
+    v_created := 1;
+
+    v_from := v_first;
+    WHILE v_from < v_end LOOP
+        v_name := 'training_split_p' || to_char(v_from, 'YYYY');
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.training_split FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_from + interval '1 year');
+        -- Proves the bound to the ATTACH in the swap, which then scans nothing.
+        EXECUTE format(
+            'ALTER TABLE public.%I ADD CONSTRAINT %I CHECK (date >= %L AND date < %L)',
+            v_name, v_name || '_bound', v_from, v_from + interval '1 year');
+        IF v_rls THEN PERFORM public.enable_user_rls(format('public.%I', v_name)::regclass, 'user_id'); END IF;
+        v_created := v_created + 1;
+        v_from := v_from + interval '1 year';
+    END LOOP;
+
+    CREATE TABLE public.training_split_progress (
+        source     text PRIMARY KEY,
+        after_id   uuid,
+        after_date timestamp,
+        done       boolean NOT NULL DEFAULT false
+    );
+    -- No policy: app_rw (default privileges) sees no row; the owner does.
+    ALTER TABLE public.training_split_progress ENABLE ROW LEVEL SECURITY;
+
+    FOREACH v_name IN ARRAY v_sources LOOP
+        EXECUTE format(
+            'CREATE TRIGGER training_split_mirror AFTER INSERT OR UPDATE OR DELETE ON public.%I'
+            ' FOR EACH ROW EXECUTE FUNCTION public.training_split_mirror()', v_name);
+        INSERT INTO public.training_split_progress (source) VALUES (v_name);
+    END LOOP;
+    RETURN v_created;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_history_prepare() FROM PUBLIC;
+
+CREATE OR REPLACE FUNCTION public.training_split_history_copy(p_batch int DEFAULT 5000)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_role       text := current_setting('app.role', true);
+    v_source     text;
+    v_after_id   uuid;
+    v_after_date timestamp;
+    v_columns    text;
+    v_copied     int := 0;
+    v_last_id    uuid;
+    v_last_date  timestamp;
+BEGIN
+    IF to_regclass('public.training_split_progress') IS NULL THEN
+        RETURN 0;
+    END IF;
+    PERFORM set_config('app.role', 'admin', true);
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+      INTO v_columns
+      FROM pg_attribute
+     WHERE attrelid = 'public.training_split'::regclass
+       AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    LOOP
+        -- FOR UPDATE: two runs never copy the same batch.
+        SELECT source, after_id, after_date
+          INTO v_source, v_after_id, v_after_date
+          FROM public.training_split_progress
+         WHERE NOT done
+         ORDER BY source
+         LIMIT 1
+           FOR UPDATE;
+        EXIT WHEN NOT FOUND;
+
+        EXECUTE format(
+            'WITH batch AS (SELECT %1$s FROM public.%2$I WHERE %3$s ORDER BY id, date LIMIT %4$s FOR SHARE),'
+            ' copied AS (INSERT INTO public.training_split (%1$s) SELECT %1$s FROM batch'
+            ' ON CONFLICT (id, date) DO NOTHING)'
+            ' SELECT (SELECT COUNT(*) FROM batch)::int, b.id, b.date'
+            ' FROM batch b ORDER BY b.id DESC, b.date DESC LIMIT 1',
+            v_columns, v_source,
+            CASE WHEN v_after_id IS NULL THEN 'true' ELSE '(id, date) > ($1, $2)' END,
+            p_batch)
+        INTO v_copied, v_last_id, v_last_date
+        USING v_after_id, v_after_date;
+        v_copied := COALESCE(v_copied, 0);
+
+        UPDATE public.training_split_progress
+           SET after_id   = COALESCE(v_last_id, after_id),
+               after_date = COALESCE(v_last_date, after_date),
+               done       = v_copied < p_batch
+         WHERE source = v_source;
+        EXIT WHEN v_copied > 0;
+    END LOOP;
+
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN v_copied;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_history_copy(int) FROM PUBLIC;
+
+CREATE OR REPLACE FUNCTION public.training_split_history_swap()
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_source   text;
+    v_part     record;
+    v_index    text;
+    v_attached int := 0;
+BEGIN
+    IF to_regclass('public.training_split') IS NULL THEN
+        RETURN 0;
+    END IF;
+    IF EXISTS (SELECT 1 FROM public.training_split_progress WHERE NOT done) THEN
+        RAISE EXCEPTION 'training_split_history_swap: the copy has not finished'
+            USING HINT = 'Run training_split_history_copy() until it returns 0.';
+    END IF;
+
+    PERFORM set_config('lock_timeout', '5s', true);
+    LOCK TABLE public.training IN ACCESS EXCLUSIVE MODE;
+
+    FOR v_source IN SELECT source FROM public.training_split_progress LOOP
+        EXECUTE format('ALTER TABLE public.training DETACH PARTITION public.%I', v_source);
+        EXECUTE format('DROP TABLE public.%I', v_source);
+    END LOOP;
+
+    FOR v_part IN
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+          FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = 'public.training_split'::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE public.training_split DETACH PARTITION public.%I', v_part.relname);
+        EXECUTE format('ALTER TABLE public.training ATTACH PARTITION public.%I %s', v_part.relname, v_part.bound);
+        EXECUTE format('ALTER TABLE public.%I DROP CONSTRAINT %I', v_part.relname, v_part.relname || '_bound');
+        FOR v_index IN
+            SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE i.indrelid = format('public.%I', v_part.relname)::regclass
+        LOOP
+            EXECUTE format('ALTER INDEX public.%I RENAME TO %I',
+                           v_index, replace(v_index, 'training_split_', 'training_'));
+        END LOOP;
+        EXECUTE format('ALTER TABLE public.%I RENAME TO %I',
+                       v_part.relname, replace(v_part.relname, 'training_split_', 'training_'));
+        v_attached := v_attached + 1;
+    END LOOP;
+
+    DROP TABLE public.training_split;
+    DROP TABLE public.training_split_progress;
+    RETURN v_attached;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_history_swap() FROM PUBLIC;
+"""
+
+# Conditional like 0002_rls: skipped on a dev DB without the app role.
+_GRANT_SPLIT = f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = '{APP_ROLE}') THEN
+        GRANT EXECUTE ON FUNCTION public.training_split_history_prepare() TO {APP_ROLE};
+        GRANT EXECUTE ON FUNCTION public.training_split_history_copy(int) TO {APP_ROLE};
+        GRANT EXECUTE ON FUNCTION public.training_split_history_swap() TO {APP_ROLE};
+    END IF;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Install the split functions (the job runs them)."""
+    op.execute(_SPLIT_FUNCTIONS)
+    op.execute(_GRANT_SPLIT)
+
+
+def downgrade() -> None:
+    """Drop the functions and an unfinished shadow; a finished split stays."""
+    op.execute("""
+        DO $$
+        DECLARE
+            v_source text;
+        BEGIN
+            IF to_regclass('public.training_split_progress') IS NOT NULL THEN
+                FOR v_source IN SELECT source FROM public.training_split_progress LOOP
+                    EXECUTE format('DROP TRIGGER IF EXISTS training_split_mirror ON public.%I', v_source);
+                END LOOP;
+            END IF;
+        END
+        $$
+    """)
+    op.execute("DROP TABLE IF EXISTS public.training_split_progress")
+    op.execute("DROP TABLE IF EXISTS public.training_split")
+    op.execute("DROP FUNCTION IF EXISTS public.training_split_history_swap()")
+    op.execute("DROP FUNCTION IF EXISTS public.training_split_history_copy(int)")
+    op.execute("DROP FUNCTION IF EXISTS public.training_split_history_prepare()")
+    op.execute("DROP FUNCTION IF EXISTS public.training_split_mirror()")
@@ -7,7 +7,13 @@ CREATE TABLE IF NOT EXISTS users (
     phone VARCHAR(20),
     country VARCHAR(255),
     username VARCHAR(255),
-    bio TEXT
+    bio TEXT,
+    -- IANA zone the user's local calendar days follow (NULL = UTC), and the
+    -- zone every training.local_date of theirs currently reflects (set by the
+    -- backfill job only). Mirrors
+    -- packages/db/alembic/versions/0010_training_local_date.py.
+    timezone TEXT,
+    local_date_tz TEXT
 );
 
 -- Canonical name-normalization function (GYM-84). SINGLE SOURCE OF TRUTH for
@@ -122,19 +128,406 @@ CREATE TABLE IF NOT EXISTS exercise_alias (
 -- alias-based resolution: name_key -> canonical (GYM-87)
 CREATE INDEX IF NOT EXISTS idx_exercise_alias_name_key ON exercise_alias (name_key);
 
+-- RANGE-partitioned on date (0012_training_partitioning): training_history
+-- (everything before the first yearly partition), one training_p<YYYY> per
+-- year, training_default for the rest; created by training_ensure_partitions()
+-- below. The primary key must contain the partition key.
 CREATE TABLE IF NOT EXISTS training (
-    id VARCHAR(32) PRIMARY KEY,
+    -- UUIDv7 assigned by the API, exposed as its 32-char hex form
+    -- (0013_training_uuid_id).
+    id UUID NOT NULL,
     date TIMESTAMP NOT NULL,
     user_id BIGINT REFERENCES users(id),
     muscle_id INT REFERENCES muscles(id),
     exercise_id INT REFERENCES exercises(id),
     set INT,
     weight DECIMAL(5, 2),
-    reps DECIMAL(5, 2)
-);
+    reps SMALLINT,
+    -- date as a calendar day in the owner's users.timezone; maintained by the
+    -- training_local_date trigger below (0010_training_local_date).
+    local_date DATE,
+    -- weight in hundredths of a kg: the aggregates run in integer arithmetic
+    -- (0014_training_fixed_point).
+    weight_c INTEGER GENERATED ALWAYS AS ((weight * 100)::integer) STORED,
+    PRIMARY KEY (id, date),
+    CONSTRAINT training_reps_range CHECK (reps BETWEEN -999 AND 999)
+) PARTITION BY RANGE (date);
+
+CREATE OR REPLACE FUNCTION public.training_local_date()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $func$
+BEGIN
+    NEW.local_date := (NEW.date AT TIME ZONE 'UTC' AT TIME ZONE COALESCE(
+        (SELECT u.timezone FROM users u WHERE u.id = NEW.user_id), 'UTC'))::date;
+    RETURN NEW;
+END;
+$func$;
+
+DROP TRIGGER IF EXISTS training_local_date ON training;
+CREATE TRIGGER training_local_date
+    BEFORE INSERT OR UPDATE OF date, user_id ON training
+    FOR EACH ROW EXECUTE FUNCTION public.training_local_date();
 
 -- Hot-path indexes (GYM-4): every analytics query filters user_id and joins/sorts on
 -- date/exercise; without these the training table is sequentially scanned each request.
 CREATE INDEX IF NOT EXISTS idx_training_user_date ON training (user_id, date);
 CREATE INDEX IF NOT EXISTS idx_training_exercise_id ON training (exercise_id);
-CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+-- Local-day grouping (streak weeks) by the materialized column (0010).
+CREATE INDEX IF NOT EXISTS idx_training_user_local_date ON training (user_id, local_date);
+-- Covering per-exercise reads: recent-exercises / last-session / completed-sets
+-- in date order, personal record in weight order (0011_training_covering_indexes,
+-- 0014_training_fixed_point).
+CREATE INDEX IF NOT EXISTS idx_training_user_exercise_date ON training (user_id, exercise_id, date DESC) INCLUDE (muscle_id, "set", weight_c, reps);
+CREATE INDEX IF NOT EXISTS idx_training_user_exercise_pr ON training (user_id, exercise_id, weight DESC, reps DESC, date DESC);
+
+-- Creates training_history / training_default and the current + next year's
+-- partitions (the indexes and trigger above are cloned onto each), and is
+-- re-run daily by the training.partitions.ensure job. SECURITY DEFINER so
+-- the app role can call it. Mirrors
+-- packages/db/alembic/versions/0014_training_fixed_point.py (first version in
+-- 0012_training_partitioning.py).
+CREATE OR REPLACE FUNCTION public.training_ensure_partitions(p_years_ahead int DEFAULT 1)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_year_start timestamp := date_trunc('year', now() AT TIME ZONE 'UTC');
+    v_history_to timestamp;
+    v_from       timestamp;
+    v_to         timestamp;
+    v_name       text;
+    v_role       text := current_setting('app.role', true);
+    v_rls        boolean := to_regprocedure('public.enable_user_rls(regclass,text)') IS NOT NULL;
+    v_created    int := 0;
+    v_columns    text;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.training'::regclass) <> 'p' THEN
+        RETURN 0;
+    END IF;
+    -- FORCE ROW LEVEL SECURITY applies to the owner too: moving rows out of
+    -- the default partition must see every user's rows.
+    PERFORM set_config('app.role', 'admin', true);
+
+    IF to_regclass('public.training_history') IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.training_history PARTITION OF public.training'
+            ' FOR VALUES FROM (MINVALUE) TO (%L)', v_year_start);
+        IF v_rls THEN PERFORM public.enable_user_rls('public.training_history', 'user_id'); END IF;
+        v_created := v_created + 1;
+    END IF;
+    IF to_regclass('public.training_default') IS NULL THEN
+        CREATE TABLE public.training_default PARTITION OF public.training DEFAULT;
+        IF v_rls THEN PERFORM public.enable_user_rls('public.training_default', 'user_id'); END IF;
+        v_created := v_created + 1;
+    END IF;
+
+    SELECT substring(pg_get_expr(c.relpartbound, c.oid) FROM $re$TO \('([^']+)'\)$re$)::timestamp
+      INTO v_history_to
+      FROM pg_class c WHERE c.oid = 'public.training_history'::regclass;
+
+    -- Generated columns (weight_c) cannot be inserted: move the stored ones.
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+      INTO v_columns
+      FROM pg_attribute
+     WHERE attrelid = 'public.training'::regclass
+       AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    FOR i IN 0..p_years_ahead LOOP
+        v_from := v_year_start + make_interval(years => i);
+        v_to   := v_from + interval '1 year';
+        v_name := 'training_p' || to_char(v_from, 'YYYY');
+        CONTINUE WHEN v_to <= v_history_to OR to_regclass('public.' || v_name) IS NOT NULL;
+        -- The first year after the cutoff of an attached heap is partial.
+        v_from := GREATEST(v_from, v_history_to);
+
+        -- Rows already routed to the default partition for this range move
+        -- into the new table before it is attached.
+        EXECUTE format(
+            'CREATE TABLE public.%I (LIKE public.training'
+            ' INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM public.training_default'
+            ' WHERE date >= %L AND date < %L RETURNING %s)'
+            ' INSERT INTO public.%I (%s) SELECT * FROM moved',
+            v_from, v_to, v_columns, v_name, v_columns);
+        EXECUTE format(
+            'ALTER TABLE public.training ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_to);
+        IF v_rls THEN PERFORM public.enable_user_rls(format('public.%I', v_name)::regclass, 'user_id'); END IF;
+        v_created := v_created + 1;
+    END LOOP;
+
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN v_created;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_ensure_partitions(int) FROM PUBLIC;
+SELECT public.training_ensure_partitions();
+
+-- Splits training_history into yearly partitions: a partitioned shadow filled
+-- by a batched copy plus mirror triggers, then swapped in under a short lock
+-- (run by the training.partitions.split_history job; a no-op here, where the
+-- history is empty). Mirrors
+-- packages/db/alembic/versions/0015_training_history_split.py.
+CREATE OR REPLACE FUNCTION public.training_split_mirror()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_role    text := current_setting('app.role', true);
+    v_columns text;
+BEGIN
+    PERFORM set_config('app.role', 'admin', true);
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM public.training_split WHERE id = OLD.id AND date = OLD.date;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        -- Generated columns (weight_c) cannot be inserted.
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+          INTO v_columns
+          FROM pg_attribute
+         WHERE attrelid = 'public.training_split'::regclass
+           AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+        EXECUTE format(
+            'INSERT INTO public.training_split (%1$s) SELECT %1$s FROM (SELECT ($1).*) r'
+            ' ON CONFLICT (id, date) DO NOTHING', v_columns)
+        USING NEW;
+    END IF;
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN NULL;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_mirror() FROM PUBLIC;
+
+CREATE OR REPLACE FUNCTION public.training_split_history_prepare()
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_role       text := current_setting('app.role', true);
+    v_rls        boolean := to_regprocedure('public.enable_user_rls(regclass,text)') IS NOT NULL;
+    v_history_to timestamp;
+    v_first      timestamp;
+    v_end        timestamp;
+    v_from       timestamp;
+    v_name       text;
+    v_def        text;
+    v_sources    text[] := ARRAY['training_history'];
+    v_created    int := 0;
+BEGIN
+    IF to_regclass('public.training_split') IS NOT NULL THEN
+        RETURN (SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'public.training_split'::regclass);
+    END IF;
+    IF to_regclass('public.training_history') IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    PERFORM set_config('app.role', 'admin', true);
+    SELECT date_trunc('year', MIN(date)) INTO v_first FROM public.training_history;
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    IF v_first IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    SELECT substring(pg_get_expr(c.relpartbound, c.oid) FROM $re$TO \('([^']+)'\)$re$)::timestamp
+      INTO v_history_to
+      FROM pg_class c WHERE c.oid = 'public.training_history'::regclass;
+    v_end := date_trunc('year', v_history_to - interval '1 microsecond') + interval '1 year';
+    -- A cutoff inside a year: that year's partition starts at the cutoff
+    -- and is re-created whole.
+    IF v_history_to < v_end AND to_regclass('public.training_p' || to_char(v_history_to, 'YYYY')) IS NOT NULL THEN
+        v_sources := v_sources || ('training_p' || to_char(v_history_to, 'YYYY'));
+    END IF;
+
+    CREATE TABLE public.training_split (LIKE public.training
+        INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) PARTITION BY RANGE (date);
+    ALTER TABLE public.training_split ADD PRIMARY KEY (id, date);
+    FOR v_name, v_def IN
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+         WHERE conrelid = 'public.training'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE public.training_split ADD CONSTRAINT %I %s', v_name, v_def);
+    END LOOP;
+    FOR v_def IN
+        SELECT pg_get_indexdef(indexrelid) FROM pg_index
+         WHERE indrelid = 'public.training'::regclass AND NOT indisprimary
+    LOOP
+        EXECUTE regexp_replace(v_def, '^CREATE (UNIQUE )?INDEX \S+ ON ONLY public\.training ',
+                               'CREATE \1INDEX ON public.training_split ');
+    END LOOP;
+    -- app_rw inherits CRUD on new tables (0002's default privileges).
+    IF v_rls THEN PERFORM public.enable_user_rls('public.training_split', 'user_id'); END IF;
+
+    -- The future training_history: a write dated before the oldest year
+    -- must find a shadow partition too.
+    EXECUTE format(
+        'CREATE TABLE public.training_split_history PARTITION OF public.training_split'
+        ' FOR VALUES FROM (MINVALUE) TO (%L)', v_first);
+    EXECUTE format(
+        'ALTER TABLE public.training_split_history ADD CONSTRAINT training_split_history_bound'
+        ' CHECK (date < %L)', v_first);
+    IF v_rls THEN PERFORM public.enable_user_rls('public.training_split_history', 'user_id'); END IF;
+    v_created := 1;
+
+    v_from := v_first;
+    WHILE v_from < v_end LOOP
+        v_name := 'training_split_p' || to_char(v_from, 'YYYY');
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.training_split FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_from, v_from + interval '1 year');
+        -- Proves the bound to the ATTACH in the swap, which then scans nothing.
+        EXECUTE format(
+            'ALTER TABLE public.%I ADD CONSTRAINT %I CHECK (date >= %L AND date < %L)',
+            v_name, v_name || '_bound', v_from, v_from + interval '1 year');
+        IF v_rls THEN PERFORM public.enable_user_rls(format('public.%I', v_name)::regclass, 'user_id'); END IF;
+        v_created := v_created + 1;
+        v_from := v_from + interval '1 year';
+    END LOOP;
+
+    CREATE TABLE public.training_split_progress (
+        source     text PRIMARY KEY,
+        after_id   uuid,
+        after_date timestamp,
+        done       boolean NOT NULL DEFAULT false
+    );
+    -- No policy: app_rw (default privileges) sees no row; the owner does.
+    ALTER TABLE public.training_split_progress ENABLE ROW LEVEL SECURITY;
+
+    FOREACH v_name IN ARRAY v_sources LOOP
+        EXECUTE format(
+            'CREATE TRIGGER training_split_mirror AFTER INSERT OR UPDATE OR DELETE ON public.%I'
+            ' FOR EACH ROW EXECUTE FUNCTION public.training_split_mirror()', v_name);
+        INSERT INTO public.training_split_progress (source) VALUES (v_name);
+    END LOOP;
+    RETURN v_created;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_history_prepare() FROM PUBLIC;
+
+CREATE OR REPLACE FUNCTION public.training_split_history_copy(p_batch int DEFAULT 5000)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_role       text := current_setting('app.role', true);
+    v_source     text;
+    v_after_id   uuid;
+    v_after_date timestamp;
+    v_columns    text;
+    v_copied     int := 0;
+    v_last_id    uuid;
+    v_last_date  timestamp;
+BEGIN
+    IF to_regclass('public.training_split_progress') IS NULL THEN
+        RETURN 0;
+    END IF;
+    PERFORM set_config('app.role', 'admin', true);
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+      INTO v_columns
+      FROM pg_attribute
+     WHERE attrelid = 'public.training_split'::regclass
+       AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    LOOP
+        -- FOR UPDATE: two runs never copy the same batch.
+        SELECT source, after_id, after_date
+          INTO v_source, v_after_id, v_after_date
+          FROM public.training_split_progress
+         WHERE NOT done
+         ORDER BY source
+         LIMIT 1
+           FOR UPDATE;
+        EXIT WHEN NOT FOUND;
+
+        EXECUTE format(
+            'WITH batch AS (SELECT %1$s FROM public.%2$I WHERE %3$s ORDER BY id, date LIMIT %4$s FOR SHARE),'
+            ' copied AS (INSERT INTO public.training_split (%1$s) SELECT %1$s FROM batch'
+            ' ON CONFLICT (id, date) DO NOTHING)'
+            ' SELECT (SELECT COUNT(*) FROM batch)::int, b.id, b.date'
+            ' FROM batch b ORDER BY b.id DESC, b.date DESC LIMIT 1',
+            v_columns, v_source,
+            CASE WHEN v_after_id IS NULL THEN 'true' ELSE '(id, date) > ($1, $2)' END,
+            p_batch)
+        INTO v_copied, v_last_id, v_last_date
+        USING v_after_id, v_after_date;
+        v_copied := COALESCE(v_copied, 0);
+
+        UPDATE public.training_split_progress
+           SET after_id   = COALESCE(v_last_id, after_id),
+               after_date = COALESCE(v_last_date, after_date),
+               done       = v_copied < p_batch
+         WHERE source = v_source;
+        EXIT WHEN v_copied > 0;
+    END LOOP;
+
+    PERFORM set_config('app.role', COALESCE(v_role, ''), true);
+    RETURN v_copied;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_history_copy(int) FROM PUBLIC;
+
+CREATE OR REPLACE FUNCTION public.training_split_history_swap()
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $func$
+DECLARE
+    v_source   text;
+    v_part     record;
+    v_index    text;
+    v_attached int := 0;
+BEGIN
+    IF to_regclass('public.training_split') IS NULL THEN
+        RETURN 0;
+    END IF;
+    IF EXISTS (SELECT 1 FROM public.training_split_progress WHERE NOT done) THEN
+        RAISE EXCEPTION 'training_split_history_swap: the copy has not finished'
+            USING HINT = 'Run training_split_history_copy() until it returns 0.';
+    END IF;
+
+    PERFORM set_config('lock_timeout', '5s', true);
+    LOCK TABLE public.training IN ACCESS EXCLUSIVE MODE;
+
+    FOR v_source IN SELECT source FROM public.training_split_progress LOOP
+        EXECUTE format('ALTER TABLE public.training DETACH PARTITION public.%I', v_source);
+        EXECUTE format('DROP TABLE public.%I', v_source);
+    END LOOP;
+
+    FOR v_part IN
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+          FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = 'public.training_split'::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE public.training_split DETACH PARTITION public.%I', v_part.relname);
+        EXECUTE format('ALTER TABLE public.training ATTACH PARTITION public.%I %s', v_part.relname, v_part.bound);
+        EXECUTE format('ALTER TABLE public.%I DROP CONSTRAINT %I', v_part.relname, v_part.relname || '_bound');
+        FOR v_index IN
+            SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE i.indrelid = format('public.%I', v_part.relname)::regclass
+        LOOP
+            EXECUTE format('ALTER INDEX public.%I RENAME TO %I',
+                           v_index, replace(v_index, 'training_split_', 'training_'));
+        END LOOP;
+        EXECUTE format('ALTER TABLE public.%I RENAME TO %I',
+                       v_part.relname, replace(v_part.relname, 'training_split_', 'training_'));
+        v_attached := v_attached + 1;
+    END LOOP;
+
+    DROP TABLE public.training_split;
+    DROP TABLE public.training_split_progress;
+    RETURN v_attached;
+END;
+$func$;
+REVOKE ALL ON FUNCTION public.training_split_history_swap() FROM PUBLIC;